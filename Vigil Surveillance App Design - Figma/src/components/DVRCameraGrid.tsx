@@ -3,7 +3,7 @@
 // Add Vite env typing for TypeScript
 /// <reference types="vite/client" />
 
-import { useState } from 'react';
+import { useEffect, useState } from 'react';
 import { motion } from 'motion/react';
 import {
   Camera,
@@ -61,6 +61,22 @@ export function DVRCameraGrid({ role }: DVRCameraGridProps) {
     refreshStatus,
   } = useLiveStatus();
 
+  // Operator focus: the selected/opened camera is analysed more often by the
+  // backend. Focus expires server-side (focus_ttl_s), so renew it while open.
+  const focusedCamera = videoModalCamera?.cameraId ?? selectedCamera;
+  useEffect(() => {
+    if (!focusedCamera) return;
+    const apiUrl = (import.meta.env.VITE_API_URL || '').replace(/\/$/, '');
+    const focusUrl = `${apiUrl}/api/cameras/${focusedCamera}/focus`;
+    const renew = () => fetch(focusUrl, { method: 'POST' }).catch(() => {});
+    renew();
+    const timer = setInterval(renew, 30000);
+    return () => {
+      clearInterval(timer);
+      fetch(focusUrl, { method: 'DELETE' }).catch(() => {});
+    };
+  }, [focusedCamera]);
+
   // Always show all expected cameras, even if backend is down or partial
   const DEFAULT_CAMERAS = [
     'CAM-042', 'CAM-128', 'CAM-089', 'CAM-156', 'CAM-283', 'CAM-074',
@@ -17,6 +17,16 @@ export interface LiveStatusResponse {
   timestamp: string;
 }
 
+// Versioned delta pushed on 'camera_update': only changed fields per camera.
+// Resync replies carry `base`: the seq the merged changes start after.
+export interface CameraDelta {
+  seq: number;
+  base?: number;
+  ts: number;
+  full: boolean;
+  cameras: Record<string, Partial<CameraStatus>>;
+}
+
 
 const API_URL = import.meta.env.VITE_API_URL || '';
 
@@ -27,6 +37,30 @@ export function useLiveStatus() {
   const [lastUpdate, setLastUpdate] = useState<string>(new Date().toISOString());
   const [offlineMode, setOfflineMode] = useState<boolean>(false);
   const intervalRef = useRef<ReturnType<typeof setInterval> | null>(null);
+  const socketRef = useRef<any>(null);
+  const seqRef = useRef<number>(-1);
+  const socketConnectedRef = useRef<boolean>(false);
+
+  // Apply a delta in order; on a gap ask the backend for everything after our seq.
+  // A resync reply covers everything after its base, so it applies whenever base <= our seq.
+  const applyDelta = (delta: CameraDelta) => {
+    if (!delta.full && delta.seq <= seqRef.current) return;
+    const base = delta.base ?? delta.seq - 1;
+    if (!delta.full && seqRef.current >= 0 && base > seqRef.current) {
+      socketRef.current?.emit('camera_resync', { since: seqRef.current });
+      return;
+    }
+    seqRef.current = delta.seq;
+    setCameraStatuses(prev => {
+      const next = delta.full ? new Map<string, CameraStatus>() : new Map(prev);
+      for (const [cameraId, changes] of Object.entries(delta.cameras)) {
+        next.set(cameraId, { ...(next.get(cameraId) || { camera_id: cameraId }), ...changes } as CameraStatus);
+      }
+      return next;
+    });
+    setSystemStatus('operational');
+    setLastUpdate(new Date().toISOString());
+  };
 
   // Fetch live status from backend
   const fetchLiveStatus = async () => {
@@ -37,6 +71,7 @@ export function useLiveStatus() {
       // Accept both {cameras: [...]} and plain array
       const cameras = Array.isArray(data) ? data : data.cameras;
       if (!Array.isArray(cameras)) throw new Error('Invalid cameras data');
+      if (typeof data.seq === 'number') seqRef.current = data.seq;
       // Deep compare to avoid re-renders if data matches
       const newMap = new Map();
       cameras.forEach((camera: CameraStatus) => {
@@ -102,13 +137,35 @@ export function useLiveStatus() {
     if (!isPolling) return;
     fetchLiveStatus();
     fetchOfflineMode();
-    // Poll every 6 seconds (optimized from 3s)
+    // Camera state arrives as deltas over the websocket; resync from our seq on (re)connect
+    let cancelled = false;
+    import('socket.io-client').then(({ io }) => {
+      // The effect was cleaned up while the client was loading: don't leave a socket behind
+      if (cancelled) return;
+      const socket = io(import.meta.env.VITE_API_URL || window.location.origin, {
+        transports: ['websocket'],
+      });
+      socketRef.current = socket;
+      socket.on('connect', () => {
+        socketConnectedRef.current = true;
+        socket.emit('camera_resync', { since: seqRef.current });
+      });
+      socket.on('disconnect', () => {
+        socketConnectedRef.current = false;
+      });
+      socket.on('camera_update', applyDelta);
+    });
+    // Poll every 6 seconds; camera status only while the websocket is down
     intervalRef.current = setInterval(() => {
-      fetchLiveStatus();
+      if (!socketConnectedRef.current) fetchLiveStatus();
       fetchOfflineMode();
     }, 6000);
     return () => {
+      cancelled = true;
       if (intervalRef.current) clearInterval(intervalRef.current);
+      socketRef.current?.disconnect();
+      socketRef.current = null;
+      socketConnectedRef.current = false;
     };
   }, [isPolling]);
 
@@ -1,89 +1,176 @@
-# VIGIL Accident Model - Clean
-# TODO: Implement crash detection
-
-# Placeholder for actual accident detection model integration
+# VIGIL Accident Model - the single crash detection engine
+#
+# Every crash entry point (camera pipeline, backend.ai.crash_detector,
+# incident service) runs through get_accident_model().
 
 
 import time
 from typing import Dict
 
 
-import torch
-import torch.nn.functional as F
-from decord import VideoReader, cpu
-from torchvision.transforms.functional import to_pil_image
-from backend.ai.crash_detector.model_architecture import MobileNetV2_LSTM
-from backend.ai.crash_detector.transforms_setup import get_test_transform
-from backend.ai.crash_detector.sampling import sample_frame_indices
+# torch, decord and the crash_detector package are imported where used, so the
+# onnxruntime backend (INFERENCE_BACKEND) runs crash detection without PyTorch.
+from backend.ai.backends import get_backend, softmax
+from backend.ai.model_registry import get_model_registry
+from backend.ai.preprocessing import IMAGENET_MEAN, IMAGENET_STD, preprocess_clip
 from pathlib import Path
+import threading
+
+CRASH_MODEL_PATH = Path(__file__).parent / "crash_detector" / "mobilenetv2_lstm_finetuned.pt"
+
 
 class AccidentModel:
+    """
+    Crash detection engine (MobileNetV2-LSTM). The process-wide instance
+    (get_accident_model()) serves the camera pipeline, backend.ai.crash_detector
+    and the incident service; the weights come from the model registry, so
+    the process holds one copy however many entry points use it.
+    """
+
     def __init__(self, model_path: str | None = None):
         if model_path is None:
             # Default to the known model path in crash_detector
-            model_path = str(Path(__file__).parent / "crash_detector" / "mobilenetv2_lstm_finetuned.pt")
+            model_path = str(CRASH_MODEL_PATH)
         
         self.model_path = model_path
         self.device = "cpu"  # Force CPU for demo stability
         self.model = None
-        self.test_transform = get_test_transform(224)
+        self.int8_model = None      # QoS ladder variant (loaded on first degraded run)
+        self._int8_failed = False
+        self.test_transforms = {}
+        # Registry name; a non-default weights file is a different model
+        self.registry_name = "crash_lstm" if Path(model_path) == CRASH_MODEL_PATH else f"crash_lstm:{model_path}"
+        self._lock = threading.Lock()
         
-        # Lazy load in predict to avoid startup delay, or load now?
-        # Let's load now for clarity, but inside a try-except block just in case
-        try:
-            self.load_model()
-        except Exception as e:
-            print(f"[ACCIDENT_MODEL] Warning: Model load failed at startup: {e}")
+        # Loaded on first use, or at startup alongside the other models by
+        # backend.ai.preload, instead of serially at import time.
 
     def load_model(self):
+        """Take this engine's reference on the shared torch model (no-op once held)."""
+        with self._lock:
+            if self.model is None:
+                self.model = get_model_registry().acquire(self.registry_name, self._load)
+        return self.model
+
+    def load_int8_model(self):
+        """
+        int8 model for the QoS ladder's quantized rungs: the regular model when
+        QUANTIZATION already quantizes it, float32 if quantization fails.
+        """
+        from backend.ai.quantization import quantization_mode
+
+        if self._int8_failed or quantization_mode("crash_lstm") != "off":
+            return self.load_model()
+        with self._lock:
+            if self.int8_model is None and not self._int8_failed:
+                try:
+                    self.int8_model = get_model_registry().acquire(f"{self.registry_name}_int8", self._load_int8)
+                except Exception as e:
+                    print(f"[ACCIDENT_MODEL] int8 model unavailable, using float32: {e}")
+                    self._int8_failed = True
+        return self.int8_model if self.int8_model is not None else self.load_model()
+
+    def unload(self):
+        """Drop this engine's references; the weights are freed when nobody else holds them."""
+        with self._lock:
+            if self.model is not None:
+                self.model = None
+                get_model_registry().release(self.registry_name, unload=True)
+            if self.int8_model is not None:
+                self.int8_model = None
+                get_model_registry().release(f"{self.registry_name}_int8", unload=True)
+
+    def _load(self):
+        from backend.ai.export import load_optimized
+        from backend.ai.quantization import load_quantized
+
         print(f"[ACCIDENT_MODEL] Loading model from {self.model_path}")
-        self.model = MobileNetV2_LSTM()
-        state = torch.load(self.model_path, map_location=self.device)
-        self.model.load_state_dict(state)
-        self.model.to(self.device)
-        self.model.eval()
+        # INT8 when selected in QUANTIZATION, else the frozen TorchScript export, else eager
+        model = load_quantized("crash_lstm", self.model_path, self._load_eager, self.device)
+        if model is None:
+            model = load_optimized("crash_lstm", self.model_path, self.device)
+        model = model if model is not None else self._load_eager()
         print("[ACCIDENT_MODEL] Model loaded successfully.")
+        return model
+
+    def _load_int8(self):
+        from backend.ai.quantization import load_quantized
+        from backend.config import QOS
+
+        # Dynamic int8 only touches the LSTM/classifier: no relief for the QoS ladder
+        model = load_quantized("crash_lstm", self.model_path, self._load_eager, self.device,
+                               mode=QOS.get("quantized_mode", "static"), dynamic_fallback=False)
+        if model is None:
+            raise RuntimeError("quantization failed")
+        return model
+
+    def _load_eager(self):
+        from backend.ai.crash_detector.model_architecture import load_for_inference
+
+        return load_for_inference(self.model_path, self.device)
+
+    def predict_video(self, video_path: str, num_frames: int = 16, img_size: int = 224) -> float:
+        """
+        Accident probability (0.0 - 1.0) for a clip decoded with decord and the
+        training transforms (PIL resize). Raises on decode/inference errors.
+        """
+        import torch
+        from decord import VideoReader, cpu
+        from torchvision.transforms.functional import to_pil_image
+        from backend.ai.crash_detector.sampling import sample_frame_indices
+        from backend.ai.crash_detector.transforms_setup import get_test_transform
+
+        transform = self.test_transforms.get(img_size)
+        if transform is None:
+            transform = self.test_transforms[img_size] = get_test_transform(img_size)
+
+        vr = VideoReader(video_path, ctx=cpu(0))
+        idxs = sample_frame_indices(len(vr), num_frames)
+        frames_np = vr.get_batch(idxs).asnumpy()
+        frame_tensors = [transform(to_pil_image(img)) for img in frames_np]
+
+        # (1, T, C, H, W); concurrent clips stack into (B, T, C, H, W) when batching is on
+        inputs = torch.stack(frame_tensors, dim=0).unsqueeze(0).numpy()
+        out = self.backend(input_shape=inputs.shape).run(inputs)
+        # Index 1 is accident, Index 0 is normal
+        return float(softmax(out, axis=1)[0, 1])
 
     def predict(self, video_path: str) -> float:
         """
-        Returns a probability (0.0 - 1.0) of accident in the video.
+        Returns a probability (0.0 - 1.0) of accident in the video (0.0 on error).
         """
-        if self.model is None:
-            self.load_model()
-            
         try:
-            # Video loading logic
-            vr = VideoReader(video_path, ctx=cpu(0))
-            total = len(vr)
-            
-            # Sample 16 frames
-            idxs = sample_frame_indices(total, 16)
-            frames_np = vr.get_batch(idxs).asnumpy()
-            
-            frame_tensors = []
-            for img in frames_np:
-                pil_img = to_pil_image(img)
-                frame_tensors.append(self.test_transform(pil_img))
-            
-            # Stack and infer
-            video_tensor = torch.stack(frame_tensors, dim=0).unsqueeze(0).to(self.device)
-            
-            with torch.no_grad():
-                out = self.model(video_tensor)
-                probs = F.softmax(out, dim=1)[0].cpu().numpy()
-            
-            # Index 1 is accident, Index 0 is normal
-            accident_prob = float(probs[1])
-            return accident_prob
-            
+            return self.predict_video(video_path)
         except Exception as e:
             print(f"[ACCIDENT_MODEL] Inference error on {video_path}: {e}")
             return 0.0
 
+    def predict_frames(self, frames, img_size: int = 224, quantized: bool = False) -> float:
+        """
+        Returns a probability (0.0 - 1.0) of accident for already-decoded frames.
+        frames: (T, H, W, 3) uint8 RGB, e.g. FrameBundle.resized(224, cv2.INTER_AREA).
+        img_size / quantized are lowered by the QoS ladder under overload.
+        """
+        inputs = preprocess_clip(frames, img_size, IMAGENET_MEAN, IMAGENET_STD, layout="NCHW")[None]  # (1, T, C, H, W)
+        out = self.backend(quantized, inputs.shape).run(inputs)
+        return float(softmax(out, axis=1)[0, 1])
+
+    def backend(self, quantized: bool = False, input_shape=None):
+        """Configured execution backend (torch or onnxruntime) for the crash model."""
+        if quantized:
+            return get_backend("crash_lstm", self.load_int8_model, weights_path=self.model_path,
+                               batch_name="crash_lstm_int8", input_shape=input_shape)
+        return get_backend("crash_lstm", self.load_model, weights_path=self.model_path, batch_name="crash_lstm",
+                           input_shape=input_shape)
+
 # Singleton instance
 _accident_model = AccidentModel()
 
 
+def get_accident_model() -> AccidentModel:
+    return _accident_model
+
+
 def detect_crash(video_path: str) -> Dict:
     """
     Run accident detection on the given video and return result dict.
@@ -98,3 +185,36 @@ def detect_crash(video_path: str) -> Dict:
         "latency_ms": latency_ms,
         "timestamp": time.time()
     }
+
+
+def detect_crash_frames(bundle, img_size: int = 224, quantized: bool = False) -> Dict:
+    """
+    Run accident detection on a shared FrameBundle (decoded once per clip).
+    Same return value as detect_crash(); img_size / quantized come from the QoS ladder.
+    On failure returns "event": "error" with the error, which the result
+    cache never stores (a failure must not read as "no crash").
+    """
+    import cv2
+
+    start = time.time()
+    try:
+        # INTER_AREA approximates the antialiased PIL resize used in training
+        confidence = _accident_model.predict_frames(bundle.resized(img_size, cv2.INTER_AREA), img_size, quantized)
+    except Exception as e:
+        print(f"[ACCIDENT_MODEL] Inference error on {bundle.video_path}: {e}")
+        return {
+            "event": "error",
+            "confidence": 0.0,
+            "model": "mobilenetv2_lstm",
+            "latency_ms": int((time.time() - start) * 1000),
+            "timestamp": time.time(),
+            "error": str(e)
+        }
+    latency_ms = int((time.time() - start) * 1000)
+    return {
+        "event": "car_crash",
+        "confidence": confidence,
+        "model": "mobilenetv2_lstm",
+        "latency_ms": latency_ms,
+        "timestamp": time.time()
+    }
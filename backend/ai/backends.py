@@ -0,0 +1,202 @@
+"""
+Inference Execution Backends
+
+Detectors run their models through a ModelBackend instead of calling torch
+directly, so the same detector code can execute on either:
+
+- "torch": PyTorch (eager, frozen TorchScript or int8, see export.py and
+  quantization.py), batched across cameras by backend/ai/batching.py
+- "onnxruntime": ONNX Runtime CPU execution provider, running models
+  exported with `python -m backend.ai.onnx_export`
+
+Backends take and return float32 numpy arrays. Selection is per model in
+backend.config.INFERENCE_BACKEND; a model without an ONNX export falls back
+to torch. This module and the onnxruntime path never import torch, so an
+inference worker configured for onnxruntime starts without loading PyTorch.
+"""
+
+import json
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from backend.ai.model_registry import get_model_registry
+from backend.ai.result_cache import model_version
+from backend.config import INFERENCE_BACKEND
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+ONNX_DIR = PROJECT_ROOT / INFERENCE_BACKEND.get("onnx_dir", "backend/models/onnx")
+ONNX_MANIFEST_PATH = ONNX_DIR / "manifest.json"
+
+
+def backend_name(model: str) -> str:
+    """Configured backend for a model: "torch" or "onnxruntime"."""
+    return INFERENCE_BACKEND.get("models", {}).get(model) or INFERENCE_BACKEND.get("default", "torch")
+
+
+def softmax(x: np.ndarray, axis: int = -1) -> np.ndarray:
+    """Numerically stable softmax over numpy logits."""
+    e = np.exp(x - x.max(axis=axis, keepdims=True))
+    return e / e.sum(axis=axis, keepdims=True)
+
+
+class ModelBackend:
+    """One model on one runtime: float32 numpy in, float32 numpy out."""
+
+    name = ""
+
+    def run(self, inputs: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+
+class TorchBackend(ModelBackend):
+    """PyTorch module, forward passes shared across cameras via the batching engine."""
+
+    name = "torch"
+
+    def __init__(self, model, batch_name: str):
+        self.model = model
+        self.batch_name = batch_name
+
+    def run(self, inputs: np.ndarray) -> np.ndarray:
+        import torch
+        from backend.ai.batching import run_batched
+
+        outputs = run_batched(self.batch_name, self.model, torch.from_numpy(inputs))
+        return outputs.detach().cpu().numpy()
+
+
+class OnnxRuntimeBackend(ModelBackend):
+    """ONNX Runtime session on the CPU execution provider (thread-safe run())."""
+
+    name = "onnxruntime"
+
+    def __init__(self, path):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = INFERENCE_BACKEND.get("intra_op_threads", 1)
+        options.inter_op_num_threads = INFERENCE_BACKEND.get("inter_op_threads", 1)
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.path = Path(path)
+        self.session = ort.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.input_shape = self.session.get_inputs()[0].shape  # ints for fixed axes, names for dynamic
+
+    def accepts(self, shape) -> bool:
+        """Whether the exported graph takes inputs of `shape` (fixed axes must match)."""
+        return len(shape) == len(self.input_shape) and all(
+            not isinstance(fixed, int) or fixed == dim for fixed, dim in zip(self.input_shape, shape))
+
+    def run(self, inputs: np.ndarray) -> np.ndarray:
+        feed = {self.input_name: np.ascontiguousarray(inputs, dtype=np.float32)}
+        return self.session.run(None, feed)[0]
+
+
+# ============================================================================
+# ONNX ARTIFACTS
+# ============================================================================
+
+def read_onnx_manifest() -> Dict:
+    try:
+        with open(ONNX_MANIFEST_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def onnx_model_path(model: str, weights_path=None, quiet: bool = False) -> Optional[Path]:
+    """
+    Exported ONNX file for `model`, or None if missing, stale or failed parity.
+
+    When the source weights file is present it must match the version the
+    export was built from; ONNX-only deployments without the torch weights
+    use the export as is.
+    """
+    entry = read_onnx_manifest().get(model)
+    if not entry:
+        return None
+    if not entry.get("parity_ok", False):
+        if not quiet:
+            print(f"[BACKEND] {model}: ONNX export failed its parity check")
+        return None
+    path = ONNX_DIR / entry["artifact"]
+    if not path.exists():
+        return None
+    if weights_path is not None and Path(weights_path).exists() and \
+            entry.get("weights_version") != model_version(str(weights_path)):
+        if not quiet:
+            print(f"[BACKEND] {model}: ONNX export is stale (re-run python -m backend.ai.onnx_export)")
+        return None
+    return path
+
+
+_sessions: Dict[str, Optional[OnnxRuntimeBackend]] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_onnx_backend(model: str, weights_path=None) -> Optional[OnnxRuntimeBackend]:
+    """Shared ONNX Runtime session for a model; None (cached) when unavailable."""
+    if model in _sessions:
+        return _sessions[model]
+    with _sessions_lock:
+        if model not in _sessions:
+            session = None
+            path = onnx_model_path(model, weights_path)
+            if path is None:
+                print(f"[BACKEND] {model}: no usable ONNX export, using torch")
+            else:
+                try:
+                    session = get_model_registry().acquire(f"{model}:onnxruntime", lambda: OnnxRuntimeBackend(path))
+                    print(f"[BACKEND] {model}: ONNX Runtime session loaded from {path.name}")
+                except Exception as e:
+                    print(f"[BACKEND] {model}: ONNX Runtime unavailable, using torch: {e}")
+            _sessions[model] = session
+    return _sessions[model]
+
+
+def active_backend(model: str, weights_path=None) -> str:
+    """
+    Backend `model` actually runs on: "onnxruntime" only when configured and
+    a usable export exists, else "torch". Does not load a session.
+    """
+    if backend_name(model) != "onnxruntime":
+        return "torch"
+    if model in _sessions:
+        return "torch" if _sessions[model] is None else "onnxruntime"
+    return "torch" if onnx_model_path(model, weights_path, quiet=True) is None else "onnxruntime"
+
+
+_shape_fallbacks = set()
+
+
+def get_backend(model: str, torch_loader: Callable, weights_path=None, batch_name: Optional[str] = None,
+                input_shape=None) -> ModelBackend:
+    """
+    Backend to run `model` on, per INFERENCE_BACKEND.
+
+    Args:
+        model: "mobilenet", "x3d" or "crash_lstm"
+        torch_loader: Returns the (cached) torch module; only called for torch
+        weights_path: Torch weights the ONNX export must match (staleness check)
+        batch_name: Batching engine name for the torch backend (defaults to model)
+        input_shape: Shape about to be run; an export with fixed axes that
+            do not match (exported before frames/size were dynamic) falls
+            back to torch for that call
+
+    Returns:
+        ModelBackend
+    """
+    if backend_name(model) == "onnxruntime":
+        session = get_onnx_backend(model, weights_path)
+        if session is not None:
+            if input_shape is None or session.accepts(input_shape):
+                return session
+            if (model, tuple(input_shape)) not in _shape_fallbacks:
+                _shape_fallbacks.add((model, tuple(input_shape)))
+                print(f"[BACKEND] {model}: ONNX export takes {session.input_shape}, running "
+                      f"{list(input_shape)} on torch (re-run python -m backend.ai.onnx_export)")
+    return TorchBackend(torch_loader(), batch_name or model)
@@ -0,0 +1,215 @@
+"""
+Dynamic Batching Inference Engine
+
+Collects clip requests from all camera threads into one queue per model and
+runs a single forward pass over as many as fit under `max_batch_size`,
+waiting at most `max_wait_ms` for the batch to fill. Callers get their slice
+of the output back through a Future.
+
+Every request tensor carries a leading batch dimension:
+- MobileNet clip classifier: (T, 3, H, W) frames -> requests are concatenated
+  into one (sum T, 3, H, W) frame batch and the logits split back per clip
+- MobileNetV2_LSTM: (1, T, 3, H, W) -> requests stack into (B, T, 3, H, W)
+
+Only requests with identical trailing shapes are batched together; others
+wait for the next batch.
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Dict
+
+
+_STOP = object()
+
+
+class _Request:
+    __slots__ = ("inputs", "future", "enqueued_at")
+
+    def __init__(self, inputs):
+        self.inputs = inputs
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class BatchingEngine:
+    """Queue + worker thread that batches forward passes for one model."""
+
+    def __init__(self, name: str, forward: Callable, max_batch_size: int = 8, max_wait_ms: float = 10):
+        self.name = name
+        self.forward = forward
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queue: "queue.Queue[_Request]" = queue.Queue()
+        self._carry: deque = deque()  # shape-mismatched requests held for the next batch (worker-only)
+        self._running = True
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=256)  # (batch_size, wait_ms, latency_ms)
+        self._totals = {"batches": 0, "requests": 0, "errors": 0}
+        self._thread = threading.Thread(target=self._loop, daemon=True, name=f"Batcher-{name}")
+        self._thread.start()
+
+    def submit(self, inputs) -> Future:
+        """Queue one request; the Future resolves to this request's output slice."""
+        if not self._running:
+            raise RuntimeError(f"Batching engine '{self.name}' is stopped")
+        request = _Request(inputs)
+        self._queue.put(request)
+        return request.future
+
+    def infer(self, inputs):
+        """Blocking convenience wrapper around submit()."""
+        return self.submit(inputs).result()
+
+    def stop(self):
+        self._running = False
+        self._queue.put(_STOP)
+        self._thread.join(timeout=2)
+
+    def _collect(self):
+        first = self._carry.popleft() if self._carry else self._queue.get()
+        if first is _STOP:
+            self._running = False
+            return []
+        batch = [first]
+        shape = tuple(first.inputs.shape[1:])
+
+        # Requests held back from an earlier batch go first
+        for request in list(self._carry):
+            if len(batch) >= self.max_batch_size:
+                break
+            if tuple(request.inputs.shape[1:]) == shape:
+                self._carry.remove(request)
+                batch.append(request)
+
+        deadline = first.enqueued_at + self.max_wait_ms / 1000.0
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                # Past the deadline: still take whatever is already queued
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is _STOP:
+                self._running = False
+                break
+            if tuple(request.inputs.shape[1:]) == shape:
+                batch.append(request)
+            else:
+                self._carry.append(request)
+        return batch
+
+    def _loop(self):
+        import torch
+
+        while self._running or self._carry:
+            batch = self._collect()
+            if not batch:
+                continue
+            started = time.perf_counter()
+            sizes = [r.inputs.shape[0] for r in batch]
+            try:
+                with torch.no_grad():
+                    inputs = batch[0].inputs if len(batch) == 1 else torch.cat([r.inputs for r in batch], dim=0)
+                    outputs = self.forward(inputs)
+                for request, out in zip(batch, torch.split(outputs, sizes, dim=0)):
+                    request.future.set_result(out)
+                error = False
+            except Exception as e:
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+                error = True
+            finished = time.perf_counter()
+            wait_ms = (started - min(r.enqueued_at for r in batch)) * 1000
+            with self._lock:
+                self._recent.append((len(batch), wait_ms, (finished - started) * 1000))
+                self._totals["batches"] += 1
+                self._totals["requests"] += len(batch)
+                self._totals["errors"] += int(error)
+
+        # Fail anything submitted after stop() so callers don't hang
+        while True:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is not _STOP:
+                request.future.set_exception(RuntimeError(f"Batching engine '{self.name}' stopped"))
+
+    def metrics(self) -> dict:
+        """Batch size, queue wait and per-batch latency over recent batches."""
+        with self._lock:
+            recent = list(self._recent)
+            totals = dict(self._totals)
+        if recent:
+            sizes, waits, latencies = zip(*recent)
+            latencies_sorted = sorted(latencies)
+            totals.update({
+                "avg_batch_size": round(sum(sizes) / len(sizes), 2),
+                "max_batch_size_seen": max(sizes),
+                "avg_wait_ms": round(sum(waits) / len(waits), 2),
+                "avg_batch_latency_ms": round(sum(latencies) / len(latencies), 2),
+                "p95_batch_latency_ms": round(latencies_sorted[int(0.95 * (len(latencies_sorted) - 1))], 2),
+            })
+        totals.update({
+            "queue_depth": self._queue.qsize() + len(self._carry),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+        })
+        return totals
+
+
+# Process-wide engines, one per model
+_engines: Dict[str, BatchingEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(name: str, forward: Callable) -> BatchingEngine:
+    """Get or create the batching engine for a model (configured from backend.config.BATCHING)."""
+    engine = _engines.get(name)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(name)
+            if engine is None:
+                from backend.config import BATCHING
+                engine = BatchingEngine(
+                    name,
+                    forward,
+                    max_batch_size=BATCHING.get("max_batch_size", 8),
+                    max_wait_ms=BATCHING.get("max_wait_ms", 10),
+                )
+                _engines[name] = engine
+    return engine
+
+
+def run_batched(name: str, model, inputs):
+    """
+    Forward `inputs` through `model`, batched with concurrent requests when
+    BATCHING is enabled; otherwise a plain no_grad forward pass.
+    """
+    from backend.config import BATCHING
+
+    if not BATCHING.get("enabled", False):
+        import torch
+        with torch.no_grad():
+            return model(inputs)
+    return get_engine(name, model).infer(inputs)
+
+
+def batching_metrics() -> dict:
+    """Metrics for every active engine, keyed by engine name."""
+    with _engines_lock:
+        engines = list(_engines.values())
+    return {engine.name: engine.metrics() for engine in engines}
+
+
+def stop_engines():
+    with _engines_lock:
+        engines = list(_engines.values())
+        _engines.clear()
+    for engine in engines:
+        engine.stop()
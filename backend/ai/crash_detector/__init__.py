@@ -2,46 +2,21 @@
 Crash Detection Service - Integrated into VIGIL
 
 Wraps the MobileNetV2-LSTM crash detection model for use in camera rotation.
+The model itself lives in the shared crash engine (backend.ai.accident_model),
+so this module, the camera pipeline and run_inference use one loaded copy.
 """
-import torch
-import torch.nn.functional as F
-from pathlib import Path
-from decord import VideoReader, cpu
-from torchvision.transforms.functional import to_pil_image
 from backend.config import ACCIDENT_THRESHOLD
+from backend.ai.accident_model import CRASH_MODEL_PATH, get_accident_model
 
-from backend.ai.crash_detector.model_architecture import MobileNetV2_LSTM
-from backend.ai.crash_detector.transforms_setup import get_test_transform
-from backend.ai.crash_detector.sampling import sample_frame_indices
-
-# Global model instance (loaded once on startup)
-_crash_model = None
-_device = "cpu"
-
-MODEL_PATH = Path(__file__).parent / "mobilenetv2_lstm_finetuned.pt"
+MODEL_PATH = CRASH_MODEL_PATH
 
 
 def load_crash_model(device="cpu"):
     """
     Load the crash detection model once on startup.
-    Called automatically on first inference.
+    Called automatically on first inference. Returns the shared model.
     """
-    global _crash_model, _device
-    
-    if _crash_model is not None:
-        return _crash_model
-    
-    print(f"🚗 Loading crash detection model from {MODEL_PATH}")
-    
-    _device = device
-    _crash_model = MobileNetV2_LSTM()
-    state = torch.load(MODEL_PATH, map_location=device)
-    _crash_model.load_state_dict(state)
-    _crash_model.to(device)
-    _crash_model.eval()
-    
-    print("✅ Crash detection model loaded successfully")
-    return _crash_model
+    return get_accident_model().load_model()
 
 
 def detect_crash(video_path: str, num_frames: int = 16, img_size: int = 224) -> dict:
@@ -62,51 +37,10 @@ def detect_crash(video_path: str, num_frames: int = 16, img_size: int = 224) ->
             "model": str
         }
     """
-    # Lazy load model on first call
-    if _crash_model is None:
-        load_crash_model(_device)
-    
     try:
-        test_transform = get_test_transform(img_size)
-        
-        # Load video and sample frames
-        vr = VideoReader(video_path, ctx=cpu(0))
-        total = len(vr)
-        
-        idxs = sample_frame_indices(total, num_frames)
-        frames_np = vr.get_batch(idxs).asnumpy()
-        
-        # Transform frames
-        frame_tensors = []
-        for img in frames_np:
-            pil_img = to_pil_image(img)
-            frame_tensors.append(test_transform(pil_img))
-        
-        # Prepare batch
-        video_tensor = torch.stack(frame_tensors, dim=0).unsqueeze(0).to(_device)
-        
-        # Inference
-        with torch.no_grad():
-            out = _crash_model(video_tensor)
-            probs = F.softmax(out, dim=1)[0].cpu().numpy()
-        
-        accident_prob = float(probs[1])
-        normal_prob = float(probs[0])
-        
-        # Only trigger crash alert if accident probability exceeds threshold
-        is_crash = accident_prob >= ACCIDENT_THRESHOLD
-        
-        # Return confidence of the PREDICTED class, not always accident_prob
-        confidence = accident_prob if is_crash else normal_prob
-        
-        return {
-            "is_crash": is_crash,
-            "event": "car_crash" if is_crash else "no_crash",
-            "confidence": confidence,
-            "normal_prob": normal_prob,
-            "accident_prob": accident_prob,
-            "model": "mobilenet_lstm_crash"
-        }
+        accident_prob = get_accident_model().predict_video(
+            video_path, num_frames=num_frames, img_size=img_size)
+        return crash_verdict(accident_prob)
     
     except Exception as e:
         print(f"❌ Crash detection error for {video_path}: {e}")
@@ -118,3 +52,26 @@ def detect_crash(video_path: str, num_frames: int = 16, img_size: int = 224) ->
             "model": "mobilenet_lstm_crash",
             "error": str(e)
         }
+
+
+def crash_verdict(accident_prob: float, model: str = "mobilenet_lstm_crash") -> dict:
+    """
+    detect_crash() result for an accident probability, e.g. one scored by the
+    shared-backbone crash head (backend.ai.multitask).
+    """
+    normal_prob = 1.0 - accident_prob  # two-class softmax
+    
+    # Only trigger crash alert if accident probability exceeds threshold
+    is_crash = accident_prob >= ACCIDENT_THRESHOLD
+    
+    # Return confidence of the PREDICTED class, not always accident_prob
+    confidence = accident_prob if is_crash else normal_prob
+    
+    return {
+        "is_crash": is_crash,
+        "event": "car_crash" if is_crash else "no_crash",
+        "confidence": confidence,
+        "normal_prob": normal_prob,
+        "accident_prob": accident_prob,
+        "model": model
+    }
@@ -8,7 +8,7 @@ from transforms_setup import get_test_transform
 from sampling import sample_frame_indices
 
 def load_model(weights_path, device="cpu"):
-    model = MobileNetV2_LSTM()
+    model = MobileNetV2_LSTM(pretrained=False)  # every weight comes from the checkpoint
     state = torch.load(weights_path, map_location=device)
     model.load_state_dict(state)
     model.to(device)
@@ -3,13 +3,19 @@ import torch.nn as nn
 from torchvision.models import mobilenet_v2
 
 class MobileNetV2_LSTM(nn.Module):
-    def __init__(self, num_classes=2, lstm_hidden=128, lstm_layers=1, dropout=0.5):
+    def __init__(self, num_classes=2, lstm_hidden=128, lstm_layers=1, dropout=0.5, pretrained=True):
         super().__init__()
 
-        try:
-            base = mobilenet_v2(weights="DEFAULT")
-        except:
-            base = mobilenet_v2(pretrained=True)
+        # pretrained=True starts the backbone from ImageNet weights (training).
+        # Inference overwrites every weight with the fine-tuned checkpoint, so it
+        # builds the bare architecture instead (see load_for_inference).
+        if not pretrained:
+            base = mobilenet_v2(weights=None)
+        else:
+            try:
+                base = mobilenet_v2(weights="DEFAULT")
+            except:
+                base = mobilenet_v2(pretrained=True)
 
         self.backbone = nn.Sequential(*list(base.features.children()))
         self.pool = nn.AdaptiveAvgPool2d((1, 1))
@@ -37,3 +43,23 @@ class MobileNetV2_LSTM(nn.Module):
         last = out[:, -1, :]
         last = self.dropout(last)
         return self.fc(last)
+
+
+def load_for_inference(weights_path, device="cpu"):
+    """
+    Build MobileNetV2_LSTM straight from a fine-tuned checkpoint.
+
+    The module is constructed on the meta device (no ImageNet download, no
+    random init), the checkpoint is memory-mapped instead of read into RAM,
+    and its tensors are assigned as the parameters rather than copied.
+    Works offline; processes loading the same file share its pages.
+    """
+    with torch.device("meta"):
+        model = MobileNetV2_LSTM(pretrained=False)
+    try:
+        state = torch.load(weights_path, map_location=device, mmap=True, weights_only=True)
+    except RuntimeError:
+        # Legacy (non-zipfile) checkpoints cannot be memory-mapped
+        state = torch.load(weights_path, map_location=device, weights_only=True)
+    model.load_state_dict(state, assign=True)
+    return model.to(device).eval()
@@ -0,0 +1,146 @@
+"""
+Detector Interface
+
+Every detector consumes a shared FrameBundle and returns the standard result
+dict (event/count, confidence, model, latency_ms, timestamp). The unified
+entry point in backend/ai/inference.py builds one bundle per clip and hands it
+to each detector, so the video is decoded once no matter how many run.
+
+The violence and crash detectors take the QoS ladder's quality options
+(img_size, quantized; backend/services/qos.py); they are part of the result
+cache key like every other option. Models served by ONNX Runtime run the
+float32 export whatever `quantized` says, and their cache key says so.
+"""
+
+from typing import Tuple
+
+from backend.ai.backends import active_backend
+from backend.ai.frame_bundle import FrameBundle
+from backend.config import QOS, QUANTIZATION
+
+
+class Detector:
+    """Base class: `name` keys the result cache, `runtime_model` names the
+    model in QUANTIZATION / INFERENCE_BACKEND."""
+
+    name = ""
+    runtime_model = ""
+
+    def weights(self, **options) -> Tuple[str, ...]:
+        """Absolute paths of the weights the detector's loader reads; their
+        versions are part of the result cache key, so replaced weights
+        invalidate cached results."""
+        return ()
+
+    def runtime(self, **options) -> str:
+        return self.runtime_model
+
+    def quantization(self, quantized: bool = False, **options) -> str:
+        """Active quantization mode; part of the result cache key. Always
+        "off" on ONNX Runtime, which runs the float32 export."""
+        if self.backend(**options) == "onnxruntime":
+            return "off"
+        mode = QUANTIZATION.get(self.runtime(**options), "off")
+        if quantized and mode == "off":
+            return QOS.get("quantized_mode", "static")
+        return mode
+
+    def backend(self, **options) -> str:
+        """Execution backend the model runs on (the configured one, or torch
+        when it has no usable ONNX export); part of the result cache key."""
+        weights = self.weights(**options)
+        return active_backend(self.runtime(**options), weights[0] if weights else None)
+
+    def detect(self, bundle: FrameBundle, **options) -> dict:
+        raise NotImplementedError
+
+
+class ViolenceDetector(Detector):
+    name = "violence"
+
+    def weights(self, model_name: str = "mobilenet", **options) -> Tuple[str, ...]:
+        from backend.ai.violence_detector.inference import MOBILENET_PATH, X3D_PATH
+        return (str(X3D_PATH if model_name == "x3d" else MOBILENET_PATH),)
+
+    def runtime(self, model_name: str = "mobilenet", **options) -> str:
+        return model_name
+
+    def detect(self, bundle: FrameBundle, model_name: str = "mobilenet", img_size: int = 224,
+               quantized: bool = False, **options) -> dict:
+        from backend.ai.violence_detector import detect_violence_frames
+        return detect_violence_frames(bundle, model_name=model_name, img_size=img_size, quantized=quantized)
+
+
+class CrashDetector(Detector):
+    name = "crash"
+    runtime_model = "crash_lstm"
+
+    def weights(self, **options) -> Tuple[str, ...]:
+        from backend.ai.accident_model import get_accident_model
+        return (str(get_accident_model().model_path),)
+
+    def detect(self, bundle: FrameBundle, img_size: int = 224, quantized: bool = False, **options) -> dict:
+        from backend.ai.accident_model import detect_crash_frames
+        return detect_crash_frames(bundle, img_size=img_size, quantized=quantized)
+
+
+def _yolo_weights() -> Tuple[str, ...]:
+    from backend.ai.people_counter.yolov8 import MODEL_PATH
+    return (str(MODEL_PATH),)
+
+
+class PeopleCounter(Detector):
+    name = "people_count"
+    runtime_model = "people_counter"
+
+    def weights(self, **options) -> Tuple[str, ...]:
+        return _yolo_weights()
+
+    def detect(self, bundle: FrameBundle, **options) -> dict:
+        from backend.ai.people_counter.yolov8 import detect_people_count_frames
+        return detect_people_count_frames(bundle)
+
+
+class ObjectPresence(Detector):
+    """Downscaled YOLO pass on a few frames: people / vehicles present (detector cascade)."""
+
+    name = "objects"
+    runtime_model = "people_counter"
+
+    def weights(self, **options) -> Tuple[str, ...]:
+        return _yolo_weights()
+
+    def detect(self, bundle: FrameBundle, frames: int = 4, img_size: int = 320, **options) -> dict:
+        from backend.ai.people_counter.yolov8 import detect_objects_frames
+        return detect_objects_frames(bundle, frames=frames, img_size=img_size)
+
+
+class MultiTaskDetector(Detector):
+    """Violence + crash heads on one shared MobileNetV2 backbone pass (backend/ai/multitask.py).
+
+    Returns {event: result} for the events it has a head for. No int8
+    variant: the QoS ladder's quantized rungs run it in float32.
+    """
+
+    name = "multitask"
+    runtime_model = "multitask"
+
+    def weights(self, **options) -> Tuple[str, ...]:
+        # Backbone checkpoint and trained heads: replacing either changes the scores
+        from backend.ai.multitask import HEADS_PATH, backbone_path
+        return (str(backbone_path()), str(HEADS_PATH))
+
+    def quantization(self, **options) -> str:
+        return "off"
+
+    def detect(self, bundle: FrameBundle, events: tuple = ("violence", "crash"), img_size: int = 224,
+               **options) -> dict:
+        from backend.ai.multitask import detect_multitask_frames
+        return detect_multitask_frames(bundle, events=events, img_size=img_size)
+
+
+# Shared instances used by backend.ai.inference, keyed by detector name
+DETECTORS = {
+    detector.name: detector
+    for detector in (ViolenceDetector(), CrashDetector(), PeopleCounter(), ObjectPresence(), MultiTaskDetector())
+}
@@ -0,0 +1,382 @@
+"""
+TorchScript Export and Optimized Runtime Loader
+
+Exports each detector to a frozen TorchScript graph (conv+BN folded, weights
+inlined as constants) and records it in a manifest. At runtime the model
+loaders call load_optimized(), which prefers the exported artifact and falls
+back to the eager model when it is missing, stale, failed its parity check
+or measured no faster than eager.
+
+- mobilenet, x3d (violence) and crash_lstm are traced, frozen and saved; the
+  oneDNN fusion pass (torch.jit.optimize_for_inference) is applied at load
+  time, and only when it measured faster than the plain frozen graph during
+  export (optimized graphs cannot be reloaded once saved)
+- people_counter (YOLOv8) uses the Ultralytics TorchScript exporter
+
+Artifacts are versioned by the source weights and torch version, so
+replacing a weights file or upgrading torch makes the runtime fall back to
+eager until the export is re-run.
+
+Usage:
+    python -m backend.ai.export [--models mobilenet crash_lstm] [--clips 4] [--repeat 5]
+"""
+
+import argparse
+import hashlib
+import json
+import shutil
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import torch
+
+from backend.ai.result_cache import model_version
+from backend.config import TORCHSCRIPT
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+EXPORT_DIR = PROJECT_ROOT / TORCHSCRIPT.get("dir", "backend/models/optimized")
+MANIFEST_PATH = EXPORT_DIR / "manifest.json"
+VIDEO_DIR = PROJECT_ROOT / "Videos"
+
+
+# ============================================================================
+# MANIFEST + RUNTIME LOADER
+# ============================================================================
+
+def _read_manifest() -> Dict:
+    try:
+        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_manifest(manifest: Dict):
+    EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = MANIFEST_PATH.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    tmp.replace(MANIFEST_PATH)
+
+
+def _version_tag(weights_path) -> str:
+    payload = f"{model_version(str(weights_path))}|{torch.__version__}"
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:10]
+
+
+def artifact_name(name: str, weights_path, suffix: str = ".ts.pt") -> str:
+    """Versioned artifact file name for an export of `weights_path`."""
+    return f"{name}-{_version_tag(weights_path)}{suffix}"
+
+
+def register_artifact(name: str, entry: Dict):
+    """Record an artifact in the manifest, deleting the one it replaces."""
+    manifest = _read_manifest()
+    stale = manifest.get(name, {}).get("artifact")
+    if stale and stale != entry["artifact"]:
+        (EXPORT_DIR / stale).unlink(missing_ok=True)
+    manifest[name] = entry
+    _write_manifest(manifest)
+
+
+def optimized_artifact_path(name: str, weights_path) -> Optional[Path]:
+    """
+    Path of the exported artifact for `name` if it is usable, else None.
+
+    Usable means: TORCHSCRIPT is enabled, the manifest entry was built from
+    the current weights file with the running torch version, it passed its
+    parity check, it measured faster than eager, and the file exists.
+    """
+    if not TORCHSCRIPT.get("enabled", False):
+        return None
+    entry = _read_manifest().get(name)
+    if not entry:
+        return None
+    if entry.get("weights_version") != model_version(str(weights_path)) or entry.get("torch_version") != torch.__version__:
+        print(f"[EXPORT] {name}: exported artifact is stale, using eager model (re-run python -m backend.ai.export)")
+        return None
+    if not entry.get("parity_ok", False):
+        print(f"[EXPORT] {name}: exported artifact failed parity check, using eager model")
+        return None
+    if not entry.get("faster", True):
+        print(f"[EXPORT] {name}: exported artifact was not faster than eager, using eager model")
+        return None
+    path = EXPORT_DIR / entry["artifact"]
+    return path if path.exists() else None
+
+
+def load_optimized(name: str, weights_path, device="cpu"):
+    """
+    Load the frozen TorchScript artifact for a detector, or None to fall back to eager.
+
+    Args:
+        name: Export name ("mobilenet", "x3d", "crash_lstm")
+        weights_path: Eager weights file the artifact was exported from
+        device: map_location for torch.jit.load
+
+    Returns:
+        torch.jit.ScriptModule in eval mode, or None
+    """
+    path = optimized_artifact_path(name, weights_path)
+    if path is None:
+        return None
+    entry = _read_manifest()[name]
+    try:
+        module = torch.jit.load(str(path), map_location=device)
+        module.eval()
+        if entry.get("onednn") and TORCHSCRIPT.get("optimize_for_inference", True):
+            module = torch.jit.optimize_for_inference(module)
+    except Exception as e:
+        print(f"[EXPORT] {name}: failed to load {path.name}, using eager model: {e}")
+        return None
+    print(f"[EXPORT] Loaded optimized {name} from {path.name} (onednn={bool(entry.get('onednn'))})")
+    return module
+
+
+# ============================================================================
+# EXPORT SPECS
+# ============================================================================
+
+def sample_bundles(folder: str, count: int, offset: int = 0) -> List:
+    """FrameBundles for up to `count` clips of Videos/<folder>, in name order from `offset`."""
+    from backend.ai.frame_bundle import FrameBundle
+
+    clip_dir = VIDEO_DIR / folder
+    if not clip_dir.is_dir():
+        return []
+    clips = sorted(p for p in clip_dir.iterdir() if p.suffix.lower() == ".mp4")[offset:offset + count]
+    return [FrameBundle(str(p)) for p in clips]
+
+
+def _mobilenet_spec():
+    from backend.ai.violence_detector import inference as vi
+
+    def inputs(bundle):
+        return vi.preprocess_frames_mobilenet(bundle.resized(vi.IMG_SIZE))
+
+    return {
+        "weights": vi.MOBILENET_PATH,
+        "build": vi.load_mobilenet_model,
+        "inputs": inputs,
+        "example_shape": (vi.FRAME_COUNT, 3, vi.IMG_SIZE, vi.IMG_SIZE),
+        "folder": "violence",
+    }
+
+
+def _x3d_spec():
+    from backend.ai.violence_detector import inference as vi
+
+    def inputs(bundle):
+        return vi.preprocess_frames_x3d(bundle.resized(vi.IMG_SIZE))
+
+    return {
+        "weights": vi.X3D_PATH,
+        "build": vi.load_x3d_model,
+        "inputs": inputs,
+        "example_shape": (1, 3, vi.FRAME_COUNT, vi.IMG_SIZE, vi.IMG_SIZE),
+        "folder": "violence",
+    }
+
+
+def _crash_lstm_spec():
+    import cv2
+    from backend.ai.accident_model import CRASH_MODEL_PATH
+    from backend.ai.crash_detector.model_architecture import load_for_inference
+    from backend.ai.preprocessing import IMAGENET_MEAN, IMAGENET_STD, preprocess_clip
+
+    weights = CRASH_MODEL_PATH
+
+    def build():
+        return load_for_inference(weights, "cpu")
+
+    def inputs(bundle):
+        frames = bundle.resized(224, cv2.INTER_AREA)
+        return torch.from_numpy(preprocess_clip(frames, 224, IMAGENET_MEAN, IMAGENET_STD)).unsqueeze(0)
+
+    return {
+        "weights": weights,
+        "build": build,
+        "inputs": inputs,
+        "example_shape": (1, 16, 3, 224, 224),
+        "folder": "crash",
+    }
+
+
+TORCH_SPECS: Dict[str, Callable[[], Dict]] = {
+    "mobilenet": _mobilenet_spec,
+    "x3d": _x3d_spec,
+    "crash_lstm": _crash_lstm_spec,
+}
+EXPORT_NAMES = list(TORCH_SPECS) + ["people_counter"]
+
+
+# ============================================================================
+# EXPORT + PARITY
+# ============================================================================
+
+def _latency_ms(fn, inputs, repeat: int) -> float:
+    with torch.no_grad():
+        fn(inputs)  # warmup (also triggers TorchScript profiling passes)
+        fn(inputs)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn(inputs)
+    return round((time.perf_counter() - start) * 1000 / repeat, 2)
+
+
+def export_torch_model(name: str, clips: int = 4, repeat: int = 5, tolerance: float = 1e-4) -> Dict:
+    """
+    Trace, freeze and save one detector; check parity and latency against eager.
+
+    Parity is the max abs diff of the raw model outputs on sample clips from
+    Videos/ (random inputs when no clips are available), plus one doubled
+    batch to confirm the traced graph is not specialized to a batch size.
+    """
+    spec = TORCH_SPECS[name]()
+    weights = Path(spec["weights"])
+    if not weights.exists():
+        raise FileNotFoundError(f"Weights not found: {weights}")
+
+    eager = spec["build"]().eval()
+    bundles = sample_bundles(spec["folder"], clips)
+    samples = []
+    for bundle in bundles:
+        try:
+            samples.append(spec["inputs"](bundle))
+        except Exception as e:
+            print(f"[EXPORT] {name}: skipping {bundle.video_path}: {e}")
+    if not samples:
+        print(f"[EXPORT] {name}: no sample clips in Videos/{spec['folder']}, using random inputs")
+        samples = [torch.randn(spec["example_shape"]) for _ in range(max(clips, 1))]
+    samples.append(torch.cat([samples[0], samples[-1]], dim=0))
+
+    with torch.no_grad():
+        traced = torch.jit.trace(eager, samples[0])
+        frozen = torch.jit.freeze(traced)  # inlines weights and folds conv+BN
+        onednn = torch.jit.optimize_for_inference(torch.jit.freeze(torch.jit.trace(eager, samples[0])))
+
+        max_diff = 0.0
+        for x in samples:
+            reference = eager(x)
+            for candidate in (frozen, onednn):
+                max_diff = max(max_diff, (candidate(x) - reference).abs().max().item())
+
+    latency = {
+        "eager": _latency_ms(eager, samples[0], repeat),
+        "frozen": _latency_ms(frozen, samples[0], repeat),
+        "onednn": _latency_ms(onednn, samples[0], repeat),
+    }
+
+    EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+    artifact = artifact_name(name, weights)
+    torch.jit.save(frozen, str(EXPORT_DIR / artifact))
+
+    return {
+        "artifact": artifact,
+        "weights": str(weights.relative_to(PROJECT_ROOT)) if weights.is_relative_to(PROJECT_ROOT) else str(weights),
+        "weights_version": model_version(str(weights)),
+        "torch_version": torch.__version__,
+        "exported_at": time.time(),
+        "input_shape": list(samples[0].shape),
+        "parity_clips": len(bundles),
+        "parity_max_abs_diff": max_diff,
+        "parity_ok": max_diff <= tolerance,
+        "latency_ms": latency,
+        "onednn": latency["onednn"] < latency["frozen"],
+        "faster": min(latency["frozen"], latency["onednn"]) < latency["eager"],
+    }
+
+
+def export_people_counter(clips: int = 4, repeat: int = 5) -> Dict:
+    """
+    Export YOLOv8 with the Ultralytics TorchScript exporter.
+
+    Parity is the max abs difference in per-frame person counts between the
+    eager and exported model on sample clips.
+    """
+    import numpy as np
+    from ultralytics import YOLO
+    from backend.ai.people_counter.yolov8 import MODEL_PATH
+
+    if not MODEL_PATH.exists():
+        raise FileNotFoundError(f"Weights not found: {MODEL_PATH}")
+
+    exported = Path(YOLO(str(MODEL_PATH)).export(format="torchscript", imgsz=640))
+    EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+    artifact = artifact_name("people_counter", MODEL_PATH, ".torchscript")
+    shutil.move(str(exported), str(EXPORT_DIR / artifact))
+
+    eager = YOLO(str(MODEL_PATH))
+    scripted = YOLO(str(EXPORT_DIR / artifact), task="detect")
+    batches = [[np.ascontiguousarray(f[..., ::-1]) for f in b.frames] for b in sample_bundles("violence", clips)]
+    if not batches:
+        batches = [[np.random.randint(0, 255, (360, 640, 3), dtype=np.uint8) for _ in range(4)]]
+
+    def person_counts(model, images):
+        return [int((r.boxes.cls.cpu().numpy() == 0).sum()) for r in model(images, verbose=False)]
+
+    max_diff = 0
+    for images in batches:
+        diffs = np.abs(np.subtract(person_counts(eager, images), person_counts(scripted, images)))
+        max_diff = max(max_diff, int(diffs.max()))
+
+    latency = {
+        "eager": _latency_ms(lambda imgs: eager(imgs, verbose=False), batches[0], repeat),
+        "frozen": _latency_ms(lambda imgs: scripted(imgs, verbose=False), batches[0], repeat),
+    }
+    return {
+        "artifact": artifact,
+        "weights": str(MODEL_PATH.relative_to(PROJECT_ROOT)),
+        "weights_version": model_version(str(MODEL_PATH)),
+        "torch_version": torch.__version__,
+        "exported_at": time.time(),
+        "input_shape": [len(batches[0]), 3, 640, 640],
+        "parity_clips": len(batches),
+        "parity_max_abs_diff": max_diff,
+        "parity_ok": max_diff == 0,
+        "latency_ms": latency,
+        "onednn": False,
+        "faster": latency["frozen"] < latency["eager"],
+    }
+
+
+def export_all(names: List[str], clips: int = 4, repeat: int = 5) -> Dict:
+    """Export the given detectors, update the manifest, and return the new entries."""
+    results = {}
+    for name in names:
+        print(f"[EXPORT] Exporting {name}...")
+        try:
+            entry = export_people_counter(clips, repeat) if name == "people_counter" else export_torch_model(name, clips, repeat)
+        except Exception as e:
+            print(f"[EXPORT] {name}: export failed: {e}")
+            continue
+        register_artifact(name, entry)
+        results[name] = entry
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", nargs="+", choices=EXPORT_NAMES, default=EXPORT_NAMES)
+    parser.add_argument("--clips", type=int, default=4, help="Sample clips per model for the parity check")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per latency measurement")
+    args = parser.parse_args()
+
+    results = export_all(args.models, args.clips, args.repeat)
+    if not results:
+        print("Nothing exported.")
+        return
+    print(f"\n{'model':<16}{'parity':>14}{'eager ms':>11}{'frozen ms':>11}{'onednn ms':>11}  artifact")
+    for name, entry in results.items():
+        latency = entry["latency_ms"]
+        parity = f"{entry['parity_max_abs_diff']:.2e}" + ("" if entry["parity_ok"] else " !")
+        used = "" if entry["parity_ok"] and entry["faster"] else "  (runtime keeps eager)"
+        onednn = latency.get("onednn")
+        print(f"{name:<16}{parity:>14}{latency['eager']:>11.1f}{latency['frozen']:>11.1f}"
+              f"{(f'{onednn:.1f}' if onednn is not None else '-'):>11}  {entry['artifact']}{used}")
+    print(f"\nManifest: {MANIFEST_PATH}")
+
+
+if __name__ == "__main__":
+    main()
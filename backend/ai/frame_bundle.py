@@ -0,0 +1,172 @@
+"""
+Shared Frame Bundle
+
+Decode-once container for one clip. Violence, crash and people-counting
+detectors all read the same sampled frames instead of each reopening the file
+(cv2 for YOLO, cv2 seek-per-frame for violence, decord for crash).
+
+The bundle is lazy: nothing is decoded until a detector first touches
+`frames`, so cache hits and demo-mode detectors never pay for decoding.
+Resized variants are computed once per (size, interpolation) and shared, and
+derived() memoizes anything else computed from the frames (e.g. the shared
+backbone's features, backend/ai/multitask.py).
+
+When the caller passes the clip's catalog entry (backend/services/video_catalog.py),
+frame count and fps come from it without opening the file, and clips the
+catalog marked invalid fail immediately.
+
+A bundle can be cancelled (its clip rotated out before analysis finished):
+decoding and every detector that has not started yet raise ClipCancelled
+instead of running.
+"""
+
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+FRAME_COUNT = 16  # Frames sampled per clip for every detector
+
+
+class ClipCancelled(Exception):
+    """The bundle was cancelled before this decode/detector step started."""
+
+
+class FrameBundle:
+    """Uniformly sampled RGB frames of one clip plus cached resized variants."""
+
+    def __init__(self, video_path: str, num_frames: int = FRAME_COUNT, clip_info: Optional[dict] = None):
+        self.video_path = video_path
+        self.num_frames = num_frames
+        self.clip_info = clip_info
+        self._frames = None   # (T, H, W, 3) uint8, set on first decode
+        self._indices = None
+        self._total_frames = 0
+        self._fps = 0.0
+        self._error: Optional[Exception] = None
+        self._variants: Dict[Tuple[int, int], object] = {}
+        self._lock = threading.Lock()
+        self._derived: Dict[tuple, object] = {}
+        self._derived_lock = threading.Lock()  # separate: computing may call resized()
+        self._cancelled = False
+
+    @classmethod
+    def from_frames(cls, video_path: str, frames, indices=None, total_frames: int = 0, fps: float = 0.0) -> "FrameBundle":
+        """Bundle around frames decoded elsewhere (e.g. received by an inference worker)."""
+        import numpy as np
+
+        bundle = cls(video_path, len(frames))
+        bundle._frames = frames
+        bundle._indices = np.arange(len(frames)) if indices is None else indices
+        bundle._total_frames = total_frames or len(frames)
+        bundle._fps = fps
+        return bundle
+
+    def cancel(self):
+        """Skip any decode/detector work on this clip that has not started yet."""
+        self._cancelled = True
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def check_cancelled(self):
+        if self._cancelled:
+            raise ClipCancelled(f"Analysis of {self.video_path} cancelled")
+
+    def _decode(self):
+        # Caller holds self._lock
+        if self._frames is not None:
+            return
+        if self._error is not None:
+            raise self._error
+        self.check_cancelled()
+        import cv2
+        import numpy as np
+        from backend.utils.video_utils import read_frames_at
+
+        info = self.clip_info
+        try:
+            if info is not None and not info.get("valid", True):
+                raise ValueError(f"Invalid video {self.video_path}: {info.get('error')}")
+            cap = cv2.VideoCapture(self.video_path)
+            if not cap.isOpened():
+                raise ValueError(f"Cannot open video: {self.video_path}")
+            try:
+                if info is not None:
+                    total, fps = info["frame_count"], info["fps"]
+                else:
+                    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+                    fps = float(cap.get(cv2.CAP_PROP_FPS) or 0.0)
+                num = min(self.num_frames, total)
+                indices = np.linspace(0, total - 1, num, dtype=int) if num > 0 else np.zeros(0, dtype=int)
+                frames = read_frames_at(cap, indices)
+            finally:
+                cap.release()
+            if len(frames) == 0:
+                raise ValueError(f"No frames extracted from {self.video_path}")
+        except Exception as e:
+            self._error = e
+            raise
+        self._frames = frames
+        self._indices = indices[: len(frames)]
+        self._total_frames = total
+        self._fps = fps
+
+    @property
+    def frames(self):
+        """(T, H, W, 3) uint8 RGB frames at native resolution."""
+        with self._lock:
+            self._decode()
+            return self._frames
+
+    @property
+    def indices(self):
+        with self._lock:
+            self._decode()
+            return self._indices
+
+    @property
+    def total_frames(self) -> int:
+        if self._frames is None and self.clip_info is not None:
+            return self.clip_info["frame_count"]
+        with self._lock:
+            self._decode()
+            return self._total_frames
+
+    @property
+    def fps(self) -> float:
+        if self._frames is None and self.clip_info is not None:
+            return self.clip_info["fps"]
+        with self._lock:
+            self._decode()
+            return self._fps
+
+    @property
+    def decoded(self) -> bool:
+        return self._frames is not None
+
+    def resized(self, size: int, interpolation: Optional[int] = None):
+        """(T, size, size, 3) uint8 variant, computed once and shared between detectors.
+
+        interpolation defaults to cv2.INTER_LINEAR.
+        """
+        import cv2
+        from backend.ai.preprocessing import resize_stack
+
+        if interpolation is None:
+            interpolation = cv2.INTER_LINEAR
+        key = (size, interpolation)
+        with self._lock:
+            self._decode()
+            variant = self._variants.get(key)
+            if variant is None:
+                variant = resize_stack(self._frames, size, interpolation=interpolation)
+                self._variants[key] = variant
+            return variant
+
+    def derived(self, key: tuple, compute: Callable[[], object]):
+        """compute() once per key for this clip; later calls with the key share the value."""
+        with self._derived_lock:
+            if key not in self._derived:
+                self.check_cancelled()
+                self._derived[key] = compute()
+            return self._derived[key]
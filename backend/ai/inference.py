@@ -7,6 +7,7 @@ Flask routes should import from here to access all AI models.
 """
 
 from __future__ import annotations
+import time
 from typing import Dict
 
 # Import specialized detectors
@@ -18,45 +19,274 @@ from typing import Dict
 
 
 print("[DEBUG] Importing violence, crash, and people counting models...")
-from backend.ai.violence_detector import detect_violence
-from backend.ai.accident_model import detect_crash
-from backend.ai.people_counter.yolov8 import detect_people_count
+from backend.ai.detectors import DETECTORS, Detector
+from backend.ai.frame_bundle import ClipCancelled, FrameBundle
+from backend.ai.motion_gate import get_motion_gate
+from backend.ai.result_cache import cached_call
+from backend.ai.worker_pool import get_worker_pool
 print("[DEBUG] Model imports complete.")
 
-def run_inference(video_path: str, camera_id: str = None) -> dict:
+
+def _run_detector(detector: Detector, bundle: FrameBundle, **options) -> dict:
+	"""Run one detector on a shared bundle through the result cache.
+
+	With WORKER_POOL enabled the detector runs in a worker process; the clip is
+	still decoded here once and shipped through shared memory.
+	A cancelled bundle raises ClipCancelled before the detector starts.
+	"""
+	bundle.check_cancelled()
+	pool = get_worker_pool()
+	if pool is not None:
+		compute = lambda _path, num_frames, **kw: pool.run(detector.name, bundle, **kw)
+	else:
+		compute = lambda _path, num_frames, **kw: detector.detect(bundle, **kw)
+	return cached_call(
+		detector.name,
+		compute,
+		bundle.video_path,
+		detector.weights(**options),
+		num_frames=bundle.num_frames,
+		quantization=detector.quantization(**options),
+		backend=detector.backend(**options),
+		**options,
+	)
+
+
+# Cached detector entry points. Repeated calls on an unchanged clip return the
+# stored result; concurrent calls for the same clip share one computation.
+# Pass the same `bundle` to several detectors to decode the clip only once.
+# **quality: img_size / quantized from a QoS ladder rung (see quality_options).
+def detect_violence(video_path: str, model_name: str = "mobilenet", bundle: FrameBundle = None, **quality) -> dict:
+	return _run_detector(DETECTORS["violence"], bundle or FrameBundle(video_path), model_name=model_name, **quality)
+
+
+def detect_crash(video_path: str, bundle: FrameBundle = None, **quality) -> dict:
+	return _run_detector(DETECTORS["crash"], bundle or FrameBundle(video_path), **quality)
+
+
+def detect_people_count(video_path: str, bundle: FrameBundle = None) -> dict:
+	return _run_detector(DETECTORS["people_count"], bundle or FrameBundle(video_path))
+
+
+def detect_objects(video_path: str, bundle: FrameBundle = None) -> dict:
+	"""Downscaled YOLO presence pass of the detector cascade (people / vehicles, see CASCADE)."""
+	from backend.config import CASCADE
+	return _run_detector(DETECTORS["objects"], bundle or FrameBundle(video_path),
+						 frames=CASCADE.get("frames", 4), img_size=CASCADE.get("img_size", 320))
+
+
+def detect_multitask(video_path: str, events=("violence", "crash"), bundle: FrameBundle = None, **quality) -> dict:
+	"""Violence + crash heads on one shared backbone pass (backend/ai/multitask.py); {event: result}."""
+	return _run_detector(DETECTORS["multitask"], bundle or FrameBundle(video_path), events=tuple(events), **quality)
+
+
+def detect_events(video_path: str, events, model_name: str = "mobilenet", bundle: FrameBundle = None,
+				  **quality) -> dict:
+	"""
+	Run several event detectors on one clip.
+
+	With MULTITASK enabled, violence and crash read one shared backbone pass
+	(feature extraction paid once per clip); events without a trained head,
+	and every event when it is off, run their dedicated model on the same
+	bundle.
+
+	Returns:
+		{event: result} for each of events ("violence", "crash")
+	"""
+	from backend.config import MULTITASK
+	bundle = bundle or FrameBundle(video_path)
+	results = {}
+	if MULTITASK.get("enabled", False):
+		# The violence head replaces the MobileNet classifier only (x3d keeps its own model)
+		shared = [event for event in events if event == "crash" or model_name == "mobilenet"]
+		if shared:
+			found = detect_multitask(video_path, shared, bundle=bundle, **quality)
+			if found.get("event") == "error":
+				print(f"[MULTITASK] Shared backbone failed, running dedicated models: {found.get('error')}")
+			# A result cache hit marks (and re-stamps) the container, not the per-event results
+			hit = {"cached": True, "timestamp": found["timestamp"]} if found.get("cached") else {}
+			results = {event: {**found[event], **hit} for event in shared if event in found}
+	for event in events:
+		if event not in results:
+			if event == "violence":
+				results[event] = detect_violence(video_path, model_name=model_name, bundle=bundle, **quality)
+			else:
+				results[event] = detect_crash(video_path, bundle=bundle, **quality)
+	return results
+
+
+def watched_events(camera_id: str) -> tuple:
+	"""Events a camera is checked for: ("violence",), ("crash",) or both (in both camera groups)."""
+	from backend.config import VIOLENCE_CAMERAS, CRASH_CAMERAS
+	events = tuple(event for event, cameras in (("violence", VIOLENCE_CAMERAS), ("crash", CRASH_CAMERAS))
+				   if camera_id in cameras)
+	return events or ("violence",)
+
+
+def _primary(results: dict) -> dict:
+	"""Result a multi-event camera reports: the most confident alert over its threshold, else violence."""
+	from backend.config import VIOLENCE_THRESHOLD, ACCIDENT_THRESHOLD
+	alerts = [r for r in results.values()
+			  if (r.get("event") == "violence" and r.get("confidence", 0) >= VIOLENCE_THRESHOLD)
+			  or (r.get("event") == "car_crash" and r.get("confidence", 0) >= ACCIDENT_THRESHOLD)]
+	if alerts:
+		return dict(max(alerts, key=lambda r: r.get("confidence", 0)))
+	return dict(results.get("violence") or next(iter(results.values())))
+
+
+def _cascade(detector: str, video_path: str, bundle: FrameBundle, people_result: dict = None):
+	"""
+	Object-presence stage in front of the violence/crash model.
+
+	Returns:
+		(early "normal" result when the objects the detector needs are absent,
+		 else None; {"people": n, "vehicles": n} seen, None if the pass failed)
+	"""
+	from backend.config import CASCADE
+	start = time.time()
+	if detector == "violence" and people_result and people_result.get("max_count") is not None:
+		# People-count cameras already ran YOLO on the clip: no second pass
+		objects = {"people": people_result["max_count"]}
+	else:
+		try:
+			found = detect_objects(video_path, bundle=bundle)
+		except ClipCancelled:
+			raise
+		except Exception as e:
+			print(f"[CASCADE] Object pass failed, running {detector} anyway: {e}")
+			return None, None
+		objects = {"people": found.get("people", 0), "vehicles": found.get("vehicles", 0)}
+	if detector == "violence":
+		present = objects["people"] >= CASCADE.get("min_people", 2)
+	else:
+		present = objects.get("vehicles", 0) >= CASCADE.get("min_vehicles", 1)
+	if present:
+		return None, objects
+	return {
+		"event": "normal",
+		"confidence": 1.0,
+		"model": "yolo_cascade",
+		"gated": True,
+		"gate": "objects",
+		"objects": objects,
+		"latency_ms": int((time.time() - start) * 1000),
+		"timestamp": time.time(),
+	}, objects
+
+
+def quality_options(qos: dict = None) -> dict:
+	"""Detector options of a QoS ladder rung that differ from full fidelity (img_size, quantized)."""
+	if not qos:
+		return {}
+	return {key: qos[key] for key in ("img_size", "quantized") if qos.get(key)}
+
+
+def run_inference(video_path: str, camera_id: str = None, model_name: str = "mobilenet", bundle: FrameBundle = None,
+				  qos: dict = None, cascade: bool = None) -> dict:
 	"""
 	Unified inference entry: runs violence, crash, and people counting as needed.
 	Returns dict with event, confidence, model, latency, timestamp, and people count if available.
+	The clip is decoded at most once and shared by every detector that runs;
+	each detector result is served from the result cache when the clip is unchanged.
+	qos is the QoS ladder rung to run at (backend/services/qos.py): smaller
+	inputs, the int8 model, no people counting ("people_count": False).
+	With a camera id, the motion gate (backend/ai/motion_gate.py) runs first:
+	quiet clips skip the violence/crash CNNs and come back "normal" with
+	gated: True; other results carry gated: False and the motion score.
+	cascade (default CASCADE["enabled"] for cameras, off without a camera id)
+	runs a downscaled YOLO pass next: the violence model only runs with
+	min_people people in one frame, the crash model only with a vehicle;
+	otherwise the result is "normal" with gated: True, gate: "objects".
+	Cameras in both VIOLENCE_CAMERAS and CRASH_CAMERAS get both detectors
+	on one shared backbone pass (detect_events): the result is the alerting
+	one (else violence), with every event's result under "events".
 	"""
+	bundle = bundle or FrameBundle(video_path)
+	quality = quality_options(qos)
+	count_people = (qos or {}).get("people_count", True)
 	result = {}
 	violence_result = None
 	crash_result = None
 	people_result = None
+	motion = None
+	objects = None
 	print(f"[DEBUG] run_inference called: video_path={video_path}, camera_id={camera_id}")
 	if camera_id:
-		from backend.config import VIOLENCE_CAMERAS, CRASH_CAMERAS, PEOPLE_COUNT_CAMERAS
-		if camera_id in VIOLENCE_CAMERAS:
-			print(f"[DEBUG] Running violence detection for {camera_id}")
-			violence_result = detect_violence(video_path)
-			if camera_id in PEOPLE_COUNT_CAMERAS:
+		from backend.config import VIOLENCE_CAMERAS, CRASH_CAMERAS, PEOPLE_COUNT_CAMERAS, MOTION_GATE, CASCADE
+		use_cascade = CASCADE.get("enabled", False) if cascade is None else cascade
+		gated = None
+		if MOTION_GATE.get("enabled", False):
+			# Cheap motion check first: quiet clips skip the violence/crash CNNs
+			start = time.time()
+			motion = get_motion_gate().check(camera_id, bundle)
+			if motion["gated"]:
+				print(f"[DEBUG] Motion gate: {camera_id} score {motion['motion_score']} < {motion['motion_threshold']}")
+				gated = get_motion_gate().gated_result(motion, start)
+		events = watched_events(camera_id)
+		if len(events) > 1:
+			# Violence + crash camera: both heads share one backbone pass (MULTITASK)
+			if camera_id in PEOPLE_COUNT_CAMERAS and count_people:
 				print(f"[DEBUG] Running people counting for {camera_id}")
-				people_result = detect_people_count(video_path)
+				people_result = detect_people_count(video_path, bundle=bundle)
+			if gated is not None:
+				result = gated
+			else:
+				early = {}
+				if use_cascade:
+					for event in events:
+						skipped, seen = _cascade(event, video_path, bundle, people_result if event == "violence" else None)
+						if seen is not None:
+							objects = {**(objects or {}), **seen}
+						if skipped is not None:
+							early[event] = skipped
+				pending = [event for event in events if event not in early]
+				print(f"[DEBUG] Running {', '.join(pending) or 'no'} detection for {camera_id}")
+				results = detect_events(video_path, pending, model_name=model_name, bundle=bundle, **quality) if pending else {}
+				results = {event: early.get(event) or results[event] for event in events}
+				result = _primary(results)
+				result["events"] = results
+				if objects is not None:
+					result["objects"] = objects
+			if people_result:
+				result['people_count'] = people_result.get('count', 0)
+				result['people_confidence'] = people_result.get('confidence', 0)
+		elif camera_id in VIOLENCE_CAMERAS:
+			if camera_id in PEOPLE_COUNT_CAMERAS and count_people:
+				print(f"[DEBUG] Running people counting for {camera_id}")
+				people_result = detect_people_count(video_path, bundle=bundle)
+			if gated is None and use_cascade:
+				gated, objects = _cascade("violence", video_path, bundle, people_result)
+			print(f"[DEBUG] Running violence detection for {camera_id}")
+			violence_result = gated or detect_violence(video_path, model_name=model_name, bundle=bundle, **quality)
 			result = violence_result or {}
 			if people_result:
 				result['people_count'] = people_result.get('count', 0)
 				result['people_confidence'] = people_result.get('confidence', 0)
 		elif camera_id in CRASH_CAMERAS:
+			if gated is None and use_cascade:
+				gated, objects = _cascade("crash", video_path, bundle)
 			print(f"[DEBUG] Running crash detection for {camera_id}")
-			crash_result = detect_crash(video_path)
+			crash_result = gated or detect_crash(video_path, bundle=bundle, **quality)
 			result = crash_result or {}
 		else:
+			if gated is None and use_cascade:
+				gated, objects = _cascade("violence", video_path, bundle)
 			print(f"[DEBUG] Running default violence detection for {camera_id}")
-			violence_result = detect_violence(video_path)
+			violence_result = gated or detect_violence(video_path, model_name=model_name, bundle=bundle, **quality)
 			result = violence_result or {}
+		if motion is not None and not motion["gated"]:
+			get_motion_gate().observe(camera_id, motion, result)
+			# The cascade's gated: True wins over the motion gate's False
+			result = {**motion, **result}
 	else:
 		print(f"[DEBUG] Running violence detection (no camera_id)")
-		violence_result = detect_violence(video_path)
+		gated = None
+		if cascade:
+			gated, objects = _cascade("violence", video_path, bundle)
+		violence_result = gated or detect_violence(video_path, model_name=model_name, bundle=bundle, **quality)
 		result = violence_result or {}
+	if objects is not None:
+		result.setdefault("objects", objects)
 	print(f"[DEBUG] Inference result: {result}")
 	return result
 
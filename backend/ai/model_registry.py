@@ -0,0 +1,168 @@
+"""
+Process-Wide Model Registry
+
+Every loaded model (torch module, TorchScript/int8 artifact, YOLO wrapper or
+ONNX Runtime session) lives here under one name, so all entry points that
+need the same model share a single copy of its weights:
+
+- acquire(name, loader): load once (concurrent callers wait for the same
+  load) and take a reference
+- release(name): drop a reference; the model is unloaded at zero only when
+  asked to, since reloading costs far more than keeping it resident
+- stats(): per-model reference count, memory footprint, load time
+
+Names: "mobilenet", "x3d", "crash_lstm", "people_counter", and
+"<model>:onnxruntime" for ONNX Runtime sessions.
+"""
+
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+
+def _tensor_bytes(value, seen: set) -> int:
+    """Bytes held by tensors in a state_dict value (packed int8 params are nested tuples)."""
+    if isinstance(value, (tuple, list)):
+        return sum(_tensor_bytes(v, seen) for v in value)
+    if hasattr(value, "untyped_storage"):
+        storage = value.untyped_storage()
+        try:
+            key = storage.data_ptr()
+        except RuntimeError:  # quantized / opaque storage
+            key = id(value)
+        if key in seen:
+            return 0  # tied weights / shared storage
+        seen.add(key)
+        return storage.nbytes()
+    return 0
+
+
+def model_footprint(model) -> int:
+    """
+    Approximate resident bytes of a model's weights.
+
+    Torch modules count parameters + buffers via state_dict (shared storages
+    once); YOLO wrappers are measured through their inner module; ONNX
+    Runtime sessions are approximated by the size of the .onnx file.
+    """
+    if model is None:
+        return 0
+    path = getattr(model, "path", None)
+    if path is not None and hasattr(model, "session"):
+        return Path(path).stat().st_size if Path(path).exists() else 0
+    state_dict = getattr(model, "state_dict", None)
+    if callable(state_dict):
+        try:
+            seen: set = set()
+            return sum(_tensor_bytes(v, seen) for v in state_dict().values())
+        except Exception:
+            pass
+    inner = getattr(model, "model", None)
+    if inner is not None and inner is not model:
+        return model_footprint(inner)
+    return 0
+
+
+class _Entry:
+    __slots__ = ("model", "refs", "lock", "load_ms", "loaded_at", "bytes", "error")
+
+    def __init__(self):
+        self.model = None
+        self.refs = 0
+        self.lock = threading.Lock()  # held while loading: one load per name
+        self.load_ms = 0.0
+        self.loaded_at: Optional[float] = None
+        self.bytes = 0
+        self.error: Optional[str] = None
+
+
+class ModelRegistry:
+    """Name -> loaded model, with reference counts and memory accounting."""
+
+    def __init__(self):
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, name: str) -> _Entry:
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                entry = self._entries[name] = _Entry()
+            return entry
+
+    def acquire(self, name: str, loader: Callable):
+        """
+        Shared instance of a model, loading it on first use.
+
+        Args:
+            name: Registry name (e.g. "crash_lstm")
+            loader: Zero-argument callable returning the loaded model; only
+                called when the model is not resident
+        Returns:
+            The model (the loader's exceptions propagate; the next acquire retries)
+        """
+        entry = self._entry(name)
+        with entry.lock:
+            if entry.model is None:
+                start = time.perf_counter()
+                try:
+                    model = loader()
+                except Exception as e:
+                    entry.error = str(e)
+                    raise
+                entry.load_ms = round((time.perf_counter() - start) * 1000, 1)
+                entry.loaded_at = time.time()
+                entry.bytes = model_footprint(model)
+                entry.error = None
+                entry.model = model
+                print(f"[MODEL_REGISTRY] {name} loaded in {entry.load_ms:.0f} ms "
+                      f"({entry.bytes / 1e6:.1f} MB)")
+            entry.refs += 1
+            return entry.model
+
+    def release(self, name: str, unload: bool = False):
+        """Drop one reference; with unload=True the model is freed once nobody holds it."""
+        entry = self._entry(name)
+        with entry.lock:
+            entry.refs = max(0, entry.refs - 1)
+            if unload and entry.refs == 0 and entry.model is not None:
+                entry.model = None
+                entry.bytes = 0
+                print(f"[MODEL_REGISTRY] {name} unloaded")
+
+    def peek(self, name: str):
+        """The resident model, or None (never loads, takes no reference)."""
+        entry = self._entries.get(name)
+        return entry.model if entry is not None else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = dict(self._entries)
+        models = {
+            name: {
+                "loaded": entry.model is not None,
+                "refs": entry.refs,
+                "memory_mb": round(entry.bytes / 1e6, 2),
+                "load_ms": entry.load_ms,
+                "loaded_at": entry.loaded_at,
+                **({"error": entry.error} if entry.error else {}),
+            }
+            for name, entry in entries.items()
+        }
+        return {
+            "models": models,
+            "total_memory_mb": round(sum(e.bytes for e in entries.values()) / 1e6, 2),
+        }
+
+
+# Process-wide registry
+_registry = ModelRegistry()
+
+
+def get_model_registry() -> ModelRegistry:
+    return _registry
+
+
+def model_registry_stats() -> dict:
+    return _registry.stats()
@@ -0,0 +1,380 @@
+"""
+Motion-Energy Gate
+
+Cheap pre-inference check in front of the violence and crash CNNs. Most
+clips from static cameras barely move; they are reported "normal" without
+running the detectors.
+
+Motion score of a clip: the bundle's sampled frames at `size` x `size`
+grayscale (strided, then INTER_AREA), differenced frame to frame; per pair,
+the fraction of pixels changing by more than `pixel_delta` grey levels. The
+score is the largest fraction over all pairs, so a short burst of motion
+anywhere in the clip keeps it above the gate. It reuses the bundle's decoded
+frames and costs a few milliseconds. Codec motion vectors are not used: cv2 does not expose
+them, and a second decode just to read them would cost more than
+differencing frames that are already decoded.
+
+Per-camera threshold, first match wins:
+1. MOTION_GATE["thresholds"][camera_id]
+2. the calibration file (`python -m backend.ai.motion_gate`), which holds
+   margin x the score of the quietest incident clip in Videos/ for the
+   detector the camera runs
+3. MOTION_GATE["default_threshold"]
+
+If the detectors confirm an incident on a clip that scored under that,
+the camera's threshold is lowered to margin x that score.
+
+Safety: after `max_consecutive_gated` gated clips in a row a camera's next
+clip runs the detectors anyway, and calls without a camera id (uploads,
+API) are never gated.
+
+A gated result is {"event": "normal", "confidence": 1 - score, "gated": True,
+"gate": "motion", "model": "motion_gate", "motion_score", "motion_threshold",
+...}. Only the CNNs are gated: YOLO people counting still runs on violence
+cameras. Every other result carries "gated": False and its motion score.
+metrics() reports the gate hit rate per camera and in total.
+
+Usage:
+    python -m backend.ai.motion_gate [--clips 200] [--margin 0.5]
+"""
+
+import argparse
+import json
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from backend.config import (
+    ACCIDENT_THRESHOLD,
+    CRASH_CAMERAS,
+    DEFAULT_CAMERAS,
+    MOTION_GATE,
+    VIOLENCE_THRESHOLD,
+)
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+# Detector a camera runs -> (incident folder, normal folder) in Videos/
+DETECTOR_FOLDERS = {
+    "violence": ("violence", "no_violence"),
+    "crash": ("crash", "no_crash"),
+}
+
+
+def detector_for(camera_id: str) -> str:
+    """CNN detector run_inference uses for a camera."""
+    return "crash" if camera_id in CRASH_CAMERAS else "violence"
+
+
+def motion_score(bundle, size: int = 64, pixel_delta: float = 15) -> float:
+    """
+    Largest fraction of pixels changing by more than pixel_delta between
+    consecutive sampled frames (0..1). Clips with fewer than two frames score 1.
+    """
+    import cv2
+    from backend.ai.preprocessing import resize_stack
+
+    frames = bundle.frames
+    if len(frames) < 2:
+        return 1.0
+    # Stride down close to the target first: area-averaging full-res frames costs far more
+    step = max(1, min(frames.shape[1], frames.shape[2]) // size)
+    small = resize_stack(np.ascontiguousarray(frames[:, ::step, ::step]), size, interpolation=cv2.INTER_AREA)
+    # Channel sum (0..765) instead of a mean over the last axis: plain adds are much faster
+    gray = small[..., 0].astype(np.int16) + small[..., 1] + small[..., 2]
+    changed = np.abs(np.diff(gray, axis=0)) > 3 * pixel_delta
+    return float(changed.mean(axis=(1, 2)).max())
+
+
+class _CameraGate:
+    __slots__ = ("checked", "gated", "forced", "consecutive", "lowered", "scores")
+
+    def __init__(self):
+        self.checked = 0
+        self.gated = 0
+        self.forced = 0
+        self.consecutive = 0
+        self.lowered: Optional[float] = None  # threshold lowered by a confirmed incident
+        self.scores = deque(maxlen=256)
+
+
+class MotionGate:
+    """Skips the CNN detectors on clips whose motion score is under the camera's threshold."""
+
+    def __init__(self, size: int = 64, pixel_delta: float = 15, default_threshold: float = 0.003,
+                 thresholds: Optional[Dict[str, float]] = None, margin: float = 0.5,
+                 calibration_path: Optional[str] = None, max_consecutive: int = 5):
+        """
+        Args:
+            size: Frames are compared at size x size grayscale
+            pixel_delta: Grey-level change that counts a pixel as moving
+            default_threshold: Threshold of cameras with no override or calibration
+            thresholds: Per-camera threshold overrides
+            margin: Fraction of a confirmed incident's score a lowered threshold is set to
+            calibration_path: JSON written by calibrate() (relative to the project root)
+            max_consecutive: Gated clips in a row before a camera runs the detectors anyway
+        """
+        self.size = size
+        self.pixel_delta = pixel_delta
+        self.default_threshold = default_threshold
+        self.overrides = dict(thresholds or {})
+        self.margin = margin
+        self.max_consecutive = max_consecutive
+        self.calibration_path = None
+        if calibration_path:
+            path = Path(calibration_path)
+            self.calibration_path = path if path.is_absolute() else PROJECT_ROOT / path
+        self._calibration = self._load_calibration()
+        self._cameras: Dict[str, _CameraGate] = {}
+        self._lock = threading.Lock()
+
+    def _load_calibration(self) -> dict:
+        if self.calibration_path is None or not self.calibration_path.exists():
+            return {}
+        try:
+            calibration = json.loads(self.calibration_path.read_text())
+        except (OSError, ValueError) as e:
+            print(f"[MOTION_GATE] Ignoring unreadable calibration {self.calibration_path}: {e}")
+            return {}
+        if calibration.get("size") != self.size or calibration.get("pixel_delta") != self.pixel_delta:
+            print("[MOTION_GATE] Calibration was made with other size/pixel_delta, ignoring it")
+            return {}
+        return calibration
+
+    def reload(self):
+        """Re-read the calibration file."""
+        calibration = self._load_calibration()
+        with self._lock:
+            self._calibration = calibration
+
+    def _camera(self, camera_id: str) -> _CameraGate:
+        # Caller holds self._lock
+        gate = self._cameras.get(camera_id)
+        if gate is None:
+            gate = self._cameras[camera_id] = _CameraGate()
+        return gate
+
+    def _base_threshold(self, camera_id: str):
+        # Caller holds self._lock
+        if camera_id in self.overrides:
+            return self.overrides[camera_id], "config"
+        calibrated = self._calibration.get("cameras", {}).get(camera_id)
+        if calibrated is None:
+            calibrated = self._calibration.get("detectors", {}).get(detector_for(camera_id), {}).get("threshold")
+        if calibrated is not None:
+            return calibrated, "calibrated"
+        return self.default_threshold, "default"
+
+    def threshold(self, camera_id: str) -> float:
+        with self._lock:
+            threshold, _ = self._base_threshold(camera_id)
+            gate = self._cameras.get(camera_id)
+            lowered = gate.lowered if gate is not None else None
+        return threshold if lowered is None else min(threshold, lowered)
+
+    def check(self, camera_id: str, bundle) -> dict:
+        """
+        Score one clip against the camera's threshold (decodes the bundle).
+
+        Returns:
+            {"gated": bool, "motion_score": float, "motion_threshold": float}
+        """
+        score = motion_score(bundle, self.size, self.pixel_delta)
+        threshold = self.threshold(camera_id)
+        with self._lock:
+            gate = self._camera(camera_id)
+            gate.checked += 1
+            gate.scores.append(score)
+            gated = score < threshold
+            if gated and gate.consecutive >= self.max_consecutive:
+                gated = False
+                gate.forced += 1
+            if gated:
+                gate.gated += 1
+                gate.consecutive += 1
+            else:
+                gate.consecutive = 0
+        return {"gated": gated, "motion_score": round(score, 4), "motion_threshold": round(threshold, 4)}
+
+    @staticmethod
+    def gated_result(motion: dict, start: float) -> dict:
+        """Detector-shaped "normal" result for a gated clip."""
+        return {
+            "event": "normal",
+            "confidence": round(1.0 - motion["motion_score"], 3),
+            "model": "motion_gate",
+            "gate": "motion",
+            "latency_ms": int((time.time() - start) * 1000),
+            "timestamp": time.time(),
+            **motion,
+        }
+
+    def observe(self, camera_id: str, motion: dict, result: dict):
+        """Lower the camera's threshold when the detectors confirm an incident on a quiet clip."""
+        event = str(result.get("event", "")).lower()
+        confidence = float(result.get("confidence", 0.0) or 0.0)
+        if event == "violence":
+            confirmed = confidence >= VIOLENCE_THRESHOLD
+        elif event in ("car_crash", "crash"):
+            confirmed = confidence >= ACCIDENT_THRESHOLD
+        else:
+            confirmed = False
+        if not confirmed:
+            return
+        lowered = self.margin * motion["motion_score"]
+        with self._lock:
+            gate = self._camera(camera_id)
+            threshold, _ = self._base_threshold(camera_id)
+            current = threshold if gate.lowered is None else min(threshold, gate.lowered)
+            if lowered >= current:
+                return
+            gate.lowered = lowered
+        print(f"[MOTION_GATE] {camera_id}: incident at motion {motion['motion_score']:.4f}, "
+              f"threshold {current:.4f} -> {lowered:.4f}")
+
+    def metrics(self) -> dict:
+        with self._lock:
+            cameras = {}
+            for cid, gate in self._cameras.items():
+                threshold, source = self._base_threshold(cid)
+                if gate.lowered is not None and gate.lowered < threshold:
+                    threshold, source = gate.lowered, "lowered"
+                scores = sorted(gate.scores)
+                cameras[cid] = {
+                    "threshold": round(threshold, 4),
+                    "threshold_source": source,
+                    "checked": gate.checked,
+                    "gated": gate.gated,
+                    "forced": gate.forced,
+                    "hit_rate": round(gate.gated / gate.checked, 3) if gate.checked else None,
+                    "score_p50": round(scores[int(0.5 * (len(scores) - 1))], 4) if scores else None,
+                    "score_p90": round(scores[int(0.9 * (len(scores) - 1))], 4) if scores else None,
+                }
+            calibrated_at = self._calibration.get("created_at")
+        checked = sum(c["checked"] for c in cameras.values())
+        gated = sum(c["gated"] for c in cameras.values())
+        return {
+            "checked": checked,
+            "gated": gated,
+            "hit_rate": round(gated / checked, 3) if checked else None,
+            "calibrated_at": calibrated_at,
+            "cameras": cameras,
+        }
+
+
+# ============================================================================
+# CALIBRATION
+# ============================================================================
+
+def score_folder(folder: str, clips: int, size: int, pixel_delta: float) -> List[float]:
+    """Motion scores of up to `clips` clips of Videos/<folder>."""
+    from backend.ai.export import sample_bundles
+
+    scores = []
+    for bundle in sample_bundles(folder, clips):
+        try:
+            scores.append(motion_score(bundle, size, pixel_delta))
+        except Exception as e:
+            print(f"[MOTION_GATE] Skipping {bundle.video_path}: {e}")
+    return scores
+
+
+def gate_report(incident_scores: List[float], normal_scores: List[float], threshold: float) -> dict:
+    """What a threshold does on labelled clips: normal clips gated, incident clips missed."""
+    gated = sum(1 for s in normal_scores if s < threshold)
+    missed = sum(1 for s in incident_scores if s < threshold)
+    return {
+        "threshold": round(threshold, 4),
+        "normal_clips": len(normal_scores),
+        "gated_normal": gated,
+        "hit_rate": round(gated / len(normal_scores), 3) if normal_scores else None,
+        "incident_clips": len(incident_scores),
+        "missed_incidents": missed,
+    }
+
+
+def calibrate(clips: int = 200, margin: Optional[float] = None, size: Optional[int] = None,
+              pixel_delta: Optional[float] = None) -> dict:
+    """
+    Per-detector thresholds from the labelled clips in Videos/: margin x the
+    score of the quietest incident clip (no incident clip is gated), mapped to
+    every camera by the detector it runs.
+    """
+    margin = MOTION_GATE.get("calibration_margin", 0.5) if margin is None else margin
+    size = MOTION_GATE.get("size", 64) if size is None else size
+    pixel_delta = MOTION_GATE.get("pixel_delta", 15) if pixel_delta is None else pixel_delta
+    detectors = {}
+    for detector, (incident_folder, normal_folder) in DETECTOR_FOLDERS.items():
+        incidents = score_folder(incident_folder, clips, size, pixel_delta)
+        normal = score_folder(normal_folder, clips, size, pixel_delta)
+        if not incidents:
+            print(f"[MOTION_GATE] No clips in Videos/{incident_folder}, {detector} cameras keep the default")
+            continue
+        threshold = margin * min(incidents)
+        detectors[detector] = {
+            **gate_report(incidents, normal, threshold),
+            "quietest_incident": round(min(incidents), 4),
+        }
+    return {
+        "created_at": time.time(),
+        "size": size,
+        "pixel_delta": pixel_delta,
+        "margin": margin,
+        "detectors": detectors,
+        "cameras": {
+            cid: detectors[detector_for(cid)]["threshold"]
+            for cid in DEFAULT_CAMERAS if detector_for(cid) in detectors
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clips", type=int, default=200, help="Clips scored per folder")
+    parser.add_argument("--margin", type=float, default=MOTION_GATE.get("calibration_margin", 0.5))
+    args = parser.parse_args()
+
+    calibration = calibrate(args.clips, args.margin)
+    if not calibration["detectors"]:
+        print("Nothing calibrated.")
+        return
+    print(f"\n{'detector':<10}{'threshold':>10}{'quietest':>10}{'normal':>8}{'gated':>7}{'hit rate':>10}"
+          f"{'incidents':>11}{'missed':>8}")
+    for detector, d in calibration["detectors"].items():
+        print(f"{detector:<10}{d['threshold']:>10.4f}{d['quietest_incident']:>10.4f}{d['normal_clips']:>8}"
+              f"{d['gated_normal']:>7}{d['hit_rate'] or 0:>10.3f}{d['incident_clips']:>11}{d['missed_incidents']:>8}")
+    path = Path(MOTION_GATE.get("calibration_path") or "backend/data/motion_gate.json")
+    path = path if path.is_absolute() else PROJECT_ROOT / path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(calibration, indent=2))
+    print(f"\nWrote {path} ({len(calibration['cameras'])} cameras); the gate loads it at startup")
+
+
+# Process-wide gate
+_gate: Optional[MotionGate] = None
+_gate_lock = threading.Lock()
+
+
+def get_motion_gate() -> MotionGate:
+    global _gate
+    if _gate is None:
+        with _gate_lock:
+            if _gate is None:
+                _gate = MotionGate(
+                    size=MOTION_GATE.get("size", 64),
+                    pixel_delta=MOTION_GATE.get("pixel_delta", 15),
+                    default_threshold=MOTION_GATE.get("default_threshold", 0.003),
+                    thresholds=MOTION_GATE.get("thresholds"),
+                    margin=MOTION_GATE.get("calibration_margin", 0.5),
+                    calibration_path=MOTION_GATE.get("calibration_path"),
+                    max_consecutive=MOTION_GATE.get("max_consecutive_gated", 5),
+                )
+    return _gate
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,534 @@
+"""
+Shared-Backbone Multi-Task Model
+
+The violence classifier and the crash MobileNetV2-LSTM each carry their own
+MobileNetV2 feature extractor, so a clip checked for both events pays for two
+full backbone passes per frame. Here one frozen MobileNetV2 backbone runs once
+per sampled frame and its pooled 1280-d features feed:
+
+- the violence head: Dropout + Linear(1280, 2) per frame, softmax averaged
+  over the frames (the violence clip classifier's reduction)
+- the crash head: LSTM(1280 -> 128) + Linear(128, 2) over the frame sequence
+  (the MobileNetV2-LSTM head)
+
+clip_features() caches the features on the FrameBundle, so feature extraction
+is paid once per clip however many heads read it.
+
+The backbone is one of the fine-tuned checkpoints, frozen
+(MULTITASK["backbone"]): "crash_lstm" reuses the crash model's feature
+extractor, so its crash head is the checkpoint's own LSTM head and crash
+scores match the dedicated model; "mobilenet" reuses the violence
+classifier's, so the violence head comes with it. The other head is trained
+on the frozen backbone's features (labelled clips in Videos/ plus operator
+feedback clips in backend/data/retraining/) and saved with the version of
+the backbone weights it was trained against; heads trained against other
+weights are ignored:
+    python -m backend.ai.retrainer --heads
+    python -m backend.ai.multitask [--events violence crash] [--clips 100] [--epochs 40]
+
+Frames go through one resize (INTER_AREA, the crash model's training resize)
+and ImageNet normalisation for every head. The backbone runs on the
+configured execution backend and is batched across cameras like the other
+models; there is no int8 variant.
+"""
+
+import argparse
+import copy
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from backend.ai.backends import get_backend
+from backend.ai.model_registry import get_model_registry
+from backend.ai.preprocessing import IMAGENET_MEAN, IMAGENET_STD, preprocess_clip
+from backend.ai.result_cache import model_version
+from backend.config import ACCIDENT_THRESHOLD, MODEL_PATHS, MULTITASK
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+HEADS_PATH = PROJECT_ROOT / MODEL_PATHS["multitask_heads"]
+FEEDBACK_DIR = PROJECT_ROOT / "backend" / "data" / "retraining"
+MODEL_NAME = "multitask_mobilenetv2"
+EVENTS = ("violence", "crash")
+FEATURE_DIM = 1280
+
+# Head the backbone's own checkpoint provides, per MULTITASK["backbone"]
+NATIVE_HEAD = {"crash_lstm": "crash", "mobilenet": "violence"}
+
+_model = None
+_model_lock = threading.Lock()
+_stats = {"clips": 0, "backbone_passes": 0, "frames": 0, "heads": {event: 0 for event in EVENTS}}
+_stats_lock = threading.Lock()
+
+
+# ============================================================================
+# MODEL
+# ============================================================================
+
+class SharedBackbone(nn.Module):
+    """MobileNetV2 features + global average pool: (N, 3, H, W) -> (N, 1280)."""
+
+    def __init__(self):
+        super().__init__()
+        from torchvision.models import mobilenet_v2
+
+        self.features = mobilenet_v2(weights=None).features
+        self.pool = nn.AdaptiveAvgPool2d((1, 1))
+
+    def forward(self, x):
+        return self.pool(self.features(x)).flatten(1)
+
+
+class ViolenceHead(nn.Module):
+    """Per-frame classifier: (T, 1280) -> (T, num_classes); same layout as the violence classifier."""
+
+    def __init__(self, num_classes: int = 2):
+        super().__init__()
+        layers = [nn.Dropout(0.2), nn.Linear(FEATURE_DIM, num_classes)]
+        if num_classes == 1:
+            layers.append(nn.Sigmoid())
+        self.classifier = nn.Sequential(*layers)
+
+    def forward(self, feats):
+        return self.classifier(feats)
+
+    def probability(self, feats) -> float:
+        outputs = self(feats)
+        if outputs.shape[1] == 2:
+            return torch.softmax(outputs, dim=1)[:, 1].mean().item()
+        return outputs.mean().item()
+
+
+class CrashHead(nn.Module):
+    """Sequence classifier: (B, T, 1280) -> (B, 2); same layout as MobileNetV2_LSTM's head."""
+
+    def __init__(self, lstm_hidden: int = 128, num_classes: int = 2, dropout: float = 0.5):
+        super().__init__()
+        self.lstm = nn.LSTM(input_size=FEATURE_DIM, hidden_size=lstm_hidden, batch_first=True)
+        self.dropout = nn.Dropout(dropout)
+        self.fc = nn.Linear(lstm_hidden, num_classes)
+
+    def forward(self, feats):
+        out, _ = self.lstm(feats)
+        return self.fc(self.dropout(out[:, -1, :]))
+
+    def probability(self, feats) -> float:
+        return torch.softmax(self(feats[None]), dim=1)[0, 1].item()
+
+
+class MultiTaskModel(nn.Module):
+    """Frozen shared backbone plus the heads available for it, keyed by event."""
+
+    def __init__(self, source: str, backbone: SharedBackbone, heads: Dict[str, nn.Module], version: str,
+                 trained: Sequence[str] = ()):
+        super().__init__()
+        self.source = source
+        self.version = version
+        self.trained = list(trained)  # heads from HEADS_PATH (the rest come with the backbone checkpoint)
+        self.backbone = backbone
+        self.heads = nn.ModuleDict(heads)
+
+
+def backbone_path(source: Optional[str] = None) -> Path:
+    """Weights file the shared backbone is taken from."""
+    source = source or MULTITASK.get("backbone", "crash_lstm")
+    if source == "crash_lstm":
+        from backend.ai.accident_model import CRASH_MODEL_PATH
+        return CRASH_MODEL_PATH
+    if source == "mobilenet":
+        from backend.ai.violence_detector.inference import MOBILENET_PATH
+        return MOBILENET_PATH
+    raise ValueError(f"Unknown multi-task backbone: {source}")
+
+
+def _read_state(path: Path) -> Dict[str, torch.Tensor]:
+    if not path.exists():
+        raise FileNotFoundError(f"Model not found: {path}")
+    try:
+        state = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+    except RuntimeError:
+        # Legacy (non-zipfile) checkpoints cannot be memory-mapped
+        state = torch.load(path, map_location="cpu", weights_only=True)
+    if any(key.startswith("backbone.features.") for key in state):
+        # Wrapped violence classifier (see violence_detector.inference.load_mobilenet_model)
+        state = {key[len("backbone."):] if key.startswith("backbone.") else key: v for key, v in state.items()}
+    return state
+
+
+def _split_checkpoint(source: str, state: Dict[str, torch.Tensor]) -> Tuple[Dict, Dict]:
+    """(backbone state with features.* keys, native head state) of a detector checkpoint."""
+    if source == "crash_lstm":
+        backbone = {"features." + key[len("backbone."):]: v for key, v in state.items() if key.startswith("backbone.")}
+        head = {key: v for key, v in state.items() if key.startswith(("lstm.", "fc."))}
+    else:
+        backbone = {key: v for key, v in state.items() if key.startswith("features.")}
+        head = {key: v for key, v in state.items() if key.startswith("classifier.")}
+    return backbone, head
+
+
+def _build_head(event: str, state: Dict[str, torch.Tensor]) -> nn.Module:
+    with torch.device("meta"):
+        if event == "violence":
+            head = ViolenceHead(num_classes=state["classifier.1.weight"].shape[0])
+        else:
+            head = CrashHead(lstm_hidden=state["fc.weight"].shape[1], num_classes=state["fc.weight"].shape[0])
+    head.load_state_dict(state, assign=True)
+    return head.eval()
+
+
+def read_heads(source: str, version: str) -> Dict[str, Dict[str, torch.Tensor]]:
+    """Trained head states in HEADS_PATH for this backbone version ({} if missing or stale)."""
+    if not HEADS_PATH.exists():
+        return {}
+    saved = torch.load(HEADS_PATH, map_location="cpu", weights_only=True)
+    if saved.get("backbone") != source or saved.get("backbone_version") != version:
+        print(f"[MULTITASK] {HEADS_PATH.name} was trained against another backbone "
+              f"({saved.get('backbone')} {saved.get('backbone_version')}), ignoring it")
+        return {}
+    return saved.get("heads", {})
+
+
+def load_multitask_model(source: Optional[str] = None) -> MultiTaskModel:
+    """
+    Frozen backbone of `source` plus its native head and any trained heads
+    matching its weights. Built on the meta device from memory-mapped
+    checkpoints like crash_detector.model_architecture.load_for_inference.
+    """
+    source = source or MULTITASK.get("backbone", "crash_lstm")
+    path = backbone_path(source)
+    version = model_version(str(path))
+    backbone_state, native_state = _split_checkpoint(source, _read_state(path))
+    with torch.device("meta"):
+        backbone = SharedBackbone()
+    backbone.load_state_dict(backbone_state, assign=True)
+    backbone.eval().requires_grad_(False)
+
+    heads = {}
+    if native_state:
+        heads[NATIVE_HEAD[source]] = _build_head(NATIVE_HEAD[source], native_state)
+    trained = read_heads(source, version)
+    for event, state in trained.items():
+        heads[event] = _build_head(event, state)  # trained heads replace the native one
+    print(f"[MULTITASK] Backbone from {path.name} ({source}), heads: {', '.join(sorted(heads)) or 'none'}")
+    return MultiTaskModel(source, backbone, heads, version, trained=sorted(trained))
+
+
+def get_multitask_model() -> MultiTaskModel:
+    """Shared multi-task model (one copy per process, see backend.ai.model_registry)."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = get_model_registry().acquire("multitask", load_multitask_model)
+    return _model
+
+
+def reload_multitask_model():
+    """Drop the loaded model so the next clip picks up newly trained heads."""
+    global _model
+    with _model_lock:
+        if _model is not None:
+            _model = None
+            get_model_registry().release("multitask", unload=True)
+
+
+def available_heads() -> List[str]:
+    """Events the shared model has a head for."""
+    return list(get_multitask_model().heads.keys())
+
+
+def backbone_backend():
+    """Configured execution backend (torch or onnxruntime) for the shared backbone."""
+    return get_backend("multitask", lambda: get_multitask_model().backbone,
+                       weights_path=backbone_path(), batch_name="multitask_backbone")
+
+
+# ============================================================================
+# INFERENCE
+# ============================================================================
+
+def clip_features(bundle, img_size: int = 224) -> np.ndarray:
+    """
+    (T, 1280) float32 backbone features of a FrameBundle, computed once per
+    clip and img_size and cached on the bundle for every head that reads them.
+    """
+    import cv2
+
+    def compute():
+        frames = bundle.resized(img_size, cv2.INTER_AREA)
+        inputs = preprocess_clip(frames, img_size, IMAGENET_MEAN, IMAGENET_STD, layout="NCHW")
+        feats = backbone_backend().run(inputs)
+        with _stats_lock:
+            _stats["backbone_passes"] += 1
+            _stats["frames"] += len(feats)
+        return feats
+
+    return bundle.derived(("multitask_features", img_size), compute)
+
+
+def detect_multitask_frames(bundle, events: Sequence[str] = EVENTS, img_size: int = 224) -> Dict:
+    """
+    Run the requested event heads on one shared backbone pass.
+
+    Args:
+        bundle: backend.ai.frame_bundle.FrameBundle for the clip
+        events: "violence" and/or "crash"
+        img_size: Backbone input size (lowered by the QoS ladder)
+
+    Returns:
+        {
+            "violence": {"event": "violence" | "normal", "confidence", ...},
+            "crash": {"event": "car_crash", "confidence": accident probability, ...},
+            "model": "multitask_mobilenetv2",
+            "backbone": backbone source,
+            "latency_ms": int,
+            "timestamp": float
+        }
+        Events without a head are left out (callers run the dedicated model);
+        on failure {"event": "error", "error": str, ...}.
+    """
+    from backend.ai.violence_detector.inference import THRESHOLD
+
+    start = time.time()
+    try:
+        model = get_multitask_model()
+        result = {"model": MODEL_NAME, "backbone": model.source}
+        served = [event for event in events if event in model.heads]
+        if served:
+            feats = torch.from_numpy(clip_features(bundle, img_size))
+            with torch.inference_mode():
+                probs = {event: model.heads[event].probability(feats) for event in served}
+        with _stats_lock:
+            _stats["clips"] += 1
+            for event in served:
+                _stats["heads"][event] += 1
+        now = time.time()
+        latency_ms = int((now - start) * 1000)
+        for event in served:
+            prob = probs[event]
+            if event == "violence":
+                label = "violence" if prob >= THRESHOLD else "normal"
+                confidence = prob if label == "violence" else 1.0 - prob
+            else:
+                label, confidence = "car_crash", prob
+            result[event] = {
+                "event": label,
+                "confidence": round(float(confidence), 3) if event == "violence" else float(confidence),
+                "model": MODEL_NAME,
+                "shared_backbone": True,
+                "latency_ms": latency_ms,
+                "timestamp": now,
+            }
+        result["latency_ms"] = latency_ms
+        result["timestamp"] = now
+        return result
+    except Exception as e:
+        print(f"[MULTITASK] Inference error on {bundle.video_path}: {e}")
+        return {
+            "event": "error",
+            "model": MODEL_NAME,
+            "latency_ms": int((time.time() - start) * 1000),
+            "timestamp": time.time(),
+            "error": str(e),
+        }
+
+
+def multitask_stats() -> dict:
+    """Clips served by detect_multitask_frames, backbone passes (one per clip and input size) and head runs."""
+    with _stats_lock:
+        stats = copy.deepcopy(_stats)
+    stats["heads_loaded"] = sorted(_model.heads.keys()) if _model is not None else None
+    stats["heads_trained"] = _model.trained if _model is not None else None
+    return stats
+
+
+# ============================================================================
+# HEAD TRAINING (frozen backbone)
+# ============================================================================
+
+def training_clips(event: str, clips: int) -> List[Tuple[str, int]]:
+    """(clip path, label) for one event: Videos/<incident|normal> plus operator feedback clips."""
+    from backend.ai.export import VIDEO_DIR
+    from backend.ai.motion_gate import DETECTOR_FOLDERS
+
+    samples = []
+    for label, folder in zip((1, 0), DETECTOR_FOLDERS[event]):
+        clip_dir = VIDEO_DIR / folder
+        if clip_dir.is_dir():
+            paths = sorted(p for p in clip_dir.iterdir() if p.suffix.lower() == ".mp4")[:clips]
+            samples += [(str(p), label) for p in paths]
+    # Confirmed incidents / rejected false alarms saved by incident_storage ("<type>_<ts>_<name>")
+    for label, category in ((1, "true_positives"), (0, "false_positives")):
+        clip_dir = FEEDBACK_DIR / category
+        if clip_dir.is_dir():
+            samples += [(str(p), label) for p in sorted(clip_dir.glob(f"{event}_*.mp4"))]
+    return samples
+
+
+def extract_features(samples: List[Tuple[str, int]], img_size: int = 224) -> List[Tuple[np.ndarray, int]]:
+    """Backbone features of each clip (one pass per clip); undecodable clips are skipped."""
+    from backend.ai.frame_bundle import FrameBundle
+
+    features = []
+    for path, label in samples:
+        try:
+            features.append((clip_features(FrameBundle(path), img_size), label))
+        except Exception as e:
+            print(f"[MULTITASK] skipping {path}: {e}")
+    return features
+
+
+def split_holdout(samples: list, holdout: float) -> Tuple[list, list]:
+    """Deterministic split keeping every k-th clip of each label for validation."""
+    if holdout <= 0:
+        return list(samples), []
+    every = max(2, round(1 / holdout))
+    train, val = [], []
+    for label in (0, 1):
+        for i, sample in enumerate(s for s in samples if s[1] == label):
+            (val if i % every == every - 1 else train).append(sample)
+    return train, val
+
+
+def clip_accuracy(event: str, head: nn.Module, samples: list) -> Optional[float]:
+    """Clip-level accuracy at the production threshold (None without clips)."""
+    from backend.ai.violence_detector.inference import THRESHOLD
+
+    if not samples:
+        return None
+    threshold = THRESHOLD if event == "violence" else ACCIDENT_THRESHOLD
+    head.eval()
+    with torch.inference_mode():
+        correct = sum(int((head.probability(torch.from_numpy(f)) >= threshold) == bool(label)) for f, label in samples)
+    return round(correct / len(samples), 3)
+
+
+def fit_head(event: str, train: list, init: Optional[nn.Module] = None, epochs: int = 40,
+             lr: float = 1e-3, seed: int = 0) -> nn.Module:
+    """
+    Train one head on frozen-backbone features with class-balanced cross
+    entropy, warm-starting from `init` when given. The violence head trains
+    on frames (each labelled with its clip), the crash head on whole clip
+    sequences.
+    """
+    torch.manual_seed(seed)
+    rng = random.Random(seed)
+    if init is not None and (event == "crash" or init.classifier[1].out_features == 2):
+        head = copy.deepcopy(init)  # warm start from the head in use
+    else:
+        head = ViolenceHead() if event == "violence" else CrashHead()
+    head.requires_grad_(True).train()
+
+    counts = np.bincount([label for _, label in train], minlength=2).astype(np.float32)
+    weight = torch.from_numpy(counts.sum() / np.maximum(counts, 1) / 2)
+    optimizer = torch.optim.Adam(head.parameters(), lr=lr)
+    if event == "violence":
+        x = torch.from_numpy(np.concatenate([f for f, _ in train]))
+        y = torch.cat([torch.full((len(f),), label, dtype=torch.long) for f, label in train])
+        batches = lambda: torch.randperm(len(x)).split(64)
+        step = lambda idx: (head(x[idx]), y[idx])
+    else:
+        sequences = [(torch.from_numpy(f)[None], torch.tensor([label])) for f, label in train]
+        batches = lambda: rng.sample(range(len(sequences)), len(sequences))
+        step = lambda i: (head(sequences[i][0]), sequences[i][1])
+
+    for _ in range(epochs):
+        for batch in batches():
+            logits, target = step(batch)
+            loss = F.cross_entropy(logits, target, weight=weight)
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+    return head.eval().requires_grad_(False)
+
+
+def train_heads(events: Optional[Sequence[str]] = None, clips: Optional[int] = None,
+                epochs: Optional[int] = None, lr: Optional[float] = None,
+                holdout: Optional[float] = None, save: bool = True) -> Dict:
+    """
+    Train heads against the frozen shared backbone and save them to HEADS_PATH.
+
+    Features are extracted once per clip; only the heads are trained. Heads
+    already present for the same backbone version are kept unless retrained.
+
+    Args:
+        events: Heads to train (default: those the backbone checkpoint lacks)
+        clips: Clips per Videos/ folder (default MULTITASK["train_clips"])
+        epochs / lr / holdout: Default to MULTITASK
+        save: Write HEADS_PATH and reload the serving model
+
+    Returns:
+        {"backbone", "backbone_version", "heads_path", "events": {event: metrics}}
+    """
+    source = MULTITASK.get("backbone", "crash_lstm")
+    events = list(events or [event for event in EVENTS if event != NATIVE_HEAD.get(source)])
+    clips = clips or MULTITASK.get("train_clips", 100)
+    epochs = epochs or MULTITASK.get("epochs", 40)
+    lr = lr or MULTITASK.get("learning_rate", 1e-3)
+    holdout = MULTITASK.get("holdout", 0.25) if holdout is None else holdout
+
+    model = get_multitask_model()
+    report = {"backbone": source, "backbone_version": model.version, "heads_path": str(HEADS_PATH), "events": {}}
+    trained = {}
+    for event in events:
+        start = time.perf_counter()
+        samples = extract_features(training_clips(event, clips))
+        labels = [label for _, label in samples]
+        if labels.count(0) == 0 or labels.count(1) == 0:
+            print(f"[MULTITASK] {event}: need incident and normal clips, got {labels.count(1)} / {labels.count(0)}")
+            report["events"][event] = {"status": "skipped", "clips": len(samples)}
+            continue
+        extracted = time.perf_counter()
+        train, val = split_holdout(samples, holdout)
+        current = model.heads[event] if event in model.heads else None
+        head = fit_head(event, train, init=current, epochs=epochs, lr=lr)
+        metrics = {
+            "status": "trained",
+            "clips": len(samples),
+            "train_clips": len(train),
+            "holdout_clips": len(val),
+            "train_accuracy": clip_accuracy(event, head, train),
+            "holdout_accuracy": clip_accuracy(event, head, val),
+            "previous_holdout_accuracy": clip_accuracy(event, current, val) if current is not None else None,
+            "feature_s": round(extracted - start, 1),
+            "train_s": round(time.perf_counter() - extracted, 1),
+        }
+        print(f"[MULTITASK] {event} head: {metrics}")
+        trained[event] = head.state_dict()
+        report["events"][event] = metrics
+
+    if save and trained:
+        heads = dict(read_heads(source, model.version))
+        heads.update(trained)
+        HEADS_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp = HEADS_PATH.with_suffix(".tmp")
+        torch.save({"backbone": source, "backbone_version": model.version, "heads": heads,
+                    "metrics": {e: report["events"][e] for e in trained}, "trained_at": time.time()}, tmp)
+        os.replace(tmp, HEADS_PATH)
+        print(f"[MULTITASK] Saved heads {', '.join(sorted(heads))} to {HEADS_PATH}")
+        reload_multitask_model()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", nargs="+", choices=EVENTS, help="Heads to train (default: non-native)")
+    parser.add_argument("--clips", type=int, default=None, help="Clips per Videos/ folder")
+    parser.add_argument("--epochs", type=int, default=None)
+    parser.add_argument("--lr", type=float, default=None)
+    parser.add_argument("--holdout", type=float, default=None, help="Fraction of clips held out")
+    parser.add_argument("--dry-run", action="store_true", help="Train and report without saving")
+    args = parser.parse_args()
+
+    train_heads(args.events, args.clips, args.epochs, args.lr, args.holdout, save=not args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
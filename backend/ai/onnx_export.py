@@ -0,0 +1,234 @@
+"""
+ONNX Export for the ONNX Runtime Backend
+
+Exports the violence MobileNet (and X3D), the MobileNetV2-LSTM crash model
+and YOLOv8n to ONNX with dynamic batch, frame-count and image-size axes (the
+QoS ladder in backend/config.py lowers frames and img_size under load),
+checks each against PyTorch on sample clips from Videos/ and on one
+reduced-quality clip, and records it in backend/models/onnx/manifest.json
+for backend/ai/backends.py. Select the runtime per model with
+INFERENCE_BACKEND in backend/config.py.
+
+- mobilenet, x3d, crash_lstm: torch.onnx.export (TorchScript-based exporter);
+  parity is the max abs diff of the raw outputs
+- people_counter: Ultralytics ONNX exporter (dynamic shapes); parity is the
+  per-frame person-count difference between Ultralytics and the numpy
+  pre/post-processing used by the ONNX Runtime path
+
+Latency is measured at the configured ORT thread count, with torch pinned
+to the same intra-op thread count for a like-for-like comparison.
+
+Usage:
+    python -m backend.ai.onnx_export [--models mobilenet crash_lstm people_counter] [--clips 4] [--repeat 5]
+"""
+
+import argparse
+import hashlib
+import json
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import torch
+
+from backend.ai.backends import ONNX_DIR, ONNX_MANIFEST_PATH, OnnxRuntimeBackend, read_onnx_manifest
+from backend.ai.export import PROJECT_ROOT, TORCH_SPECS, sample_bundles
+from backend.ai.result_cache import model_version
+from backend.config import INFERENCE_BACKEND
+
+OPSET = 17
+EXPORT_NAMES = list(TORCH_SPECS) + ["people_counter"]
+
+# Input axes left dynamic per model: batch, plus the frames/img_size the QoS ladder varies
+DYNAMIC_AXES = {
+    "mobilenet": {0: "batch", 2: "height", 3: "width"},                 # (frames, 3, H, W)
+    "x3d": {0: "batch", 2: "frames", 3: "height", 4: "width"},          # (1, 3, T, H, W)
+    "crash_lstm": {0: "batch", 1: "frames", 3: "height", 4: "width"},   # (1, T, 3, H, W)
+}
+REDUCED_AXES = {"batch": None, "frames": 8, "height": 160, "width": 160}  # "small" QoS rung shape
+
+
+def _artifact_name(name: str, weights_path) -> str:
+    tag = hashlib.sha1(model_version(str(weights_path)).encode("utf-8")).hexdigest()[:10]
+    return f"{name}-{tag}.onnx"
+
+
+def _register(name: str, entry: Dict):
+    manifest = read_onnx_manifest()
+    stale = manifest.get(name, {}).get("artifact")
+    if stale and stale != entry["artifact"]:
+        (ONNX_DIR / stale).unlink(missing_ok=True)
+    manifest[name] = entry
+    ONNX_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = ONNX_MANIFEST_PATH.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    tmp.replace(ONNX_MANIFEST_PATH)
+
+
+def _latency_ms(fn, repeat: int) -> float:
+    fn()  # warmup
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return round((time.perf_counter() - start) * 1000 / repeat, 2)
+
+
+def _relative(path: Path) -> str:
+    return str(path.relative_to(PROJECT_ROOT)) if path.is_relative_to(PROJECT_ROOT) else str(path)
+
+
+def export_torch_model(name: str, clips: int = 4, repeat: int = 5, tolerance: float = 1e-4) -> Dict:
+    """Export one torch detector to ONNX and compare it with eager PyTorch."""
+    spec = TORCH_SPECS[name]()
+    weights = Path(spec["weights"])
+    if not weights.exists():
+        raise FileNotFoundError(f"Weights not found: {weights}")
+
+    eager = spec["build"]().eval()
+    samples = []
+    for bundle in sample_bundles(spec["folder"], clips):
+        try:
+            samples.append(spec["inputs"](bundle))
+        except Exception as e:
+            print(f"[ONNX] {name}: skipping {bundle.video_path}: {e}")
+    if not samples:
+        print(f"[ONNX] {name}: no sample clips in Videos/{spec['folder']}, using random inputs")
+        samples = [torch.randn(spec["example_shape"]) for _ in range(max(clips, 1))]
+    samples.append(torch.cat([samples[0], samples[-1]], dim=0))  # dynamic batch axis check
+    axes = DYNAMIC_AXES[name]
+    reduced = list(samples[0].shape)
+    for dim, axis in axes.items():
+        reduced[dim] = REDUCED_AXES[axis] or reduced[dim]
+    samples.append(torch.randn(reduced))  # dynamic frames / size axes check
+
+    ONNX_DIR.mkdir(parents=True, exist_ok=True)
+    artifact = _artifact_name(name, weights)
+    with torch.no_grad():
+        torch.onnx.export(
+            eager, (samples[0],), str(ONNX_DIR / artifact),
+            input_names=["input"], output_names=["output"],
+            dynamic_axes={"input": axes, "output": {0: "batch"}},
+            opset_version=OPSET, dynamo=False,
+        )
+        session = OnnxRuntimeBackend(ONNX_DIR / artifact)
+        max_diff = max(float(np.abs(session.run(x.numpy()) - eager(x).numpy()).max()) for x in samples)
+
+        threads = torch.get_num_threads()
+        torch.set_num_threads(INFERENCE_BACKEND.get("intra_op_threads", 1))
+        try:
+            x = samples[0]
+            latency = {
+                "torch": _latency_ms(lambda: eager(x), repeat),
+                "onnxruntime": _latency_ms(lambda: session.run(x.numpy()), repeat),
+            }
+        finally:
+            torch.set_num_threads(threads)
+
+    return {
+        "artifact": artifact,
+        "weights": _relative(weights),
+        "weights_version": model_version(str(weights)),
+        "opset": OPSET,
+        "exported_at": time.time(),
+        "input_shape": list(samples[0].shape),
+        "dynamic_axes": sorted(set(axes.values())),
+        "parity_max_abs_diff": max_diff,
+        "parity_ok": max_diff <= tolerance,
+        "latency_ms": latency,
+    }
+
+
+def export_people_counter(clips: int = 4, repeat: int = 5) -> Dict:
+    """Export YOLOv8n with dynamic shapes; compare person counts with Ultralytics."""
+    from ultralytics import YOLO
+    from backend.ai.people_counter.yolov8 import IMG_SIZE, MODEL_PATH, PERSON_CLASS, count_people_onnx
+
+    if not MODEL_PATH.exists():
+        raise FileNotFoundError(f"Weights not found: {MODEL_PATH}")
+
+    eager = YOLO(str(MODEL_PATH))
+    exported = Path(YOLO(str(MODEL_PATH)).export(format="onnx", imgsz=IMG_SIZE, dynamic=True, opset=OPSET))
+    ONNX_DIR.mkdir(parents=True, exist_ok=True)
+    artifact = _artifact_name("people_counter", MODEL_PATH)
+    shutil.move(str(exported), str(ONNX_DIR / artifact))
+    session = OnnxRuntimeBackend(ONNX_DIR / artifact)
+
+    batches = [b.frames for b in sample_bundles("violence", clips)]
+    if not batches:
+        batches = [np.random.randint(0, 255, (4, 360, 640, 3), dtype=np.uint8)]
+
+    def eager_counts(frames):
+        images = [np.ascontiguousarray(f[..., ::-1]) for f in frames]
+        return [int((r.boxes.cls.cpu().numpy() == PERSON_CLASS).sum()) for r in eager(images, verbose=False)]
+
+    max_diff = 0
+    for frames in batches:
+        diffs = np.abs(np.subtract(eager_counts(frames), count_people_onnx(session, frames)))
+        max_diff = max(max_diff, int(diffs.max()))
+
+    threads = torch.get_num_threads()
+    torch.set_num_threads(INFERENCE_BACKEND.get("intra_op_threads", 1))
+    try:
+        frames = batches[0]
+        latency = {
+            "torch": _latency_ms(lambda: eager_counts(frames), repeat),
+            "onnxruntime": _latency_ms(lambda: count_people_onnx(session, frames), repeat),
+        }
+    finally:
+        torch.set_num_threads(threads)
+
+    return {
+        "artifact": artifact,
+        "weights": _relative(MODEL_PATH),
+        "weights_version": model_version(str(MODEL_PATH)),
+        "opset": OPSET,
+        "exported_at": time.time(),
+        "input_shape": [len(batches[0]), 3, IMG_SIZE, IMG_SIZE],
+        "parity_max_abs_diff": max_diff,
+        # Letterbox/NMS details differ slightly from Ultralytics; allow one person
+        "parity_ok": max_diff <= 1,
+        "latency_ms": latency,
+    }
+
+
+def export_all(names: List[str], clips: int = 4, repeat: int = 5) -> Dict:
+    """Export the given models to ONNX, update the manifest, and return the new entries."""
+    results = {}
+    for name in names:
+        print(f"[ONNX] Exporting {name}...")
+        try:
+            entry = export_people_counter(clips, repeat) if name == "people_counter" else export_torch_model(name, clips, repeat)
+        except Exception as e:
+            print(f"[ONNX] {name}: export failed: {e}")
+            continue
+        _register(name, entry)
+        results[name] = entry
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", nargs="+", choices=EXPORT_NAMES, default=EXPORT_NAMES)
+    parser.add_argument("--clips", type=int, default=4, help="Sample clips per model for the parity check")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per latency measurement")
+    args = parser.parse_args()
+
+    results = export_all(args.models, args.clips, args.repeat)
+    if not results:
+        print("Nothing exported.")
+        return
+    print(f"\nThreads: intra_op={INFERENCE_BACKEND.get('intra_op_threads', 1)} inter_op={INFERENCE_BACKEND.get('inter_op_threads', 1)}")
+    print(f"{'model':<16}{'parity':>12}{'torch ms':>11}{'ort ms':>10}{'speedup':>9}  artifact")
+    for name, entry in results.items():
+        latency = entry["latency_ms"]
+        parity = f"{entry['parity_max_abs_diff']:.2e}" + ("" if entry["parity_ok"] else " !")
+        speedup = latency["torch"] / latency["onnxruntime"]
+        print(f"{name:<16}{parity:>12}{latency['torch']:>11.1f}{latency['onnxruntime']:>10.1f}{speedup:>8.2f}x  {entry['artifact']}")
+    print(f"\nManifest: {ONNX_MANIFEST_PATH}")
+
+
+if __name__ == "__main__":
+    main()
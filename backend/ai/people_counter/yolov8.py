@@ -1,49 +1,160 @@
 """
 YOLOv8 People Counter Integration
 
-This module loads a YOLOv8 model and counts people in a video.
+This module loads a YOLOv8 model and counts people in a video. It also runs
+the downscaled object-presence pass of the detector cascade (people and
+vehicles on a few frames, see backend.ai.inference.run_inference).
 Requires ultralytics package: pip install ultralytics
+(not needed with the onnxruntime backend, which does its own pre/post-processing)
 """
+import threading
 import time
 from pathlib import Path
-from ultralytics import YOLO
-import cv2
+import numpy as np
+
+from backend.ai.backends import backend_name, get_onnx_backend
+from backend.ai.model_registry import get_model_registry
 
 MODEL_PATH = Path(__file__).parent.parent.parent / "models" / "yolov8n.pt"
 
+# Ultralytics predict() defaults, mirrored by the ONNX Runtime path
+IMG_SIZE = 640
+CONF_THRESHOLD = 0.25
+IOU_THRESHOLD = 0.7
+PERSON_CLASS = 0  # COCO
+VEHICLE_CLASSES = (2, 3, 5, 7)  # COCO car, motorcycle, bus, truck
+
 # Global model cache
 _yolo_model = None
+_yolo_lock = threading.Lock()
+
+def _load_yolo():
+    from ultralytics import YOLO
+    from backend.ai.export import optimized_artifact_path
+    # Prefer the TorchScript export (python -m backend.ai.export), fall back to the .pt weights
+    artifact = optimized_artifact_path("people_counter", MODEL_PATH)
+    return YOLO(str(artifact), task="detect") if artifact else YOLO(str(MODEL_PATH))
 
 def load_yolo_model():
     global _yolo_model
     if _yolo_model is None:
-        _yolo_model = YOLO(str(MODEL_PATH))
+        with _yolo_lock:
+            if _yolo_model is None:
+                _yolo_model = get_model_registry().acquire("people_counter", _load_yolo)
     return _yolo_model
 
 def detect_people_count(video_path: str) -> dict:
-    model = load_yolo_model()
-    cap = cv2.VideoCapture(video_path)
-    people_count = 0
-    frame_count = 0
+    from backend.ai.frame_bundle import FrameBundle
+    return detect_people_count_frames(FrameBundle(video_path))
+
+def detect_people_count_frames(bundle) -> dict:
+    """Count people on the sampled frames of a shared FrameBundle in one batched call."""
+    session = get_onnx_backend("people_counter", MODEL_PATH) if backend_name("people_counter") == "onnxruntime" else None
+    model = load_yolo_model() if session is None else None
     start = time.time()
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-        results = model(frame, verbose=False)
+    if session is not None:
+        counts = count_people_onnx(session, bundle.frames)
+    else:
+        # Ultralytics expects BGR numpy images, like cv2.VideoCapture produces
+        images = [np.ascontiguousarray(frame[..., ::-1]) for frame in bundle.frames]
+        results = model(images, verbose=False)
         # Count people (class 0 in COCO)
-        n_people = sum(int(cls == 0) for cls in results[0].boxes.cls.cpu().numpy())
-        people_count += n_people
-        frame_count += 1
-        if frame_count >= 16:
-            break
-    cap.release()
+        counts = [int((r.boxes.cls.cpu().numpy() == PERSON_CLASS).sum()) for r in results]
+    people_count = sum(counts)
+    frame_count = len(counts)
     avg_count = int(round(people_count / frame_count)) if frame_count else 0
     latency = int((time.time() - start) * 1000)
     return {
         "count": avg_count,
+        "max_count": max(counts, default=0),  # Most people in one frame (cascade gate)
         "confidence": 0.95,  # Placeholder, can be improved
         "model": "yolov8n.pt",
         "latency_ms": latency,
         "timestamp": time.time()
     }
+
+
+def detect_objects_frames(bundle, frames: int = 4, img_size: int = 320) -> dict:
+    """
+    Object-presence pass for the detector cascade: YOLO at img_size on `frames`
+    evenly spaced frames of the bundle.
+
+    Returns:
+        {"people": most people in one frame, "vehicles": most vehicles in one frame,
+         "frames", "img_size", "model", "latency_ms", "timestamp"}
+    """
+    session = get_onnx_backend("people_counter", MODEL_PATH) if backend_name("people_counter") == "onnxruntime" else None
+    model = load_yolo_model() if session is None else None
+    all_frames = bundle.frames
+    picks = np.unique(np.linspace(0, len(all_frames) - 1, min(frames, len(all_frames))).round().astype(int))
+    sampled = all_frames[picks]
+    classes = (PERSON_CLASS,) + VEHICLE_CLASSES
+    start = time.time()
+    if session is not None:
+        per_frame = count_classes_onnx(session, sampled, classes, size=img_size)
+    else:
+        images = [np.ascontiguousarray(frame[..., ::-1]) for frame in sampled]
+        results = model(images, imgsz=img_size, classes=list(classes), verbose=False)
+        per_frame = []
+        for r in results:
+            cls = r.boxes.cls.cpu().numpy().astype(int)
+            per_frame.append({c: int((cls == c).sum()) for c in classes})
+    return {
+        "people": max((c[PERSON_CLASS] for c in per_frame), default=0),
+        "vehicles": max((sum(c[v] for v in VEHICLE_CLASSES) for c in per_frame), default=0),
+        "frames": len(sampled),
+        "img_size": img_size,
+        "model": "yolov8n.pt",
+        "latency_ms": int((time.time() - start) * 1000),
+        "timestamp": time.time(),
+    }
+
+
+def letterbox_batch(frames: np.ndarray, size: int = IMG_SIZE) -> np.ndarray:
+    """(N, H, W, 3) uint8 RGB -> (N, 3, size, size) float32 in [0, 1], aspect kept, padded with gray."""
+    import cv2
+
+    n, h, w = frames.shape[:3]
+    scale = min(size / h, size / w)
+    new_w, new_h = int(round(w * scale)), int(round(h * scale))
+    top, left = (size - new_h) // 2, (size - new_w) // 2
+    canvas = np.full((n, size, size, 3), 114, dtype=np.uint8)
+    for i in range(n):
+        canvas[i, top:top + new_h, left:left + new_w] = cv2.resize(frames[i], (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    out = np.empty((n, 3, size, size), dtype=np.float32)
+    np.multiply(canvas.transpose(0, 3, 1, 2), np.float32(1.0 / 255.0), out=out)
+    return out
+
+
+def count_people_onnx(session, frames: np.ndarray) -> list:
+    """Per-frame person counts from a YOLOv8 ONNX export (see count_classes_onnx)."""
+    return [counts[PERSON_CLASS] for counts in count_classes_onnx(session, frames, (PERSON_CLASS,))]
+
+
+def count_classes_onnx(session, frames: np.ndarray, classes, size: int = IMG_SIZE) -> list:
+    """
+    Per-frame {class: count} from a YOLOv8 ONNX export (output (N, 84, anchors)).
+
+    Mirrors Ultralytics post-processing: each anchor takes its best class,
+    keeps it above CONF_THRESHOLD, then NMS per class at IOU_THRESHOLD.
+    """
+    import cv2
+
+    preds = session.run(letterbox_batch(frames, size))  # (N, 4 + classes, anchors)
+    counts = []
+    for pred in preds:
+        scores = pred[4:]                          # (classes, anchors)
+        best = scores.argmax(axis=0)
+        frame_counts = {}
+        for cls in classes:
+            class_scores = scores[cls]
+            keep = (best == cls) & (class_scores > CONF_THRESHOLD)
+            if not keep.any():
+                frame_counts[cls] = 0
+                continue
+            cx, cy, bw, bh = pred[:4, keep]
+            boxes = np.stack([cx - bw / 2, cy - bh / 2, bw, bh], axis=1)
+            kept = cv2.dnn.NMSBoxes(boxes.tolist(), class_scores[keep].tolist(), CONF_THRESHOLD, IOU_THRESHOLD)
+            frame_counts[cls] = len(kept)
+        counts.append(frame_counts)
+    return counts
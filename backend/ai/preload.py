@@ -0,0 +1,211 @@
+"""
+Model Preload, Warmup and Readiness
+
+Loads every configured model in parallel at startup, then runs a few warmup
+passes through the real detector path (preprocessing, backend, batching) at
+the production input shapes, so allocator and oneDNN primitive caches are
+primed before the first camera pass.
+
+readiness() backs the /api/ready endpoint; the camera simulator calls
+wait_until_ready() before its first pass.
+
+Models (backend.config.PRELOAD["models"], default: derived from the camera
+groups):
+- "mobilenet":      violence classifier   (VIOLENCE_CAMERAS)
+- "people_counter": YOLOv8n               (PEOPLE_COUNT_CAMERAS, every camera with CASCADE)
+- "crash_lstm":     MobileNetV2-LSTM      (CRASH_CAMERAS)
+- "multitask":      shared backbone + heads (cameras in both groups, MULTITASK)
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from backend.ai.model_registry import model_registry_stats
+from backend.config import CASCADE, CRASH_CAMERAS, MULTITASK, PEOPLE_COUNT_CAMERAS, PRELOAD, VIOLENCE_CAMERAS
+
+# model -> (detector name in backend.ai.detectors.DETECTORS, detect() options)
+WARMUP_DETECTORS = {
+    "mobilenet": ("violence", {"model_name": "mobilenet"}),
+    "x3d": ("violence", {"model_name": "x3d"}),
+    "crash_lstm": ("crash", {}),
+    "people_counter": ("people_count", {}),
+    "multitask": ("multitask", {}),
+}
+
+_status: Dict[str, dict] = {}
+_status_lock = threading.Lock()
+_ready = threading.Event()
+_thread: Optional[threading.Thread] = None
+_started_at: Optional[float] = None
+_finished_at: Optional[float] = None
+
+
+def configured_models() -> List[str]:
+    """Models to preload: PRELOAD["models"], or whatever the camera groups use."""
+    if PRELOAD.get("models"):
+        return list(PRELOAD["models"])
+    models = []
+    if VIOLENCE_CAMERAS:
+        models.append("mobilenet")
+    if PEOPLE_COUNT_CAMERAS or CASCADE.get("enabled", False):
+        models.append("people_counter")
+    if CRASH_CAMERAS:
+        models.append("crash_lstm")
+    if MULTITASK.get("enabled", False) and set(VIOLENCE_CAMERAS) & set(CRASH_CAMERAS):
+        models.append("multitask")
+    return models
+
+
+# ============================================================================
+# LOADERS (return the backend the model ended up on)
+# ============================================================================
+
+def _load_violence(model_name: str) -> str:
+    from backend.ai.backends import get_backend
+    from backend.ai.violence_detector.inference import MOBILENET_PATH, X3D_PATH, get_model
+
+    weights = MOBILENET_PATH if model_name == "mobilenet" else X3D_PATH
+    return get_backend(model_name, lambda: get_model(model_name), weights, f"violence_{model_name}").name
+
+
+def _load_crash() -> str:
+    from backend.ai.accident_model import get_accident_model
+    return get_accident_model().backend().name
+
+
+def _load_people_counter() -> str:
+    from backend.ai.backends import backend_name, get_onnx_backend
+    from backend.ai.people_counter.yolov8 import MODEL_PATH, load_yolo_model
+
+    if backend_name("people_counter") == "onnxruntime" and get_onnx_backend("people_counter", MODEL_PATH):
+        return "onnxruntime"
+    load_yolo_model()
+    return "torch"
+
+
+def _load_multitask() -> str:
+    from backend.ai.multitask import backbone_backend
+    return backbone_backend().name
+
+
+_LOADERS = {
+    "mobilenet": lambda: _load_violence("mobilenet"),
+    "x3d": lambda: _load_violence("x3d"),
+    "crash_lstm": _load_crash,
+    "people_counter": _load_people_counter,
+    "multitask": _load_multitask,
+}
+
+
+# ============================================================================
+# PRELOAD
+# ============================================================================
+
+def _warmup_bundle():
+    """Synthetic clip at the configured source resolution; decoding is not warmed, inference is."""
+    import numpy as np
+    from backend.ai.frame_bundle import FRAME_COUNT, FrameBundle
+
+    width, height = PRELOAD.get("warmup_frame_size", (640, 360))
+    frames = np.random.default_rng(0).integers(0, 256, (FRAME_COUNT, height, width, 3), dtype=np.uint8)
+    return FrameBundle.from_frames("<warmup>", frames)
+
+
+def _set_status(model: str, **fields):
+    with _status_lock:
+        _status.setdefault(model, {}).update(fields)
+
+
+def _preload_model(model: str, runs: int):
+    from backend.ai.detectors import DETECTORS
+    from backend.ai.worker_pool import get_worker_pool
+
+    detector, options = WARMUP_DETECTORS[model]
+    pool = get_worker_pool()
+    start = time.perf_counter()
+    try:
+        _set_status(model, state="loading")
+        # With the worker pool, models load inside the workers during warmup
+        backend = "worker_pool" if pool is not None else _LOADERS[model]()
+        loaded = time.perf_counter()
+        _set_status(model, state="warming", backend=backend, load_ms=round((loaded - start) * 1000, 1))
+
+        for _ in range(runs):
+            if pool is not None:
+                # One warmup clip per worker each round; least-loaded dispatch spreads them
+                results = [f.result() for f in [pool.submit(detector, _warmup_bundle(), **options)
+                                                 for _ in range(pool.num_workers)]]
+            else:
+                results = [DETECTORS[detector].detect(_warmup_bundle(), **options)]
+            errors = [r.get("error") for r in results if r.get("event") == "error"]
+            if errors:
+                raise RuntimeError(errors[0])
+        _set_status(model, state="ready", warmup_runs=runs,
+                    warmup_ms=round((time.perf_counter() - loaded) * 1000, 1))
+        print(f"[PRELOAD] {model} ready on {backend} "
+              f"(load {_status[model]['load_ms']:.0f} ms, warmup {_status[model]['warmup_ms']:.0f} ms)")
+    except Exception as e:
+        _set_status(model, state="failed", error=str(e), total_ms=round((time.perf_counter() - start) * 1000, 1))
+        print(f"[PRELOAD] {model} failed: {e}")
+
+
+def _run(models: List[str], runs: int):
+    global _finished_at
+    try:
+        # Each load is mostly torch/ORT/IO work that releases the GIL, so threads overlap well
+        with ThreadPoolExecutor(max_workers=max(1, len(models)), thread_name_prefix="Preload") as executor:
+            list(executor.map(lambda m: _preload_model(m, runs), models))
+    finally:
+        _finished_at = time.time()
+        _ready.set()
+        print(f"[PRELOAD] Finished in {_finished_at - _started_at:.1f}s")
+
+
+def start_preload(models: Optional[List[str]] = None) -> threading.Thread:
+    """Start loading + warming models in the background (idempotent)."""
+    global _thread, _started_at
+    with _status_lock:
+        if _thread is not None:
+            return _thread
+        models = [m for m in (models or configured_models()) if m in _LOADERS]
+        for model in models:
+            _status[model] = {"state": "pending"}
+        _started_at = time.time()
+        if not PRELOAD.get("enabled", True):
+            models = []
+        _thread = threading.Thread(target=_run, args=(models, PRELOAD.get("warmup_runs", 2)),
+                                   daemon=True, name="ModelPreload")
+        _thread.start()
+    print(f"[PRELOAD] Loading {', '.join(models) or 'no models'}...")
+    return _thread
+
+
+def wait_until_ready(timeout: Optional[float] = None) -> bool:
+    """Block until preload finished (successfully or not); False on timeout."""
+    return _ready.wait(timeout)
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+
+def readiness() -> dict:
+    """Preload state, per-model load/warmup timings and registry memory for /api/ready."""
+    with _status_lock:
+        models = {name: dict(status) for name, status in _status.items()}
+    failed = [name for name, status in models.items() if status.get("state") == "failed"]
+    if not _ready.is_set():
+        status = "loading" if _started_at else "not_started"
+    else:
+        status = "degraded" if failed else "ready"
+    return {
+        "ready": _ready.is_set(),
+        "status": status,
+        "started_at": _started_at,
+        "finished_at": _finished_at,
+        "elapsed_s": round(((_finished_at or time.time()) - _started_at), 2) if _started_at else None,
+        "models": models,
+        "registry": model_registry_stats(),
+    }
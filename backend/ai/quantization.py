@@ -0,0 +1,307 @@
+"""
+INT8 Quantized CPU Inference
+
+Per-detector quantization modes, selected in backend.config.QUANTIZATION:
+
+- "off":     float32 (default)
+- "dynamic": nn.LSTM / nn.Linear weights quantized to int8, activations
+             quantized on the fly (no calibration needed)
+- "static":  "dynamic" plus post-training static quantization of the
+             MobileNetV2 feature extractor (FX graph mode, x86/fbgemm kernels),
+             calibrated on clips from Videos/
+
+Supported detectors: "mobilenet" (violence MobileNetV2 clip classifier) and
+"crash_lstm" (MobileNetV2-LSTM). The X3D model is a small 3D conv
+placeholder and stays float32.
+
+`python -m backend.ai.quantization` calibrates, measures the accuracy delta
+against float32 on the labelled local dataset, and saves the quantized
+graph as a versioned TorchScript artifact next to the exports from
+backend/ai/export.py. At runtime load_quantized() prefers that artifact and
+otherwise quantizes the eager model at load time.
+
+Usage:
+    python -m backend.ai.quantization [--models mobilenet crash_lstm] [--mode static]
+                                      [--calibration-clips 8] [--eval-clips 20] [--threads 1]
+"""
+
+import argparse
+import copy
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import torch
+import torch.nn as nn
+
+from backend.ai.export import (
+    EXPORT_DIR,
+    TORCH_SPECS,
+    artifact_name,
+    load_optimized,
+    register_artifact,
+    sample_bundles,
+)
+from backend.ai.result_cache import model_version
+from backend.config import ACCIDENT_THRESHOLD, QUANTIZATION
+
+QUANT_MODES = ("off", "dynamic", "static")
+
+
+def _violence_probability(outputs: torch.Tensor) -> float:
+    # Same reduction as violence_detector.inference.run_inference_on_frames
+    if outputs.shape[1] == 2:
+        return torch.softmax(outputs, dim=1)[:, 1].mean().item()
+    return outputs.mean().item()
+
+
+def _crash_probability(outputs: torch.Tensor) -> float:
+    return torch.softmax(outputs, dim=1)[0, 1].item()
+
+
+def _quant_spec(name: str) -> Dict:
+    """Export spec (weights/build/inputs) plus what quantization and evaluation need."""
+    spec = TORCH_SPECS[name]()
+    if name == "mobilenet":
+        from backend.ai.violence_detector.inference import THRESHOLD
+        spec.update(backbone="features", probability=_violence_probability,
+                    threshold=THRESHOLD, folders=("violence", "no_violence"))
+    elif name == "crash_lstm":
+        spec.update(backbone="backbone", probability=_crash_probability,
+                    threshold=ACCIDENT_THRESHOLD, folders=("crash", "no_crash"))
+    else:
+        raise ValueError(f"Quantization not supported for: {name}")
+    return spec
+
+
+def quantization_mode(name: str) -> str:
+    """Configured quantization mode for a detector ("off" when unset or unknown)."""
+    mode = QUANTIZATION.get(name, "off")
+    return mode if mode in QUANT_MODES else "off"
+
+
+# ============================================================================
+# QUANTIZATION
+# ============================================================================
+
+def _backbone_batch(inputs: torch.Tensor) -> torch.Tensor:
+    """Model input -> the (N, 3, H, W) frame batch the 2D backbone sees."""
+    return inputs.reshape(-1, *inputs.shape[-3:])
+
+
+def calibration_inputs(name: str, clips: int) -> List[torch.Tensor]:
+    """Backbone calibration batches from Videos/, alternating positive and negative clips."""
+    spec = _quant_spec(name)
+    per_class = max(clips // 2, 1)
+    positives, negatives = (sample_bundles(folder, per_class) for folder in spec["folders"])
+    batches = []
+    for pair in zip(positives, negatives):
+        for bundle in pair:
+            try:
+                batches.append(_backbone_batch(spec["inputs"](bundle)))
+            except Exception as e:
+                print(f"[QUANT] {name}: skipping calibration clip {bundle.video_path}: {e}")
+    return batches
+
+
+def quantize_model(model: nn.Module, name: str, mode: str, calibration: Optional[List[torch.Tensor]] = None) -> nn.Module:
+    """
+    Return an int8 copy of `model`.
+
+    Args:
+        model: Float32 eager model in eval mode
+        name: "mobilenet" or "crash_lstm" (selects the backbone to quantize)
+        mode: "dynamic" or "static"
+        calibration: Backbone input batches, required for "static"
+
+    Returns:
+        Quantized nn.Module (the input model is left untouched)
+    """
+    from torch.ao.quantization import get_default_qconfig_mapping, quantize_dynamic
+    from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+    engine = QUANTIZATION.get("engine", "x86")
+    torch.backends.quantized.engine = engine
+    quantized = copy.deepcopy(model).eval()
+
+    if mode == "static":
+        if not calibration:
+            raise ValueError("Static quantization needs calibration inputs")
+        attr = _quant_spec(name)["backbone"]
+        prepared = prepare_fx(getattr(quantized, attr), get_default_qconfig_mapping(engine), (calibration[0],))
+        with torch.no_grad():
+            for batch in calibration:
+                prepared(batch)
+        setattr(quantized, attr, convert_fx(prepared))
+    elif mode != "dynamic":
+        raise ValueError(f"Unknown quantization mode: {mode}")
+
+    return quantize_dynamic(quantized, {nn.LSTM, nn.Linear}, dtype=torch.qint8)
+
+
+def load_quantized(name: str, weights_path, build: Callable[[], nn.Module], device="cpu", mode: Optional[str] = None,
+                   dynamic_fallback: bool = True):
+    """
+    Quantized model for a detector when QUANTIZATION selects it (or `mode`
+    is given, e.g. by the QoS ladder), else None.
+
+    Prefers the artifact saved by `python -m backend.ai.quantization`; without
+    one, quantizes the eager model from `build()` at load time (static mode
+    calibrates on Videos/ clips, falling back to dynamic when none exist, or
+    returning None when dynamic_fallback is False).
+    """
+    mode = mode if mode in QUANT_MODES else quantization_mode(name)
+    if mode == "off":
+        return None
+    module = load_optimized(f"{name}_{mode}", weights_path, device)
+    if module is not None:
+        return module
+
+    start = time.time()
+    try:
+        calibration = calibration_inputs(name, QUANTIZATION.get("calibration_clips", 8)) if mode == "static" else None
+        if mode == "static" and not calibration:
+            if not dynamic_fallback:
+                print(f"[QUANT] {name}: no calibration clips in Videos/, not quantizing")
+                return None
+            print(f"[QUANT] {name}: no calibration clips in Videos/, using dynamic quantization")
+            mode, calibration = "dynamic", None
+        module = quantize_model(build(), name, mode, calibration)
+    except Exception as e:
+        print(f"[QUANT] {name}: quantization failed, using float32 model: {e}")
+        return None
+    print(f"[QUANT] {name}: quantized ({mode}) at load time in {time.time() - start:.1f}s")
+    return module
+
+
+# ============================================================================
+# ACCURACY REPORT
+# ============================================================================
+
+def _evaluation_set(spec: Dict, per_class: int, offset: int) -> Tuple[List[Tuple[object, int]], bool]:
+    """Labelled (bundle, label) pairs held out from calibration when enough clips exist."""
+    positive, negative = spec["folders"]
+    held_out = [(b, 1) for b in sample_bundles(positive, per_class, offset)] + \
+               [(b, 0) for b in sample_bundles(negative, per_class, offset)]
+    if held_out:
+        return held_out, True
+    return [(b, 1) for b in sample_bundles(positive, per_class)] + \
+           [(b, 0) for b in sample_bundles(negative, per_class)], False
+
+
+def evaluate(model: nn.Module, spec: Dict, samples: List[Tuple[torch.Tensor, int]]) -> Dict:
+    """Accuracy, per-clip probabilities and mean per-clip latency of one model."""
+    probs, correct, elapsed = [], 0, 0.0
+    with torch.no_grad():
+        model(samples[0][0])  # warmup
+        for inputs, label in samples:
+            start = time.perf_counter()
+            outputs = model(inputs)
+            elapsed += time.perf_counter() - start
+            prob = spec["probability"](outputs)
+            probs.append(prob)
+            correct += int((prob >= spec["threshold"]) == bool(label))
+    return {
+        "accuracy": correct / len(samples),
+        "probs": probs,
+        "latency_ms": elapsed * 1000 / len(samples),
+    }
+
+
+def quantize_and_report(name: str, mode: str, calibration_clips: int, eval_clips: int) -> Dict:
+    """Quantize one detector, compare it with float32 on Videos/, and save the artifact."""
+    spec = _quant_spec(name)
+    weights = spec["weights"]
+    if not weights.exists():
+        raise FileNotFoundError(f"Weights not found: {weights}")
+
+    eager = spec["build"]().eval()
+    calibration = calibration_inputs(name, calibration_clips) if mode == "static" else None
+    quantized = quantize_model(eager, name, mode, calibration)
+
+    bundles, held_out = _evaluation_set(spec, eval_clips, offset=max(calibration_clips // 2, 1) if mode == "static" else 0)
+    samples = []
+    for bundle, label in bundles:
+        try:
+            samples.append((spec["inputs"](bundle), label))
+        except Exception as e:
+            print(f"[QUANT] {name}: skipping {bundle.video_path}: {e}")
+    if not samples:
+        raise ValueError(f"No evaluation clips in Videos/{spec['folders'][0]} or Videos/{spec['folders'][1]}")
+
+    fp32 = evaluate(eager, spec, samples)
+    int8 = evaluate(quantized, spec, samples)
+    diffs = [abs(a - b) for a, b in zip(fp32["probs"], int8["probs"])]
+    agreement = sum((a >= spec["threshold"]) == (b >= spec["threshold"])
+                    for a, b in zip(fp32["probs"], int8["probs"])) / len(samples)
+
+    with torch.no_grad():
+        scripted = torch.jit.freeze(torch.jit.trace(quantized, samples[0][0]))
+    export_name = f"{name}_{mode}"
+    artifact = artifact_name(export_name, weights)
+    EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+    torch.jit.save(scripted, str(EXPORT_DIR / artifact))
+
+    entry = {
+        "artifact": artifact,
+        "weights": str(weights),
+        "weights_version": model_version(str(weights)),
+        "torch_version": torch.__version__,
+        "exported_at": time.time(),
+        "input_shape": list(samples[0][0].shape),
+        "quantization": mode,
+        "engine": QUANTIZATION.get("engine", "x86"),
+        "calibration_clips": len(calibration or []),
+        "eval_clips": len(samples),
+        "eval_held_out": held_out,
+        "accuracy_fp32": fp32["accuracy"],
+        "accuracy_int8": int8["accuracy"],
+        "accuracy_delta": int8["accuracy"] - fp32["accuracy"],
+        "decision_agreement": agreement,
+        # Accuracy is reported, not gated: the config selection is the trade-off decision
+        "parity_max_abs_diff": max(diffs),
+        "parity_mean_abs_diff": sum(diffs) / len(diffs),
+        "parity_ok": True,
+        "latency_ms": {"eager": round(fp32["latency_ms"], 2), "int8": round(int8["latency_ms"], 2)},
+        "onednn": False,
+        "faster": int8["latency_ms"] < fp32["latency_ms"],
+    }
+    register_artifact(export_name, entry)
+    return entry
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", nargs="+", choices=["mobilenet", "crash_lstm"], default=["mobilenet", "crash_lstm"])
+    parser.add_argument("--mode", choices=["dynamic", "static"], default="static")
+    parser.add_argument("--calibration-clips", type=int, default=QUANTIZATION.get("calibration_clips", 8))
+    parser.add_argument("--eval-clips", type=int, default=20, help="Evaluation clips per class")
+    parser.add_argument("--threads", type=int, default=1, help="Torch threads (1 = per-core numbers)")
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    results = {}
+    for name in args.models:
+        print(f"[QUANT] Quantizing {name} ({args.mode})...")
+        try:
+            results[name] = quantize_and_report(name, args.mode, args.calibration_clips, args.eval_clips)
+        except Exception as e:
+            print(f"[QUANT] {name}: failed: {e}")
+    if not results:
+        print("Nothing quantized.")
+        return
+
+    print(f"\n{'model':<12}{'clips':>6}{'acc fp32':>10}{'acc int8':>10}{'delta':>8}{'agree':>8}"
+          f"{'max dp':>9}{'fp32 ms':>9}{'int8 ms':>9}{'speedup':>9}")
+    for name, e in results.items():
+        latency = e["latency_ms"]
+        clips = f"{e['eval_clips']}{'' if e['eval_held_out'] else '*'}"
+        print(f"{name:<12}{clips:>6}{e['accuracy_fp32']:>10.3f}{e['accuracy_int8']:>10.3f}{e['accuracy_delta']:>+8.3f}"
+              f"{e['decision_agreement']:>8.3f}{e['parity_max_abs_diff']:>9.4f}{latency['eager']:>9.1f}"
+              f"{latency['int8']:>9.1f}{latency['eager'] / latency['int8']:>8.2f}x")
+    if not all(e["eval_held_out"] for e in results.values()):
+        print("* not enough clips to hold out from calibration; evaluated on calibration clips")
+    print(f"\nEnable per detector in backend/config.py: QUANTIZATION = {{'{next(iter(results))}': '{args.mode}', ...}}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Inference Result Cache
+
+Content-addressed cache in front of the detector entry points.
+
+The simulator re-analyses the same clip every pass until it rotates, and the
+small Videos/ catalog is shared by all cameras, so most detector calls repeat
+work that has already been done. Results are keyed on:
+
+- clip identity (absolute path + size + mtime, or a content hash)
+- detector name and model version
+- sampling parameters (frame count, image size, ...)
+
+Entries are evicted LRU-first and expire after a TTL. An optional on-disk tier
+(JSON files) keeps results across restarts. Concurrent requests for the same
+key share one in-flight computation (single-flight), so two camera threads
+looking at the same clip only run the model once.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Callable, Dict, Optional, Sequence, Tuple, Union
+
+_HASH_CHUNK = 1 << 20
+
+
+def clip_fingerprint(video_path: str, hash_content: bool = False) -> str:
+    """Identify a clip by path + size + mtime, or by a SHA-1 of its bytes."""
+    path = os.path.abspath(video_path)
+    st = os.stat(path)
+    if not hash_content:
+        return f"{path}:{st.st_size}:{st.st_mtime_ns}"
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return f"sha1:{digest.hexdigest()}:{st.st_size}"
+
+
+def model_version(model_path: Union[None, str, Sequence[str]]) -> str:
+    """Version string for a weights file (or several, joined by "+"); changes whenever one is replaced."""
+    if not model_path:
+        return "none"
+    if not isinstance(model_path, (str, os.PathLike)):
+        return "+".join(model_version(path) for path in model_path)
+    try:
+        st = os.stat(model_path)
+    except OSError:
+        return f"{Path(model_path).name}@missing"
+    return f"{Path(model_path).name}@{st.st_size}:{st.st_mtime_ns}"
+
+
+def make_key(video_path: str, detector: str, version: str, params: Optional[Dict] = None,
+             hash_content: bool = False) -> str:
+    """Build the cache key for one detector run on one clip."""
+    payload = json.dumps(
+        [clip_fingerprint(video_path, hash_content), detector, version, params or {}],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Thread-safe LRU/TTL result cache with an optional disk tier and single-flight."""
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 600, disk_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+        self._entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "shared": 0, "evictions": 0}
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl_seconds is not None and time.time() - stored_at > self.ttl_seconds
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / f"{key}.json"
+
+    def _read_disk(self, key: str) -> Optional[Tuple[float, dict]]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if self._expired(record.get("stored_at", 0)):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            return None
+        return record["stored_at"], record["value"]
+
+    def _write_disk(self, key: str, stored_at: float, value: dict):
+        if not self.disk_dir:
+            return
+        tmp = self._disk_path(key).with_suffix(".tmp")
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"stored_at": stored_at, "value": value}, f)
+            os.replace(tmp, self._disk_path(key))
+        except (OSError, TypeError, ValueError) as e:
+            print(f"[CACHE] Could not persist result {key[:12]}: {e}")
+
+    def _insert(self, key: str, stored_at: float, value: dict):
+        # Caller holds self._lock
+        self._entries[key] = (stored_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return a cached value or None. Checks memory first, then disk."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if not self._expired(entry[0]):
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return entry[1]
+                del self._entries[key]
+        record = self._read_disk(key)
+        if record is None:
+            return None
+        with self._lock:
+            self._insert(key, *record)
+            self._stats["disk_hits"] += 1
+        return record[1]
+
+    def put(self, key: str, value: dict):
+        stored_at = time.time()
+        with self._lock:
+            self._insert(key, stored_at, value)
+        self._write_disk(key, stored_at, value)
+
+    def get_or_compute(self, key: str, compute: Callable[[], dict],
+                       cacheable: Callable[[dict], bool] = lambda v: True) -> Tuple[dict, bool]:
+        """
+        Return (value, cached). Concurrent callers for a missing key wait on
+        the first caller's computation instead of running their own.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value, True
+
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+                self._stats["misses"] += 1
+            else:
+                self._stats["shared"] += 1
+
+        if not owner:
+            return future.result(), True
+
+        try:
+            value = compute()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+            if cacheable(value):
+                self.put(key, value)
+            return value, False
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.disk_dir:
+            for path in self.disk_dir.glob("*.json"):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), inflight=len(self._inflight))
+
+
+# Global cache instance (configured from backend.config.RESULT_CACHE)
+_cache: Optional[ResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """Get or create the process-wide result cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                from backend.config import RESULT_CACHE
+                _cache = ResultCache(
+                    max_entries=RESULT_CACHE.get("max_entries", 512),
+                    ttl_seconds=RESULT_CACHE.get("ttl_seconds", 600),
+                    disk_dir=RESULT_CACHE.get("disk_dir"),
+                )
+    return _cache
+
+
+def cached_call(detector: str, fn: Callable[..., dict], video_path: str,
+                model_path: Union[None, str, Sequence[str]] = None, **params) -> dict:
+    """
+    Run fn(video_path, **params) through the result cache.
+
+    Error results are returned but never stored. Cache hits are returned as a
+    copy with a fresh timestamp and "cached": True.
+    """
+    from backend.config import RESULT_CACHE
+
+    if not RESULT_CACHE.get("enabled", True) or not video_path:
+        return fn(video_path, **params)
+
+    try:
+        key = make_key(video_path, detector, model_version(model_path), params,
+                       hash_content=RESULT_CACHE.get("hash_content", False))
+    except OSError:
+        # Missing/unreadable clip: let the detector report the error itself
+        return fn(video_path, **params)
+
+    value, cached = get_result_cache().get_or_compute(
+        key,
+        lambda: fn(video_path, **params),
+        cacheable=lambda v: isinstance(v, dict) and "error" not in v and v.get("event") != "error",
+    )
+    # Always hand back a copy: callers merge extra fields into the result dict
+    result = dict(value)
+    if not cached:
+        return result
+    result["cached"] = True
+    result["timestamp"] = time.time()
+    return result
@@ -77,5 +77,38 @@ def retrain_pipeline():
         "samples_used": total_samples
     }
 
+def retrain_heads(events=None, clips=None):
+    """
+    Trains the multi-task heads (backend/ai/multitask.py) against the shared
+    frozen MobileNetV2 backbone.
+    1. Extract backbone features once per labelled clip (Videos/ + operator feedback).
+    2. Train only the violence / crash heads on them.
+    3. Save the heads with the backbone version they match; serving picks them up.
+    """
+    from backend.ai.multitask import train_heads
+
+    logger.info("🧠 Training multi-task heads on the shared frozen backbone...")
+    report = train_heads(events=events, clips=clips)
+    trained = [event for event, metrics in report["events"].items() if metrics.get("status") == "trained"]
+    if not trained:
+        logger.warning("⚠️ No head trained (need incident and normal clips per event).")
+        return {"status": "skipped", "message": "No training data for the requested heads.", **report}
+    for event in trained:
+        metrics = report["events"][event]
+        logger.info(f"✅ {event} head: {metrics['clips']} clips, "
+                    f"holdout accuracy {metrics['holdout_accuracy']} (train {metrics['train_accuracy']})")
+    logger.info(f"💾 Heads saved to {report['heads_path']}")
+    return {"status": "success", "trained": trained, **report}
+
+
 if __name__ == "__main__":
-    retrain_pipeline()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Model retraining pipeline")
+    parser.add_argument("--heads", action="store_true", help="Train multi-task heads on the shared frozen backbone")
+    parser.add_argument("--events", nargs="+", choices=("violence", "crash"), help="Heads to train (with --heads)")
+    args = parser.parse_args()
+    if args.heads:
+        retrain_heads(events=args.events)
+    else:
+        retrain_pipeline()
@@ -7,7 +7,8 @@ Uses the root-level inference.py which has the actual PyTorch model.
 import os
 # Force CPU mode BEFORE any torch imports
 os.environ['CUDA_VISIBLE_DEVICES'] = ''
-os.environ['OMP_NUM_THREADS'] = '1'
+# One thread unless a caller (e.g. an inference worker) already set a budget
+os.environ.setdefault('OMP_NUM_THREADS', '1')
 
 import sys
 from pathlib import Path
@@ -26,7 +27,7 @@ _run_ml_inference = None
 
 try:
     # Import the actual violence model inference from inference.py
-    from .inference import run_inference as _run_ml_inference
+    from .inference import run_inference_on_frames as _run_ml_inference
     ML_AVAILABLE = True
     print("[OK] Violence ML model loaded successfully")
 except Exception as e:
@@ -43,6 +44,22 @@ def detect_violence(video_path: str, model_name: str = "mobilenet") -> Dict[str,
         video_path: Path to video file
         model_name: "mobilenet" or "x3d" (default: mobilenet)
     
+    Returns:
+        Same as detect_violence_frames()
+    """
+    from backend.ai.frame_bundle import FrameBundle
+    return detect_violence_frames(FrameBundle(video_path), model_name=model_name)
+
+
+def detect_violence_frames(bundle, model_name: str = "mobilenet", **quality) -> Dict[str, object]:
+    """
+    Run violence detection on a shared FrameBundle (decoded once per clip).
+    
+    Args:
+        bundle: backend.ai.frame_bundle.FrameBundle for the clip
+        model_name: "mobilenet" or "x3d" (default: mobilenet)
+        **quality: img_size / quantized overrides from the QoS ladder
+    
     Returns:
         {
             "event": "violence" | "normal",
@@ -59,7 +76,7 @@ def detect_violence(video_path: str, model_name: str = "mobilenet") -> Dict[str,
     if ML_AVAILABLE and _run_ml_inference is not None:
         # Use real PyTorch inference
         try:
-            result = _run_ml_inference(video_path, model_name=model_name)
+            result = _run_ml_inference(bundle, model_name=model_name, **quality)
             print(f"[VIOLENCE] Real inference result: {result}")
             return result
         except Exception as e:
@@ -72,7 +89,7 @@ def detect_violence(video_path: str, model_name: str = "mobilenet") -> Dict[str,
     # Videos in "no_violence" folder -> normal
     
     # Normalize path separators for cross-platform compatibility
-    normalized_path = video_path.lower().replace("\\", "/")
+    normalized_path = bundle.video_path.lower().replace("\\", "/")
     print(f"[DEMO] Analyzing path: {normalized_path}")
     
     is_violence_video = "/violence/" in normalized_path and "/no_violence/" not in normalized_path
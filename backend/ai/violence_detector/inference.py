@@ -1,17 +1,25 @@
 # Export for external import
-__all__ = ["run_inference"]
+__all__ = ["run_inference", "run_inference_on_frames"]
 """
 Pure ML inference module - no Flask dependencies.
 Loads MobileNetClip and X3D-S models for violence detection.
+
+torch is imported only when a model runs on the torch backend, so with
+INFERENCE_BACKEND set to onnxruntime this module never loads PyTorch.
 """
 
-import torch
-import torch.nn as nn
 import cv2
 import numpy as np
+import threading
 import time
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+
+from backend.ai.backends import get_backend, softmax
+from backend.ai.frame_bundle import FrameBundle
+from backend.ai.model_registry import get_model_registry
+from backend.ai.preprocessing import IMAGENET_MEAN, IMAGENET_STD, KINETICS_MEAN, KINETICS_STD, preprocess_clip
+from backend.utils.video_utils import read_frames_at
 
 # Model paths
 PROJECT_ROOT = Path(__file__).resolve().parents[3]
@@ -21,7 +29,7 @@ X3D_PATH = MODEL_DIR / "x3d_s_best.pth"
 
 # Inference settings
 # Force CPU to avoid CUDA DLL loading issues in Flask
-DEVICE = torch.device("cpu")
+DEVICE = "cpu"
 FRAME_COUNT = 16  # Number of frames to sample
 IMG_SIZE = 224    # Input image size
 THRESHOLD = 0.6   # Violence detection threshold
@@ -31,6 +39,9 @@ _models = {
     "mobilenet": None,
     "x3d": None
 }
+_models_lock = threading.Lock()
+_int8_models = {}      # QoS int8 variants, by model name
+_int8_failed = set()  # models whose int8 variant could not be built (serve float32)
 
 
 def load_mobilenet_model():
@@ -38,6 +49,9 @@ def load_mobilenet_model():
     if not MOBILENET_PATH.exists():
         raise FileNotFoundError(f"Model not found: {MOBILENET_PATH}")
     
+    import torch
+    import torch.nn as nn
+    
     # MobileNetV2 backbone with custom head for binary classification
     from torchvision import models
     model = models.mobilenet_v2(pretrained=False)
@@ -90,6 +104,9 @@ def load_x3d_model():
     if not X3D_PATH.exists():
         raise FileNotFoundError(f"Model not found: {X3D_PATH}")
     
+    import torch
+    import torch.nn as nn
+    
     # X3D-S is a 3D CNN for video classification
     # This is a simplified placeholder - actual X3D would use pytorchvideo
     model = nn.Sequential(
@@ -109,22 +126,73 @@ def load_x3d_model():
     return model
 
 
-def get_model(model_name: str = "mobilenet"):
-    """Get or load model from cache."""
-    if _models[model_name] is None:
-        if model_name == "mobilenet":
-            _models[model_name] = load_mobilenet_model()
-        elif model_name == "x3d":
-            _models[model_name] = load_x3d_model()
-        else:
+def _load_model(model_name: str):
+    from backend.ai.export import load_optimized
+    from backend.ai.quantization import load_quantized
+    if model_name == "mobilenet":
+        # INT8 when selected in QUANTIZATION, else the frozen TorchScript export, else eager
+        model = load_quantized("mobilenet", MOBILENET_PATH, load_mobilenet_model, DEVICE)
+        if model is None:
+            model = load_optimized("mobilenet", MOBILENET_PATH, DEVICE)
+        return model if model is not None else load_mobilenet_model()
+    if model_name == "x3d":
+        model = load_optimized("x3d", X3D_PATH, DEVICE)
+        return model if model is not None else load_x3d_model()
+    raise ValueError(f"Unknown model: {model_name}")
+
+
+def get_model(model_name: str = "mobilenet", quantized: bool = False):
+    """Get or load model (one shared copy per process, see backend.ai.model_registry).
+
+    quantized=True (QoS ladder) returns an int8 MobileNet, loaded once under
+    "mobilenet_int8"; it is the regular model when QUANTIZATION already
+    quantizes it, and x3d has no int8 variant.
+    """
+    if quantized and model_name == "mobilenet" and model_name not in _int8_failed:
+        from backend.ai.quantization import quantization_mode
+        if quantization_mode(model_name) == "off":
+            if _int8_models.get(model_name) is None:
+                with _models_lock:
+                    if _int8_models.get(model_name) is None and model_name not in _int8_failed:
+                        try:
+                            _int8_models[model_name] = get_model_registry().acquire(
+                                f"{model_name}_int8", lambda: _load_int8_model(model_name))
+                        except Exception as e:
+                            print(f"[VIOLENCE] int8 {model_name} unavailable, using float32: {e}")
+                            _int8_failed.add(model_name)
+            if _int8_models.get(model_name) is not None:
+                return _int8_models[model_name]
+    if _models.get(model_name) is None:
+        if model_name not in _models:
             raise ValueError(f"Unknown model: {model_name}")
-    
+        with _models_lock:
+            if _models[model_name] is None:
+                _models[model_name] = get_model_registry().acquire(model_name, lambda: _load_model(model_name))
     return _models[model_name]
 
 
-def extract_frames(video_path: str, num_frames: int = FRAME_COUNT) -> np.ndarray:
+def _load_int8_model(model_name: str):
+    from backend.ai.quantization import load_quantized
+    from backend.config import QOS
+    # Dynamic int8 only touches the classifier: no relief for the QoS ladder
+    model = load_quantized(model_name, MOBILENET_PATH, load_mobilenet_model, DEVICE,
+                           mode=QOS.get("quantized_mode", "static"), dynamic_fallback=False)
+    if model is None:
+        raise RuntimeError("quantization failed")
+    return model
+
+
+def extract_frames(video_path: str, num_frames: int = FRAME_COUNT, size: Optional[Tuple[int, int]] = None) -> np.ndarray:
     """Extract uniformly sampled frames from video.
     
+    All sampled frames are read in one forward pass (see
+    backend.utils.video_utils.read_frames_at) instead of seeking per frame.
+    
+    Args:
+        video_path: Path to video file
+        num_frames: Number of frames to sample
+        size: Optional (width, height) to downscale to while decoding
+    
     Returns:
         numpy array of shape (num_frames, H, W, 3)
     """
@@ -133,85 +201,49 @@ def extract_frames(video_path: str, num_frames: int = FRAME_COUNT) -> np.ndarray
     if not cap.isOpened():
         raise ValueError(f"Cannot open video: {video_path}")
     
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    if total_frames < num_frames:
-        num_frames = total_frames
-    
-    # Uniformly sample frame indices
-    indices = np.linspace(0, total_frames - 1, num_frames, dtype=int)
-    
-    frames = []
-    for idx in indices:
-        cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
-        ret, frame = cap.read()
-        if ret:
-            # Convert BGR to RGB
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            frames.append(frame)
-    
-    cap.release()
+    try:
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if total_frames < num_frames:
+            num_frames = total_frames
+        
+        # Uniformly sample frame indices
+        indices = np.linspace(0, total_frames - 1, num_frames, dtype=int)
+        frames = read_frames_at(cap, indices, size=size)
+    finally:
+        cap.release()
     
     if len(frames) == 0:
         raise ValueError(f"No frames extracted from {video_path}")
     
-    return np.array(frames)
+    return frames
 
 
-def preprocess_frames_mobilenet(frames: np.ndarray) -> torch.Tensor:
+def preprocess_frames_mobilenet(frames: np.ndarray) -> "torch.Tensor":
     """Preprocess frames for MobileNet (2D CNN).
     
     Args:
-        frames: (num_frames, H, W, 3) numpy array
+        frames: (num_frames, H, W, 3) uint8 numpy array
     
     Returns:
         tensor of shape (num_frames, 3, 224, 224)
     """
-    processed = []
-    
-    for frame in frames:
-        # Resize to 224x224
-        frame = cv2.resize(frame, (IMG_SIZE, IMG_SIZE))
-        # Normalize to [0, 1]
-        frame = frame.astype(np.float32) / 255.0
-        # ImageNet normalization
-        mean = np.array([0.485, 0.456, 0.406])
-        std = np.array([0.229, 0.224, 0.225])
-        frame = (frame - mean) / std
-        # HWC to CHW
-        frame = np.transpose(frame, (2, 0, 1))
-        processed.append(frame)
-    
-    # Stack to (num_frames, 3, 224, 224)
-    tensor = torch.from_numpy(np.array(processed)).float()
-    return tensor.to(DEVICE)
+    import torch
+    inputs = preprocess_clip(frames, IMG_SIZE, IMAGENET_MEAN, IMAGENET_STD, layout="NCHW")
+    return torch.from_numpy(inputs).to(DEVICE)
 
 
-def preprocess_frames_x3d(frames: np.ndarray) -> torch.Tensor:
+def preprocess_frames_x3d(frames: np.ndarray) -> "torch.Tensor":
     """Preprocess frames for X3D (3D CNN).
     
     Args:
-        frames: (num_frames, H, W, 3) numpy array
+        frames: (num_frames, H, W, 3) uint8 numpy array
     
     Returns:
         tensor of shape (1, 3, num_frames, 224, 224)
     """
-    processed = []
-    
-    for frame in frames:
-        frame = cv2.resize(frame, (IMG_SIZE, IMG_SIZE))
-        frame = frame.astype(np.float32) / 255.0
-        mean = np.array([0.45, 0.45, 0.45])
-        std = np.array([0.225, 0.225, 0.225])
-        frame = (frame - mean) / std
-        processed.append(frame)
-    
-    # Stack to (num_frames, H, W, 3)
-    video = np.array(processed)
-    # THWC to CTHW: (3, num_frames, 224, 224)
-    video = np.transpose(video, (3, 0, 1, 2))
-    # Add batch dimension: (1, 3, num_frames, 224, 224)
-    tensor = torch.from_numpy(video).unsqueeze(0).float()
-    return tensor.to(DEVICE)
+    import torch
+    inputs = preprocess_clip(frames, IMG_SIZE, KINETICS_MEAN, KINETICS_STD, layout="NCTHW")
+    return torch.from_numpy(inputs).to(DEVICE)
 
 
 def run_inference(video_path: str, model_name: str = "mobilenet") -> Dict:
@@ -231,39 +263,54 @@ def run_inference(video_path: str, model_name: str = "mobilenet") -> Dict:
             "timestamp": float
         }
     """
+    return run_inference_on_frames(FrameBundle(video_path, FRAME_COUNT), model_name=model_name)
+
+
+def run_inference_on_frames(bundle: FrameBundle, model_name: str = "mobilenet",
+                            img_size: int = IMG_SIZE, quantized: bool = False) -> Dict:
+    """
+    Run violence detection on an already-sampled clip (see backend.ai.frame_bundle).
+    
+    Same return value as run_inference(). The img_size variant of the frames
+    is shared with any other detector reading the same bundle. img_size and
+    quantized are lowered by the QoS ladder under overload.
+    """
     start_time = time.time()
     
     try:
-        # Extract frames from video
-        frames = extract_frames(video_path, num_frames=FRAME_COUNT)
-        
-        # Get model
-        model = get_model(model_name)
+        # Sampled frames, resized once to img_size (decoded lazily on first use)
+        frames = bundle.resized(img_size)
         
-        # Preprocess
+        # Preprocess + forward on the configured backend (torch or onnxruntime)
         if model_name == "mobilenet":
-            inputs = preprocess_frames_mobilenet(frames)
+            inputs = preprocess_clip(frames, img_size, IMAGENET_MEAN, IMAGENET_STD, layout="NCHW")
+        else:
+            inputs = preprocess_clip(frames, img_size, KINETICS_MEAN, KINETICS_STD, layout="NCTHW")
+        backend = get_backend(
+            model_name,
+            lambda: get_model(model_name, quantized=quantized),
+            weights_path=MOBILENET_PATH if model_name == "mobilenet" else X3D_PATH,
+            batch_name=f"violence_{model_name}_int8" if quantized else f"violence_{model_name}",
+            input_shape=inputs.shape,
+        )
+        if model_name == "mobilenet":
+            # Frames from concurrent clips share one forward pass when batching is on
+            outputs = backend.run(inputs)  # (num_frames, 2) or (num_frames, 1)
             # Average predictions across all frames
-            with torch.no_grad():
-                outputs = model(inputs)  # (num_frames, 2) or (num_frames, 1)
-                
-                # Handle 2-class output
-                if outputs.shape[1] == 2:
-                    # Apply softmax and get violence probability (class 1)
-                    probs = torch.softmax(outputs, dim=1)
-                    violence_prob = probs[:, 1].mean().item()  # Violence class
-                    normal_prob = probs[:, 0].mean().item()   # Normal class
-                else:
-                    # Binary sigmoid output
-                    violence_prob = outputs.mean().item()
-                    normal_prob = 1.0 - violence_prob
+            if outputs.shape[1] == 2:
+                # Apply softmax and get violence probability (class 1)
+                probs = softmax(outputs, axis=1)
+                violence_prob = float(probs[:, 1].mean())  # Violence class
+                normal_prob = float(probs[:, 0].mean())    # Normal class
+            else:
+                # Binary sigmoid output
+                violence_prob = float(outputs.mean())
+                normal_prob = 1.0 - violence_prob
         
         elif model_name == "x3d":
-            inputs = preprocess_frames_x3d(frames)
-            with torch.no_grad():
-                outputs = model(inputs)  # (1, 1)
-                violence_prob = outputs.item()
-                normal_prob = 1.0 - violence_prob
+            outputs = backend.run(inputs)  # (1, 1)
+            violence_prob = float(outputs.reshape(-1)[0])
+            normal_prob = 1.0 - violence_prob
         
         else:
             raise ValueError(f"Unknown model: {model_name}")
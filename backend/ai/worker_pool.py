@@ -0,0 +1,328 @@
+"""
+Multi-Process Inference Worker Pool
+
+Runs detectors in N worker processes instead of threads inside the Flask
+process, so a camera pass uses N cores and model forward passes never contend
+with request handling for the GIL.
+
+- Each worker is a spawned process that loads its models once (module-level
+  caches) and runs one clip at a time with its own thread budget
+  (OMP/MKL/torch/ONNX Runtime threads = `threads_per_worker`).
+- Decoded frames travel through a `multiprocessing.shared_memory` block split
+  into fixed-size ring slots: the scheduler copies a clip's frames into a
+  free slot and sends only (slot, shape, dtype) to the worker. Clips larger
+  than a slot fall back to pickling the array.
+- submit() returns a concurrent.futures.Future resolved by a collector thread
+  when the worker's result dict comes back.
+- A supervisor thread restarts dead workers and re-dispatches their
+  in-flight tasks once before failing them with WorkerCrashedError.
+
+Configured by backend.config.WORKER_POOL; used by backend.ai.inference when
+enabled. Workers are spawned, which re-imports the parent's __main__ module,
+so the entry script must keep its side effects under `if __name__ == "__main__"`.
+"""
+
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+from typing import Dict, Optional
+
+import numpy as np
+
+
+class WorkerCrashedError(RuntimeError):
+    """The worker running a task died and the retry budget is spent."""
+
+
+class _Task:
+    __slots__ = ("task_id", "detector", "video_path", "options", "shape", "dtype", "slot", "inline",
+                 "future", "attempts", "submitted_at")
+
+    def __init__(self, task_id, detector, video_path, options, frames):
+        self.task_id = task_id
+        self.detector = detector
+        self.video_path = video_path
+        self.options = options
+        self.shape = frames.shape
+        self.dtype = frames.dtype.str
+        self.slot: Optional[int] = None
+        self.inline = None  # frames pickled with the task when they do not fit a slot
+        self.future = Future()
+        self.attempts = 0
+        self.submitted_at = time.perf_counter()
+
+    def message(self):
+        return (self.task_id, self.detector, self.video_path, self.options,
+                self.shape, self.dtype, self.slot, self.inline)
+
+
+# ============================================================================
+# WORKER PROCESS
+# ============================================================================
+
+def _worker_main(worker_id: int, shm_name: str, slot_bytes: int, threads: int, tasks, results):
+    """Worker process entry point: serve tasks until a None sentinel arrives."""
+    # Thread budget before any numeric library is imported
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    os.environ["CUDA_VISIBLE_DEVICES"] = ""
+
+    from backend import config
+    # One clip at a time per worker: nothing to batch, and ORT gets the same budget
+    config.BATCHING["enabled"] = False
+    config.INFERENCE_BACKEND["intra_op_threads"] = threads
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass  # onnxruntime-only worker
+
+    from backend.ai.detectors import DETECTORS
+    from backend.ai.frame_bundle import FrameBundle
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    print(f"[WORKER-{worker_id}] Ready (pid={os.getpid()}, threads={threads})")
+    try:
+        while True:
+            message = tasks.get()
+            if message is None:
+                break
+            task_id, detector, video_path, options, shape, dtype, slot, inline = message
+            try:
+                if inline is not None:
+                    frames = inline
+                else:
+                    frames = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=slot * slot_bytes)
+                bundle = FrameBundle.from_frames(video_path, frames)
+                result = DETECTORS[detector].detect(bundle, **options)
+                del frames, bundle  # release the shared-memory view before reporting done
+                results.put((worker_id, task_id, result, None))
+            except Exception as e:
+                results.put((worker_id, task_id, None, f"{type(e).__name__}: {e}"))
+    finally:
+        shm.close()
+
+
+# ============================================================================
+# POOL (SCHEDULER SIDE)
+# ============================================================================
+
+class WorkerPool:
+    """Process pool for detector inference with shared-memory frame transfer."""
+
+    def __init__(self, workers: int = 2, threads_per_worker: int = 1, slots: Optional[int] = None,
+                 slot_mb: float = 48, max_retries: int = 1):
+        self.num_workers = max(1, workers)
+        self.threads_per_worker = max(1, threads_per_worker)
+        self.num_slots = slots or 2 * self.num_workers
+        self.slot_bytes = int(slot_mb * 1024 * 1024)
+        self.max_retries = max_retries
+        self._ctx = mp.get_context("spawn")  # never fork a process that already runs threads
+        self._shm = shared_memory.SharedMemory(create=True, size=self.num_slots * self.slot_bytes)
+        self._free_slots: "queue.Queue[int]" = queue.Queue()
+        for slot in range(self.num_slots):
+            self._free_slots.put(slot)
+        self._results = self._ctx.Queue()
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._pending: Dict[int, _Task] = {}
+        self._inflight: Dict[int, Dict[int, _Task]] = {}
+        self._workers: Dict[int, mp.Process] = {}
+        self._task_queues: Dict[int, object] = {}
+        self._running = True
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "inline": 0, "restarts": 0, "retries": 0}
+        self._latencies = deque(maxlen=256)
+        for worker_id in range(self.num_workers):
+            self._start_worker(worker_id)
+        self._collector = threading.Thread(target=self._collect_loop, daemon=True, name="WorkerPool-collector")
+        self._supervisor = threading.Thread(target=self._supervise_loop, daemon=True, name="WorkerPool-supervisor")
+        self._collector.start()
+        self._supervisor.start()
+        print(f"[WORKER_POOL] Started {self.num_workers} workers x {self.threads_per_worker} threads, "
+              f"{self.num_slots} slots x {slot_mb:g} MB")
+
+    def _start_worker(self, worker_id: int):
+        tasks = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, self._shm.name, self.slot_bytes, self.threads_per_worker, tasks, self._results),
+            daemon=True,
+            name=f"InferenceWorker-{worker_id}",
+        )
+        process.start()
+        self._workers[worker_id] = process
+        self._task_queues[worker_id] = tasks
+        self._inflight[worker_id] = {}
+
+    def submit(self, detector: str, bundle, **options) -> Future:
+        """
+        Queue one detector run on a clip.
+
+        Args:
+            detector: Name in backend.ai.detectors.DETECTORS
+            bundle: FrameBundle (decoded here; frames are shipped to the worker)
+            **options: Passed to Detector.detect()
+
+        Returns:
+            Future resolving to the detector's result dict
+        """
+        if not self._running:
+            raise RuntimeError("Worker pool is shut down")
+        frames = np.ascontiguousarray(bundle.frames)
+        task = _Task(next(self._ids), detector, bundle.video_path, options, frames)
+        if frames.nbytes <= self.slot_bytes:
+            task.slot = self._free_slots.get()  # blocks while every slot is in flight (backpressure)
+            offset = task.slot * self.slot_bytes
+            np.ndarray(frames.shape, dtype=frames.dtype, buffer=self._shm.buf, offset=offset)[...] = frames
+        else:
+            task.inline = frames
+        with self._lock:
+            self._stats["submitted"] += 1
+            self._stats["inline"] += int(task.inline is not None)
+            self._pending[task.task_id] = task
+        self._dispatch(task)
+        return task.future
+
+    def run(self, detector: str, bundle, **options) -> dict:
+        """Blocking convenience wrapper around submit()."""
+        return self.submit(detector, bundle, **options).result()
+
+    def _dispatch(self, task: _Task):
+        with self._lock:
+            # Least-loaded live worker
+            live = [w for w, p in self._workers.items() if p.is_alive()] or list(self._workers)
+            worker_id = min(live, key=lambda w: len(self._inflight[w]))
+            self._inflight[worker_id][task.task_id] = task
+            task.attempts += 1
+            tasks = self._task_queues[worker_id]
+        tasks.put(task.message())
+
+    def _finish(self, task: _Task, result=None, error: Optional[BaseException] = None):
+        if task.slot is not None:
+            self._free_slots.put(task.slot)
+            task.slot = None
+        with self._lock:
+            self._pending.pop(task.task_id, None)
+            self._stats["failed" if error else "completed"] += 1
+            if not error:
+                self._latencies.append((time.perf_counter() - task.submitted_at) * 1000)
+        if error:
+            task.future.set_exception(error)
+        else:
+            task.future.set_result(result)
+
+    def _collect_loop(self):
+        while self._running or self._pending:
+            try:
+                worker_id, task_id, result, error = self._results.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            with self._lock:
+                task = self._inflight.get(worker_id, {}).pop(task_id, None)
+            if task is None:
+                continue  # already re-dispatched after a restart
+            self._finish(task, result, RuntimeError(error) if error else None)
+
+    def _supervise_loop(self):
+        while self._running:
+            time.sleep(0.5)
+            for worker_id, process in list(self._workers.items()):
+                if process.is_alive() or not self._running:
+                    continue
+                with self._lock:
+                    # Snapshot and replace under the lock so no dispatch lands on the dead queue
+                    orphaned = list(self._inflight[worker_id].values())
+                    self._start_worker(worker_id)
+                    self._stats["restarts"] += 1
+                print(f"[WORKER_POOL] Worker {worker_id} died (exit code {process.exitcode}), restarted; "
+                      f"{len(orphaned)} task(s) in flight")
+                for task in orphaned:
+                    if task.attempts <= self.max_retries:
+                        with self._lock:
+                            self._stats["retries"] += 1
+                        self._dispatch(task)
+                    else:
+                        self._finish(task, error=WorkerCrashedError(
+                            f"Worker {worker_id} crashed while running {task.detector} on {task.video_path}"))
+
+    def metrics(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            latencies = sorted(self._latencies)
+            inflight = {w: len(t) for w, t in self._inflight.items()}
+        stats.update({
+            "workers": self.num_workers,
+            "alive": sum(p.is_alive() for p in self._workers.values()),
+            "threads_per_worker": self.threads_per_worker,
+            "slots_free": self._free_slots.qsize(),
+            "slots_total": self.num_slots,
+            "inflight": inflight,
+        })
+        if latencies:
+            stats["avg_latency_ms"] = round(sum(latencies) / len(latencies), 2)
+            stats["p95_latency_ms"] = round(latencies[int(0.95 * (len(latencies) - 1))], 2)
+        return stats
+
+    def shutdown(self, timeout: float = 5.0):
+        """Stop workers, fail anything still pending, and release shared memory."""
+        self._running = False
+        for tasks in self._task_queues.values():
+            tasks.put(None)
+        for process in self._workers.values():
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for task in pending:
+            if not task.future.done():
+                task.future.set_exception(RuntimeError("Worker pool shut down"))
+        self._shm.close()
+        self._shm.unlink()
+
+
+# Process-wide pool, created on first use when WORKER_POOL is enabled
+_pool: Optional[WorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_worker_pool() -> Optional[WorkerPool]:
+    """The shared WorkerPool, or None when WORKER_POOL is disabled."""
+    global _pool
+    from backend.config import WORKER_POOL
+
+    if not WORKER_POOL.get("enabled", False):
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                workers = WORKER_POOL.get("workers") or max(1, (os.cpu_count() or 2) - 1)
+                _pool = WorkerPool(
+                    workers=workers,
+                    threads_per_worker=WORKER_POOL.get("threads_per_worker", 1),
+                    slots=WORKER_POOL.get("slots"),
+                    slot_mb=WORKER_POOL.get("slot_mb", 48),
+                    max_retries=WORKER_POOL.get("max_retries", 1),
+                )
+    return _pool
+
+
+def worker_pool_metrics() -> dict:
+    return _pool.metrics() if _pool is not None else {"enabled": False}
+
+
+def shutdown_worker_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
@@ -3,12 +3,13 @@ import os
 import io
 import csv
 import json
+import math
 import uuid
 import tempfile
 import threading
 from datetime import datetime
 from pathlib import Path
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
 try:
@@ -39,11 +40,15 @@ if not hasattr(app, 'notification_rules'):
     app.notification_rules = {}
 
 # --- Model Retraining Service ---
-def retrain_model(training_data_path=None):
+def retrain_model(training_data_path=None, heads=False, events=None):
     """
     Triggers the model retraining pipeline.
+    heads=True trains the multi-task heads on the shared frozen backbone instead.
     """
     try:
+        if heads:
+            from backend.ai.retrainer import retrain_heads
+            return retrain_heads(events=events)
         from backend.ai.retrainer import retrain_pipeline
         return retrain_pipeline()
     except Exception as e:
@@ -54,70 +59,52 @@ def retrain_model(training_data_path=None):
 # --- Camera Simulator and State ---
 try:
     from backend.config import DEFAULT_CAMERAS, VIOLENCE_THRESHOLD, ACCIDENT_THRESHOLD
-    from backend.services.camera_simulator import CameraSimulator
+    from backend.services.camera_simulator import get_simulator
+    from backend.services.runtime import get_runtime, should_start_runtime
+    from backend.services.state_publisher import get_state_publisher
+    from backend.services.adaptive_rate import get_rate_controller
     from backend.services.camera_manager import camera_states, get_offline_mode_state, set_offline_mode_state
     from backend.services.incident_storage import add_incident, get_incidents
     from backend.ai.inference import run_inference
+    from backend.ai.preload import readiness
 except ImportError:
     from config import DEFAULT_CAMERAS, VIOLENCE_THRESHOLD, ACCIDENT_THRESHOLD
-    from services.camera_simulator import CameraSimulator
+    from services.camera_simulator import get_simulator
+    from services.runtime import get_runtime, should_start_runtime
+    from services.state_publisher import get_state_publisher
+    from services.adaptive_rate import get_rate_controller
     from services.camera_manager import camera_states, get_offline_mode_state, set_offline_mode_state
     from services.incident_storage import add_incident, get_incidents, get_incident_by_id, mark_incident_resolved, acknowledge_incident, dispatch_incident, list_security_roster, clear_incidents, get_incident_stats, ack_all_incidents
     from ai.inference import run_inference
+    from ai.preload import readiness
 import time
 
-# Start camera simulator on app startup
-simulator = None
 def start_simulator():
-    global simulator
-    if simulator is None:
-        simulator = CameraSimulator(camera_ids=DEFAULT_CAMERAS, video_dir=VIDEO_DIR, rotation_interval=5, violence_probability=0.15)
-        simulator.start()
-        print("[DEBUG] CameraSimulator started.")
-        # Link simulator state to global camera_states
-        def sync_states():
-            while True:
-                for cid, state in simulator.camera_states.items():
-                    camera_states.set(cid, state)
-                # [DEBUG] Print current camera_states
-                # print(f"[DEBUG] camera_states: {camera_states.all()}")
-                time.sleep(1)
-        threading.Thread(target=sync_states, daemon=True).start()
-
-    # Force initial camera states if empty (guarantee frontend always gets cameras)
-    if not camera_states.all():
-        print("[DEBUG] Forcing initial camera states...")
-        video_root = Path(__file__).parent.parent / "Videos"
-        video_files = []
-        for subfolder in video_root.iterdir():
-            if subfolder.is_dir():
-                video_files += list(subfolder.glob("*.mp4"))
-                video_files += list(subfolder.glob("*.MP4"))
-        for idx, cid in enumerate(DEFAULT_CAMERAS):
-            chosen_video = video_files[idx % len(video_files)] if video_files else None
-            rel_path = f"{chosen_video.parent.name}/{chosen_video.name}" if chosen_video else None
-            camera_states.set(cid, {
-                "camera_id": cid,
-                "status": "online",
-                "video": rel_path,
-                "event": "none",
-                "confidence": 0.0,
-                "last_update": None
-            })
-        print("[DEBUG] Initial camera states set.")
+    """Start the process runtime (preload, camera simulator, state publisher); no-op if running."""
+    get_runtime().start(emit=emit_camera_update)
 
-start_simulator()
 
-@app.route('/api/live-status', methods=['GET'])
-def live_status():
-    # live_status endpoint should simply return the current state from camera_states
-    # which is being updated by the simulator thread.
-    all_states_dict = camera_states.all()
+def create_app(start_runtime: bool = True):
+    """
+    App factory: returns the configured Flask app and, unless
+    start_runtime=False, starts the runtime (model preload, camera
+    simulator, state sync).
+
+    Importing this module has no side effects, so tools can import helpers
+    without spawning threads or loading models. WSGI servers use
+    `backend.app:create_app()`.
+    """
+    if start_runtime:
+        start_simulator()
+    return app
+
+
+def _live_status_body(snapshot, seq):
+    """JSON body of /api/live-status for one state snapshot (serialized once per snapshot and seq)."""
     states = []
-    
     for cid in DEFAULT_CAMERAS:
         # Get state or default
-        state = all_states_dict.get(cid)
+        state = snapshot.get(cid)
         if not state:
             # Fallback if simulator hasn't initialized this camera yet
             state = {
@@ -127,9 +114,76 @@ def live_status():
                 "event": "none", 
                 "confidence": 0.0
             }
-        states.append(state)
+        states.append(dict(state))
+    return json.dumps({"cameras": states, "seq": seq, "version": snapshot.version})
+
+
+@app.route('/api/live-status', methods=['GET'])
+def live_status():
+    # live_status endpoint should simply return the current state from camera_states
+    # which is being updated by the simulator thread.
+    # ?since=<seq> returns only what changed after that delta (or a full snapshot)
+    since = request.args.get('since', type=int) if request.query_string else None
+    if since is not None:
+        return jsonify(get_state_publisher().since(since))
+    # seq first: every delta up to it is already in the snapshot read after it
+    seq = get_state_publisher().seq
+    snapshot = camera_states.snapshot()
+    etag = f"v{snapshot.version}-s{seq}"
+    headers = {"ETag": f'"{etag}"', "Cache-Control": "no-cache"}
+    # Pollers echo the ETag verbatim; only other forms (lists, W/) need parsing
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match and (if_none_match == headers["ETag"] or request.if_none_match.contains(etag)):
+        return Response(status=304, headers=headers)
+    body = snapshot.cached(("live-status", seq), lambda snap: _live_status_body(snap, seq))
+    return Response(body, mimetype="application/json", headers=headers)
+
+
+@app.route('/api/cameras/rates', methods=['GET'])
+def camera_rates():
+    """Per-camera risk, target interval and effective analysis rate (adaptive rate controller)."""
+    return jsonify(get_rate_controller().metrics())
+
+
+@app.route('/api/cameras/<camera_id>/focus', methods=['POST', 'DELETE'])
+def camera_focus(camera_id):
+    """
+    Operator focus: analyse this camera at the hottest rate while it is watched.
+    POST lasts ADAPTIVE_RATE focus_ttl_s (or JSON {"ttl_s": ...}, a positive number of seconds,
+    capped at max_focus_ttl_s); clients renew it. DELETE ends it.
+    """
+    if camera_id not in DEFAULT_CAMERAS:
+        return jsonify({"error": f"Unknown camera {camera_id}"}), 404
+    controller = get_rate_controller()
+    if request.method == 'DELETE':
+        controller.clear_focus(camera_id)
+        return jsonify({"camera_id": camera_id, "focus_until": None})
+    data = request.get_json(silent=True) or {}
+    try:
+        ttl = float(data['ttl_s']) if data.get('ttl_s') is not None else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "ttl_s must be a number"}), 400
+    if ttl is not None and not (math.isfinite(ttl) and ttl > 0):
+        return jsonify({"error": "ttl_s must be a positive number of seconds"}), 400
+    until = controller.set_focus(camera_id, ttl=ttl)
+    return jsonify({"camera_id": camera_id, "focus_until": until})
 
-    return jsonify({"cameras": states})
+
+@app.route('/api/runtime', methods=['GET'])
+def runtime_status():
+    """Background runtime status: owned threads, loaded models, uptime."""
+    return jsonify(get_runtime().status())
+
+
+@app.route('/api/ready', methods=['GET'])
+def ready():
+    """
+    Readiness probe: 503 while models are still loading/warming, 200 after.
+    Per-model load/warmup timings and errors are in "models"; a model that
+    failed to load makes the status "degraded" (the app serves demo results).
+    """
+    status = readiness()
+    return jsonify(status), 200 if status["ready"] else 503
 
 
 
@@ -204,6 +258,7 @@ def api_retrain():
     """
     Trigger model retraining. Accepts optional file upload or data path.
     Example: POST /api/retrain with JSON {"data_path": "..."} or multipart file.
+    JSON {"heads": true, "events": ["violence"]} trains multi-task heads on the shared backbone.
     """
     # Handle file upload (multipart/form-data)
     if 'file' in request.files:
@@ -221,7 +276,7 @@ def api_retrain():
     # Handle JSON data (data_path)
     data = request.get_json(silent=True) or {}
     data_path = data.get('data_path')
-    result = retrain_model(training_data_path=data_path)
+    result = retrain_model(training_data_path=data_path, heads=bool(data.get('heads')), events=data.get('events'))
     return jsonify(result)
 
 # Simulator stats endpoint (debug/monitoring)
@@ -232,6 +287,8 @@ def simulator_stats():
     Useful for monitoring the live demo system.
     """
     simulator = get_simulator()
+    if simulator is None:
+        return jsonify({"running": False})
     return jsonify(simulator.get_stats())
 
 # Offline mode endpoints (toggle AI incident creation)
@@ -785,8 +842,7 @@ def global_search():
                             pass
 
         # Search cameras
-        camera_states = get_all_camera_states()
-        for camera in camera_states:
+        for camera in camera_states.snapshot().states.values():
             cam_id = camera.get("camera_id", "")
             if camera_id and camera_id != cam_id:
                 continue
@@ -823,19 +879,28 @@ def handle_disconnect():
 def emit_incident_update(incident):
     socketio.emit('incident_update', incident)
 
-# Demo: emit camera status update
-def emit_camera_update(camera_state):
-    socketio.emit('camera_update', camera_state)
+@socketio.on('camera_resync')
+def handle_camera_resync(data=None):
+    """Client missed deltas (seq gap, reconnect): send it everything after its seq."""
+    since = (data or {}).get('since', -1)
+    emit('camera_update', get_state_publisher().since(int(since) if since is not None else -1))
+
+# Emit camera state deltas: {"seq", "ts", "full", "cameras": {camera_id: changed fields}}
+# (called by the state publisher once per tick, see backend/services/state_publisher.py)
+def emit_camera_update(delta):
+    socketio.emit('camera_update', delta)
 
-# Example: Hook into incident creation (add_incident) and camera state update to emit events
-# (In production, call emit_incident_update and emit_camera_update in the relevant service logic)
+# Example: Hook into incident creation (add_incident) to emit events
+# (In production, call emit_incident_update in the relevant service logic)
 
 if __name__ == "__main__":
     print("🚀 Starting VIGIL Backend on http://127.0.0.1:5000")
     print("📹 Loading video dataset...")
     print("🎥 Initializing cameras...")
     print("🎬 Starting live camera simulator...")
-    start_simulator()
+    use_reloader = True
+    # The reloader's file-watcher parent must not start a second set of cameras/models
+    create_app(start_runtime=should_start_runtime(use_reloader))
     print("✅ System ready - cameras are now 'live'")
-    socketio.run(app, host="0.0.0.0", port=5000, debug=True, use_reloader=True)
+    socketio.run(app, host="0.0.0.0", port=5000, debug=True, use_reloader=use_reloader)
 
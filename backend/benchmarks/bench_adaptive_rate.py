@@ -0,0 +1,151 @@
+"""
+Adaptive Analysis Rate Benchmark
+
+Runs CameraOrchestrator + AdaptiveRateController (time-scaled: intervals in
+tenths of a second) over a fake pipeline whose cameras report fixed scores:
+a few hot (violence 0.9), a few borderline (violence 0.6) and the rest calm
+(normal 0.95). Halfway through, an operator focuses one calm camera and
+another calm camera raises an incident.
+
+Checks:
+- hot and borderline cameras are analysed more often than calm ones
+- the total analysis rate stays within the budget
+- focus and incidents speed a calm camera up right away (its pending due
+  time is pulled in, not left until the old interval expires)
+
+Also reports analyses/s against a fixed cadence giving every camera the
+hot cameras' rate.
+
+Exits non-zero on failure.
+
+Usage:
+    python -m backend.benchmarks.bench_adaptive_rate [--cameras 24] [--budget 8] [--duration 24]
+"""
+
+import argparse
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict
+
+from backend.services.adaptive_rate import AdaptiveRateController
+from backend.services.orchestrator import CameraOrchestrator
+
+
+class FakeBundle:
+    frames = None
+
+    def __init__(self, video_path):
+        self.video_path = video_path
+
+    def cancel(self):
+        pass
+
+
+class ScoredPipeline:
+    def __init__(self, scores, controller):
+        self.scores = scores
+        self.controller = controller
+        self.lock = threading.Lock()
+        self.runs = defaultdict(list)
+
+    def select_clip(self, camera_id):
+        return f"{camera_id}.mp4", f"/clips/{camera_id}.mp4"
+
+    def bundle_for(self, video_path):
+        return FakeBundle(video_path)
+
+    def analyse_clip(self, camera_id, video_path, bundle):
+        time.sleep(0.005)
+        return dict(self.scores[camera_id])
+
+    def record_result(self, camera_id, rel_video_path, video_path, result):
+        with self.lock:
+            self.runs[camera_id].append(time.monotonic())
+        self.controller.observe(camera_id, result)
+
+
+def rate(runs, start, end):
+    n = sum(1 for t in runs if start <= t < end)
+    return n / (end - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cameras", type=int, default=24)
+    parser.add_argument("--budget", type=float, default=8.0)
+    parser.add_argument("--duration", type=float, default=24)
+    args = parser.parse_args()
+
+    cameras = [f"BENCH-{i:03d}" for i in range(args.cameras)]
+    hot, borderline = cameras[:2], cameras[2:5]
+    calm = cameras[5:]
+    focused, incident = calm[0], calm[1]
+    scores = {cid: {"event": "normal", "confidence": 0.95} for cid in calm}
+    scores.update({cid: {"event": "violence", "confidence": 0.9} for cid in hot})
+    scores.update({cid: {"event": "normal", "confidence": 0.4} for cid in borderline})  # violence p = 0.6
+
+    controller = AdaptiveRateController(min_interval=0.2, max_interval=6.0, budget_ips=args.budget,
+                                        incident_window=60, focus_ttl=60, tick_s=0.2)
+    pipeline = ScoredPipeline(scores, controller)
+    orchestrator = CameraOrchestrator(pipeline, cameras, interval=1.0, jitter=0.05, max_inflight=8,
+                                      inference_workers=8, wait_for_models=False)
+    orchestrator.start()
+    controller.attach(orchestrator, cameras)
+    controller.start()
+
+    start = time.monotonic()
+    half = start + args.duration / 2
+    time.sleep(args.duration / 2)
+    controller.set_focus(focused)
+    controller.note_incident(incident)
+    time.sleep(args.duration / 2)
+    end = time.monotonic()
+    metrics = controller.metrics()
+    controller.stop()
+    orchestrator.stop()
+
+    # Steady state: skip the first quarter (every camera starts at the default interval)
+    steady = start + args.duration / 4
+
+    def group_rate(group, a, b):
+        return statistics.mean(rate(pipeline.runs[c], a, b) for c in group)
+
+    hot_rate = group_rate(hot, steady, half)
+    border_rate = group_rate(borderline, steady, half)
+    calm_rate = group_rate([c for c in calm if c not in (focused, incident)], steady, half)
+    total_rate = sum(rate(pipeline.runs[c], steady, end) for c in cameras)
+    focus_before = rate(pipeline.runs[focused], steady, half)
+    focus_after = rate(pipeline.runs[focused], half + 1, end)
+    incident_after = rate(pipeline.runs[incident], half + 1, end)
+    first_focus_run = min((t for t in pipeline.runs[focused] if t >= half), default=end) - half
+    fixed_rate = args.cameras / 0.2
+
+    print(f"{args.cameras} cameras, budget {args.budget:g}/s, {args.duration:g}s "
+          f"(demand {metrics['demand_ips']}/s, allocated {metrics['allocated_ips']}/s)")
+    print(f"  analyses/s per camera: hot {hot_rate:.2f}  borderline {border_rate:.2f}  calm {calm_rate:.2f}")
+    print(f"  focused calm camera {focus_before:.2f} -> {focus_after:.2f}/s (first run {first_focus_run:.2f}s "
+          f"after focus), incident camera -> {incident_after:.2f}/s")
+    print(f"  total {total_rate:.2f} analyses/s vs {fixed_rate:.0f}/s for a fixed cadence at the hot rate")
+
+    failures = []
+    if not hot_rate > border_rate > calm_rate:
+        failures.append("rates not ordered hot > borderline > calm")
+    if total_rate > args.budget * 1.15:
+        failures.append(f"total rate {total_rate:.2f}/s over budget {args.budget:g}/s")
+    if focus_after < 2 * focus_before:
+        failures.append("operator focus did not speed the camera up")
+    if first_focus_run > 1.0:
+        failures.append(f"focused camera waited {first_focus_run:.2f}s for its first run")
+    if incident_after < 2 * calm_rate:
+        failures.append("a fresh incident did not speed the camera up")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK: risk-ordered rates within budget; focus and incidents apply immediately")
+
+
+if __name__ == "__main__":
+    main()
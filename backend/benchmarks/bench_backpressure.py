@@ -0,0 +1,168 @@
+"""
+Orchestrator Backpressure Benchmark
+
+Overloads CameraOrchestrator with a fake pipeline: every camera rotates to
+a new clip on each tick, and inference (two "detectors" that sleep, each
+skipped once the bundle is cancelled) takes longer than the pipeline can
+sustain for all cameras. A third of the cameras are high priority (their
+own load fits in capacity); every sixth camera has clips that take longer
+than its interval to analyse, so they are still in flight when it rotates.
+
+Checks:
+- no camera ever has more than queue_depth jobs queued
+- jobs on rotated-out clips are cancelled, in flight ones included, and no
+  result is ever recorded for a clip that had already rotated out
+- cancelled bundles skip the detectors that had not started
+- admission sheds low-priority cameras first: per camera, high-priority
+  ones are shed at under a tenth of the low-priority rate
+- recorded results are fresh: result age (record time - due time) stays
+  within stale_after intervals
+
+Exits non-zero on failure.
+
+Usage:
+    python -m backend.benchmarks.bench_backpressure [--cameras 36] [--interval 1] [--detector-ms 150]
+                                                    [--inflight 4] [--duration 12]
+"""
+
+import argparse
+import sys
+import threading
+import time
+from collections import defaultdict
+
+from backend.ai.frame_bundle import ClipCancelled
+from backend.services.orchestrator import CameraOrchestrator
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[int(q * (len(values) - 1))] if values else 0.0
+
+
+class FakeBundle:
+    frames = None
+
+    def __init__(self, video_path):
+        self.video_path = video_path
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class RotatingPipeline:
+    """Every select_clip rotates to a new clip; inference is two cancellable detector steps."""
+
+    def __init__(self, detector_ms: float, slow_cameras: set):
+        self.detector_s = detector_ms / 1000
+        self.slow_cameras = slow_cameras
+        self.lock = threading.Lock()
+        self.clips = defaultdict(int)       # camera -> current clip number
+        self.selected_at = {}               # (camera, clip) -> monotonic time selected
+        self.records = defaultdict(list)    # camera -> (age_s, clip was current)
+        self.steps_run = 0
+        self.steps_skipped = 0
+
+    def select_clip(self, camera_id):
+        with self.lock:
+            self.clips[camera_id] += 1
+            clip = f"{camera_id}/clip_{self.clips[camera_id]}.mp4"
+            self.selected_at[clip] = time.monotonic()
+        return clip, f"/clips/{clip}"
+
+    def bundle_for(self, video_path):
+        return FakeBundle(video_path)
+
+    def analyse_clip(self, camera_id, video_path, bundle):
+        for _ in range(2):
+            if bundle.cancelled:
+                with self.lock:
+                    self.steps_skipped += 1
+                raise ClipCancelled(video_path)
+            time.sleep(self.detector_s * (4 if camera_id in self.slow_cameras else 1))
+            with self.lock:
+                self.steps_run += 1
+        return {"event": "none", "confidence": 0.0}
+
+    def record_result(self, camera_id, rel_video_path, video_path, result):
+        with self.lock:
+            current = rel_video_path == f"{camera_id}/clip_{self.clips[camera_id]}.mp4"
+            self.records[camera_id].append((time.monotonic() - self.selected_at[rel_video_path], current))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cameras", type=int, default=36)
+    parser.add_argument("--interval", type=float, default=1.0)
+    parser.add_argument("--detector-ms", type=float, default=150)
+    parser.add_argument("--inflight", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=12)
+    args = parser.parse_args()
+
+    cameras = [f"CAM-{i:03d}" for i in range(args.cameras)]
+    high = set(cameras[: args.cameras // 3])
+    slow = set(cameras[5::6])
+    pipeline = RotatingPipeline(args.detector_ms, slow)
+    stale_after = 2.0
+    orchestrator = CameraOrchestrator(
+        pipeline, cameras, interval=args.interval, jitter=0.1,
+        max_inflight=args.inflight, queue_depth=1, stale_after=stale_after, max_waiting=args.inflight * 2,
+        priorities={cid: 2 for cid in high}, default_priority=1,
+        decode_workers=2, inference_workers=args.inflight, io_workers=4,
+        timeouts={"inference": 10}, wait_for_models=False,
+    )
+    orchestrator.start()
+    deadline = time.monotonic() + args.duration
+    max_queued = 0
+    while time.monotonic() < deadline:
+        time.sleep(0.2)
+        max_queued = max(max_queued, max(c["queued"] for c in orchestrator.metrics()["cameras"].values()))
+    metrics = orchestrator.metrics()
+    orchestrator.stop()
+
+    capacity = args.inflight / (2 * args.detector_ms / 1000)
+    demand = args.cameras / args.interval
+    ages = [age for runs in pipeline.records.values() for age, _ in runs]
+    stale_records = sum(1 for runs in pipeline.records.values() for _, current in runs if not current)
+    high_runs = sum(len(pipeline.records[c]) for c in high)
+    low_runs = sum(len(pipeline.records[c]) for c in cameras if c not in high)
+    admission = metrics["admission"]
+    shed = admission["shed_by_priority"]
+
+    print(f"{args.cameras} cameras every {args.interval:g}s = {demand:.0f} jobs/s "
+          f"vs capacity {capacity:.0f} jobs/s, {args.duration:g}s")
+    print(f"  recorded: high priority {high_runs}, low priority {low_runs}; "
+          f"result age p50 {percentile(ages, 0.5):.2f}s p95 {percentile(ages, 0.95):.2f}s max {max(ages or [0]):.2f}s")
+    print(f"  dropped {metrics['dropped']}  cancelled {metrics['cancelled']}  shed by priority {shed}")
+    print(f"  detector steps run {pipeline.steps_run}, skipped by cancellation {pipeline.steps_skipped}; "
+          f"max queued per camera {max_queued}")
+
+    failures = []
+    if max_queued > 1:
+        failures.append(f"a camera queued {max_queued} jobs (queue_depth 1)")
+    if stale_records:
+        failures.append(f"{stale_records} results recorded for clips that had rotated out")
+    if not metrics["cancelled"].get("rotated"):
+        failures.append("no job on a rotated-out clip was cancelled")
+    if not pipeline.steps_skipped:
+        failures.append("cancelled bundles never skipped a detector")
+    high_shed_rate = shed.get("2", 0) / max(1, len(high))
+    low_shed_rate = shed.get("1", 0) / max(1, args.cameras - len(high))
+    if high_shed_rate > 0.1 * low_shed_rate:
+        failures.append(f"high-priority cameras shed {high_shed_rate:.1f}/camera vs low {low_shed_rate:.1f}")
+    if not shed.get("1"):
+        failures.append("overload never shed a low-priority camera")
+    if high_runs <= low_runs:
+        failures.append("high-priority cameras did not get more runs than low-priority ones")
+    if ages and max(ages) > stale_after * args.interval * 1.2 + 2 * args.detector_ms / 1000:
+        failures.append(f"a result was {max(ages):.2f}s old when recorded")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK: bounded queues, rotated work cancelled, low priority shed first, fresh results")
+
+
+if __name__ == "__main__":
+    main()
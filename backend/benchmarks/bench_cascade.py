@@ -0,0 +1,115 @@
+"""
+Detector Cascade Benchmark
+
+Runs the cascade's object-presence pass (YOLOv8n at CASCADE["img_size"] on
+CASCADE["frames"] frames) on the labelled clips in Videos/ and reports, per
+detector:
+
+- skip rate: normal clips (no_violence / no_crash) where the heavy model
+  would not run (fewer than min_people people / no vehicle)
+- missed incidents: incident clips (violence / crash) the cascade would have
+  reported "normal" without running the model
+- presence pass vs heavy model latency per clip (decoding excluded; the
+  heavy model is timed only when its weights are present) and the inference
+  time saved per clip
+- for violence, the same numbers at min_people 1..3
+
+Exits non-zero if the configured thresholds miss more than --max-missed
+incident clips.
+
+Usage:
+    python -m backend.benchmarks.bench_cascade [--clips 50] [--max-missed 0]
+"""
+
+import argparse
+import sys
+import time
+
+from backend.ai.export import sample_bundles
+from backend.ai.motion_gate import DETECTOR_FOLDERS
+from backend.ai.people_counter.yolov8 import detect_objects_frames
+from backend.config import CASCADE
+
+
+def presence(folder, clips):
+    """[(people, vehicles)] and presence-pass ms per clip for Videos/<folder>."""
+    found, elapsed, bundles = [], 0.0, []
+    for bundle in sample_bundles(folder, clips):
+        try:
+            bundle.frames
+        except Exception as e:
+            print(f"  skipping {bundle.video_path}: {e}")
+            continue
+        start = time.perf_counter()
+        objects = detect_objects_frames(bundle, CASCADE.get("frames", 4), CASCADE.get("img_size", 320))
+        elapsed += time.perf_counter() - start
+        found.append((objects["people"], objects["vehicles"]))
+        bundles.append(bundle)
+    return found, elapsed * 1000 / max(1, len(found)), bundles
+
+
+def heavy_ms(detector, bundles, clips=3):
+    """Mean latency of the heavy model on a few already-decoded clips (None without weights)."""
+    if detector == "violence":
+        from backend.ai.violence_detector import detect_violence_frames as run
+    else:
+        from backend.ai.accident_model import detect_crash_frames as run
+    times = []
+    for bundle in bundles[:clips + 1]:
+        start = time.perf_counter()
+        result = run(bundle)
+        times.append(time.perf_counter() - start)
+        if result.get("event") == "error" or result.get("error"):
+            return None
+    return sum(times[1:]) * 1000 / max(1, len(times) - 1) if len(times) > 1 else None
+
+
+def needed(detector, people, vehicles, min_people):
+    if detector == "violence":
+        return people >= min_people
+    return vehicles >= CASCADE.get("min_vehicles", 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clips", type=int, default=50, help="Clips per folder")
+    parser.add_argument("--max-missed", type=int, default=0, help="Incident clips the cascade may miss")
+    args = parser.parse_args()
+
+    min_people = CASCADE.get("min_people", 2)
+    print(f"Cascade presence pass: YOLOv8n at {CASCADE.get('img_size', 320)}px on {CASCADE.get('frames', 4)} frames, "
+          f"violence needs {min_people} people, crash needs {CASCADE.get('min_vehicles', 1)} vehicle(s)")
+    failures = []
+    for detector, (incident_folder, normal_folder) in DETECTOR_FOLDERS.items():
+        incidents, incident_ms, incident_bundles = presence(incident_folder, args.clips)
+        normal, normal_ms, normal_bundles = presence(normal_folder, args.clips)
+        if not incidents and not normal:
+            print(f"\n{detector}: no clips")
+            continue
+        pass_ms = (incident_ms * len(incidents) + normal_ms * len(normal)) / (len(incidents) + len(normal))
+        model_ms = heavy_ms(detector, normal_bundles or incident_bundles)
+
+        print(f"\n{detector}: {len(normal)} normal / {len(incidents)} incident clips, presence pass {pass_ms:.0f} ms/clip, "
+              f"{detector} model {'n/a (no weights)' if model_ms is None else f'{model_ms:.0f} ms/clip'}")
+        rows = (1, 2, 3) if detector == "violence" else (min_people,)
+        for people in rows:
+            skipped = sum(1 for p, v in normal if not needed(detector, p, v, people))
+            missed = sum(1 for p, v in incidents if not needed(detector, p, v, people))
+            line = f"  {'min_people ' + str(people) + ': ' if detector == 'violence' else ''}" \
+                   f"skip {skipped}/{len(normal)} normal clips, missed incidents {missed}/{len(incidents)}"
+            if model_ms is not None and normal:
+                saved = skipped / len(normal) * model_ms - pass_ms
+                line += f", saves {saved:.0f} ms per normal clip"
+            print(line)
+            if people == min_people and missed > args.max_missed:
+                failures.append(f"{detector}: {missed} incident clips skipped (max {args.max_missed})")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK: the configured cascade misses no incident clip on Videos/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Frame Extraction Microbenchmark
+
+Compares the old seek-per-frame extraction (cap.set(POS_FRAMES) before every
+sampled frame) against the single-pass reader in backend.utils.video_utils.
+
+Usage:
+    python -m backend.benchmarks.bench_frame_extraction [--folder violence] [--clips 10] [--repeat 3]
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from backend.utils.video_utils import read_frames_at
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+VIDEO_DIR = PROJECT_ROOT / "Videos"
+FRAME_COUNT = 16
+IMG_SIZE = 224
+
+
+def extract_seek_per_frame(video_path: str, num_frames: int = FRAME_COUNT) -> np.ndarray:
+    """Baseline: the original seek-per-frame loop, full-resolution frames."""
+    cap = cv2.VideoCapture(video_path)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    num_frames = min(num_frames, total_frames)
+    frames = []
+    for idx in np.linspace(0, total_frames - 1, num_frames, dtype=int):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+        ret, frame = cap.read()
+        if ret:
+            frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    cap.release()
+    return np.array(frames)
+
+
+def extract_single_pass(video_path: str, num_frames: int = FRAME_COUNT, size=None) -> np.ndarray:
+    cap = cv2.VideoCapture(video_path)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    num_frames = min(num_frames, total_frames)
+    indices = np.linspace(0, total_frames - 1, num_frames, dtype=int)
+    frames = read_frames_at(cap, indices, size=size)
+    cap.release()
+    return frames
+
+
+def _time(fn, clips, repeat):
+    best = float("inf")
+    nbytes = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for clip in clips:
+            nbytes = max(nbytes, fn(str(clip)).nbytes)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000 / len(clips), nbytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--folder", default="violence", help="Subfolder of Videos/ to sample clips from")
+    parser.add_argument("--clips", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    folder = VIDEO_DIR / args.folder
+    clips = sorted(p for p in folder.iterdir() if p.suffix.lower() == ".mp4")[: args.clips]
+    if not clips:
+        print(f"No clips found in {folder}")
+        return
+
+    print(f"Benchmarking {len(clips)} clips from {folder} ({FRAME_COUNT} frames each, best of {args.repeat})")
+    variants = [
+        ("seek per frame", extract_seek_per_frame),
+        ("single pass", extract_single_pass),
+        (f"single pass @{IMG_SIZE}px", lambda p: extract_single_pass(p, size=(IMG_SIZE, IMG_SIZE))),
+    ]
+    baseline = None
+    for name, fn in variants:
+        ms, nbytes = _time(fn, clips, args.repeat)
+        baseline = baseline or ms
+        print(f"  {name:<24} {ms:8.1f} ms/clip   {baseline / ms:5.2f}x   frames: {nbytes / 1e6:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+/api/live-status Benchmark
+
+Times the /api/live-status handler (no runtime, no models) while a writer
+thread updates camera state, and compares:
+
+- legacy: lock + copy every state, then jsonify (the SafeDict endpoint)
+- snapshot: pre-serialized body per state version, 200 with ETag
+- revalidation: a poller echoing the last ETag in If-None-Match, answered
+  304 until a write changes the state
+
+Each view is called directly in a prebuilt request context, with no test
+client, routing or WSGI round trip. The cost of a no-op view in the same
+harness is subtracted, so what is left is the handler's own work. Views
+are interleaved over --rounds rounds and the median is reported, which
+keeps machine noise from favouring one of them.
+
+Checks:
+- the protocol (test client): an unchanged state answers 304, a change
+  produces a new ETag and a body with the new value
+- snapshot polls and revalidations each cost at most --max-ratio of the
+  legacy handler
+
+Exits non-zero on failure.
+
+Usage:
+    python -m backend.benchmarks.bench_live_status [--requests 500] [--rounds 15] [--writes-per-s 50] [--max-ratio 0.6]
+"""
+
+import argparse
+import statistics
+import sys
+import threading
+import time
+
+from flask import Response, jsonify
+from werkzeug.test import EnvironBuilder
+
+import backend.app as app_module
+from backend.config import DEFAULT_CAMERAS
+from backend.services.camera_manager import SafeDict, camera_states, set_camera_state, update_camera_inference
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500, help="Polls per view per round")
+    parser.add_argument("--rounds", type=int, default=15)
+    parser.add_argument("--writes-per-s", type=float, default=50)
+    parser.add_argument("--max-ratio", type=float, default=0.6, help="Max snapshot / legacy handler cost")
+    args = parser.parse_args()
+
+    app = app_module.create_app(start_runtime=False)
+    failures = []
+
+    # Legacy endpoint, for comparison
+    legacy_states = SafeDict()
+
+    def legacy_live_status():
+        all_states = legacy_states.all()
+        return jsonify({"cameras": [all_states.get(cid) for cid in DEFAULT_CAMERAS]})
+
+    def noop():
+        return Response(status=204)
+
+    client = app.test_client()
+
+    for cid in DEFAULT_CAMERAS:
+        set_camera_state(cid, {"camera_id": cid, "status": "online", "video": "crash/a.mp4", "event": "none",
+                               "confidence": 0.0, "last_update": None, "people_count": 0})
+
+    # Protocol
+    first = client.get("/api/live-status")
+    etag = first.headers.get("ETag")
+    again = client.get("/api/live-status", headers={"If-None-Match": etag})
+    if first.status_code != 200 or not etag or again.status_code != 304:
+        failures.append(f"unchanged state should revalidate to 304 (got {first.status_code}/{again.status_code})")
+    update_camera_inference(DEFAULT_CAMERAS[0], {"confidence": 0.77})
+    changed = client.get("/api/live-status", headers={"If-None-Match": etag})
+    if changed.status_code != 200 or changed.headers.get("ETag") == etag:
+        failures.append("a state change should produce a new ETag and body")
+    elif changed.get_json()["cameras"][0]["confidence"] != 0.77:
+        failures.append("new body does not contain the change")
+
+    stop = threading.Event()
+
+    def writer():
+        i = 0
+        while not stop.wait(1 / args.writes_per_s):
+            cid = DEFAULT_CAMERAS[i % len(DEFAULT_CAMERAS)]
+            fields = {"confidence": round((i % 100) / 100, 2), "last_update": time.time()}
+            update_camera_inference(cid, fields)
+            state = dict(legacy_states.get(cid) or camera_states.get(cid))
+            state.update(fields)
+            legacy_states.set(cid, state)
+            i += 1
+
+    for cid in DEFAULT_CAMERAS:
+        legacy_states.set(cid, dict(camera_states.get(cid)))
+    thread = threading.Thread(target=writer, daemon=True)
+    thread.start()
+
+    environ = EnvironBuilder(path="/api/live-status").get_environ()
+
+    def handler_us(view, revalidate=False):
+        """Mean us per call of `view`, each in its own request context."""
+        environs = [dict(environ) for _ in range(args.requests)]
+        etag, statuses = "", {}
+        start = time.perf_counter()
+        for env in environs:
+            env["HTTP_IF_NONE_MATCH"] = etag
+            with app.request_context(env):
+                resp = view()
+            if revalidate:
+                etag = resp.headers.get("ETag") or etag
+            statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+        return (time.perf_counter() - start) * 1e6 / args.requests, statuses
+
+    views = {
+        "noop": (noop, False),
+        "legacy (lock+copy+jsonify)": (legacy_live_status, False),
+        "snapshot 200": (app_module.live_status, False),
+        "snapshot If-None-Match": (app_module.live_status, True),
+    }
+    costs = {label: [] for label in views}
+    statuses = {label: {} for label in views}
+    for _ in range(args.rounds):
+        for label, (view, revalidate) in views.items():
+            us, counts = handler_us(view, revalidate)
+            costs[label].append(us)
+            for status, n in counts.items():
+                statuses[label][status] = statuses[label].get(status, 0) + n
+    stop.set()
+    thread.join()
+
+    harness = statistics.median(costs.pop("noop"))
+    # Clamped at 0: a handler within noise of the no-op view costs nothing measurable
+    handler = {label: max(0.0, statistics.median(us) - harness) for label, us in costs.items()}
+    legacy = handler["legacy (lock+copy+jsonify)"]
+    print(f"{args.requests} polls x {args.rounds} rounds per view, {len(DEFAULT_CAMERAS)} cameras, "
+          f"{args.writes_per_s:g} state writes/s; handler cost net of a {harness:.1f} us no-op view (median)")
+    for label, us in handler.items():
+        print(f"  {label:<28} {us:8.1f} us/request  {us / legacy:5.2f}x legacy  {statuses[label]}")
+    for label in ("snapshot 200", "snapshot If-None-Match"):
+        if handler[label] > args.max_ratio * legacy:
+            failures.append(f"{label} costs {handler[label]:.1f} us, {handler[label] / legacy:.2f}x the "
+                            f"legacy handler (max {args.max_ratio:g}x)")
+    if not statuses["snapshot If-None-Match"].get(304):
+        failures.append("revalidating poller never got a 304")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"OK: 304 on unchanged state, new ETag on change; snapshot polls at most {args.max_ratio:g}x "
+          f"the legacy handler cost")
+
+
+if __name__ == "__main__":
+    main()
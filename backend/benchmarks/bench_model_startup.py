@@ -0,0 +1,102 @@
+"""
+Crash Model Startup Benchmark
+
+Times building MobileNetV2_LSTM from the fine-tuned checkpoint, each run in a
+fresh interpreter (what every boot and every new inference worker pays):
+
+- legacy: MobileNetV2_LSTM() (ImageNet weights downloaded or read from the
+  torch hub cache, then initialized) + torch.load + load_state_dict copy
+- fast:   load_for_inference() (meta-device construction, mmap torch.load,
+  load_state_dict(assign=True))
+
+torch import time is excluded; the check at the end verifies both paths
+produce the same logits. On machines without network access and an empty
+hub cache the legacy path fails, which the report shows.
+
+Usage:
+    python -m backend.benchmarks.bench_model_startup [--weights PATH] [--runs 5]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+_CHILD = r"""
+import json, sys, time
+import torch
+torch.set_num_threads(1)
+from backend.ai.crash_detector.model_architecture import MobileNetV2_LSTM, load_for_inference
+
+mode, weights = sys.argv[1], sys.argv[2]
+start = time.perf_counter()
+if mode == "legacy":
+    model = MobileNetV2_LSTM()
+    model.load_state_dict(torch.load(weights, map_location="cpu"))
+    model.eval()
+else:
+    model = load_for_inference(weights, "cpu")
+elapsed = (time.perf_counter() - start) * 1000
+torch.manual_seed(0)
+with torch.no_grad():
+    logits = model(torch.rand(1, 4, 3, 224, 224))[0].tolist()
+print(json.dumps({"ms": elapsed, "logits": logits}))
+"""
+
+
+def run_once(mode: str, weights: Path) -> dict:
+    proc = subprocess.run([sys.executable, "-c", _CHILD, mode, str(weights)], cwd=PROJECT_ROOT,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def synthetic_checkpoint(directory: str) -> Path:
+    """Random fine-tuned-shaped checkpoint for trees without the real weights."""
+    import torch
+    from backend.ai.crash_detector.model_architecture import MobileNetV2_LSTM
+
+    path = Path(directory) / "mobilenetv2_lstm_random.pt"
+    torch.save(MobileNetV2_LSTM(pretrained=False).state_dict(), path)
+    return path
+
+
+def main():
+    from backend.ai.accident_model import CRASH_MODEL_PATH
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weights", type=Path, default=CRASH_MODEL_PATH)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        weights = args.weights
+        if not weights.exists():
+            print(f"{weights} not found, using a random checkpoint of the same shape")
+            weights = synthetic_checkpoint(tmp)
+
+        results = {}
+        for mode in ("legacy", "fast"):
+            runs = [run_once(mode, weights) for _ in range(args.runs)]
+            errors = [r["error"] for r in runs if "error" in r]
+            if errors:
+                print(f"  {mode:<7} failed: {errors[0]}")
+                continue
+            times = [r["ms"] for r in runs]
+            results[mode] = runs[0]["logits"]
+            print(f"  {mode:<7} median {statistics.median(times):8.1f} ms   "
+                  f"min {min(times):8.1f} ms   ({args.runs} fresh processes)")
+
+        if len(results) == 2:
+            diff = max(abs(a - b) for a, b in zip(results["legacy"], results["fast"]))
+            print(f"  max |logit diff| legacy vs fast: {diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
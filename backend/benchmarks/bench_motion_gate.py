@@ -0,0 +1,132 @@
+"""
+Motion Gate Benchmark
+
+Measures the motion gate (backend/ai/motion_gate.py) on the labelled clips
+in Videos/, per detector:
+
+- gate hit rate: normal clips (no_violence / no_crash) that would skip the
+  CNNs at the thresholds in use (config, calibration file or default)
+- missed incidents: incident clips (violence / crash) the gate would have
+  reported "normal" without running the detector
+- a threshold sweep (0.5x .. 8x the threshold in use) showing the trade-off
+- gate cost per clip (on already-decoded frames)
+
+Then runs run_inference end to end on two synthetic clips for a generic
+camera (violence CNN, no people counting): a static one must come back
+gated without touching a model, a moving one must reach the detector.
+
+Exits non-zero if the thresholds in use miss more than --max-missed incident
+clips or the end-to-end checks fail.
+
+Usage:
+    python -m backend.benchmarks.bench_motion_gate [--clips 200] [--max-missed 0]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from backend.ai.export import sample_bundles
+from backend.ai.motion_gate import DETECTOR_FOLDERS, detector_for, gate_report, get_motion_gate, motion_score
+from backend.config import CRASH_CAMERAS, DEFAULT_CAMERAS, PEOPLE_COUNT_CAMERAS
+
+
+def score_clips(folder, clips, gate):
+    """(scores, gate ms per clip) for Videos/<folder>; decoding is not timed."""
+    scores, elapsed = [], 0.0
+    for bundle in sample_bundles(folder, clips):
+        try:
+            bundle.frames
+        except Exception as e:
+            print(f"  skipping {bundle.video_path}: {e}")
+            continue
+        start = time.perf_counter()
+        scores.append(motion_score(bundle, gate.size, gate.pixel_delta))
+        elapsed += time.perf_counter() - start
+    return scores, elapsed * 1000 / max(1, len(scores))
+
+
+def write_clip(path, moving: bool, frames: int = 48, size: int = 160):
+    import cv2
+
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), 12, (size, size))
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 256, (size, size, 3), dtype=np.uint8)
+    for i in range(frames):
+        frame = background.copy()
+        if moving:
+            x = (i * 7) % (size - 40)
+            frame[40:120, x:x + 40] = 255
+        writer.write(frame)
+    writer.release()
+
+
+def end_to_end(camera_id):
+    """run_inference on a static and a moving synthetic clip; returns failures."""
+    from backend.ai.frame_bundle import FrameBundle
+    from backend.ai.inference import run_inference
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for moving in (False, True):
+            path = Path(tmp) / ("moving.mp4" if moving else "static.mp4")
+            write_clip(path, moving)
+            result = run_inference(str(path), camera_id=camera_id, bundle=FrameBundle(str(path)))
+            label = "moving" if moving else "static"
+            print(f"  {label} clip on {camera_id}: gated={result.get('gated')} model={result.get('model')} "
+                  f"motion={result.get('motion_score')} event={result.get('event')}")
+            if result.get("gated") is not (not moving):
+                failures.append(f"{label} clip gated={result.get('gated')}")
+            if not moving and result.get("model") != "motion_gate":
+                failures.append("static clip reached a detector")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clips", type=int, default=200, help="Clips per folder")
+    parser.add_argument("--max-missed", type=int, default=0, help="Incident clips the gate may miss")
+    args = parser.parse_args()
+
+    gate = get_motion_gate()
+    failures = []
+    print(f"Motion gate on Videos/ ({gate.size}px, pixel_delta {gate.pixel_delta:g})")
+    for detector, (incident_folder, normal_folder) in DETECTOR_FOLDERS.items():
+        camera = next((cid for cid in DEFAULT_CAMERAS if detector_for(cid) == detector), None)
+        threshold = gate.threshold(camera) if camera else gate.default_threshold
+        incidents, incident_ms = score_clips(incident_folder, args.clips, gate)
+        normal, normal_ms = score_clips(normal_folder, args.clips, gate)
+        if not incidents and not normal:
+            print(f"\n{detector}: no clips")
+            continue
+        report = gate_report(incidents, normal, threshold)
+        gate_ms = (incident_ms * len(incidents) + normal_ms * len(normal)) / (len(incidents) + len(normal))
+        print(f"\n{detector} cameras (threshold {threshold:.4f} on {camera}), gate {gate_ms:.2f} ms/clip")
+        print(f"  hit rate {report['gated_normal']}/{report['normal_clips']} normal clips gated, "
+              f"missed incidents {report['missed_incidents']}/{report['incident_clips']}")
+        print(f"  {'threshold':>10}{'hit rate':>10}{'missed':>8}")
+        for factor in (0.5, 1, 2, 4, 8):
+            row = gate_report(incidents, normal, threshold * factor)
+            print(f"  {row['threshold']:>10.4f}{row['hit_rate'] or 0:>10.3f}{row['missed_incidents']:>8}")
+        if report["missed_incidents"] > args.max_missed:
+            failures.append(f"{detector}: {report['missed_incidents']} incident clips gated "
+                            f"(max {args.max_missed})")
+
+    print("\nEnd to end (run_inference):")
+    generic = next(cid for cid in DEFAULT_CAMERAS if cid not in CRASH_CAMERAS and cid not in PEOPLE_COUNT_CAMERAS)
+    failures += end_to_end(generic)
+    print(f"  gate metrics: {get_motion_gate().metrics()['cameras']}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK: no incident clip missed at the thresholds in use; quiet clips skip the detectors")
+
+
+if __name__ == "__main__":
+    main()
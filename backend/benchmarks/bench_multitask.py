@@ -0,0 +1,145 @@
+"""
+Shared-Backbone Multi-Task Benchmark
+
+Scores labelled clips from Videos/ for both violence and crash, two ways, on
+the same decoded frames:
+
+- dedicated: the violence MobileNetV2 classifier plus the crash
+  MobileNetV2-LSTM (two backbone passes per frame)
+- shared: backend/ai/multitask.py, one frozen backbone pass feeding both heads
+
+Reports latency per clip (decoding excluded, batching off so it is
+single-stream compute), backbone passes per clip, crash-head parity with the
+dedicated crash model, and per-event accuracy against the folder labels for
+both paths (the violence head only once trained: python -m backend.ai.retrainer --heads).
+
+Checks:
+- exactly one backbone pass per clip on the shared path
+- the shared path takes at most --max-ratio of the dedicated time
+- with the "crash_lstm" backbone and its native crash head, crash
+  probabilities match the dedicated model within --parity-tol
+
+Exits non-zero on failure.
+
+Usage:
+    python -m backend.benchmarks.bench_multitask [--clips 8] [--max-ratio 0.8] [--parity-tol 1e-4]
+"""
+
+import argparse
+import sys
+import time
+
+import cv2
+
+from backend.config import ACCIDENT_THRESHOLD, BATCHING, MULTITASK
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clips", type=int, default=8, help="Clips per Videos/ folder")
+    parser.add_argument("--max-ratio", type=float, default=0.8, help="Max shared / dedicated latency")
+    parser.add_argument("--parity-tol", type=float, default=1e-4, help="Max crash probability difference")
+    args = parser.parse_args()
+
+    BATCHING["enabled"] = False  # time the forward passes, not the batching window
+
+    from backend.ai.accident_model import get_accident_model
+    from backend.ai.export import sample_bundles
+    from backend.ai.frame_bundle import FrameBundle
+    from backend.ai.multitask import EVENTS, available_heads, detect_multitask_frames, multitask_stats
+    from backend.ai.violence_detector.inference import run_inference_on_frames
+
+    try:
+        heads = available_heads()
+    except FileNotFoundError as e:
+        print(f"FAIL: {e}")
+        sys.exit(1)
+    source = MULTITASK.get("backbone", "crash_lstm")
+    print(f"Shared backbone: {source}, heads: {', '.join(heads) or 'none'}")
+
+    clips = []  # (frames, {event: label})
+    for folder, labels in (("violence", {"violence": 1}), ("no_violence", {"violence": 0}),
+                           ("crash", {"crash": 1}), ("no_crash", {"crash": 0})):
+        for bundle in sample_bundles(folder, args.clips):
+            try:
+                clips.append((bundle.frames, labels))
+            except Exception as e:
+                print(f"  skipping {bundle.video_path}: {e}")
+    if len(clips) < 2:
+        print("FAIL: not enough decodable clips in Videos/")
+        sys.exit(1)
+
+    crash_model = get_accident_model()
+    dedicated_ms, shared_ms, crash_diff = [], [], []
+    correct = {"dedicated": {e: [] for e in EVENTS}, "shared": {e: [] for e in EVENTS}}
+    passes_before = None
+    for i, (frames, labels) in enumerate(clips):
+        dedicated_bundle = FrameBundle.from_frames(f"<clip {i}>", frames)
+        start = time.perf_counter()
+        violence = run_inference_on_frames(dedicated_bundle)
+        crash_prob = crash_model.predict_frames(dedicated_bundle.resized(224, cv2.INTER_AREA))
+        dedicated = time.perf_counter() - start
+
+        shared_bundle = FrameBundle.from_frames(f"<clip {i}>", frames)
+        if i == 1:
+            passes_before = multitask_stats()["backbone_passes"]
+        start = time.perf_counter()
+        result = detect_multitask_frames(shared_bundle, EVENTS)
+        shared = time.perf_counter() - start
+        if result.get("event") == "error" or violence.get("event") == "error":
+            print(f"FAIL: inference error: {result.get('error') or violence.get('error')}")
+            sys.exit(1)
+        if i > 0:  # first clip warms both paths up
+            dedicated_ms.append(dedicated * 1000)
+            shared_ms.append(shared * 1000)
+
+        if "crash" in result:
+            crash_diff.append(abs(result["crash"]["confidence"] - crash_prob))
+        for event, label in labels.items():
+            if event == "violence":
+                correct["dedicated"][event].append((violence["event"] == "violence") == bool(label))
+                if "violence" in result:
+                    correct["shared"][event].append((result["violence"]["event"] == "violence") == bool(label))
+            else:
+                correct["dedicated"][event].append((crash_prob >= ACCIDENT_THRESHOLD) == bool(label))
+                if "crash" in result:
+                    correct["shared"][event].append((result["crash"]["confidence"] >= ACCIDENT_THRESHOLD) == bool(label))
+
+    passes = multitask_stats()["backbone_passes"] - passes_before
+    timed = len(clips) - 1
+    dedicated_mean = sum(dedicated_ms) / timed
+    shared_mean = sum(shared_ms) / timed
+    ratio = shared_mean / dedicated_mean
+    print(f"\n{len(clips)} clips ({timed} timed), both events per clip:")
+    print(f"  dedicated models   {dedicated_mean:7.1f} ms/clip (2 backbone passes)")
+    print(f"  shared backbone    {shared_mean:7.1f} ms/clip ({passes / timed:.2f} backbone passes), "
+          f"{ratio:.2f}x the dedicated time")
+    if crash_diff:
+        print(f"  crash head vs dedicated crash model: max |dp| {max(crash_diff):.2e}")
+    for event in EVENTS:
+        line = f"  {event} accuracy: dedicated "
+        for path in ("dedicated", "shared"):
+            hits = correct[path][event]
+            if path == "shared":
+                line += ", shared "
+            line += f"{sum(hits)}/{len(hits)}" if hits else "n/a (no head)"
+        print(line)
+
+    failures = []
+    if passes != timed:
+        failures.append(f"{passes} backbone passes for {timed} clips (expected one per clip)")
+    if ratio > args.max_ratio:
+        failures.append(f"shared path {ratio:.2f}x the dedicated time (max {args.max_ratio})")
+    native_crash = source == "crash_lstm" and "crash" not in multitask_stats()["heads_trained"]
+    if native_crash and crash_diff and max(crash_diff) > args.parity_tol:
+        failures.append(f"crash head differs from the dedicated model by {max(crash_diff):.2e} "
+                        f"(max {args.parity_tol:g})")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK: one backbone pass per clip feeds both heads")
+
+
+if __name__ == "__main__":
+    main()
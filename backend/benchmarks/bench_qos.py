@@ -0,0 +1,244 @@
+"""
+QoS Degradation Ladder Benchmark
+
+First measures each rung's inference cost: one violence MobileNetV2 and one
+crash MobileNetV2-LSTM forward pass at the rung's frames / img_size, int8
+rungs quantized with QOS["quantized_mode"] exactly as the loaders do
+(architectures with random weights, calibrated on random inputs; timing
+does not depend on the weights), one thread.
+
+Then runs CameraOrchestrator + QoSController (time-scaled: hold of 1s) over
+a fake pipeline whose analysis cost is --cost-ms scaled by the measured cost
+of the rung it runs at (halved again on rungs without people counting, which
+is not timed). Phase 1 overloads the pipeline; phase 2 slows every camera
+down so it is idle.
+
+Checks:
+- on every rung that changes frames / img_size / quantized, each detector
+  costs at least --min-saving less than on the rung above it (no
+  do-nothing rungs)
+- under overload the level steps down, and degraded results still cover
+  every camera (fidelity is traded instead of cameras going stale)
+- once load falls the level steps back up to full fidelity
+- steps are at least hold_s apart (no flapping at a threshold)
+- under steady overload a reversed step up backs off: each retry of a step
+  up to the same rung waits at least twice as long as the previous one, so
+  no rung's step up is reversed more than log2(duration / hold_s) - 1 times
+  (the level does not keep cycling between two rungs)
+- every recorded result carries the rung it ran at (qos_level / qos)
+
+Exits non-zero on failure.
+
+Usage:
+    python -m backend.benchmarks.bench_qos [--cameras 24] [--cost-ms 200] [--inflight 2] [--duration 10]
+                                       [--min-saving 0.1] [--repeat 5]
+"""
+
+import argparse
+import math
+import sys
+import threading
+import time
+
+from backend.config import QOS
+from backend.services.orchestrator import CameraOrchestrator
+from backend.services.qos import QoSController
+
+
+class FakeBundle:
+    frames = None
+
+    def __init__(self, video_path, num_frames):
+        self.video_path = video_path
+        self.num_frames = num_frames
+
+    def cancel(self):
+        pass
+
+
+def measure_rung_costs(ladder, repeat: int) -> list:
+    """Per rung, {"violence": ms, "crash": ms} of one forward pass each (best of `repeat`)."""
+    import torch
+    import torch.nn as nn
+    from torchvision.models import mobilenet_v2
+    from backend.ai.crash_detector.model_architecture import MobileNetV2_LSTM
+    from backend.ai.quantization import quantize_model
+
+    threads = torch.get_num_threads()
+    torch.set_num_threads(1)
+    violence = mobilenet_v2(weights=None)
+    violence.classifier[1] = nn.Linear(violence.last_channel, 2)
+    models = {False: {"mobilenet": violence.eval(), "crash_lstm": MobileNetV2_LSTM(pretrained=False).eval()}}
+    mode = QOS.get("quantized_mode", "static")
+    calibration = [torch.randn(8, 3, 224, 224) for _ in range(4)]
+
+    def timed_ms(model, x):
+        with torch.no_grad():
+            model(x)  # warmup
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                model(x)
+                best = min(best, time.perf_counter() - start)
+        return best * 1000
+
+    costs = []
+    try:
+        for rung in ladder:
+            quantized = bool(rung.get("quantized"))
+            if quantized not in models:
+                models[True] = {name: quantize_model(model, name, mode, calibration if mode == "static" else None)
+                                for name, model in models[False].items()}
+            frames, size = rung.get("frames", 16), rung.get("img_size", 224)
+            costs.append({
+                "violence": timed_ms(models[quantized]["mobilenet"], torch.randn(frames, 3, size, size)),
+                "crash": timed_ms(models[quantized]["crash_lstm"], torch.randn(1, frames, 3, size, size)),
+            })
+    finally:
+        torch.set_num_threads(threads)
+    return costs
+
+
+class LadderPipeline:
+    """Analysis cost follows the measured inference cost of the rung, halved without people counting."""
+
+    def __init__(self, cost_ms: float, rung_costs: list):
+        self.cost_s = cost_ms / 1000
+        full = sum(rung_costs[0].values())
+        self.rung_scale = [sum(cost.values()) / full for cost in rung_costs]
+        self.lock = threading.Lock()
+        self.records = []  # (monotonic time, camera, qos_level, qos name)
+
+    def select_clip(self, camera_id):
+        return f"{camera_id}.mp4", f"/clips/{camera_id}.mp4"
+
+    def bundle_for(self, video_path, qos=None):
+        return FakeBundle(video_path, (qos or {}).get("frames", 16))
+
+    def analyse_clip(self, camera_id, video_path, bundle, qos=None):
+        qos = qos or {}
+        cost = self.cost_s * self.rung_scale[qos.get("level", 0)]
+        cost *= 0.5 if qos.get("people_count", True) is False else 1.0
+        time.sleep(cost)
+        result = {"event": "normal", "confidence": 0.9}
+        if qos:
+            result["qos_level"] = qos["level"]
+            result["qos"] = qos["name"]
+        return result
+
+    def record_result(self, camera_id, rel_video_path, video_path, result):
+        with self.lock:
+            self.records.append((time.monotonic(), camera_id, result.get("qos_level"), result.get("qos")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cameras", type=int, default=24)
+    parser.add_argument("--cost-ms", type=float, default=200)
+    parser.add_argument("--inflight", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--min-saving", type=float, default=0.1,
+                        help="Min fraction of inference cost a rung must save over the rung above")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed forward passes per rung")
+    args = parser.parse_args()
+
+    failures = []
+    ladder = QOS["ladder"]
+    rung_costs = measure_rung_costs(ladder, args.repeat)
+    print(f"Inference cost per rung (one forward pass, 1 thread, quantized_mode "
+          f"{QOS.get('quantized_mode', 'static')}):")
+    model_keys = ("frames", "img_size", "quantized")
+    full = sum(rung_costs[0].values())
+    for level, (rung, costs) in enumerate(zip(ladder, rung_costs)):
+        name = rung.get("name", f"level{level}")
+        line = (f"  {level} {name:<8} violence {costs['violence']:7.1f} ms  crash {costs['crash']:7.1f} ms  "
+                f"{sum(costs.values()) / full:5.2f}x full")
+        if level > 0 and any(rung.get(k) != ladder[level - 1].get(k) for k in model_keys):
+            above = rung_costs[level - 1]
+            savings = {detector: 1 - cost / above[detector] for detector, cost in costs.items()}
+            line += "  saves " + ", ".join(f"{d} {v:.0%}" for d, v in savings.items())
+            for detector, saving in savings.items():
+                if saving < args.min_saving:
+                    failures.append(f"rung {name} saves {detector} {saving:.0%} inference over the rung above "
+                                    f"(min {args.min_saving:.0%})")
+        print(line)
+
+    hold_s = 1.0
+    qos = QoSController(ladder=ladder, step_down={"lag_ms": 500, "waiting": 2, "drops": 1},
+                        step_up={"lag_ms": 100, "waiting": 0, "drops": 0}, hold_s=hold_s)
+    cameras = [f"QOS-{i:03d}" for i in range(args.cameras)]
+    pipeline = LadderPipeline(args.cost_ms, rung_costs)
+    orchestrator = CameraOrchestrator(pipeline, cameras, interval=1.0, jitter=0.05, max_inflight=args.inflight,
+                                      max_waiting=args.inflight * 2, inference_workers=args.inflight,
+                                      wait_for_models=False, qos=qos, qos_tick=0.25)
+    orchestrator.start()
+
+    start = time.monotonic()
+    time.sleep(args.duration)
+    overloaded_level = qos.level
+    switch, switch_at = time.monotonic(), time.time()
+    for cid in cameras:
+        orchestrator.set_interval(cid, 20.0)
+    deadline = switch + args.duration * 1.5
+    while qos.level > 0 and time.monotonic() < deadline:
+        time.sleep(0.25)
+    recovered_after = time.monotonic() - switch
+    metrics = qos.metrics()
+    orchestrator.stop()
+
+    overload = [r for r in pipeline.records if start + args.duration / 2 <= r[0] < switch]
+    degraded = [r for r in overload if r[2]]
+    covered = {r[1] for r in overload}
+    step_times = [step["at"] for step in metrics["steps"]]
+    min_gap = min((b - a for a, b in zip(step_times, step_times[1:])), default=None)
+    steps = [(step["from"], step["to"]) for step in metrics["steps"]]
+    # Step ups under overload that the next step reversed: (rung stepped up to, time waited before it)
+    overload_steps = [(step["at"], step["from"], step["to"]) for step in metrics["steps"] if step["at"] < switch_at]
+    reversed_ups = [(up[2], up[0] - prev[0]) for prev, up, down in
+                    zip(overload_steps, overload_steps[1:], overload_steps[2:])
+                    if up[2] < up[1] and (down[1], down[2]) == (up[2], up[1])]
+    cycles = len(reversed_ups)
+    max_cycles = max(1, int(math.log2(args.duration / hold_s)) - 1)
+    per_rung = {level: sum(1 for rung, _ in reversed_ups if rung == level) for level, _ in reversed_ups}
+    no_backoff = []
+    for level in {rung for rung, _ in reversed_ups}:
+        waits = [wait for rung, wait in reversed_ups if rung == level]
+        if any(b < min(2 * a, qos.max_hold_s) * 0.95 for a, b in zip(waits, waits[1:])):
+            no_backoff.append((level, waits))
+    unlabelled = sum(1 for r in pipeline.records if r[2] is None or r[3] is None)
+    capacity = args.inflight / (args.cost_ms / 1000)
+
+    print(f"{args.cameras} cameras every 1s vs full-fidelity capacity {capacity:.0f}/s, hold {hold_s:g}s")
+    print(f"  overload: level {overloaded_level} ({qos.profile(overloaded_level)['name']}), "
+          f"{len(degraded)}/{len(overload)} results degraded, {len(covered)}/{args.cameras} cameras analysed")
+    print(f"  steps: " + ", ".join(f"{a}->{b}" for a, b in steps) + f" ({cycles} reversed step ups)")
+    print(f"  back to full fidelity {recovered_after:.1f}s after load fell; "
+          f"min gap between steps {min_gap if min_gap is None else round(min_gap, 2)}s")
+
+    if overloaded_level == 0:
+        failures.append("overload never stepped the level down")
+    if not degraded:
+        failures.append("no degraded result under overload")
+    if len(covered) < args.cameras:
+        failures.append(f"only {len(covered)}/{args.cameras} cameras analysed under overload")
+    if qos.level != 0:
+        failures.append(f"level still {qos.level} {recovered_after:.1f}s after load fell")
+    if min_gap is not None and min_gap < hold_s * 0.9:
+        failures.append(f"steps {min_gap:.2f}s apart (hold {hold_s:g}s)")
+    for level, waits in no_backoff:
+        failures.append(f"step up to level {level} retried without backing off: waited "
+                        + ", ".join(f"{w:.1f}s" for w in waits))
+    for level, count in sorted(per_rung.items()):
+        if count > max_cycles:
+            failures.append(f"step up to level {level} reversed {count} times (max {max_cycles}): the level cycles")
+    if unlabelled:
+        failures.append(f"{unlabelled} results without qos_level / qos")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK: steps down under overload, backs off reversed step ups, recovers, level recorded on every result")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Camera Scheduler Benchmark
+
+Runs a synthetic per-camera job (sleep of --job-ms, standing in for
+GIL-releasing decode + inference; one camera takes --slow-ms) for many
+cameras with a target interval, two ways:
+
+- sequential: walk every camera, then sleep the interval (the old
+  CameraSimulator loop)
+- scheduler: CameraScheduler with --workers worker threads
+
+and reports, per camera, the period between consecutive runs (what a viewer
+sees as update latency) plus run-count fairness and scheduler lag.
+
+Usage:
+    python -m backend.benchmarks.bench_scheduler [--cameras 200] [--interval 2] [--workers 8]
+                                                 [--job-ms 20] [--slow-ms 500] [--duration 20]
+"""
+
+import argparse
+import statistics
+import threading
+import time
+from collections import defaultdict
+
+from backend.services.scheduler import CameraScheduler
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[int(q * (len(values) - 1))] if values else 0.0
+
+
+class Recorder:
+    def __init__(self, job_ms: float, slow_ms: float, slow_camera: str):
+        self.starts = defaultdict(list)
+        self.lock = threading.Lock()
+        self.job_s = job_ms / 1000
+        self.slow_s = slow_ms / 1000
+        self.slow_camera = slow_camera
+
+    def job(self, camera_id: str):
+        with self.lock:
+            self.starts[camera_id].append(time.monotonic())
+        time.sleep(self.slow_s if camera_id == self.slow_camera else self.job_s)
+
+    def report(self, label: str, cameras, interval: float):
+        periods = [b - a for c in cameras for a, b in zip(self.starts[c], self.starts[c][1:])]
+        runs = [len(self.starts[c]) for c in cameras]
+        print(f"  {label:<11} period p50 {statistics.median(periods) if periods else 0:6.2f}s  "
+              f"p95 {percentile(periods, 0.95):6.2f}s  max {max(periods, default=0):6.2f}s  "
+              f"(target {interval:.2f}s)   runs/camera min {min(runs)} max {max(runs)}")
+
+
+def run_sequential(cameras, interval, duration, recorder):
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        for camera_id in cameras:
+            if time.monotonic() >= end:
+                break
+            recorder.job(camera_id)
+        time.sleep(interval)
+
+
+def run_scheduler(cameras, interval, duration, workers, recorder):
+    scheduler = CameraScheduler(recorder.job, cameras, interval=interval, workers=workers, jitter=0.1)
+    scheduler.start()
+    time.sleep(duration)
+    metrics = scheduler.metrics()
+    scheduler.stop()
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cameras", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=2.0)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--job-ms", type=float, default=20)
+    parser.add_argument("--slow-ms", type=float, default=500)
+    parser.add_argument("--duration", type=float, default=20)
+    args = parser.parse_args()
+
+    cameras = [f"CAM-{i:04d}" for i in range(args.cameras)]
+    print(f"{args.cameras} cameras, target interval {args.interval}s, job {args.job_ms:g} ms "
+          f"(one camera {args.slow_ms:g} ms), {args.duration:g}s per run")
+
+    sequential = Recorder(args.job_ms, args.slow_ms, cameras[0])
+    run_sequential(cameras, args.interval, args.duration, sequential)
+    sequential.report("sequential", cameras, args.interval)
+
+    scheduled = Recorder(args.job_ms, args.slow_ms, cameras[0])
+    metrics = run_scheduler(cameras, args.interval, args.duration, args.workers, scheduled)
+    scheduled.report(f"{args.workers} workers", cameras, args.interval)
+    lag = metrics.get("lag_ms", {})
+    print(f"  scheduler lag avg {lag.get('avg', 0):.1f} ms  p95 {lag.get('p95', 0):.1f} ms  "
+          f"max {lag.get('max', 0):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
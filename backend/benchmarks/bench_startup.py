@@ -0,0 +1,102 @@
+"""
+Backend Startup Benchmark
+
+Measures cold start of the backend in fresh interpreters:
+
+- import: `python -X importtime -c "import backend.app"`, reporting the total
+  and the slowest direct imports
+- first response: interpreter start until create_app(start_runtime=False)
+  serves GET /api/live-status through the Flask test client
+
+Fails (exit code 1) when the import exceeds --budget-ms or when a heavy
+inference dependency (torch, cv2, ...) is imported at module import time;
+those belong to first use or the explicit preload phase. Intended to run in
+CI next to compileall.
+
+Usage:
+    python -m backend.benchmarks.bench_startup [--budget-ms 1500] [--runs 3] [--top 10]
+"""
+
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_BUDGET_MS = 1500
+HEAVY_MODULES = ("torch", "torchvision", "cv2", "decord", "ultralytics", "onnxruntime")
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+_FIRST_RESPONSE = (
+    "from backend.app import create_app\n"
+    "response = create_app(start_runtime=False).test_client().get('/api/live-status')\n"
+    "assert response.status_code == 200, response.status_code\n"
+)
+
+
+def import_profile(module: str):
+    """(total_ms, [(cumulative_ms, name)] of the module's direct imports, set of all imported names)."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=PROJECT_ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    direct, names, total_us = [], set(), 0
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(2)), len(match.group(3)), match.group(4)
+        names.add(name)
+        if indent <= 1:
+            total_us += cumulative  # top level: interpreter startup + the module
+        elif indent == 3:
+            direct.append((cumulative / 1000, name))
+    return total_us / 1000, sorted(direct, reverse=True), names
+
+
+def first_response_ms() -> float:
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", _FIRST_RESPONSE], cwd=PROJECT_ROOT,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="backend.app")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    profiles = [import_profile(args.module) for _ in range(args.runs)]
+    totals = [p[0] for p in profiles]
+    total = statistics.median(totals)
+    _, direct, names = profiles[-1]
+    print(f"import {args.module}: median {total:.0f} ms (min {min(totals):.0f} ms, {args.runs} runs)")
+    for cumulative, name in direct[:args.top]:
+        print(f"  {cumulative:8.1f} ms  {name}")
+
+    response = statistics.median(first_response_ms() for _ in range(args.runs))
+    print(f"first /api/live-status response: median {response:.0f} ms from interpreter start")
+
+    failures = []
+    heavy = sorted(set(HEAVY_MODULES) & names)
+    if heavy:
+        failures.append(f"heavy modules imported at import time: {', '.join(heavy)}")
+    if total > args.budget_ms:
+        failures.append(f"import took {total:.0f} ms, budget {args.budget_ms:.0f} ms")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"OK: within {args.budget_ms:.0f} ms budget, no heavy imports")
+
+
+if __name__ == "__main__":
+    main()
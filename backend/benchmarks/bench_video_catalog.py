@@ -0,0 +1,96 @@
+"""
+Video Catalog Benchmark
+
+Builds a temporary Videos/ tree with --clips clips (copies of one real clip,
+spread over the four categories) and measures:
+
+- cold build: scan + probe every clip
+- warm build: new process-style catalog reading the persisted index
+- refresh with nothing changed: directory mtimes only, and with the
+  per-clip stat cycle that catches in-place rewrites
+- refresh after rewriting one clip in place (its folder mtime unchanged)
+- choosing a clip: catalog.choose() vs the old glob of the category folder
+
+Usage:
+    python -m backend.benchmarks.bench_video_catalog [--clips 2000] [--source Videos/crash/<clip>.mp4]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from backend.services.video_catalog import VIDEO_DIR, VideoCatalog
+
+CATEGORIES = ["violence", "crash", "no_violence", "no_crash"]
+
+
+def timed(fn, repeat: int = 1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) * 1000 / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clips", type=int, default=2000)
+    parser.add_argument("--source", default=None, help="Clip to replicate (default: smallest clip under Videos/)")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    clips = [p for p in VIDEO_DIR.rglob("*") if p.suffix.lower() == ".mp4"]
+    source = Path(args.source) if args.source else min(clips, key=lambda p: p.stat().st_size, default=None)
+    if source is None:
+        sys.exit("No source clip found")
+
+    tmp = Path(tempfile.mkdtemp(prefix="vigil_catalog_"))
+    try:
+        root = tmp / "Videos"
+        for category in CATEGORIES:
+            (root / category).mkdir(parents=True)
+        for i in range(args.clips):
+            # Copies, not hard links: touching one clip must not touch the others
+            shutil.copyfile(source, root / CATEGORIES[i % len(CATEGORIES)] / f"clip_{i:06d}.mp4")
+        index = tmp / "index.json"
+        print(f"{args.clips} clips under {root} (source {source.name})")
+
+        catalog = VideoCatalog(root, index_path=str(index), probe_workers=args.workers)
+        ms, _ = timed(catalog.refresh)
+        print(f"  cold build (probe all)      {ms:9.1f} ms")
+
+        warm = VideoCatalog(root, index_path=str(index), probe_workers=args.workers)
+        ms, changes = timed(warm.refresh)
+        print(f"  warm build (from index)     {ms:9.1f} ms  probed {warm.probed}")
+
+        ms, _ = timed(warm.refresh, repeat=20)
+        print(f"  refresh, nothing changed    {ms:9.3f} ms")
+
+        warm.stat_interval_s = 0  # stat every indexed clip on each refresh
+        ms, _ = timed(warm.refresh, repeat=20)
+        print(f"  refresh + stat every clip   {ms:9.3f} ms")
+
+        touched = root / "crash" / "clip_000001.mp4"
+        os.utime(touched, None)
+        ms, changes = timed(warm.refresh)
+        print(f"  refresh, one clip rewritten {ms:9.1f} ms  {changes}")
+
+        ms_choose, _ = timed(lambda: warm.choose("violence"), repeat=1000)
+        folder = root / "violence"
+        ms_glob, _ = timed(lambda: random.choice(list(folder.glob("*.mp4"))), repeat=5)
+        print(f"  choose clip: catalog {ms_choose * 1000:.1f} us   glob {ms_glob:.1f} ms")
+
+        if warm.probed != 1 or len(warm.clips()) != args.clips:
+            print(f"FAIL: expected the rewritten clip re-probed and {args.clips} clips, "
+                  f"got {warm.probed} probes / {len(warm.clips())} clips")
+            sys.exit(1)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
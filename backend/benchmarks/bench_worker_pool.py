@@ -0,0 +1,84 @@
+"""
+Worker Pool Throughput Benchmark
+
+Runs one detector over pre-decoded clips, first in-process (sequential, the
+way camera threads share one core today) and then through WorkerPool with an
+increasing number of worker processes, and reports clips/s per configuration.
+Throughput should scale with workers up to the number of physical cores.
+
+Usage:
+    python -m backend.benchmarks.bench_worker_pool [--detector violence] [--workers 1 2 4]
+                                                   [--clips 24] [--threads 1]
+"""
+
+import argparse
+import os
+import time
+from pathlib import Path
+
+from backend.ai.detectors import DETECTORS
+from backend.ai.frame_bundle import FrameBundle
+from backend.ai.worker_pool import WorkerPool
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+VIDEO_DIR = PROJECT_ROOT / "Videos"
+FOLDERS = {"violence": "violence", "people_count": "violence", "crash": "crash"}
+
+
+def load_bundles(folder: str, count: int):
+    clips = sorted(p for p in (VIDEO_DIR / folder).iterdir() if p.suffix.lower() == ".mp4")
+    bundles = []
+    for i in range(count):
+        bundle = FrameBundle(str(clips[i % len(clips)]))
+        bundle.frames  # decode up front: only inference is timed
+        bundles.append(bundle)
+    return bundles
+
+
+def bench_in_process(detector: str, bundles) -> float:
+    DETECTORS[detector].detect(bundles[0])  # model load + warmup
+    start = time.perf_counter()
+    for bundle in bundles:
+        DETECTORS[detector].detect(bundle)
+    return len(bundles) / (time.perf_counter() - start)
+
+
+def bench_pool(detector: str, bundles, workers: int, threads: int):
+    pool = WorkerPool(workers=workers, threads_per_worker=threads)
+    try:
+        # Warm every worker (model load) before timing
+        for future in [pool.submit(detector, bundles[i % len(bundles)]) for i in range(2 * workers)]:
+            future.result()
+        start = time.perf_counter()
+        futures = [pool.submit(detector, bundle) for bundle in bundles]
+        errors = sum(1 for f in futures if "error" in f.result())
+        elapsed = time.perf_counter() - start
+        metrics = pool.metrics()
+    finally:
+        pool.shutdown()
+    return len(bundles) / elapsed, metrics.get("p95_latency_ms", 0.0), errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--detector", choices=sorted(DETECTORS), default="violence")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clips", type=int, default=24)
+    parser.add_argument("--threads", type=int, default=1, help="Threads per worker")
+    args = parser.parse_args()
+
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+    bundles = load_bundles(FOLDERS[args.detector], args.clips)
+    print(f"Benchmarking {args.detector} on {len(bundles)} clips ({os.cpu_count()} CPUs)")
+
+    baseline = bench_in_process(args.detector, bundles)
+    print(f"  {'in-process':<14} {baseline:8.2f} clips/s   1.00x")
+    for workers in args.workers:
+        throughput, p95, errors = bench_pool(args.detector, bundles, workers, args.threads)
+        note = f"   ({errors} error results)" if errors else ""
+        print(f"  {f'{workers} worker(s)':<14} {throughput:8.2f} clips/s  {throughput / baseline:5.2f}x"
+              f"   p95 {p95:7.1f} ms{note}")
+
+
+if __name__ == "__main__":
+    main()
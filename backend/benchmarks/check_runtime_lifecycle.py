@@ -0,0 +1,94 @@
+"""
+Runtime Lifecycle Check
+
+Starts the backend runtime the way the app does, then repeats every start
+path (create_app(), start_simulator(), get_runtime().start(),
+start_camera_simulator(), re-importing backend.app) and asserts that the
+set of background threads and the loaded models stay exactly the same, i.e.
+nothing is started or loaded twice. Finally stops the runtime and asserts
+its threads are gone.
+
+Exits non-zero on failure, so it can run in CI next to compileall.
+
+Usage:
+    python -m backend.benchmarks.check_runtime_lifecycle [--settle 3]
+"""
+
+import argparse
+import importlib
+import sys
+import threading
+import time
+from collections import Counter
+
+# Threads that come and go on their own (preload executor, orchestrator executors that
+# grow on demand up to a fixed bound, video catalog probes, pool workers of other libs)
+TRANSIENT_PREFIXES = ("Preload", "CameraPool", "VideoProbe", "ThreadPoolExecutor", "Dummy-")
+
+
+def thread_snapshot() -> Counter:
+    return Counter(t.name for t in threading.enumerate() if not t.name.startswith(TRANSIENT_PREFIXES))
+
+
+def model_snapshot() -> dict:
+    from backend.ai.model_registry import model_registry_stats
+    return {name: (m["loaded"], m["refs"]) for name, m in model_registry_stats()["models"].items()}
+
+
+def settle(seconds: float):
+    from backend.ai.preload import wait_until_ready
+    wait_until_ready(timeout=300)
+    time.sleep(seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--settle", type=float, default=3.0, help="Seconds to let the runtime run between checks")
+    args = parser.parse_args()
+
+    import backend.app as app_module
+    from backend.services.camera_simulator import get_simulator, start_camera_simulator
+    from backend.services.runtime import get_runtime
+
+    failures = []
+    if get_runtime().running or get_simulator() is not None:
+        failures.append("importing backend.app started the runtime")
+
+    app_module.create_app()
+    settle(args.settle)
+    threads, models, simulator = thread_snapshot(), model_snapshot(), get_simulator()
+    print(f"after start: {sum(threads.values())} threads, models {models}")
+
+    app_module.create_app()
+    app_module.start_simulator()
+    start_camera_simulator()
+    get_runtime().start()
+    importlib.import_module("backend.app")
+    settle(args.settle)
+
+    if thread_snapshot() != threads:
+        failures.append(f"thread set changed: {dict(threads)} -> {dict(thread_snapshot())}")
+    if model_snapshot() != models:
+        failures.append(f"models changed: {models} -> {model_snapshot()}")
+    if get_simulator() is not simulator:
+        failures.append("a second simulator was created")
+    duplicated = [name for name, count in thread_snapshot().items() if count > 1 and not name.startswith("Thread-")]
+    if duplicated:
+        failures.append(f"duplicate background threads: {duplicated}")
+
+    owned = get_runtime().threads()
+    get_runtime().stop()
+    leftover = [t.name for t in threading.enumerate() if t.name in owned and t.is_alive()]
+    if leftover:
+        failures.append(f"threads still alive after stop(): {leftover}")
+    print(f"runtime threads {owned} stopped; status: {get_runtime().status()}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK: one runtime, constant threads and models")
+
+
+if __name__ == "__main__":
+    main()
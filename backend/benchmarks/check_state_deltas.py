@@ -0,0 +1,120 @@
+"""
+Camera State Delta Check
+
+Drives camera_manager.update_camera_inference the way the simulator does
+and checks what the state publisher emits:
+
+- only changed fields are published; a write that changes nothing publishes nothing
+- seq increases by one per delta, and writes within a tick share one delta
+- since(seq) returns the merged changes after seq with "base": seq (so a
+  client at seq applies it despite the seq jump), and a full snapshot once
+  seq has fallen out of the history
+- a client applying the deltas ends up with exactly camera_states
+
+Then reports bytes sent: the deltas vs a full /api/live-status snapshot at
+the same rate (what polling would cost for the same freshness).
+
+Exits non-zero on failure.
+
+Usage:
+    python -m backend.benchmarks.check_state_deltas [--cameras 12] [--updates 500]
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+
+from backend.services import state_publisher
+from backend.services.camera_manager import camera_states, set_camera_state, update_camera_inference
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cameras", type=int, default=12)
+    parser.add_argument("--updates", type=int, default=500)
+    args = parser.parse_args()
+
+    emitted = []
+    publisher = state_publisher.StatePublisher(emit=emitted.append, tick_s=0.05, history=4)
+    state_publisher._publisher = publisher
+    failures = []
+
+    cameras = [f"CAM-{i:03d}" for i in range(args.cameras)]
+    for cid in cameras:
+        set_camera_state(cid, {"camera_id": cid, "status": "online", "video": "a.mp4", "event": "none",
+                               "confidence": 0.0, "last_update": None})
+    first = publisher.flush()
+    if first is None or first["seq"] != 1 or set(first["cameras"]) != set(cameras):
+        failures.append(f"initial states not published as seq 1: {first}")
+
+    update_camera_inference(cameras[0], {"event": "none", "status": "online"})
+    if publisher.flush() is not None:
+        failures.append("a write that changed nothing was published")
+
+    update_camera_inference(cameras[0], {"event": "violence", "confidence": 0.9})
+    update_camera_inference(cameras[1], {"confidence": 0.1})
+    update_camera_inference(cameras[0], {"confidence": 0.95})
+    delta = publisher.flush()
+    expected = {cameras[0]: {"event": "violence", "confidence": 0.95}, cameras[1]: {"confidence": 0.1}}
+    if delta is None or delta["seq"] != 2 or delta["cameras"] != expected:
+        failures.append(f"coalesced delta wrong: {delta}")
+
+    # Client starting from the initial snapshot, applying deltas live
+    client = {cid: dict(fields) for cid, fields in first["cameras"].items()}
+    for fields_cid, fields in delta["cameras"].items():
+        client[fields_cid].update(fields)
+    client_seq = delta["seq"]
+
+    publisher.start()
+    delta_bytes = 0
+    for i in range(args.updates):
+        cid = random.choice(cameras)
+        update_camera_inference(cid, {"event": random.choice(["none", "none", "violence"]),
+                                      "confidence": round(random.random(), 2), "last_update": time.time()})
+        if i % 7 == 0:
+            update_camera_inference(cid, {"video": f"clip_{i}.mp4"})
+        time.sleep(0.002)
+    publisher.stop()
+
+    seqs = [d["seq"] for d in emitted]
+    if seqs != list(range(1, len(seqs) + 1)):
+        failures.append(f"emitted seqs not consecutive: {seqs[:10]}...")
+    for d in emitted:
+        if d["seq"] <= client_seq:
+            continue
+        delta_bytes += len(json.dumps(d))
+        for cid, fields in d["cameras"].items():
+            client.setdefault(cid, {}).update(fields)
+        client_seq = d["seq"]
+    if client != camera_states.all():
+        failures.append("client state built from deltas differs from camera_states")
+
+    resync = publisher.since(publisher.seq - 3)
+    if resync["full"] or resync["seq"] != publisher.seq:
+        failures.append(f"recent resync should be incremental at seq {publisher.seq}: {resync['seq']}")
+    if resync.get("base") != publisher.seq - 3:
+        failures.append(f"incremental resync should carry base {publisher.seq - 3}: {resync.get('base')}")
+    # Client behind by several deltas (the useLiveStatus gap rule): the reply must be applicable
+    client_at = publisher.seq - 3
+    if not (resync["seq"] > client_at and resync.get("base", resync["seq"] - 1) <= client_at):
+        failures.append("a client at base would reject the resync reply and ask again")
+    if not publisher.since(1)["full"] or not publisher.since(-1)["full"]:
+        failures.append("resync from before the history should be a full snapshot")
+    if publisher.since(publisher.seq)["cameras"]:
+        failures.append("resync from the current seq should be empty")
+
+    print(f"{args.updates} updates on {args.cameras} cameras -> {len(emitted)} deltas (seq {publisher.seq})")
+    live_deltas = sum(1 for d in emitted if d["seq"] > 2)
+    full_bytes = live_deltas * len(json.dumps({"cameras": list(camera_states.all().values())}))
+    print(f"  bytes: {live_deltas} deltas {delta_bytes}, full snapshots at the same rate {full_bytes}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK: changed fields only, consecutive seqs, resync")
+
+
+if __name__ == "__main__":
+    main()
@@ -30,11 +30,214 @@ DEFAULT_CAMERAS = [
 MODEL_NAME = "Vigil-MobileNetClip-v1"
 
 
+# Weights files the loaders read (relative to the project root)
 MODEL_PATHS = {
-    "mobilenet_clip": "backend/models/mobilenet_clip_best_ts.pt",  # Violence
-    "crash_lstm": "backend/models/mobilenetv2_lstm_finetuned.pt",  # Crash
+    "mobilenet_clip": "backend/models/mobilenet_clip_best.pth",    # Violence
+    "crash_lstm": "backend/ai/crash_detector/mobilenetv2_lstm_finetuned.pt",  # Crash
     "people_counter": "backend/models/yolov8n.pt",                 # People counting
     "x3d_s": "backend/models/x3d_s_best.pth",
+    "multitask_heads": "backend/models/multitask_heads.pt",     # Heads on the shared backbone
+}
+
+# Inference result cache (backend/ai/result_cache.py)
+# Keyed on clip identity + detector + model version + sampling params.
+RESULT_CACHE = {
+    "enabled": True,
+    "max_entries": 512,       # LRU capacity (in-memory tier)
+    "ttl_seconds": 600,       # Entries older than this are recomputed
+    "disk_dir": None,         # e.g. "backend/data/result_cache" to persist across restarts
+    "hash_content": False,    # True: key on file SHA-1 instead of path+size+mtime
+}
+
+# Cross-camera dynamic batching (backend/ai/batching.py)
+# Clip requests from all cameras share one forward pass per model.
+BATCHING = {
+    "enabled": True,
+    "max_batch_size": 8,      # Clips per forward pass
+    "max_wait_ms": 10,        # Longest a request waits for the batch to fill
+}
+
+# Frozen TorchScript artifacts (backend/ai/export.py)
+# Build with: python -m backend.ai.export. Loaders prefer these and fall back to eager.
+TORCHSCRIPT = {
+    "enabled": True,
+    "dir": "backend/models/optimized",   # Artifacts + manifest.json
+    "optimize_for_inference": True,      # Apply oneDNN fusions where export measured a win
+}
+
+# INT8 CPU inference (backend/ai/quantization.py), per detector: "off" | "dynamic" | "static"
+# "dynamic" quantizes LSTM/Linear layers; "static" also quantizes the MobileNetV2
+# feature extractor, calibrated on Videos/. Measure the accuracy delta first:
+#   python -m backend.ai.quantization
+QUANTIZATION = {
+    "mobilenet": "off",       # Violence MobileNetV2 clip classifier
+    "crash_lstm": "off",      # Crash MobileNetV2-LSTM
+    "engine": "x86",          # torch.backends.quantized.engine (x86 / fbgemm / qnnpack)
+    "calibration_clips": 8,   # Clips used to calibrate static quantization
+}
+
+# Execution backend per model (backend/ai/backends.py): "torch" | "onnxruntime"
+# onnxruntime needs exports from: python -m backend.ai.onnx_export
+# Models without a valid ONNX export run on torch.
+INFERENCE_BACKEND = {
+    "default": "torch",
+    "models": {               # Overrides: "mobilenet", "x3d", "crash_lstm", "people_counter"
+        # "mobilenet": "onnxruntime",
+    },
+    "onnx_dir": "backend/models/onnx",
+    "intra_op_threads": 1,    # ORT threads per session (matches OMP_NUM_THREADS=1)
+    "inter_op_threads": 1,
+}
+
+# Multi-process inference tier (backend/ai/worker_pool.py)
+# Detectors run in worker processes; frames travel through shared-memory slots.
+WORKER_POOL = {
+    "enabled": False,
+    "workers": 0,             # 0 = cpu_count - 1
+    "threads_per_worker": 1,  # OMP/MKL/torch/ORT threads per worker
+    "slots": None,            # Shared-memory ring slots (None = 2 per worker)
+    "slot_mb": 48,            # Slot size; larger clips are pickled instead
+    "max_retries": 1,         # Re-dispatches of a task whose worker crashed
+}
+
+# Startup model preload + warmup (backend/ai/preload.py, GET /api/ready)
+PRELOAD = {
+    "enabled": True,
+    "models": None,                   # None = models used by the configured camera groups
+    "warmup_runs": 2,                 # Full detector passes per model before ready
+    "warmup_frame_size": (640, 360),  # (width, height) of the synthetic warmup clip
+    "timeout_s": 300,                 # Simulator starts anyway after this long
+}
+
+# Camera analysis scheduler (backend/services/scheduler.py)
+# Earliest-deadline-first per-camera runs on a bounded worker pool.
+SCHEDULER = {
+    "workers": 4,         # Cameras analysed concurrently (their clips batch together)
+    "interval_s": None,   # Target seconds between runs per camera (None = simulator rotation_interval)
+    "intervals": {},      # Per-camera overrides, e.g. {"CAM-101": 2.0}
+    "jitter": 0.1,        # +/- fraction of the interval added to each due time
+}
+
+# asyncio camera pipeline (backend/services/orchestrator.py)
+# When enabled it replaces the scheduler threads; intervals and jitter still
+# come from SCHEDULER.
+ORCHESTRATOR = {
+    "enabled": True,
+    "max_inflight": 4,        # Jobs between decode and recording the result at once
+    # Backpressure: bounded per-camera queues + priority admission
+    "queue_depth": 1,             # Jobs queued per camera; a new job drops the oldest
+    "stale_after_intervals": 2,   # Drop a job not started this many intervals after its due time
+    "max_waiting": 8,             # Jobs waiting for a slot before the lowest-priority ones are shed
+    "priorities": {cid: 2 for cid in VIOLENCE_CAMERAS + CRASH_CAMERAS},  # Higher = shed last
+    "default_priority": 1,
+    "decode_workers": 2,      # Threads decoding clips (cv2/decord release the GIL)
+    "inference_workers": 4,   # Threads dispatching inference (batching engines / worker pool)
+    "io_workers": 4,          # Clip selection, state + incident updates
+    "timeouts_s": {"select": 5, "decode": 15, "inference": 60, "record": 5},
+}
+
+# Quality-of-service ladder under overload (backend/services/qos.py)
+# The orchestrator steps every camera down one rung at a time while it is
+# overloaded, and back up (hysteresis) once load has stayed low for hold_s.
+# Rung 0 is full fidelity; later rungs override the detector settings.
+QOS = {
+    "enabled": True,
+    "ladder": [
+        {"name": "full"},
+        {"name": "frames8", "frames": 8},                                      # FRAME_COUNT 16 -> 8
+        {"name": "small", "frames": 8, "img_size": 160},                       # IMG_SIZE 224 -> 160
+        {"name": "int8", "frames": 8, "img_size": 160, "quantized": True},     # Quantized violence/crash model
+        {"name": "minimal", "frames": 8, "img_size": 160, "quantized": True, "people_count": False},  # No YOLO
+    ],
+    "step_down": {"lag_ms": 2000, "waiting": 4, "drops": 1},  # Any of these over a tick = overloaded
+    "step_up": {"lag_ms": 500, "waiting": 0, "drops": 0},     # All of these = calm
+    "hold_s": 10,               # Seconds between steps; calm must last this long to step up
+    "max_hold_s": 80,           # Cap on the (doubling) calm needed to retry a step up overload reversed
+    "tick_s": 1.0,              # Seconds between load checks
+    # QUANTIZATION mode used by "quantized" rungs when a model's is "off". "static" (calibrated int8
+    # MobileNetV2 convs) is ~3x faster at 8x160px; "dynamic" only quantizes the classifier/LSTM and
+    # saves nothing there. Without calibration clips in Videos/ these rungs run float32.
+    "quantized_mode": "static",
+    # Models on onnxruntime run their float32 export on "quantized" rungs (frames/img_size still apply)
+}
+
+# Motion-energy gate before the violence/crash CNNs (backend/ai/motion_gate.py)
+# Motion score = largest fraction of low-res pixels changing between consecutive
+# sampled frames. Clips under the camera's threshold skip the detectors and are
+# reported "normal" with gated: True. Calibrate per camera on Videos/ (reports
+# the incidents each threshold would miss):
+#   python -m backend.ai.motion_gate
+MOTION_GATE = {
+    "enabled": True,
+    "size": 64,                   # Frames are compared at size x size grayscale
+    "pixel_delta": 15,            # Grey-level change (0-255) that counts a pixel as moving
+    "default_threshold": 0.003,   # Cameras without a calibrated or configured threshold
+    "thresholds": {},             # Per-camera overrides, e.g. {"CAM-042": 0.01}
+    "calibration_margin": 0.5,    # Calibrated threshold = margin x quietest incident clip's score
+    "calibration_path": "backend/data/motion_gate.json",  # Written by the calibration run
+    "max_consecutive_gated": 5,   # Run the detectors anyway after this many gated clips in a row
+}
+
+# Object-presence cascade in run_inference (backend/ai/inference.py)
+# A downscaled YOLOv8n pass on a few frames runs first: the violence model runs
+# only with at least min_people people in one frame, the crash model only with
+# a vehicle (COCO car/motorcycle/bus/truck) in view. People-count cameras gate
+# on their full people count instead of a second YOLO pass.
+# Measure what it would skip and miss on Videos/ first:
+#   python -m backend.benchmarks.bench_cascade
+CASCADE = {
+    "enabled": False,
+    "frames": 4,          # Frames of the clip's sample YOLO looks at
+    "img_size": 320,      # YOLO input size (640 for people counting)
+    "min_people": 2,      # Violence model runs with this many people in one frame
+    "min_vehicles": 1,    # Crash model runs with this many vehicles in one frame
+}
+
+# Shared-backbone multi-task model (backend/ai/multitask.py)
+# Cameras in both VIOLENCE_CAMERAS and CRASH_CAMERAS (and mixed clips in the
+# incident service) run one frozen MobileNetV2 backbone pass per frame that
+# feeds a violence head and a crash LSTM head. The backbone checkpoint brings
+# its own head; train the other against the frozen backbone first:
+#   python -m backend.ai.retrainer --heads
+# Events without a head matching the backbone run their dedicated model.
+MULTITASK = {
+    "enabled": True,
+    "backbone": "crash_lstm",     # Frozen feature extractor: "crash_lstm" (crash head native) or "mobilenet" (violence head native)
+    "train_clips": 100,           # Clips per Videos/ folder used to train heads
+    "holdout": 0.25,              # Fraction of clips held out to report head accuracy
+    "epochs": 40,
+    "learning_rate": 1e-3,
+}
+
+# Risk-adaptive analysis rate (backend/services/adaptive_rate.py)
+# Overrides the scheduler interval per camera from smoothed confidence,
+# recent incidents and operator focus.
+ADAPTIVE_RATE = {
+    "enabled": True,
+    "min_interval_s": 2.0,        # Hot cameras: at/over threshold, fresh incident, operator focus
+    "max_interval_s": 30.0,       # Calm cameras
+    "budget_ips": 2.0,            # Analyses per second across all cameras (None = unlimited)
+    "incident_window_s": 600,     # An incident's risk decays to 0 over this window
+    "focus_ttl_s": 60,            # Operator focus lasts this long unless renewed
+    "max_focus_ttl_s": 3600,      # Longest focus a client may request (POST ttl_s is clamped to this)
+    "tick_s": 2.0,                # Seconds between interval updates
+}
+
+# Camera state deltas over Socket.IO (backend/services/state_publisher.py)
+STATE_PUBLISHER = {
+    "tick_s": 0.2,      # Changes within one tick go out as one "camera_update" delta
+    "history": 1024,    # Deltas kept so clients can resync from a seq
+}
+
+# Video catalog (backend/services/video_catalog.py)
+# Clip metadata indexed once and refreshed on changes; rotation and decoding read from it.
+VIDEO_CATALOG = {
+    "root": None,                 # None = <project>/Videos
+    "extensions": [".mp4", ".avi", ".mov", ".mkv"],  # Matched case-insensitively
+    "index_path": "backend/data/video_catalog.json",  # Persisted probe results (None = memory only)
+    "probe_workers": 4,           # Threads probing new/changed clips
+    "poll_interval_s": 10,        # Watcher refresh period (directory mtimes, then size+mtime per clip)
+    "stat_interval_s": 60,        # Stat indexed clips in unchanged folders this often (in-place rewrites)
 }
 
 DATA_PATHS = {
@@ -0,0 +1,282 @@
+"""
+Risk-Adaptive Camera Analysis Rate
+
+Instead of one fixed cadence for every camera, each camera's analysis
+interval follows its risk:
+
+- smoothed event probability (mean over the last SMOOTHING_WINDOW results,
+  kept per camera here rather than in backend.utils.smoothing so rate
+  decisions never feed the incident smoothing) relative to the camera's
+  alert threshold, so borderline and hot cameras score high and calm ones low
+- recent incidents, decaying to nothing over `incident_window_s`
+- operator focus (a camera opened on the dashboard), for `focus_ttl_s`
+  unless renewed
+
+risk = the highest of the three (0..1), and the interval is interpolated
+geometrically from `max_interval_s` (risk 0) down to `min_interval_s`
+(risk 1). If the resulting rates add up to more than `budget_ips` analyses
+per second, every camera keeps its calm rate and the remaining budget is
+shared in proportion to how much faster each camera wants to go (if even
+the calm rates do not fit, all rates are scaled down), so hot cameras still
+run faster than calm ones.
+
+Every `tick_s` the new intervals are pushed to the attached scheduler
+(CameraOrchestrator or CameraScheduler set_interval). metrics() reports risk,
+target interval and the measured (effective) rate per camera.
+
+Configured by backend.config.ADAPTIVE_RATE.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterable, Optional
+
+from backend.config import ACCIDENT_THRESHOLD, ADAPTIVE_RATE, CRASH_CAMERAS, SMOOTHING_WINDOW, VIOLENCE_THRESHOLD
+
+ALERT_EVENTS = ("violence", "car_crash", "crash")
+
+
+def event_probability(result: dict) -> Optional[float]:
+    """Probability of the alert event from a detector result (None for errors)."""
+    event = str(result.get("event", "")).lower()
+    if event in ("", "error"):
+        return None
+    confidence = float(result.get("confidence", 0.0) or 0.0)
+    # Detectors report the confidence of the predicted class
+    return confidence if event in ALERT_EVENTS else 1.0 - confidence
+
+
+class _CameraRate:
+    __slots__ = ("probabilities", "smoothed", "last_incident", "focus_until", "risk", "reasons", "interval", "runs")
+
+    def __init__(self, interval: float):
+        self.probabilities = deque(maxlen=SMOOTHING_WINDOW)  # recent event probabilities
+        self.smoothed = 0.0
+        self.last_incident: Optional[float] = None
+        self.focus_until = 0.0
+        self.risk = 0.0
+        self.reasons = []
+        self.interval = interval
+        self.runs = deque(maxlen=64)  # monotonic times of recent analyses
+
+
+class AdaptiveRateController:
+    """Sets each camera's analysis interval from its risk, within a global budget."""
+
+    def __init__(self, min_interval: float = 2.0, max_interval: float = 30.0, budget_ips: Optional[float] = 2.0,
+                 incident_window: float = 600, focus_ttl: float = 60, max_focus_ttl: float = 3600,
+                 tick_s: float = 2.0):
+        """
+        Args:
+            min_interval: Seconds between analyses of the hottest cameras
+            max_interval: Seconds between analyses of calm cameras
+            budget_ips: Analyses per second across all cameras (None = unlimited)
+            incident_window: Seconds over which an incident's risk decays to 0
+            focus_ttl: Seconds operator focus lasts unless renewed
+            max_focus_ttl: Longest focus set_focus() grants
+            tick_s: Seconds between interval updates
+        """
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.budget_ips = budget_ips
+        self.incident_window = incident_window
+        self.focus_ttl = focus_ttl
+        self.max_focus_ttl = max(max_focus_ttl, focus_ttl)
+        self.tick_s = tick_s
+        self.scheduler = None
+        self._cameras: Dict[str, _CameraRate] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_plan = {"demand_ips": 0.0, "allocated_ips": 0.0, "over_budget": False}
+
+    # ------------------------------------------------------------------ inputs
+
+    def attach(self, scheduler, camera_ids: Iterable[str]):
+        """Drive `scheduler`'s per-camera intervals (anything with set_interval(camera_id, seconds))."""
+        with self._lock:
+            self.scheduler = scheduler
+            for cid in camera_ids:
+                self._cameras.setdefault(cid, _CameraRate(self.max_interval))
+        self.update()
+
+    def _camera(self, camera_id: str) -> _CameraRate:
+        # Caller holds self._lock
+        rate = self._cameras.get(camera_id)
+        if rate is None:
+            rate = self._cameras[camera_id] = _CameraRate(self.max_interval)
+        return rate
+
+    def observe(self, camera_id: str, result: dict):
+        """Feed one analysis result (called once per recorded result)."""
+        probability = event_probability(result)
+        with self._lock:
+            rate = self._camera(camera_id)
+            rate.runs.append(time.monotonic())
+            if probability is not None:
+                rate.probabilities.append(probability)
+                rate.smoothed = sum(rate.probabilities) / len(rate.probabilities)
+
+    def note_incident(self, camera_id: str):
+        with self._lock:
+            self._camera(camera_id).last_incident = time.time()
+        self.update()
+
+    def set_focus(self, camera_id: str, ttl: Optional[float] = None) -> float:
+        """
+        Mark a camera as watched by an operator.
+
+        Args:
+            ttl: Seconds the focus lasts (default focus_ttl), clamped to 0..max_focus_ttl
+
+        Returns:
+            Epoch seconds until which the focus lasts
+        """
+        ttl = self.focus_ttl if ttl is None else min(max(ttl, 0.0), self.max_focus_ttl)
+        until = time.time() + ttl
+        with self._lock:
+            self._camera(camera_id).focus_until = until
+        self.update()
+        return until
+
+    def clear_focus(self, camera_id: str):
+        with self._lock:
+            self._camera(camera_id).focus_until = 0.0
+        self.update()
+
+    # ------------------------------------------------------------------ planning
+
+    def _risk(self, camera_id: str, rate: _CameraRate, now: float):
+        threshold = ACCIDENT_THRESHOLD if camera_id in CRASH_CAMERAS else VIOLENCE_THRESHOLD
+        parts = {"confidence": min(1.0, rate.smoothed / threshold) if threshold > 0 else 0.0}
+        if rate.last_incident is not None and self.incident_window > 0:
+            parts["incident"] = max(0.0, 1.0 - (now - rate.last_incident) / self.incident_window)
+        if rate.focus_until > now:
+            parts["focus"] = 1.0
+        risk = max(parts.values())
+        return risk, [name for name, value in parts.items() if value > 0 and value >= risk - 1e-9]
+
+    def _plan(self, risks: Dict[str, float]) -> Dict[str, float]:
+        """Target interval per camera for the given risks, within the budget."""
+        ratio = self.min_interval / self.max_interval
+        wanted = {cid: 1.0 / (self.max_interval * ratio ** risk) for cid, risk in risks.items()}
+        demand = sum(wanted.values())
+        floor = 1.0 / self.max_interval
+        rates = dict(wanted)
+        over_budget = self.budget_ips is not None and demand > self.budget_ips
+        if over_budget:
+            base = floor * len(wanted)
+            extra = sum(r - floor for r in wanted.values())
+            if base >= self.budget_ips or extra <= 0:
+                # Not even every camera at the calm rate fits: scale all down, keeping the ordering
+                rates = {cid: r * self.budget_ips / demand for cid, r in wanted.items()}
+            else:
+                share = (self.budget_ips - base) / extra
+                rates = {cid: floor + (r - floor) * share for cid, r in wanted.items()}
+        self._last_plan = {
+            "demand_ips": round(demand, 3),
+            "allocated_ips": round(sum(rates.values()), 3),
+            "over_budget": over_budget,
+        }
+        return {cid: 1.0 / r for cid, r in rates.items()}
+
+    def update(self) -> Dict[str, float]:
+        """Recompute every camera's interval and apply changes to the scheduler."""
+        now = time.time()
+        changed = {}
+        with self._lock:
+            if not self._cameras:
+                return {}
+            risks = {}
+            for cid, rate in self._cameras.items():
+                rate.risk, rate.reasons = self._risk(cid, rate, now)
+                risks[cid] = rate.risk
+            for cid, interval in self._plan(risks).items():
+                rate = self._cameras[cid]
+                # Ignore jitter-sized changes so schedules don't churn
+                if abs(interval - rate.interval) > 0.05 * rate.interval:
+                    rate.interval = interval
+                    changed[cid] = interval
+            scheduler = self.scheduler
+        if scheduler is not None:
+            for cid, interval in changed.items():
+                scheduler.set_interval(cid, interval)
+        return changed
+
+    # ------------------------------------------------------------------ lifecycle
+
+    def start(self):
+        """Update intervals every tick in a background thread (no-op if already running)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="AdaptiveRate")
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+        with self._lock:
+            self.scheduler = None
+
+    def thread(self) -> Optional[threading.Thread]:
+        return self._thread
+
+    def _run(self):
+        while not self._stop.wait(self.tick_s):
+            try:
+                self.update()
+            except Exception as e:
+                print(f"[RATE] Update failed: {e}")
+
+    # ------------------------------------------------------------------ metrics
+
+    def metrics(self) -> dict:
+        now, mono = time.time(), time.monotonic()
+        with self._lock:
+            cameras = {}
+            for cid, rate in self._cameras.items():
+                runs = [t for t in rate.runs if mono - t <= 10 * self.max_interval]
+                span = mono - runs[0] if len(runs) > 1 else 0.0
+                cameras[cid] = {
+                    "risk": round(rate.risk, 3),
+                    "reasons": list(rate.reasons),
+                    "smoothed_probability": round(rate.smoothed, 3),
+                    "focus_s": round(rate.focus_until - now, 1) if rate.focus_until > now else None,
+                    "target_interval_s": round(rate.interval, 2),
+                    "target_per_min": round(60.0 / rate.interval, 2),
+                    "effective_per_min": round(60.0 * (len(runs) - 1) / span, 2) if span > 0 else None,
+                }
+            plan = dict(self._last_plan)
+        return {
+            "min_interval_s": self.min_interval,
+            "max_interval_s": self.max_interval,
+            "budget_ips": self.budget_ips,
+            **plan,
+            "cameras": cameras,
+        }
+
+
+# Process-wide controller
+_controller: Optional[AdaptiveRateController] = None
+_controller_lock = threading.Lock()
+
+
+def get_rate_controller() -> AdaptiveRateController:
+    global _controller
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                _controller = AdaptiveRateController(
+                    min_interval=ADAPTIVE_RATE.get("min_interval_s", 2.0),
+                    max_interval=ADAPTIVE_RATE.get("max_interval_s", 30.0),
+                    budget_ips=ADAPTIVE_RATE.get("budget_ips", 2.0),
+                    incident_window=ADAPTIVE_RATE.get("incident_window_s", 600),
+                    focus_ttl=ADAPTIVE_RATE.get("focus_ttl_s", 60),
+                    max_focus_ttl=ADAPTIVE_RATE.get("max_focus_ttl_s", 3600),
+                    tick_s=ADAPTIVE_RATE.get("tick_s", 2.0),
+                )
+    return _controller
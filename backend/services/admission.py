@@ -0,0 +1,111 @@
+"""
+Priority Admission Controller
+
+Global gate in front of the expensive part of the camera pipeline (decode +
+inference + record) in backend/services/orchestrator.py.
+
+- At most `capacity` jobs are admitted at once.
+- Jobs waiting for a slot are served highest priority first (FIFO within a
+  priority).
+- At most `max_waiting` jobs wait. When one more arrives, the controller
+  sheds the lowest-priority job among the waiters and the newcomer (oldest
+  first within that priority), so under overload low-priority cameras are
+  dropped before any high-priority one waits.
+
+Shed jobs are counted per priority; a recent shed means the pipeline is
+over capacity.
+
+Runs on the orchestrator's event loop (not thread-safe).
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Dict, Optional
+
+
+class AdmissionController:
+    """Priority-ordered, bounded admission to `capacity` pipeline slots."""
+
+    def __init__(self, capacity: int, max_waiting: int = 8):
+        """
+        Args:
+            capacity: Jobs admitted at once
+            max_waiting: Jobs allowed to wait for a slot before shedding starts
+        """
+        self.capacity = max(1, capacity)
+        self.max_waiting = max(0, max_waiting)
+        self._in_use = 0
+        self._waiting = []  # heap of [-priority, order, future, priority]
+        self._order = itertools.count()
+        self._admitted = 0
+        self._shed: Dict[int, int] = {}
+        self._last_shed: Optional[float] = None
+
+    async def acquire(self, priority: int = 0) -> bool:
+        """
+        Wait for a slot.
+
+        Returns:
+            True once admitted (call release() when done), False if the job was shed
+        """
+        if self._in_use < self.capacity and not self._waiting:
+            self._in_use += 1
+            self._admitted += 1
+            return True
+
+        future = asyncio.get_running_loop().create_future()
+        entry = [-priority, next(self._order), future, priority]
+        if len(self._waiting) >= self.max_waiting:
+            victim = self._lowest_priority(entry)
+            self._count_shed(victim[3])
+            if victim is entry:
+                return False
+            self._waiting.remove(victim)
+            heapq.heapify(self._waiting)
+            victim[2].set_result(False)
+        heapq.heappush(self._waiting, entry)
+
+        try:
+            admitted = await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled() and future.result():
+                # Handed a slot just as we were cancelled: pass it on
+                self.release()
+            elif entry in self._waiting:
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+            raise
+        if admitted:
+            self._admitted += 1
+        return admitted
+
+    def release(self):
+        """Free a slot, handing it straight to the best waiting job."""
+        while self._waiting:
+            entry = heapq.heappop(self._waiting)
+            if not entry[2].done():
+                entry[2].set_result(True)
+                return
+        self._in_use = max(0, self._in_use - 1)
+
+    def _lowest_priority(self, incoming: list) -> list:
+        # Lowest priority loses; within it, the job that has waited longest
+        return min(self._waiting + [incoming], key=lambda e: (e[3], e[1]))
+
+    def _count_shed(self, priority: int):
+        self._shed[priority] = self._shed.get(priority, 0) + 1
+        self._last_shed = time.monotonic()
+
+    def metrics(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "in_use": self._in_use,
+            "waiting": len(self._waiting),
+            "max_waiting": self.max_waiting,
+            "admitted": self._admitted,
+            "shed": sum(self._shed.values()),
+            "shed_by_priority": {str(p): n for p, n in sorted(self._shed.items())},
+            "last_shed_s_ago": round(time.monotonic() - self._last_shed, 1) if self._last_shed is not None else None,
+        }
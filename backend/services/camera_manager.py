@@ -1,72 +1,34 @@
 # VIGIL Camera Manager - Clean
 import threading
-from pathlib import Path
 import random
 from backend.config import VIOLENCE_CAMERAS, CRASH_CAMERAS
+from backend.services.video_catalog import get_video_catalog
+from backend.services.state_publisher import get_state_publisher
+from backend.services.state_store import CameraStateStore
 
-def get_video_path(camera_id):
-    dataroot = Path(__file__).parent.parent.parent
-    video_dir = dataroot / 'Videos'
+def _camera_categories(camera_id, shuffle_generic=False):
+    """Catalog categories to pick a camera's clip from, in order of preference."""
     if camera_id in VIOLENCE_CAMERAS:
-        folder = video_dir / 'violence'
-    elif camera_id in CRASH_CAMERAS:
-        folder = video_dir / 'crash'
-    else:
-        folder = video_dir / 'no_violence'
-        if not folder.exists() or not list(folder.glob('*.mp4')):
-            folder = video_dir / 'no_crash'
-    if folder.exists():
-        files = [f for f in folder.glob('*.mp4') if f.is_file()]
-        if files:
-            return str(folder.name + '/' + random.choice(files).name)
-    # fallback: pick any video from Videos/
-    dataroot = Path(__file__).parent.parent.parent
-    video_dir = dataroot / 'Videos'
-    for subfolder in ['violence', 'crash', 'no_violence', 'no_crash']:
-        folder = video_dir / subfolder
-        if folder.exists():
-            files = [f for f in folder.glob('*.mp4') if f.is_file()]
-            if files:
-                return str(folder.name + '/' + random.choice(files).name)
+        return ['violence']
+    if camera_id in CRASH_CAMERAS:
+        return ['crash']
+    # Randomly assign no_violence or no_crash to generic cameras to vary content
+    # biased 60% towards no_crash (cars) to satisfy user preference
+    if shuffle_generic and random.random() < 0.6:
+        return ['no_crash', 'no_violence']
+    return ['no_violence', 'no_crash']
+
+def get_video_path(camera_id):
+    catalog = get_video_catalog()
+    for category in _camera_categories(camera_id) + ['violence', 'crash', 'no_violence', 'no_crash']:
+        chosen = catalog.choose(category)
+        if chosen:
+            return chosen
     # If no valid video found, log warning and return None
     import logging
     logging.warning(f"No valid video found for camera {camera_id}")
     return None
 
-def rotate_camera_video(camera_id, allow_violence=True, allow_crash=True):
-    """
-    Rotates the video for a camera. Returns the new video path.
-    """
-    from backend.config import VIOLENCE_CAMERAS, CRASH_CAMERAS
-    dataroot = Path(__file__).parent.parent.parent
-    video_dir = dataroot / 'Videos'
-    if camera_id in VIOLENCE_CAMERAS:
-        folder = video_dir / 'violence'
-    elif camera_id in CRASH_CAMERAS:
-        folder = video_dir / 'crash'
-    else:
-        folder = video_dir / 'no_violence'
-        if not folder.exists() or not list(folder.glob('*.mp4')):
-            folder = video_dir / 'no_crash'
-    if folder.exists():
-        files = list(folder.glob('*.mp4'))
-        if files:
-            chosen = random.choice(files)
-            return str(folder.name + '/' + chosen.name)
-    return ''
-
-def update_camera_inference(camera_id, inference_result):
-    """
-    Updates the camera state with inference result.
-    """
-    state = camera_states.get(camera_id, {})
-    state.update(inference_result)
-    camera_states.set(camera_id, state)
-
-import threading
-from pathlib import Path
-import random
-
 class SafeDict:
     def __init__(self):
         self._d = {}
@@ -88,8 +50,10 @@ class SafeDict:
         with self._lock:
             return dict(self._d)
 
-# Camera state storage
-camera_states = SafeDict()
+# Camera state storage (copy-on-write snapshots; lock-free reads)
+camera_states = CameraStateStore()
+# Every change goes out to websocket clients as part of a delta
+camera_states.subscribe(lambda camera_id, changes: get_state_publisher().record(camera_id, changes))
 
 # Incident storage
 incidents = SafeDict()
@@ -109,80 +73,43 @@ def set_offline_mode_state(enabled: bool):
     logging.info(f"System offline mode set to: {enabled}")
 
 def get_video_absolute_path(camera_id: str) -> str:
-    """
-    Returns the absolute path to the video file for a given camera ID.
-    """
     """
     Returns the relative path to a valid video file for a given camera ID, based on camera type.
     """
-    from backend.config import VIOLENCE_CAMERAS, CRASH_CAMERAS
-    dataroot = Path(__file__).parent.parent.parent
-    video_dir = dataroot / 'Videos'
-    if camera_id in VIOLENCE_CAMERAS:
-        folder = video_dir / 'violence'
-    elif camera_id in CRASH_CAMERAS:
-        folder = video_dir / 'crash'
-    else:
-        # Assign non-violence/non-crash videos for other cameras
-        folder = video_dir / 'no_violence'
-        if not folder.exists() or not list(folder.glob('*.mp4')):
-            folder = video_dir / 'no_crash'
-    if folder.exists():
-        files = list(folder.glob('*.mp4'))
-        if files:
+    catalog = get_video_catalog()
+    for category in _camera_categories(camera_id) + ['violence', 'crash', 'no_violence', 'no_crash']:
+        clips = catalog.clips(category)
+        if clips:
             # Return path relative to Videos/ for frontend
-            return str(folder.name + '/' + files[0].name)
-    # fallback: pick any video from Videos/
-    for subfolder in ['violence', 'crash', 'no_violence', 'no_crash']:
-        folder = video_dir / subfolder
-        if folder.exists():
-            files = list(folder.glob('*.mp4'))
-            if files:
-                return str(folder.name + '/' + files[0].name)
+            return clips[0]
     return ''
 
-# --- MISSING FUNCTIONS FOR SIMULATOR ---
 def rotate_camera_video(camera_id, allow_violence=True, allow_crash=True):
-    """
-    Rotates the video for a camera. Returns the new video path.
-    """
     """
     Rotates the video for a camera. Returns the new video path (relative to Videos/).
-    Picks a random video from the correct folder for the camera type.
+    Picks a random valid clip from the video catalog for the camera type.
     """
-    from backend.config import VIOLENCE_CAMERAS, CRASH_CAMERAS
-    dataroot = Path(__file__).parent.parent.parent
-    video_dir = dataroot / 'Videos'
-    if camera_id in VIOLENCE_CAMERAS:
-        folder = video_dir / 'violence'
-    elif camera_id in CRASH_CAMERAS:
-        folder = video_dir / 'crash'
-    else:
-        # Randomly assign no_violence or no_crash to generic cameras to vary content
-        # biased 60% towards no_crash (cars) to satisfy user preference
-        if random.random() < 0.6:
-            folder = video_dir / 'no_crash'
-            if not folder.exists() or not list(folder.glob('*.mp4')):
-                folder = video_dir / 'no_violence'
-        else:
-            folder = video_dir / 'no_violence'
-            if not folder.exists() or not list(folder.glob('*.mp4')):
-                folder = video_dir / 'no_crash'
-    if folder.exists():
-        files = [f for f in folder.glob('*.mp4') if f.is_file()]
-        if files:
-            chosen = random.choice(files)
-            return str(folder.name + '/' + chosen.name)
-            
+    categories = _camera_categories(camera_id, shuffle_generic=True)
+    catalog = get_video_catalog()
+    for category in categories:
+        chosen = catalog.choose(category)
+        if chosen:
+            return chosen
+
     # If no valid video found, log warning and return None
     import logging
-    logging.warning(f"No valid video found for camera {camera_id} in {folder}")
+    logging.warning(f"No valid video found for camera {camera_id} in {categories}")
     return ''
 
 def update_camera_inference(camera_id, inference_result):
     """
     Updates the camera state with inference result.
+    Only the fields that changed are published (backend.services.state_publisher).
+    """
+    camera_states.update(camera_id, inference_result)
+
+def set_camera_state(camera_id, state):
+    """
+    Replaces a camera's state (e.g. at startup) and publishes it in full.
     """
-    state = camera_states.get(camera_id, {})
-    state.update(inference_result)
-    camera_states.set(camera_id, state)
\ No newline at end of file
+    camera_states.replace(camera_id, state)
\ No newline at end of file
@@ -1,33 +1,32 @@
 # Camera state management feeding the frontend
+# Legacy interface (process_video); state lives in camera_manager.camera_states
 
-CAMERAS = {
-    "CAM-01": {"status": "online", "confidence": 0.0, "last_model": None, "last_latency": 0, "last_timestamp": 0},
-    "CAM-02": {"status": "online", "confidence": 0.0, "last_model": None, "last_latency": 0, "last_timestamp": 0},
-    "CAM-03": {"status": "online", "confidence": 0.0, "last_model": None, "last_latency": 0, "last_timestamp": 0},
-}
+from backend.services.camera_manager import camera_states
 
 
 def update_camera(camera_id: str, incident: bool, confidence: float, model: str = None, latency_ms: int = 0, timestamp: float = 0) -> None:
-    if camera_id not in CAMERAS:
-        CAMERAS[camera_id] = {"status": "online", "confidence": 0.0, "last_model": None, "last_latency": 0, "last_timestamp": 0}
-    CAMERAS[camera_id]["status"] = "incident" if incident else "online"
-    CAMERAS[camera_id]["confidence"] = round(float(confidence), 2)
+    fields = {
+        "camera_id": camera_id,
+        "status": "incident" if incident else "online",
+        "confidence": round(float(confidence), 2),
+    }
     if model:
-        CAMERAS[camera_id]["last_model"] = model
+        fields["last_model"] = model
     if latency_ms:
-        CAMERAS[camera_id]["last_latency"] = latency_ms
+        fields["last_latency"] = latency_ms
     if timestamp:
-        CAMERAS[camera_id]["last_timestamp"] = timestamp
+        fields["last_timestamp"] = timestamp
+    camera_states.update(camera_id, fields)
 
 
 def get_camera_states() -> list[dict]:
     return [
         {
             "camera_id": cam_id,
-            "status": data["status"],
-            "confidence": data["confidence"],
+            "status": data.get("status", "online"),
+            "confidence": data.get("confidence", 0.0),
             "last_model": data.get("last_model"),
-            "last_latency": data.get("last_latency"),
+            "last_latency": data.get("last_latency", 0),
         }
-        for cam_id, data in CAMERAS.items()
+        for cam_id, data in camera_states.snapshot().states.items()
     ]
@@ -3,11 +3,24 @@ import time
 import random
 from pathlib import Path
 from typing import Optional
-from backend.config import DEFAULT_CAMERAS, VIOLENCE_CAMERAS, CRASH_CAMERAS, PEOPLE_COUNT_CAMERAS, VIOLENCE_THRESHOLD, ACCIDENT_THRESHOLD
-from backend.services.camera_manager import rotate_camera_video, update_camera_inference, get_video_absolute_path, get_offline_mode_state
+from backend.config import VIOLENCE_CAMERAS, CRASH_CAMERAS, PEOPLE_COUNT_CAMERAS, VIOLENCE_THRESHOLD, ACCIDENT_THRESHOLD
+from backend.services.camera_manager import camera_states, rotate_camera_video, update_camera_inference, get_video_absolute_path, get_offline_mode_state
 from backend.services.incident_storage import add_incident
-from backend.ai.inference import run_inference
-from backend.ai.accident_model import detect_crash
+from backend.services.video_catalog import get_video_catalog
+from backend.services.state_publisher import get_state_publisher
+from backend.ai.inference import run_inference, detect_people_count
+from backend.ai.motion_gate import get_motion_gate
+from backend.ai.frame_bundle import FRAME_COUNT, ClipCancelled, FrameBundle
+from backend.ai.result_cache import get_result_cache
+from backend.ai.batching import batching_metrics
+from backend.ai.worker_pool import worker_pool_metrics
+from backend.ai.model_registry import model_registry_stats
+from backend.ai.preload import readiness, start_preload, wait_until_ready
+from backend.config import PRELOAD, SCHEDULER, ORCHESTRATOR, ADAPTIVE_RATE, QOS, MOTION_GATE
+from backend.services.adaptive_rate import get_rate_controller
+from backend.services.qos import get_qos_controller
+from backend.services.scheduler import CameraScheduler
+from backend.services.orchestrator import CameraOrchestrator
 
 # Placeholder for model inference import
 # from backend.ai.inference import run_inference
@@ -35,6 +48,7 @@ class CameraSimulator:
             }
         self.running = False
         self.thread: Optional[threading.Thread] = None
+        self.scheduler = None  # CameraScheduler or CameraOrchestrator
         self.lock = threading.Lock()
         self.inference_count = 0
         self.inference_count = 0
@@ -49,180 +63,250 @@ class CameraSimulator:
         self.crash_cooldown = 40     # Seconds before allowing next crash
     
     def start(self):
-        """Start the simulation loop in a background thread."""
+        """Start the simulation in the background."""
         if self.running:
             print("⚠️  Simulator already running")
             return
         
         self.running = True
-        self.thread = threading.Thread(target=self._simulation_loop, daemon=True)
-        self.thread.start()
+        self._stop_event.clear()
+        if ORCHESTRATOR.get("enabled", False):
+            # One asyncio task per camera; it waits for model preload itself
+            self.scheduler = CameraOrchestrator(
+                self,
+                camera_ids=self.camera_ids,
+                interval=SCHEDULER.get("interval_s") or self.rotation_interval,
+                intervals=SCHEDULER.get("intervals"),
+                jitter=SCHEDULER.get("jitter", 0.1),
+                max_inflight=ORCHESTRATOR.get("max_inflight", 4),
+                queue_depth=ORCHESTRATOR.get("queue_depth", 1),
+                stale_after=ORCHESTRATOR.get("stale_after_intervals", 2),
+                max_waiting=ORCHESTRATOR.get("max_waiting", 8),
+                priorities=ORCHESTRATOR.get("priorities"),
+                default_priority=ORCHESTRATOR.get("default_priority", 1),
+                decode_workers=ORCHESTRATOR.get("decode_workers", 2),
+                inference_workers=ORCHESTRATOR.get("inference_workers", 4),
+                io_workers=ORCHESTRATOR.get("io_workers", 4),
+                timeouts=ORCHESTRATOR.get("timeouts_s"),
+                qos=get_qos_controller() if QOS.get("enabled", False) else None,
+                qos_tick=QOS.get("tick_s", 1.0),
+            )
+            self.scheduler.start()
+            self._attach_rate_controller()
+        else:
+            self.thread = threading.Thread(target=self._simulation_loop, daemon=True, name="CameraSimulator")
+            self.thread.start()
         print(f"🎬 Camera Simulator started (rotation: {self.rotation_interval}s)")
     
     def stop(self):
         """Stop the simulation loop."""
         self.running = False
+        self._stop_event.set()
         if self.thread:
             self.thread.join(timeout=5)
             print("🛑 Camera Simulator stopped")
+        elif isinstance(self.scheduler, CameraOrchestrator):
+            self.scheduler.stop()
+            print("🛑 Camera Simulator stopped")
     
     def _simulation_loop(self):
         """
         Main simulation loop - runs in background thread.
         Periodically rotates videos and runs inference.
         """
+        # First pass only once every model is loaded and warm (no cold-start latency spike)
+        start_preload()
+        deadline = time.time() + PRELOAD.get("timeout_s", 300)
+        while self.running and not wait_until_ready(timeout=0.5):
+            if time.time() > deadline:
+                print(f"⚠️  Models not ready after {PRELOAD.get('timeout_s', 300)}s, starting anyway")
+                break
         print("▶️  Starting camera simulation loop...")
-        
-        while self.running:
-            current_time = time.time()
-            for camera_id in DEFAULT_CAMERAS:
-                try:
-                    # Check if we should rotate the video (video_rotation_duration)
-                    now = time.time()
-                    last_rot = self.last_video_rotation.get(camera_id, 0)
-                    
-                    # Force initial rotation if no video, otherwise check duration
-                    current_video = self.camera_states.get(camera_id, {}).get("video")
-                    
-                    if not current_video or (now - last_rot > self.video_rotation_duration):
-                        rel_video_path = rotate_camera_video(camera_id)
-                        self.last_video_rotation[camera_id] = now
-                        # Cache it if needed, or rely on rotate_camera_video returning simple path
-                    else:
-                        # KEEP EXISTING VIDEO - Re-fetch current from camera_states to be sure
-                        # Actually rotate_camera_video logic in this codebase is purely functional/random?
-                        # We need to persist the current video path.
-                        # The camera_states logic in camera_manager holds the state.
-                        # We should just NOT call rotate_camera_video and use existing.
-                        # But wait, we need 'rel_video_path' for inference below.
-                        # Get current video from camera_states if available
-                        state = self.camera_states.get(camera_id, {})
-                        rel_video_path = state.get("video")
-                        
-                        # Fallback if somehow missing
-                        if not rel_video_path:
-                             rel_video_path = rotate_camera_video(camera_id)
-                             self.last_video_rotation[camera_id] = now
+        # Each camera runs on its own deadline on a bounded worker pool, so a
+        # slow camera no longer delays the rest of the pass
+        self.scheduler = CameraScheduler(
+            self._process_camera,
+            camera_ids=self.camera_ids,
+            interval=SCHEDULER.get("interval_s") or self.rotation_interval,
+            intervals=SCHEDULER.get("intervals"),
+            workers=SCHEDULER.get("workers", 4),
+            jitter=SCHEDULER.get("jitter", 0.1),
+        )
+        self.scheduler.start()
+        self._attach_rate_controller()
+        self._stop_event.wait()
+        self.scheduler.stop()
 
-                    video_path = str(self.video_dir / rel_video_path) if rel_video_path else ''
-                    if rel_video_path and Path(rel_video_path).is_absolute():
-                        video_path = rel_video_path
-                    # Violence section: run people counting and violence detection
-                    if camera_id in VIOLENCE_CAMERAS:
-                        try:
-                            from backend.ai.people_counter.yolov8 import detect_people_count
-                            people_result = detect_people_count(video_path)
-                            with self.lock:
-                                update_camera_inference(camera_id, people_result)
-                                self.inference_count += 1
-                                offline = get_offline_mode_state()
-                                if not offline and people_result.get("count", 0) > 15:
-                                    print(f"   👥 {camera_id} detected high people count ({people_result['count']}) - Merging into Violence Check")
-                                    # Do NOT trigger separate incident here.
-                                    # Let the main violence/inference loop handle incident creation
-                                    # so it respects cooldowns and duplicate checks.
-                                elif offline:
-                                    print(f"[OFFLINE MODE] Skipping people_count incident for {camera_id}")
-                        except Exception as e:
-                            print(f"❌ People counting failed for {camera_id}: {e}")
-                    # Determine model by video folder
-                    try:
-                        video_folder = Path(video_path).parent.name.lower()
-                        if video_folder in ["crash", "no_crash"]:
-                            # Use crash model
-                            result = run_inference(video_path, camera_id=camera_id)
-                        elif video_folder in ["violence", "no_violence"]:
-                            # Use violence model (with people counting)
-                            result = run_inference(video_path, camera_id=camera_id)
-                            # CRITICAL: Ensure early people_result is preserved if run_inference didn't return it
-                            if 'people_count' not in result and 'people_result' in locals() and people_result:
-                                result['people_count'] = people_result.get('count', 0)
-                        else:
-                            # Unknown: skip
-                            print(f"[SIMULATOR] Unknown video type for {camera_id}: {video_path}")
-                            continue
-                        with self.lock:
-                            update_camera_inference(camera_id, result)
-                            self.inference_count += 1
-                            # Incident creation logic
-                            event = result.get('event', '').lower()
-                            confidence = result.get('confidence', 0)
-                            print(f"   [DEBUG] {camera_id} Inference: Event='{event}', Conf={confidence:.2f}, Folder='{video_folder}'")
-                            
-                            # Enforce thresholds & Offline Mode
-                            offline = get_offline_mode_state()
-                            
-                            if offline:
-                                # detailed logging if needed, or just skip
-                                if (event == "violence" and confidence >= VIOLENCE_THRESHOLD) or (event == "car_crash" and confidence >= ACCIDENT_THRESHOLD):
-                                     print(f"   ⏸️ OFFLINE: Skipping incident detection for {camera_id}")
-                            else:
-                                if video_folder in ["violence", "no_violence"] and event == "violence":
-                                    if confidence >= VIOLENCE_THRESHOLD:
-                                        now = time.time()
-                                        blocked_until = self.violence_blocked_until.get(camera_id, 0)
-                                        
-                                        if video_path in self.processed_incident_videos:
-                                            print(f"   ℹ️ Skipping duplicate incident for {video_path}")
-                                        elif now < blocked_until:
-                                            print(f"   ⏳ Snoozing detection for {camera_id} (Blocked until {blocked_until:.1f} vs Now {now:.1f})")
-                                        else:
-                                            print(f"   [DEBUG] Triggering Violence: {camera_id} | BlockedUntil: {blocked_until:.1f} | Now: {now:.1f}")
-                                            # Double check to be absolutely sure
-                                            if now < blocked_until:
-                                                print("   [CRITICAL ERROR] Race condition detected! Aborting trigger.")
-                                                continue
-                                            people = result.get('people_count', 0)
-                                            label = f"Violence incident involving {people} people" if people else "Violence incident detected"
-                                            add_incident(
-                                                camera_id,
-                                                "violence",
-                                                confidence,
-                                                rel_video_path,
-                                                result.get('model', 'unknown'),
-                                                {"label": label, "timestamp": result.get('timestamp'), "people_count": people} if people else {"label": label, "timestamp": result.get('timestamp')}
-                                            )
-                                            self.processed_incident_videos.add(video_path)
-                                            # Set NEXT block time
-                                            self.violence_blocked_until[camera_id] = now + self.violence_cooldown
-                                    else:
-                                        print(f"   Note: Violence detected but confidence {confidence:.2f} < {VIOLENCE_THRESHOLD}")
+    def _attach_rate_controller(self):
+        """Let the adaptive rate controller drive the scheduler's per-camera intervals."""
+        if ADAPTIVE_RATE.get("enabled", False):
+            get_rate_controller().attach(self.scheduler, self.camera_ids)
 
-                                elif video_folder in ["crash", "no_crash"] and event == "car_crash":
-                                    if confidence >= ACCIDENT_THRESHOLD:
-                                        now = time.time()
-                                        blocked_until = self.crash_blocked_until.get(camera_id, 0)
+    def _process_camera(self, camera_id: str):
+        """One analysis of one camera: rotate/keep its clip, run inference, raise incidents."""
+        if not self.running:
+            return
+        try:
+            rel_video_path, video_path = self.select_clip(camera_id)
+            # One decode per clip, shared by people counting and run_inference
+            bundle = self.bundle_for(video_path)
+            result = self.analyse_clip(camera_id, video_path, bundle)
+            if result is not None:
+                self.record_result(camera_id, rel_video_path, video_path, result)
+        except Exception as e:
+            print(f"❌ Error processing {camera_id}: {e}")
 
-                                        if video_path in self.processed_incident_videos:
-                                            print(f"   ℹ️ Skipping duplicate incident for {video_path}")
-                                        elif now < blocked_until:
-                                            print(f"   ⏳ Snoozing detection for {camera_id} (Blocked for {blocked_until - now:.1f}s)")
-                                        else:
-                                            add_incident(
-                                                camera_id,
-                                                "crash",
-                                                confidence,
-                                                rel_video_path,
-                                                result.get('model', 'unknown'),
-                                                {"label": "Car crash detected", "timestamp": result.get('timestamp')}
-                                            )
-                                            self.processed_incident_videos.add(video_path)
-                                            self.crash_blocked_until[camera_id] = now + self.crash_cooldown
-                                    else:
-                                        print(f"   Note: Crash detected but confidence {confidence:.2f} < {ACCIDENT_THRESHOLD}")
-                        print(f"   ✓ {camera_id}: {result.get('event', 'unknown').upper()} (conf: {result.get('confidence', 0.0):.2%})")
-                    except Exception as e:
-                        print(f"❌ Error processing {camera_id}: {e}")
-                    # Removed sleep from here to prevent serial blocking
-                except Exception as e:
-                    print(f"❌ Error in camera loop for {camera_id}: {e}")
+    # Pipeline stages, shared by _process_camera (thread scheduler) and the
+    # asyncio orchestrator (backend/services/orchestrator.py)
 
-            
-            # Sleep ONCE per full rotation of all cameras
-            time.sleep(self.rotation_interval)
+    def select_clip(self, camera_id: str):
+        """Keep the camera's clip or rotate to a new one; returns (relative path, absolute path)."""
+        # Check if we should rotate the video (video_rotation_duration)
+        now = time.time()
+        last_rot = self.last_video_rotation.get(camera_id, 0)
 
+        # Force initial rotation if no video, otherwise check duration
+        # (the camera's current clip lives in camera_manager.camera_states)
+        rel_video_path = (camera_states.get(camera_id) or {}).get("video")
+
+        if not rel_video_path or (now - last_rot > self.video_rotation_duration):
+            rel_video_path = rotate_camera_video(camera_id)
+            self.last_video_rotation[camera_id] = now
+            # Publish the new clip so the dashboard plays what is being analysed
+            update_camera_inference(camera_id, {"video": rel_video_path})
+
+        video_path = str(self.video_dir / rel_video_path) if rel_video_path else ''
+        if rel_video_path and Path(rel_video_path).is_absolute():
+            video_path = rel_video_path
+        return rel_video_path, video_path
+
+    def bundle_for(self, video_path: str, qos: Optional[dict] = None) -> FrameBundle:
+        """Lazy frame bundle for a clip, with its catalog metadata (frame count, fps, validity).
+        qos is the QoS ladder rung the clip is analysed at (its "frames" sets the frames sampled)."""
+        num_frames = (qos or {}).get("frames", FRAME_COUNT)
+        return FrameBundle(video_path, num_frames, clip_info=get_video_catalog().info_for_path(video_path))
+
+    def analyse_clip(self, camera_id: str, video_path: str, bundle: FrameBundle,
+                     qos: Optional[dict] = None) -> Optional[dict]:
+        """People counting (violence cameras) + the camera's detector; None for unknown clip types.
+        At a degraded QoS rung the result records it as "qos_level" / "qos"."""
+        people_result = None
+        # Violence section: run people counting and violence detection
+        if camera_id in VIOLENCE_CAMERAS and (qos or {}).get("people_count", True):
+            try:
+                people_result = detect_people_count(video_path, bundle=bundle)
+                with self.lock:
+                    update_camera_inference(camera_id, people_result)
+                    self.inference_count += 1
+                    offline = get_offline_mode_state()
+                    if not offline and people_result.get("count", 0) > 15:
+                        print(f"   👥 {camera_id} detected high people count ({people_result['count']}) - Merging into Violence Check")
+                        # Do NOT trigger separate incident here.
+                        # Let the main violence/inference loop handle incident creation
+                        # so it respects cooldowns and duplicate checks.
+                    elif offline:
+                        print(f"[OFFLINE MODE] Skipping people_count incident for {camera_id}")
+            except ClipCancelled:
+                raise
+            except Exception as e:
+                print(f"❌ People counting failed for {camera_id}: {e}")
+        # Determine model by video folder
+        video_folder = Path(video_path).parent.name.lower()
+        if video_folder in ["crash", "no_crash"]:
+            # Use crash model
+            result = run_inference(video_path, camera_id=camera_id, bundle=bundle, qos=qos)
+        elif video_folder in ["violence", "no_violence"]:
+            # Use violence model (with people counting)
+            result = run_inference(video_path, camera_id=camera_id, bundle=bundle, qos=qos)
+            # CRITICAL: Ensure early people_result is preserved if run_inference didn't return it
+            if 'people_count' not in result and people_result:
+                result['people_count'] = people_result.get('count', 0)
+        else:
+            # Unknown: skip
+            print(f"[SIMULATOR] Unknown video type for {camera_id}: {video_path}")
+            return None
+        if qos is not None:
+            result["qos_level"] = qos["level"]
+            result["qos"] = qos["name"]
+        return result
+
+    def record_result(self, camera_id: str, rel_video_path: str, video_path: str, result: dict):
+        """Publish the result to camera state and raise incidents (thresholds, cooldowns, dedup)."""
+        video_folder = Path(video_path).parent.name.lower()
+        get_rate_controller().observe(camera_id, result)
+        with self.lock:
+            update_camera_inference(camera_id, result)
+            self.inference_count += 1
+            # Incident creation logic
+            event = result.get('event', '').lower()
+            confidence = result.get('confidence', 0)
+            print(f"   [DEBUG] {camera_id} Inference: Event='{event}', Conf={confidence:.2f}, Folder='{video_folder}'")
+
+            # Enforce thresholds & Offline Mode
+            offline = get_offline_mode_state()
+
+            if offline:
+                # detailed logging if needed, or just skip
+                if (event == "violence" and confidence >= VIOLENCE_THRESHOLD) or (event == "car_crash" and confidence >= ACCIDENT_THRESHOLD):
+                     print(f"   ⏸️ OFFLINE: Skipping incident detection for {camera_id}")
+            else:
+                if video_folder in ["violence", "no_violence"] and event == "violence":
+                    if confidence >= VIOLENCE_THRESHOLD:
+                        now = time.time()
+                        blocked_until = self.violence_blocked_until.get(camera_id, 0)
+
+                        if video_path in self.processed_incident_videos:
+                            print(f"   ℹ️ Skipping duplicate incident for {video_path}")
+                        elif now < blocked_until:
+                            print(f"   ⏳ Snoozing detection for {camera_id} (Blocked until {blocked_until:.1f} vs Now {now:.1f})")
+                        else:
+                            print(f"   [DEBUG] Triggering Violence: {camera_id} | BlockedUntil: {blocked_until:.1f} | Now: {now:.1f}")
+                            # Double check to be absolutely sure
+                            if now < blocked_until:
+                                print("   [CRITICAL ERROR] Race condition detected! Aborting trigger.")
+                                return
+                            people = result.get('people_count', 0)
+                            label = f"Violence incident involving {people} people" if people else "Violence incident detected"
+                            add_incident(
+                                camera_id,
+                                "violence",
+                                confidence,
+                                rel_video_path,
+                                result.get('model', 'unknown'),
+                                {"label": label, "timestamp": result.get('timestamp'), "people_count": people} if people else {"label": label, "timestamp": result.get('timestamp')}
+                            )
+                            self.processed_incident_videos.add(video_path)
+                            get_rate_controller().note_incident(camera_id)
+                            # Set NEXT block time
+                            self.violence_blocked_until[camera_id] = now + self.violence_cooldown
+                    else:
+                        print(f"   Note: Violence detected but confidence {confidence:.2f} < {VIOLENCE_THRESHOLD}")
+
+                elif video_folder in ["crash", "no_crash"] and event == "car_crash":
+                    if confidence >= ACCIDENT_THRESHOLD:
+                        now = time.time()
+                        blocked_until = self.crash_blocked_until.get(camera_id, 0)
+
+                        if video_path in self.processed_incident_videos:
+                            print(f"   ℹ️ Skipping duplicate incident for {video_path}")
+                        elif now < blocked_until:
+                            print(f"   ⏳ Snoozing detection for {camera_id} (Blocked for {blocked_until - now:.1f}s)")
+                        else:
+                            add_incident(
+                                camera_id,
+                                "crash",
+                                confidence,
+                                rel_video_path,
+                                result.get('model', 'unknown'),
+                                {"label": "Car crash detected", "timestamp": result.get('timestamp')}
+                            )
+                            self.processed_incident_videos.add(video_path)
+                            get_rate_controller().note_incident(camera_id)
+                            self.crash_blocked_until[camera_id] = now + self.crash_cooldown
+                    else:
+                        print(f"   Note: Crash detected but confidence {confidence:.2f} < {ACCIDENT_THRESHOLD}")
+        print(f"   ✓ {camera_id}: {result.get('event', 'unknown').upper()} (conf: {result.get('confidence', 0.0):.2%})")
 
-    
     def _demo_inference(self, camera_id: str, video_abs_path: str):
         """
         Fallback demo inference when real inference unavailable.
@@ -315,7 +399,18 @@ class CameraSimulator:
                 "violence_probability": self.violence_probability,
                 "violence_cooldown_s": self.violence_cooldown,
                 "crash_cooldown_s": self.crash_cooldown,
-                "cameras_monitored": len(DEFAULT_CAMERAS)
+                "cameras_monitored": len(self.camera_ids),
+                "result_cache": get_result_cache().stats(),
+                "batching": batching_metrics(),
+                "worker_pool": worker_pool_metrics(),
+                "scheduler": self.scheduler.metrics() if self.scheduler else None,
+                "video_catalog": get_video_catalog().stats(),
+                "state_publisher": get_state_publisher().metrics(),
+                "adaptive_rate": get_rate_controller().metrics() if ADAPTIVE_RATE.get("enabled", False) else None,
+                "qos": get_qos_controller().metrics() if QOS.get("enabled", False) else None,
+                "motion_gate": get_motion_gate().metrics() if MOTION_GATE.get("enabled", False) else None,
+                "models": readiness()["status"],
+                "model_registry": model_registry_stats(),
             }
 
     def clear_processed_video(self, video_path: str, camera_id: str = None):
@@ -356,34 +451,20 @@ class CameraSimulator:
             print(f"♻️  Reset processed videos, forced rotation, and set global snooze for {len(self.camera_ids)} cams.")
 
 
-# Global simulator instance
-_simulator: Optional[CameraSimulator] = None
-_simulator_lock = threading.Lock()
-
-
-def get_simulator() -> CameraSimulator:
-    """Get or create global simulator instance."""
-    global _simulator
-    
-    if _simulator is None:
-        with _simulator_lock:
-            if _simulator is None:
-                _simulator = CameraSimulator(
-                    rotation_interval=2.0,
-                    violence_probability=0.15
-                )
-    
-    return _simulator
+# The simulator is owned by the process runtime (backend.services.runtime)
+def get_simulator() -> Optional[CameraSimulator]:
+    """The running simulator, or None before the runtime has started."""
+    from backend.services.runtime import get_runtime
+    return get_runtime().simulator
 
 
 def start_camera_simulator():
-    """Start the global camera simulator (called from app.py on startup)."""
-    simulator = get_simulator()
-    if not simulator.running:
-        simulator.start()
+    """Start the runtime (and its simulator) if it is not running yet."""
+    from backend.services.runtime import get_runtime
+    get_runtime().start()
 
 
 def stop_camera_simulator():
-    """Stop the global camera simulator (called on app shutdown)."""
-    if _simulator and _simulator.running:
-        _simulator.stop()
+    """Stop the runtime (called on app shutdown)."""
+    from backend.services.runtime import get_runtime
+    get_runtime().stop()
@@ -1,5 +1,5 @@
-from backend.ai.inference import run_inference
-from backend.ai.crash_detector import detect_crash
+from backend.ai.inference import detect_events, run_inference
+from backend.ai.crash_detector import crash_verdict, detect_crash
 from backend.services.camera_service import update_camera
 from backend.utils.smoothing import smooth_decision
 
@@ -68,12 +68,15 @@ def process_video(
             except Exception as e:
                 crash_result = {"is_crash": False, "confidence": 0.0, "error": str(e)}
         else:
-            # Unknown video type: run both detectors
-            violence_result = run_inference(video_path, model_name=model_name)
-            try:
-                crash_result = detect_crash(video_path)
-            except Exception as e:
-                crash_result = {"is_crash": False, "confidence": 0.0, "error": str(e)}
+            # Unknown video type: run both detectors on one decode
+            # (one shared backbone pass when MULTITASK is enabled)
+            results = detect_events(video_path, ("violence", "crash"), model_name=model_name)
+            violence_result = results["violence"]
+            if results["crash"].get("event") == "error":
+                crash_result = {"is_crash": False, "confidence": 0.0, "error": results["crash"].get("error")}
+            else:
+                crash_result = crash_verdict(results["crash"].get("confidence", 0.0),
+                                             results["crash"].get("model", "mobilenet_lstm_crash"))
     
     # Determine final event based on camera type
     if is_violence_camera:
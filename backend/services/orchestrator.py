@@ -0,0 +1,576 @@
+"""
+asyncio Camera Pipeline Orchestrator
+
+One asyncio event loop (on a single thread) drives every camera as a
+lightweight task instead of an OS thread:
+
+    select clip -> decode -> inference -> record (state + incidents)
+
+Each stage's blocking work runs on a bounded executor (decode, inference,
+I/O) under a per-stage timeout, so thousands of idle cameras cost a
+coroutine each, not a sleeping thread. Recorded state changes reach
+Socket.IO clients through backend/services/state_publisher.py.
+
+Scheduling mirrors backend/services/scheduler.py: each camera's ticker
+sleeps until its due time (previous due + interval +/- jitter, first runs
+phase-spread), selects the clip and queues a job; the camera's worker runs
+queued jobs through decode -> inference -> record. Lag, missed periods,
+stage latencies and timeouts are tracked per camera. set_interval() (driven
+by backend/services/adaptive_rate.py) applies immediately: a shorter
+interval pulls the camera's pending due time in.
+
+Backpressure, so a pipeline that falls behind sheds work instead of
+delivering late alerts:
+
+- Each camera queues at most `queue_depth` jobs; a new job drops the
+  oldest ("superseded").
+- A job whose clip rotated out (the ticker selected a different clip) is
+  cancelled, queued or in flight ("rotated"): its bundle is cancelled so
+  decode/detectors that have not started are skipped, and its result is
+  never recorded.
+- A job not started within `stale_after` intervals of its due time is
+  dropped ("stale").
+- At most `max_inflight` jobs are inside the pipeline at once; the
+  AdmissionController (backend/services/admission.py) serves waiting jobs
+  by camera priority and sheds the lowest-priority ones once more than
+  `max_waiting` wait ("shed").
+
+Dropped and cancelled jobs are counted per camera and in total (metrics()).
+
+With a QoSController (backend/services/qos.py), load (lag p95, waiting jobs,
+drops) is fed to it every `qos_tick` seconds; each admitted job takes the
+current rung of the degradation ladder, passed to the pipeline as
+bundle_for(video_path, qos=...) and analyse_clip(..., qos=...).
+
+A stage that times out is abandoned for that run (its executor thread
+finishes in the background, skipping detectors not yet started; executors
+are bounded so this cannot pile up).
+
+Configured by backend.config.ORCHESTRATOR (+ SCHEDULER for intervals).
+"""
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+
+from backend.ai.frame_bundle import ClipCancelled
+from backend.services.admission import AdmissionController
+
+STAGES = ("select", "decode", "inference", "record")
+
+
+class StageTimeout(Exception):
+    def __init__(self, stage: str, timeout: float):
+        super().__init__(f"{stage} stage timed out after {timeout:g}s")
+        self.stage = stage
+
+
+class JobCancelled(Exception):
+    def __init__(self, reason: str):
+        super().__init__(f"job cancelled ({reason})")
+        self.reason = reason
+
+
+class _Job:
+    """One queued analysis of one camera's clip."""
+
+    __slots__ = ("camera_id", "due", "rel_video_path", "video_path", "bundle", "cancel_reason", "cancelled", "qos")
+
+    def __init__(self, camera_id: str, due: float, rel_video_path: str, video_path: str):
+        self.camera_id = camera_id
+        self.due = due
+        self.rel_video_path = rel_video_path
+        self.video_path = video_path
+        self.bundle = None
+        self.cancel_reason: Optional[str] = None
+        self.cancelled = asyncio.Event()
+        self.qos: Optional[dict] = None  # QoS profile taken at admission
+
+    def cancel(self, reason: str):
+        if self.cancel_reason is not None:
+            return
+        self.cancel_reason = reason
+        self.cancelled.set()
+        if self.bundle is not None:
+            self.bundle.cancel()
+
+
+class _CameraStats:
+    __slots__ = ("interval", "priority", "runs", "errors", "missed", "timeouts", "last_lag_ms", "avg_lag_ms",
+                 "max_lag_ms", "stage_ms", "in_flight", "next_due", "queue", "wakeup", "retime", "clip_lock", "current",
+                 "dropped", "cancelled")
+
+    def __init__(self, interval: float, priority: int, queue_depth: int):
+        self.interval = interval
+        self.priority = priority
+        self.runs = 0
+        self.errors = 0
+        self.missed = 0
+        self.timeouts = {}
+        self.last_lag_ms = 0.0
+        self.avg_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self.stage_ms = {}
+        self.in_flight = False
+        self.next_due: Optional[float] = None
+        self.queue = deque(maxlen=queue_depth)
+        self.wakeup: Optional[asyncio.Event] = None
+        self.retime: Optional[asyncio.Event] = None  # set when the interval changes
+        self.clip_lock: Optional[asyncio.Lock] = None  # clip selection vs recording a result
+        self.current: Optional[_Job] = None  # popped from the queue, waiting for admission or running
+        self.dropped = {}
+        self.cancelled = {}
+
+
+class CameraOrchestrator:
+    """Runs the camera pipeline of a CameraSimulator as asyncio tasks."""
+
+    EWMA_ALPHA = 0.2
+
+    def __init__(self, pipeline, camera_ids: Iterable[str], interval: float = 5.0,
+                 intervals: Optional[Dict[str, float]] = None, jitter: float = 0.1,
+                 max_inflight: int = 4, queue_depth: int = 1, stale_after: float = 2.0,
+                 max_waiting: int = 8, priorities: Optional[Dict[str, int]] = None, default_priority: int = 1,
+                 decode_workers: int = 2, inference_workers: int = 4, io_workers: int = 4,
+                 timeouts: Optional[Dict[str, float]] = None, wait_for_models: bool = True,
+                 qos=None, qos_tick: float = 1.0, name: str = "CameraOrchestrator"):
+        """
+        Args:
+            pipeline: Object with select_clip / bundle_for / analyse_clip / record_result (CameraSimulator);
+                bundle_for returns a FrameBundle (anything with .frames and .cancel()); with qos, bundle_for
+                and analyse_clip also take a qos=profile keyword
+            camera_ids: Cameras to run
+            interval: Default target seconds between runs of a camera
+            intervals: Per-camera interval overrides
+            jitter: Fraction of the interval randomly added to/subtracted from each due time
+            max_inflight: Jobs inside decode -> inference -> record at once
+            queue_depth: Jobs queued per camera; a new job drops the oldest
+            stale_after: Drop a job not started this many intervals after its due time
+            max_waiting: Jobs waiting for a pipeline slot before the lowest-priority ones are shed
+            priorities: Per-camera priority (higher is shed last)
+            default_priority: Priority of cameras not in priorities
+            decode_workers, inference_workers, io_workers: Executor sizes
+            timeouts: Seconds per stage (STAGES); missing = no timeout
+            wait_for_models: Hold the first runs until backend.ai.preload reports ready
+            qos: QoSController stepping detector fidelity with load (None = always full fidelity)
+            qos_tick: Seconds between load samples fed to qos
+        """
+        self.pipeline = pipeline
+        self.interval = interval
+        self.jitter = max(0.0, jitter)
+        self.max_inflight = max(1, max_inflight)
+        self.queue_depth = max(1, queue_depth)
+        self.stale_after = stale_after
+        self.max_waiting = max_waiting
+        self.priorities = dict(priorities or {})
+        self.default_priority = default_priority
+        self.timeouts = dict(timeouts or {})
+        self.wait_for_models = wait_for_models
+        self.qos = qos
+        self.qos_tick = qos_tick
+        self.name = name
+        self._worker_sizes = {"decode": decode_workers, "inference": inference_workers, "io": io_workers}
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+        self._stats: Dict[str, _CameraStats] = {
+            cid: self._new_stats(cid, (intervals or {}).get(cid, interval)) for cid in camera_ids
+        }
+        self._stats_lock = threading.Lock()
+        self._recent_lags = deque(maxlen=1024)
+        self._tick_lags = []  # lags since the last QoS sample
+        self._admission: Optional[AdmissionController] = None
+        self._tasks: Dict[str, asyncio.Task] = {}    # camera tickers
+        self._workers: Dict[str, asyncio.Task] = {}  # camera job workers
+        self._qos_runner: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopped: Optional[asyncio.Event] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+
+    # ------------------------------------------------------------------ lifecycle
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run_loop, daemon=True, name=f"{self.name}-loop")
+        self._thread.start()
+        self._started.wait(5)
+
+    def stop(self, timeout: float = 5.0):
+        """Cancel every camera task, then shut the executors down."""
+        if self._thread is None:
+            return
+        if self._loop is not None and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._stopped.set)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def threads(self) -> list:
+        return [self._thread] if self._thread is not None and self._thread.is_alive() else []
+
+    def _new_stats(self, camera_id: str, interval: float, priority: Optional[int] = None) -> _CameraStats:
+        if priority is None:
+            priority = self.priorities.get(camera_id, self.default_priority)
+        return _CameraStats(interval, priority, self.queue_depth)
+
+    def add_camera(self, camera_id: str, interval: Optional[float] = None, priority: Optional[int] = None):
+        """Start running a camera (thread-safe)."""
+        with self._stats_lock:
+            if camera_id in self._stats:
+                return
+            self._stats[camera_id] = self._new_stats(camera_id, interval or self.interval, priority)
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._spawn, camera_id, self._loop.time())
+
+    def remove_camera(self, camera_id: str):
+        """Cancel a camera's tasks (thread-safe); an executor stage already running completes."""
+        with self._stats_lock:
+            self._stats.pop(camera_id, None)
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._cancel, camera_id)
+
+    def set_interval(self, camera_id: str, interval: float):
+        """Change a camera's interval (thread-safe); a shorter one pulls its pending due time in."""
+        with self._stats_lock:
+            stats = self._stats.get(camera_id)
+            if stats is None:
+                return
+            stats.interval = interval
+        if stats.retime is not None and self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(stats.retime.set)
+
+    # ------------------------------------------------------------------ event loop
+
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._main())
+        finally:
+            self._loop.close()
+
+    async def _main(self):
+        self._stopped = asyncio.Event()
+        self._admission = AdmissionController(self.max_inflight, self.max_waiting)
+        self._executors = {
+            kind: ThreadPoolExecutor(max_workers=max(1, size), thread_name_prefix=f"CameraPool-{kind}")
+            for kind, size in self._worker_sizes.items()
+        }
+        self._started.set()
+        try:
+            if self.wait_for_models:
+                await self._wait_for_models()
+            now = self._loop.time()
+            cameras = list(self._stats)
+            for idx, camera_id in enumerate(cameras):
+                # Evenly phase-spread first runs over one interval
+                self._spawn(camera_id, now + self._stats[camera_id].interval * idx / max(1, len(cameras)))
+            print(f"[ORCHESTRATOR] Running {len(cameras)} camera tasks "
+                  f"(max {self.max_inflight} in flight, {self.max_waiting} waiting)")
+            if self.qos is not None:
+                self._qos_runner = self._loop.create_task(self._qos_task(), name="qos")
+            await self._stopped.wait()
+        finally:
+            tasks = list(self._tasks.values()) + list(self._workers.values())
+            if self._qos_runner is not None:
+                tasks.append(self._qos_runner)
+                self._qos_runner = None
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._tasks.clear()
+            self._workers.clear()
+            for executor in self._executors.values():
+                executor.shutdown(wait=False, cancel_futures=True)
+            print("[ORCHESTRATOR] Stopped")
+
+    async def _wait_for_models(self):
+        from backend.ai.preload import start_preload, wait_until_ready
+        from backend.config import PRELOAD
+
+        start_preload()
+        deadline = self._loop.time() + PRELOAD.get("timeout_s", 300)
+        while not self._stopped.is_set() and not wait_until_ready(timeout=0):
+            if self._loop.time() > deadline:
+                print(f"⚠️  Models not ready after {PRELOAD.get('timeout_s', 300)}s, starting anyway")
+                return
+            await asyncio.sleep(0.5)
+
+    async def _qos_task(self):
+        """Feed the QoS controller one load sample per tick."""
+        dropped = 0
+        while True:
+            await asyncio.sleep(self.qos_tick)
+            with self._stats_lock:
+                lags, self._tick_lags = sorted(self._tick_lags), []
+                total = sum(sum(s.dropped.values()) for s in self._stats.values())
+            load = {
+                "lag_ms": round(lags[int(0.95 * (len(lags) - 1))], 1) if lags else 0.0,
+                "waiting": self._admission.metrics()["waiting"],
+                "drops": total - dropped,
+            }
+            dropped = total
+            self.qos.observe(load)
+
+    def _spawn(self, camera_id: str, due: float):
+        if camera_id in self._tasks or camera_id not in self._stats:
+            return
+        self._stats[camera_id].wakeup = asyncio.Event()
+        self._stats[camera_id].retime = asyncio.Event()
+        self._stats[camera_id].clip_lock = asyncio.Lock()
+        self._tasks[camera_id] = self._loop.create_task(self._camera_task(camera_id, due), name=camera_id)
+        self._workers[camera_id] = self._loop.create_task(self._camera_worker(camera_id), name=f"{camera_id}-worker")
+
+    def _cancel(self, camera_id: str):
+        for tasks in (self._tasks, self._workers):
+            task = tasks.pop(camera_id, None)
+            if task is not None:
+                task.cancel()
+
+    async def _camera_task(self, camera_id: str, due: float):
+        """Ticker: select the clip at each due time and queue a job for the worker."""
+        last_due = None
+        while True:
+            stats = self._stats.get(camera_id)
+            if stats is None:
+                return
+            stats.next_due = due
+            try:
+                await asyncio.wait_for(stats.retime.wait(), max(0.0, due - self._loop.time()))
+                # Interval changed while waiting: due = last run + the new interval, if that is sooner
+                stats.retime.clear()
+                if last_due is not None:
+                    due = min(due, max(self._loop.time(), last_due + stats.interval))
+                continue
+            except asyncio.TimeoutError:
+                pass
+            last_due = due
+            await self._enqueue(camera_id, stats, due)
+            now = self._loop.time()
+            next_due = due + stats.interval * (1 + random.uniform(-self.jitter, self.jitter))
+            if next_due < now:
+                # Overran whole periods: count them and go again right away
+                stats.missed += int((now - next_due) // stats.interval) + 1
+                next_due = now
+            due = next_due
+
+    async def _enqueue(self, camera_id: str, stats: _CameraStats, due: float):
+        # A result being recorded now is for the current clip: rotate only after it
+        async with stats.clip_lock:
+            await self._select(camera_id, stats, due)
+
+    async def _select(self, camera_id: str, stats: _CameraStats, due: float):
+        try:
+            rel_video_path, video_path = await self._stage(
+                stats, "select", "io", self.pipeline.select_clip, camera_id)
+        except asyncio.CancelledError:
+            raise
+        except StageTimeout as e:
+            stats.timeouts[e.stage] = stats.timeouts.get(e.stage, 0) + 1
+            stats.errors += 1
+            print(f"[ORCHESTRATOR] {camera_id}: {e}")
+            return
+        except Exception as e:
+            stats.errors += 1
+            print(f"❌ Error processing {camera_id}: {e}")
+            return
+
+        # Work on a clip that rotated out is no longer worth finishing
+        if stats.current is not None and stats.current.rel_video_path != rel_video_path:
+            stats.current.cancel("rotated")
+        for job in [j for j in stats.queue if j.rel_video_path != rel_video_path]:
+            stats.queue.remove(job)
+            self._count(stats.dropped, "rotated")
+        if len(stats.queue) == stats.queue.maxlen:
+            stats.queue.popleft()
+            self._count(stats.dropped, "superseded")
+        stats.queue.append(_Job(camera_id, due, rel_video_path, video_path))
+        stats.wakeup.set()
+
+    async def _camera_worker(self, camera_id: str):
+        """Run the camera's queued jobs, oldest first, through admission and the pipeline."""
+        stats = self._stats.get(camera_id)
+        while stats is not None and camera_id in self._stats:
+            if not stats.queue:
+                stats.wakeup.clear()
+                await stats.wakeup.wait()
+                continue
+            job = stats.current = stats.queue.popleft()
+            try:
+                admitted = await self._admit(job, stats)
+                if job.cancel_reason is not None and not admitted:
+                    self._count(stats.cancelled, job.cancel_reason)
+                    continue
+                if not admitted:
+                    self._count(stats.dropped, "shed")
+                    continue
+                try:
+                    started = self._loop.time()
+                    if job.cancel_reason is not None:
+                        self._count(stats.cancelled, job.cancel_reason)
+                        continue
+                    if self.stale_after and started - job.due > self.stale_after * stats.interval:
+                        self._count(stats.dropped, "stale")
+                        continue
+                    self._record_lag(stats, (started - job.due) * 1000)
+                    if self.qos is not None:
+                        job.qos = self.qos.profile()
+                    stats.in_flight = True
+                    await self._run_job(job, stats)
+                finally:
+                    stats.in_flight = False
+                    self._admission.release()
+            finally:
+                stats.current = None
+
+    async def _admit(self, job: _Job, stats: _CameraStats) -> bool:
+        """Wait for a pipeline slot; gives up (False) if the job is shed or cancelled meanwhile."""
+        acquire = self._loop.create_task(self._admission.acquire(stats.priority))
+        cancelled = self._loop.create_task(job.cancelled.wait())
+        try:
+            await asyncio.wait([acquire, cancelled], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            cancelled.cancel()
+            if not acquire.done():
+                # Leaves the wait; a slot handed over meanwhile is passed on
+                acquire.cancel()
+                await asyncio.gather(acquire, return_exceptions=True)
+        if acquire.cancelled():
+            return False
+        if acquire.result() and job.cancel_reason is not None:
+            self._admission.release()
+            return False
+        return acquire.result()
+
+    async def _run_job(self, job: _Job, stats: _CameraStats):
+        camera_id = job.camera_id
+        try:
+            quality = {"qos": job.qos} if job.qos is not None else {}
+            job.bundle = bundle = self.pipeline.bundle_for(job.video_path, **quality)
+            if job.cancel_reason is not None:
+                bundle.cancel()
+            await self._stage(stats, "decode", "decode", lambda: bundle.frames, job=job)
+            result = await self._stage(
+                stats, "inference", "inference",
+                lambda: self.pipeline.analyse_clip(camera_id, job.video_path, bundle, **quality), job=job)
+            if result is None:
+                return
+            async with stats.clip_lock:
+                if job.cancel_reason is not None:
+                    raise JobCancelled(job.cancel_reason)
+                await self._stage(stats, "record", "io", self.pipeline.record_result,
+                                  camera_id, job.rel_video_path, job.video_path, result)
+            stats.runs += 1
+        except asyncio.CancelledError:
+            raise
+        except (JobCancelled, ClipCancelled):
+            self._count(stats.cancelled, job.cancel_reason or "cancelled")
+        except StageTimeout as e:
+            # Skip whatever the abandoned executor work has not started yet
+            if job.bundle is not None:
+                job.bundle.cancel()
+            stats.timeouts[e.stage] = stats.timeouts.get(e.stage, 0) + 1
+            stats.errors += 1
+            print(f"[ORCHESTRATOR] {camera_id}: {e}")
+        except Exception as e:
+            stats.errors += 1
+            print(f"❌ Error processing {camera_id}: {e}")
+
+    async def _stage(self, stats: _CameraStats, stage: str, executor: str, fn, *args, job: Optional[_Job] = None):
+        """
+        Run one blocking stage on its executor under the stage timeout, recording its latency.
+        With a job, returns early (JobCancelled) as soon as the job is cancelled.
+        """
+        if job is not None and job.cancel_reason is not None:
+            raise JobCancelled(job.cancel_reason)
+        start = self._loop.time()
+        timeout = self.timeouts.get(stage)
+        work = self._loop.run_in_executor(self._executors[executor], fn, *args)
+        cancelled = self._loop.create_task(job.cancelled.wait()) if job is not None else None
+        try:
+            done, _ = await asyncio.wait([work] + ([cancelled] if cancelled else []),
+                                         timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if work in done:
+                return work.result()
+            if job is not None and job.cancel_reason is not None:
+                raise JobCancelled(job.cancel_reason)
+            raise StageTimeout(stage, timeout)
+        finally:
+            if not work.done():
+                work.cancel()
+            if cancelled is not None:
+                cancelled.cancel()
+            ms = (self._loop.time() - start) * 1000
+            prev = stats.stage_ms.get(stage)
+            stats.stage_ms[stage] = ms if prev is None else (1 - self.EWMA_ALPHA) * prev + self.EWMA_ALPHA * ms
+
+    @staticmethod
+    def _count(counters: dict, reason: str):
+        counters[reason] = counters.get(reason, 0) + 1
+
+    def _record_lag(self, stats: _CameraStats, lag_ms: float):
+        a = self.EWMA_ALPHA
+        stats.avg_lag_ms = lag_ms if stats.runs == 0 and stats.max_lag_ms == 0 else (1 - a) * stats.avg_lag_ms + a * lag_ms
+        stats.last_lag_ms = lag_ms
+        stats.max_lag_ms = max(stats.max_lag_ms, lag_ms)
+        with self._stats_lock:
+            self._recent_lags.append(lag_ms)
+            if self.qos is not None:
+                self._tick_lags.append(lag_ms)
+
+    # ------------------------------------------------------------------ metrics
+
+    def metrics(self) -> dict:
+        now = self._loop.time() if self._loop is not None else time.monotonic()
+        with self._stats_lock:
+            stats = dict(self._stats)
+            lags = sorted(self._recent_lags)
+        cameras = {
+            camera_id: {
+                "interval_s": s.interval,
+                "runs": s.runs,
+                "errors": s.errors,
+                "timeouts": dict(s.timeouts),
+                "missed_periods": s.missed,
+                "lag_ms": round(s.last_lag_ms, 1),
+                "avg_lag_ms": round(s.avg_lag_ms, 1),
+                "max_lag_ms": round(s.max_lag_ms, 1),
+                "stage_ms": {k: round(v, 1) for k, v in s.stage_ms.items()},
+                "in_flight": s.in_flight,
+                "priority": s.priority,
+                "queued": len(s.queue),
+                "dropped": dict(s.dropped),
+                "cancelled": dict(s.cancelled),
+                "due_in_s": round(s.next_due - now, 2) if s.next_due is not None and not s.in_flight else None,
+            }
+            for camera_id, s in stats.items()
+        }
+        summary = {
+            "driver": "asyncio",
+            "tasks": len(self._tasks),
+            "max_inflight": self.max_inflight,
+            "busy": sum(1 for c in cameras.values() if c["in_flight"]),
+            "dropped": self._totals(c["dropped"] for c in cameras.values()),
+            "cancelled": self._totals(c["cancelled"] for c in cameras.values()),
+            "admission": self._admission.metrics() if self._admission is not None else None,
+            "qos": self.qos.metrics() if self.qos is not None else None,
+            "cameras": cameras,
+        }
+        if lags:
+            summary["lag_ms"] = {
+                "avg": round(sum(lags) / len(lags), 1),
+                "p95": round(lags[int(0.95 * (len(lags) - 1))], 1),
+                "max": round(lags[-1], 1),
+            }
+        return summary
+
+    @staticmethod
+    def _totals(counters: Iterable[dict]) -> dict:
+        totals = {}
+        for counter in counters:
+            for reason, n in counter.items():
+                totals[reason] = totals.get(reason, 0) + n
+        return totals
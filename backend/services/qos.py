@@ -0,0 +1,145 @@
+"""
+Quality-of-Service Degradation Ladder
+
+Under overload every camera is analysed at lower fidelity rather than some
+cameras going stale. The ladder (backend.config.QOS["ladder"]) lists rungs
+from full fidelity down; each rung overrides detector settings:
+
+- "frames":       frames sampled per clip (FrameBundle num_frames, 16 -> 8)
+- "img_size":     violence/crash input size (224 -> 160)
+- "quantized":    int8 violence/crash model
+- "people_count": False skips YOLO people counting
+
+The orchestrator feeds the controller its load once per tick: scheduling lag
+(p95 of jobs admitted during the tick), jobs waiting for admission and jobs
+dropped (shed / stale / superseded). If any step_down threshold is crossed
+the level steps down one rung; once every step_up threshold has held for
+`hold_s` it steps back up one rung. Steps are at least `hold_s` apart, so
+the level does not flap at the boundary.
+
+Calm is measured on the degraded rung, so it does not prove the rung above
+can keep up. A step up that is reversed (overload steps it back down within
+2 * hold_s) makes the next step up to that rung wait for calm lasting twice
+as long as the reversed one waited, up to `max_hold_s`; a step up that
+holds resets it to `hold_s`. Under steady overload the level settles on the
+cheapest rung that keeps up instead of cycling between it and the one above.
+
+Each job runs at the rung current when it is admitted; the simulator stamps
+it into the result and camera state as "qos_level" / "qos".
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional
+
+from backend.config import QOS
+
+FULL_FIDELITY = {"name": "full"}
+
+
+class QoSController:
+    """Load-driven level on a degradation ladder, with hysteresis."""
+
+    def __init__(self, ladder: Optional[List[dict]] = None, step_down: Optional[Dict[str, float]] = None,
+                 step_up: Optional[Dict[str, float]] = None, hold_s: float = 10.0,
+                 max_hold_s: Optional[float] = None):
+        """
+        Args:
+            ladder: Rungs from full fidelity (index 0) down
+            step_down: Load thresholds (lag_ms / waiting / drops); any one crossed = overloaded
+            step_up: Load thresholds that must all hold for hold_s before stepping back up
+            hold_s: Minimum seconds between steps
+            max_hold_s: Cap on the calm needed to step up after reversed step ups (default 8 * hold_s)
+        """
+        self.ladder = [dict(rung) for rung in (ladder or [FULL_FIDELITY])]
+        self.step_down = dict(step_down or {})
+        self.step_up = dict(step_up or {})
+        self.hold_s = hold_s
+        self.max_hold_s = max(hold_s, 8 * hold_s if max_hold_s is None else max_hold_s)
+        self.level = 0
+        self._up_holds: Dict[int, float] = {}  # level -> calm needed to step up to it, after reversals
+        self._last_step = float("-inf")
+        self._last_up = float("-inf")
+        self._up_wait = 0.0  # seconds the last step up waited after the step before it
+        self._calm_since: Optional[float] = None
+        self._history = []  # (time, from level, to level, load)
+        self._last_load: Dict[str, float] = {}
+
+    def profile(self, level: Optional[int] = None) -> dict:
+        """Rung settings plus "level" and "name" (current level by default)."""
+        level = self.level if level is None else level
+        rung = self.ladder[level]
+        return {**rung, "level": level, "name": rung.get("name", f"level{level}")}
+
+    def observe(self, load: Dict[str, float], now: Optional[float] = None) -> int:
+        """
+        Step the level from one tick's load.
+
+        Args:
+            load: {"lag_ms": ..., "waiting": ..., "drops": ...}
+
+        Returns:
+            The (possibly new) level
+        """
+        now = time.monotonic() if now is None else now
+        self._last_load = dict(load)
+        overloaded = any(load.get(k, 0) > v for k, v in self.step_down.items())
+        calm = all(load.get(k, 0) <= v for k, v in self.step_up.items())
+        if not calm:
+            self._calm_since = None
+        elif self._calm_since is None:
+            self._calm_since = now
+
+        if self._last_step == self._last_up and now - self._last_up >= 2 * self.hold_s:
+            self._up_holds.pop(self.level, None)  # the last step up held
+        if now - self._last_step < self.hold_s:
+            return self.level
+        up_hold = self._up_holds.get(self.level - 1, self.hold_s)
+        if overloaded and self.level < len(self.ladder) - 1:
+            self._step(self.level + 1, now, load)
+        elif calm and not overloaded and self.level > 0 and now - self._calm_since >= up_hold:
+            self._step(self.level - 1, now, load)
+        return self.level
+
+    def _step(self, level: int, now: float, load: Dict[str, float]):
+        previous, self.level = self.level, level
+        if level < previous:
+            self._last_up, self._up_wait = now, now - self._last_step
+        elif self._last_step == self._last_up and now - self._last_up < 2 * self.hold_s:
+            # The step up to `previous` was reversed: wait twice as long before the next one
+            self._up_holds[previous] = min(2 * max(self._up_wait, self.hold_s), self.max_hold_s)
+        self._last_step = now
+        self._calm_since = None
+        self._history = (self._history + [(time.time(), previous, level, dict(load))])[-20:]
+        direction = "down" if level > previous else "up"
+        print(f"[QOS] Stepped {direction} to level {level} ({self.profile()['name']}), load {load}")
+
+    def metrics(self) -> dict:
+        return {
+            "level": self.level,
+            "name": self.profile()["name"],
+            "ladder": [rung.get("name", f"level{i}") for i, rung in enumerate(self.ladder)],
+            "load": self._last_load,
+            "up_hold_s": {self.profile(level)["name"]: hold for level, hold in sorted(self._up_holds.items())},
+            "steps": [{"at": at, "from": a, "to": b, "load": load} for at, a, b, load in self._history],
+        }
+
+
+# Process-wide controller
+_controller: Optional[QoSController] = None
+_controller_lock = threading.Lock()
+
+
+def get_qos_controller() -> QoSController:
+    global _controller
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                _controller = QoSController(
+                    ladder=QOS.get("ladder"),
+                    step_down=QOS.get("step_down"),
+                    step_up=QOS.get("step_up"),
+                    hold_s=QOS.get("hold_s", 10),
+                    max_hold_s=QOS.get("max_hold_s"),
+                )
+    return _controller
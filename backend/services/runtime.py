@@ -0,0 +1,179 @@
+"""
+Backend Runtime Lifecycle
+
+One Runtime per process owns everything that runs in the background:
+
+- the camera simulator (the asyncio orchestrator loop, or its loop thread
+  and camera scheduler workers)
+- the camera state publisher (versioned deltas to Socket.IO clients)
+- the adaptive rate controller (per-camera analysis intervals from risk)
+- model preload (models live in backend.ai.model_registry)
+- the video catalog watcher (backend.services.video_catalog)
+- the batching engines and the inference worker pool, torn down on stop
+
+start() is idempotent, so importing or creating the app twice cannot start
+a second simulator or load a second copy of the models. With the Werkzeug
+reloader, only the serving child process starts a runtime (see
+should_start_runtime()). stop() shuts everything down and also runs at
+interpreter exit.
+"""
+
+import atexit
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from backend.config import DEFAULT_CAMERAS
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+VIDEO_DIR = PROJECT_ROOT / "Videos"
+
+
+def should_start_runtime(use_reloader: bool) -> bool:
+    """
+    False in the Werkzeug reloader's watcher process.
+
+    With use_reloader=True the script runs twice: a parent that only watches
+    files and restarts the child, and the child (WERKZEUG_RUN_MAIN=true) that
+    actually serves requests. Only the child should own cameras and models.
+    """
+    return not use_reloader or os.environ.get("WERKZEUG_RUN_MAIN") == "true"
+
+
+class Runtime:
+    """Start/stop/status for the process's background services."""
+
+    def __init__(self, camera_ids=None, video_dir=VIDEO_DIR, rotation_interval: float = 5,
+                 violence_probability: float = 0.15):
+        self.camera_ids = list(camera_ids or DEFAULT_CAMERAS)
+        self.video_dir = Path(video_dir)
+        self.rotation_interval = rotation_interval
+        self.violence_probability = violence_probability
+        self.simulator = None
+        self.catalog = None
+        self.started_at: Optional[float] = None
+        self.publisher = None
+        self.rate_controller = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self.started_at is not None
+
+    def start(self, emit=None) -> bool:
+        """
+        Start preload, simulator and state publisher; False if already running.
+
+        Args:
+            emit: Called with each camera state delta
+                  (e.g. the app's Socket.IO emit_camera_update)
+        """
+        from backend.ai.preload import start_preload
+        from backend.config import ADAPTIVE_RATE
+        from backend.services.adaptive_rate import get_rate_controller
+        from backend.services.camera_simulator import CameraSimulator
+        from backend.services.state_publisher import get_state_publisher
+        from backend.services.video_catalog import get_video_catalog
+
+        with self._lock:
+            if self.running:
+                return False
+            # Load + warm all models in parallel; the simulator waits for them before its first pass
+            start_preload()
+            # Index Videos/ once (rotation reads clips from it), then watch for changes
+            self.catalog = get_video_catalog()
+            self.catalog.start_watcher()
+            self.simulator = CameraSimulator(
+                camera_ids=self.camera_ids,
+                video_dir=self.video_dir,
+                rotation_interval=self.rotation_interval,
+                violence_probability=self.violence_probability,
+            )
+            self.publisher = get_state_publisher()
+            self.publisher.start(emit=emit)
+            self._publish_camera_states()
+            self.simulator.start()
+            if ADAPTIVE_RATE.get("enabled", False):
+                self.rate_controller = get_rate_controller()
+                self.rate_controller.start()
+            self.started_at = time.time()
+        print(f"[RUNTIME] Started (pid={os.getpid()}, {len(self.camera_ids)} cameras)")
+        return True
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the simulator, rate controller, catalog watcher and publisher, then the batching engines and worker pool."""
+        from backend.ai.batching import stop_engines
+        from backend.ai.worker_pool import shutdown_worker_pool
+
+        with self._lock:
+            if not self.running:
+                return
+            if self.simulator is not None:
+                self.simulator.stop()
+            if self.rate_controller is not None:
+                self.rate_controller.stop(timeout)
+            if self.catalog is not None:
+                self.catalog.stop_watcher()
+            if self.publisher is not None:
+                self.publisher.stop(timeout)
+            self.started_at = None
+        stop_engines()
+        shutdown_worker_pool()
+        print("[RUNTIME] Stopped")
+
+    def _publish_camera_states(self):
+        """
+        Put the simulator's initial camera states into camera_states and publish them.
+
+        From then on camera_states is the only copy; the simulator reads and
+        writes camera state through it.
+        """
+        from backend.services.camera_manager import set_camera_state
+
+        for cid, state in list(self.simulator.camera_states.items()):
+            set_camera_state(cid, state)
+
+    def threads(self) -> list:
+        """Names of the live background threads this runtime owns."""
+        owned = [self.publisher.thread() if self.publisher else None,
+                 self.simulator.thread if self.simulator else None,
+                 self.catalog.watcher_thread() if self.catalog else None,
+                 self.rate_controller.thread() if self.rate_controller else None]
+        if self.simulator is not None and self.simulator.scheduler is not None:
+            owned += self.simulator.scheduler.threads()
+        return [t.name for t in owned if t is not None and t.is_alive()]
+
+    def status(self) -> dict:
+        from backend.ai.model_registry import model_registry_stats
+        from backend.ai.preload import readiness
+
+        registry = model_registry_stats()
+        return {
+            "running": self.running,
+            "pid": os.getpid(),
+            "started_at": self.started_at,
+            "uptime_s": round(time.time() - self.started_at, 1) if self.started_at else 0.0,
+            "cameras": len(self.camera_ids),
+            "threads": self.threads(),
+            "process_threads": threading.active_count(),
+            "models": readiness()["status"],
+            "models_loaded": sum(1 for m in registry["models"].values() if m["loaded"]),
+            "model_memory_mb": registry["total_memory_mb"],
+        }
+
+
+# Process-wide runtime
+_runtime: Optional[Runtime] = None
+_runtime_lock = threading.Lock()
+
+
+def get_runtime() -> Runtime:
+    global _runtime
+    if _runtime is None:
+        with _runtime_lock:
+            if _runtime is None:
+                _runtime = Runtime()
+                atexit.register(_runtime.stop)
+    return _runtime
@@ -0,0 +1,275 @@
+"""
+Deadline-Based Camera Scheduler
+
+Runs one job per camera at a target interval on a bounded set of worker
+threads, instead of walking every camera in turn (one slow camera delayed
+all the others) or giving each camera its own mostly-sleeping thread.
+
+- A min-heap holds each camera's next due time. The dispatcher pops the
+  earliest-due camera only once a worker is free, so the most overdue camera
+  always runs next (earliest deadline first, FIFO on ties) and no camera can
+  starve.
+- A camera is never in flight twice. Its next due time is its previous due
+  time + interval (no drift), randomized by +/- jitter. When a run overruns
+  whole periods, the missed periods are counted and the camera is due again
+  immediately.
+- Initial due times are spread evenly over one interval, so cameras do not
+  all fire at once.
+- Lag (actual start - due time) is tracked per camera and globally.
+- set_interval() with a shorter interval pulls the camera's pending due time
+  in (the adaptive rate controller relies on this for focus / incidents).
+
+Configured by backend.config.SCHEDULER.
+"""
+
+import heapq
+import itertools
+import queue
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, Optional
+
+
+class _CameraStats:
+    __slots__ = ("interval", "runs", "errors", "missed", "last_lag_ms", "avg_lag_ms", "max_lag_ms",
+                 "last_duration_ms", "avg_duration_ms", "next_due", "last_start", "in_flight")
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.runs = 0
+        self.errors = 0
+        self.missed = 0
+        self.last_lag_ms = 0.0
+        self.avg_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self.last_duration_ms = 0.0
+        self.avg_duration_ms = 0.0
+        self.next_due: Optional[float] = None
+        self.last_start: Optional[float] = None
+        self.in_flight = False
+
+
+class CameraScheduler:
+    """Earliest-deadline-first camera jobs on a fixed worker pool."""
+
+    EWMA_ALPHA = 0.2
+
+    def __init__(self, job: Callable[[str], None], camera_ids: Iterable[str], interval: float = 5.0,
+                 intervals: Optional[Dict[str, float]] = None, workers: int = 4, jitter: float = 0.1,
+                 name: str = "CameraScheduler"):
+        """
+        Args:
+            job: Called as job(camera_id) on a worker thread; exceptions are logged
+            camera_ids: Cameras to schedule
+            interval: Default target seconds between the starts of two runs of a camera
+            intervals: Per-camera interval overrides
+            workers: Worker threads (max cameras analysed concurrently)
+            jitter: Fraction of the interval randomly added to/subtracted from each due time
+        """
+        self.job = job
+        self.interval = interval
+        self.workers = max(1, workers)
+        self.jitter = max(0.0, jitter)
+        self.name = name
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._slots = threading.Semaphore(self.workers)
+        self._tasks: "queue.Queue" = queue.Queue()
+        self._stats: Dict[str, _CameraStats] = {}
+        self._recent_lags = deque(maxlen=1024)
+        self._running = False
+        self._threads = []
+        for camera_id in camera_ids:
+            self._stats[camera_id] = _CameraStats((intervals or {}).get(camera_id, interval))
+
+    # ------------------------------------------------------------------ lifecycle
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        now = time.monotonic()
+        with self._cond:
+            self._heap.clear()
+            cameras = list(self._stats)
+            for idx, camera_id in enumerate(cameras):
+                # Evenly phase-spread first runs over one interval
+                stats = self._stats[camera_id]
+                self._push(camera_id, now + stats.interval * idx / max(1, len(cameras)))
+        self._threads = [threading.Thread(target=self._dispatch_loop, daemon=True, name=f"{self.name}-dispatch")]
+        self._threads += [threading.Thread(target=self._worker_loop, daemon=True, name=f"{self.name}-worker-{i}")
+                          for i in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop dispatching; jobs already handed to a worker finish first."""
+        if not self._running:
+            return
+        self._running = False
+        with self._cond:
+            self._cond.notify_all()
+        for _ in range(self.workers):
+            self._tasks.put(None)
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+
+    def threads(self) -> list:
+        return [t for t in self._threads if t.is_alive()]
+
+    # ------------------------------------------------------------------ cameras
+
+    def add_camera(self, camera_id: str, interval: Optional[float] = None):
+        with self._cond:
+            if camera_id in self._stats:
+                return
+            self._stats[camera_id] = _CameraStats(interval or self.interval)
+            if self._running:
+                self._push(camera_id, time.monotonic())
+                self._cond.notify()
+
+    def remove_camera(self, camera_id: str):
+        """Stop scheduling a camera (an in-flight run completes; its heap entry is skipped)."""
+        with self._cond:
+            self._stats.pop(camera_id, None)
+
+    def set_interval(self, camera_id: str, interval: float):
+        """
+        Change a camera's target interval. A shorter one pulls its pending due
+        time in to last start + interval (now if that has passed); otherwise
+        it applies from the next due time.
+        """
+        with self._cond:
+            stats = self._stats.get(camera_id)
+            if stats is None:
+                return
+            shorter = interval < stats.interval
+            stats.interval = interval
+            if not shorter or not self._running or stats.in_flight or stats.next_due is None:
+                return
+            base = stats.last_start if stats.last_start is not None else time.monotonic()
+            due = min(stats.next_due, base + interval)
+            if due < stats.next_due:
+                self._push(camera_id, due)  # the old heap entry is now stale and skipped
+                self._cond.notify()
+
+    # ------------------------------------------------------------------ internals
+
+    def _push(self, camera_id: str, due: float):
+        # Caller holds self._cond
+        self._stats[camera_id].next_due = due
+        heapq.heappush(self._heap, (due, next(self._seq), camera_id))
+
+    def _dispatch_loop(self):
+        while self._running:
+            # Only pop once a worker is free: a popped camera starts now, so lag is real
+            if not self._slots.acquire(timeout=0.5):
+                continue
+            task = None
+            with self._cond:
+                while self._running and task is None:
+                    if not self._heap:
+                        self._cond.wait(0.5)
+                        continue
+                    due, _, camera_id = self._heap[0]
+                    wait = due - time.monotonic()
+                    if wait > 0:
+                        self._cond.wait(min(wait, 0.5))
+                        continue
+                    heapq.heappop(self._heap)
+                    stats = self._stats.get(camera_id)
+                    if stats is None or stats.next_due != due:
+                        continue  # removed or rescheduled camera: stale entry
+                    stats.in_flight = True
+                    stats.last_start = time.monotonic()
+                    task = (camera_id, due)
+            if task is None:
+                self._slots.release()
+                break
+            self._tasks.put(task)
+
+    def _worker_loop(self):
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                break
+            camera_id, due = task
+            started = time.monotonic()
+            lag_ms = (started - due) * 1000
+            error = False
+            try:
+                self.job(camera_id)
+            except Exception as e:
+                error = True
+                print(f"[SCHEDULER] {camera_id} job failed: {e}")
+            finally:
+                self._slots.release()
+            self._complete(camera_id, due, started, lag_ms, error)
+
+    def _complete(self, camera_id: str, due: float, started: float, lag_ms: float, error: bool):
+        now = time.monotonic()
+        with self._cond:
+            stats = self._stats.get(camera_id)
+            if stats is None:
+                return
+            duration_ms = (now - started) * 1000
+            a = self.EWMA_ALPHA
+            stats.runs += 1
+            stats.errors += int(error)
+            stats.last_lag_ms = lag_ms
+            stats.avg_lag_ms = lag_ms if stats.runs == 1 else (1 - a) * stats.avg_lag_ms + a * lag_ms
+            stats.max_lag_ms = max(stats.max_lag_ms, lag_ms)
+            stats.last_duration_ms = duration_ms
+            stats.avg_duration_ms = (duration_ms if stats.runs == 1
+                                     else (1 - a) * stats.avg_duration_ms + a * duration_ms)
+            stats.in_flight = False
+            self._recent_lags.append(lag_ms)
+
+            next_due = due + stats.interval * (1 + random.uniform(-self.jitter, self.jitter))
+            if next_due < now:
+                # Overran whole periods: count them and run again as soon as a worker frees up
+                stats.missed += int((now - next_due) // stats.interval) + 1
+                next_due = now
+            if self._running:
+                self._push(camera_id, next_due)
+                self._cond.notify()
+
+    # ------------------------------------------------------------------ metrics
+
+    def metrics(self) -> dict:
+        now = time.monotonic()
+        with self._cond:
+            lags = sorted(self._recent_lags)
+            cameras = {
+                camera_id: {
+                    "interval_s": s.interval,
+                    "runs": s.runs,
+                    "errors": s.errors,
+                    "missed_periods": s.missed,
+                    "lag_ms": round(s.last_lag_ms, 1),
+                    "avg_lag_ms": round(s.avg_lag_ms, 1),
+                    "max_lag_ms": round(s.max_lag_ms, 1),
+                    "avg_duration_ms": round(s.avg_duration_ms, 1),
+                    "in_flight": s.in_flight,
+                    "due_in_s": round(s.next_due - now, 2) if s.next_due is not None and not s.in_flight else None,
+                }
+                for camera_id, s in self._stats.items()
+            }
+            overdue = sum(1 for due, _, cid in self._heap if due <= now and cid in self._stats)
+        summary = {
+            "workers": self.workers,
+            "busy": sum(1 for c in cameras.values() if c["in_flight"]),
+            "overdue": overdue,
+            "cameras": cameras,
+        }
+        if lags:
+            summary["lag_ms"] = {
+                "avg": round(sum(lags) / len(lags), 1),
+                "p95": round(lags[int(0.95 * (len(lags) - 1))], 1),
+                "max": round(lags[-1], 1),
+            }
+        return summary
@@ -0,0 +1,166 @@
+"""
+Camera State Publisher
+
+Turns camera state changes into versioned deltas for websocket clients
+instead of clients polling /api/live-status for full snapshots.
+
+- camera_manager reports every state write with only the fields whose
+  value changed (record()); writes that change nothing publish nothing.
+- Changes are coalesced per camera and flushed once per tick as one delta:
+  {"seq": n, "ts": ..., "full": False, "cameras": {camera_id: {field: value}}}
+  with a monotonically increasing seq, emitted through the app's
+  emit_camera_update (Socket.IO "camera_update").
+- The last `history` deltas are kept, so a client that missed some (gap in
+  seq, reconnect) resyncs with since(seq): the merged deltas after seq,
+  stamped "base": seq so the client applies it over its state at seq even
+  though the current seq is not base + 1, or a full snapshot ("full": True)
+  when seq is older than the history.
+
+Configured by backend.config.STATE_PUBLISHER.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+from backend.config import STATE_PUBLISHER
+
+
+class StatePublisher:
+    """Coalesces per-camera field changes into sequenced deltas."""
+
+    def __init__(self, emit: Optional[Callable[[dict], None]] = None, tick_s: float = 0.2, history: int = 1024):
+        """
+        Args:
+            emit: Called with each delta (e.g. Socket.IO emit_camera_update)
+            tick_s: Seconds between flushes; changes within a tick go out as one delta
+            history: Deltas kept for resync
+        """
+        self.emit = emit
+        self.tick_s = tick_s
+        self.seq = 0
+        self._pending: Dict[str, dict] = {}
+        self._history = deque(maxlen=max(1, history))
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.published = 0
+        self.emit_errors = 0
+
+    def record(self, camera_id: str, changes: dict):
+        """Queue changed fields of a camera for the next delta (no-op for empty changes)."""
+        if not changes:
+            return
+        with self._lock:
+            self._pending.setdefault(camera_id, {}).update(changes)
+        self._wake.set()
+
+    def flush(self) -> Optional[dict]:
+        """Publish pending changes as one delta now; returns it (None if nothing changed)."""
+        with self._lock:
+            if not self._pending:
+                return None
+            self.seq += 1
+            delta = {"seq": self.seq, "ts": time.time(), "full": False, "cameras": self._pending}
+            self._pending = {}
+            self._history.append(delta)
+            self.published += 1
+        if self.emit is not None:
+            try:
+                self.emit(delta)
+            except Exception as e:
+                self.emit_errors += 1
+                print(f"[PUBLISHER] Emit failed: {e}")
+        return delta
+
+    def since(self, seq: int) -> dict:
+        """
+        Everything a client at `seq` is missing, as one delta.
+
+        Returns:
+            Merged delta of all changes after seq ("base": seq, "seq": current),
+            or a full snapshot ("full": True) when seq is unknown or older
+            than the history
+        """
+        with self._lock:
+            current = self.seq
+            oldest = self._history[0]["seq"] if self._history else current + 1
+            if 0 <= seq <= current and seq >= oldest - 1:
+                cameras: Dict[str, dict] = {}
+                for delta in self._history:
+                    if delta["seq"] > seq:
+                        for camera_id, changes in delta["cameras"].items():
+                            cameras.setdefault(camera_id, {}).update(changes)
+                return {"seq": current, "base": seq, "ts": time.time(), "full": False, "cameras": cameras}
+        return self.snapshot()
+
+    def snapshot(self) -> dict:
+        """Full state of every camera at the current seq."""
+        from backend.services.camera_manager import camera_states
+
+        with self._lock:
+            current = self.seq
+        cameras = {cid: dict(state) for cid, state in camera_states.all().items()}
+        return {"seq": current, "ts": time.time(), "full": True, "cameras": cameras}
+
+    # ------------------------------------------------------------------ lifecycle
+
+    def start(self, emit: Optional[Callable[[dict], None]] = None):
+        """Flush every tick in a background thread (no-op if already running)."""
+        if emit is not None:
+            self.emit = emit
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="StatePublisher")
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+        self.flush()
+
+    def thread(self) -> Optional[threading.Thread]:
+        return self._thread
+
+    def _run(self):
+        while not self._stop.is_set():
+            # Sleep until something changes, then let the tick collect more changes
+            self._wake.wait()
+            if self._stop.wait(self.tick_s):
+                break
+            self._wake.clear()
+            self.flush()
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "seq": self.seq,
+                "published": self.published,
+                "pending_cameras": len(self._pending),
+                "history": len(self._history),
+                "emit_errors": self.emit_errors,
+                "tick_s": self.tick_s,
+            }
+
+
+# Process-wide publisher
+_publisher: Optional[StatePublisher] = None
+_publisher_lock = threading.Lock()
+
+
+def get_state_publisher() -> StatePublisher:
+    global _publisher
+    if _publisher is None:
+        with _publisher_lock:
+            if _publisher is None:
+                _publisher = StatePublisher(
+                    tick_s=STATE_PUBLISHER.get("tick_s", 0.2),
+                    history=STATE_PUBLISHER.get("history", 1024),
+                )
+    return _publisher
@@ -0,0 +1,117 @@
+"""
+Copy-on-Write Camera State Store
+
+The one authoritative place for per-camera state (event, confidence,
+video, people count, ...).
+
+- Writers (update/set) take a write lock, build a new immutable snapshot
+  (a new mapping with only the changed camera's state replaced) and
+  publish it with the next version number.
+- Readers call snapshot() and get the current one without any lock:
+  replacing the snapshot reference is a single atomic assignment, and a
+  snapshot never changes after it is published, so it can be iterated,
+  serialized and cached freely.
+- Subscribers are called with (camera_id, changed fields) under the write
+  lock, so they observe changes in version order (the state publisher
+  turns them into websocket deltas).
+- Serialized forms (e.g. the /api/live-status body) are cached per
+  snapshot with cached(), so each version is serialized at most once no
+  matter how many clients poll.
+
+`camera_manager.camera_states` is the process-wide store; it keeps the
+get/set/all calls of the SafeDict it replaces (states it returns are
+read-only; write through update/replace).
+"""
+
+import threading
+import time
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, Optional
+
+_EMPTY = MappingProxyType({})
+
+
+class StateSnapshot:
+    """Immutable view of every camera's state at one version."""
+
+    __slots__ = ("version", "states", "created_at", "_cache", "__weakref__")
+
+    def __init__(self, version: int, states: Mapping[str, Mapping[str, Any]]):
+        self.version = version
+        self.states = MappingProxyType(states)
+        self.created_at = time.time()
+        self._cache: Dict[Any, Any] = {}
+
+    def get(self, camera_id: str, default=None):
+        return self.states.get(camera_id, default)
+
+    def cached(self, key, build: Callable[["StateSnapshot"], Any]):
+        """build(self), computed once per snapshot and key (a race at worst builds twice)."""
+        try:
+            return self._cache[key]
+        except KeyError:
+            value = self._cache[key] = build(self)
+            return value
+
+
+class CameraStateStore:
+    """Versioned camera states: locked copy-on-write writes, lock-free snapshot reads."""
+
+    def __init__(self):
+        self._snapshot = StateSnapshot(0, {})
+        self._write_lock = threading.Lock()
+        self._subscribers = []
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+
+    def subscribe(self, callback: Callable[[str, dict], None]):
+        """Call callback(camera_id, changes) after every published change (keep it cheap)."""
+        self._subscribers.append(callback)
+
+    def snapshot(self) -> StateSnapshot:
+        """The current snapshot (no lock; never changes after it is returned)."""
+        return self._snapshot
+
+    def _publish(self, camera_id: str, state: Mapping[str, Any], changes: dict):
+        # Caller holds self._write_lock
+        current = self._snapshot
+        states = dict(current.states)
+        states[camera_id] = MappingProxyType(dict(state))
+        self._snapshot = StateSnapshot(current.version + 1, states)
+        for callback in self._subscribers:
+            try:
+                callback(camera_id, changes)
+            except Exception as e:
+                print(f"[STATE] Subscriber failed for {camera_id}: {e}")
+
+    def update(self, camera_id: str, fields: Mapping[str, Any]) -> dict:
+        """
+        Merge fields into a camera's state.
+
+        Returns:
+            The fields whose value actually changed (empty: nothing published)
+        """
+        with self._write_lock:
+            current = self._snapshot.states.get(camera_id, _EMPTY)
+            changes = {k: v for k, v in fields.items() if k not in current or current[k] != v}
+            if changes:
+                self._publish(camera_id, {**current, **changes}, changes)
+            return changes
+
+    def replace(self, camera_id: str, state: Mapping[str, Any]):
+        """Replace a camera's whole state."""
+        with self._write_lock:
+            self._publish(camera_id, state, dict(state))
+
+    # SafeDict-compatible interface (read-only states; copies from all())
+
+    def get(self, camera_id: str, default=None) -> Optional[Mapping[str, Any]]:
+        return self._snapshot.states.get(camera_id, default)
+
+    def set(self, camera_id: str, state: Mapping[str, Any]):
+        self.replace(camera_id, state)
+
+    def all(self) -> Dict[str, dict]:
+        return {cid: dict(state) for cid, state in self._snapshot.states.items()}
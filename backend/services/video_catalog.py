@@ -0,0 +1,339 @@
+"""
+Video Catalog
+
+In-memory index of every clip under Videos/<category>/, built once and
+refreshed incrementally, so clip rotation never globs the filesystem and
+detectors never reopen a file just to learn its frame count or fps.
+
+Per clip (keyed by its path relative to Videos/, e.g. "crash/a.mp4"):
+category, size, mtime, frame_count, fps, duration_s, width, height, codec,
+valid and error. Clips that cannot be opened or decoded are marked
+invalid once, at probe time, and are never handed out for rotation.
+
+- Extensions are matched case-insensitively (.mp4 and .MP4 alike).
+- refresh() rescans only category folders whose directory mtime changed
+  and probes only new or modified files (size + mtime), in parallel.
+  A clip rewritten in place does not change its folder's mtime, so the
+  already-indexed clips of unchanged folders are also stat'ed, every
+  stat_interval_s.
+- Probe results persist to a JSON index (VIDEO_CATALOG["index_path"]), so a
+  restart with tens of thousands of clips re-probes nothing that is unchanged.
+- A watcher thread (owned by the runtime) calls refresh() every
+  poll_interval_s; inotify is not used, directory mtimes make polling cheap
+  and the slower per-clip stat cycle catches in-place rewrites.
+
+Configured by backend.config.VIDEO_CATALOG.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from backend.config import VIDEO_CATALOG
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+VIDEO_DIR = PROJECT_ROOT / "Videos"
+
+INDEX_VERSION = 1
+
+
+def probe_clip(path: str) -> dict:
+    """
+    Read a clip's stream metadata and decode its first frame.
+
+    Returns:
+        dict with frame_count, fps, duration_s, width, height, codec, valid, error
+    """
+    import cv2
+
+    info = {"frame_count": 0, "fps": 0.0, "duration_s": 0.0, "width": 0, "height": 0,
+            "codec": "", "valid": False, "error": None}
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened():
+            info["error"] = "cannot open"
+            return info
+        info["frame_count"] = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        info["fps"] = float(cap.get(cv2.CAP_PROP_FPS) or 0.0)
+        info["width"] = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        info["height"] = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+        info["codec"] = "".join(chr((fourcc >> 8 * i) & 0xFF) for i in range(4)).strip("\x00 ")
+        if info["fps"] > 0:
+            info["duration_s"] = round(info["frame_count"] / info["fps"], 3)
+        if info["frame_count"] <= 0:
+            info["error"] = "no frames"
+        elif not cap.read()[0]:
+            info["error"] = "cannot decode first frame"
+        else:
+            info["valid"] = True
+    except Exception as e:
+        info["error"] = str(e)
+    finally:
+        cap.release()
+    return info
+
+
+class VideoCatalog:
+    """Clip metadata for Videos/<category>/*, refreshed on size/mtime changes."""
+
+    def __init__(self, root=VIDEO_DIR, extensions=None, index_path: Optional[str] = None,
+                 probe_workers: int = 4, stat_interval_s: float = 60.0):
+        """
+        Args:
+            root: Directory holding one sub-folder per category
+            extensions: File extensions to index (case-insensitive)
+            index_path: JSON file persisting probe results across restarts (None = memory only)
+            probe_workers: Threads probing new clips in parallel
+            stat_interval_s: Seconds between stats of indexed clips in unchanged folders
+                (0 = every refresh)
+        """
+        self.root = Path(root)
+        self.extensions = {e.lower() for e in (extensions or VIDEO_CATALOG.get("extensions", [".mp4"]))}
+        self.index_path = Path(index_path) if index_path else None
+        if self.index_path is not None and not self.index_path.is_absolute():
+            self.index_path = PROJECT_ROOT / self.index_path
+        self.probe_workers = max(1, probe_workers)
+        self.stat_interval_s = stat_interval_s
+        self._last_stat = float("-inf")
+        self._clips: Dict[str, dict] = {}
+        self._by_category: Dict[str, List[str]] = {}
+        self._dir_mtimes: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.last_refresh: Optional[float] = None
+        self.last_refresh_ms = 0.0
+        self.probed = 0
+        self._load_index()
+
+    # ------------------------------------------------------------------ queries
+
+    def get(self, rel_path: str) -> Optional[dict]:
+        """Metadata for a clip by its Videos/-relative path."""
+        with self._lock:
+            return self._clips.get(rel_path)
+
+    def info_for_path(self, path: str) -> Optional[dict]:
+        """Metadata for an absolute (or Videos/-relative) clip path, None if not catalogued."""
+        try:
+            rel_path = Path(path).resolve().relative_to(self.root.resolve()).as_posix()
+        except ValueError:
+            rel_path = str(path)
+        return self.get(rel_path)
+
+    def categories(self) -> List[str]:
+        with self._lock:
+            return sorted(self._by_category)
+
+    def clips(self, category: Optional[str] = None) -> List[str]:
+        """Relative paths of valid clips, sorted; all categories when category is None."""
+        with self._lock:
+            if category is not None:
+                return list(self._by_category.get(category, []))
+            return [rel for cat in sorted(self._by_category) for rel in self._by_category[cat]]
+
+    def choose(self, category: str) -> Optional[str]:
+        """A random valid clip of a category (relative path), None if it has none."""
+        with self._lock:
+            clips = self._by_category.get(category)
+            return random.choice(clips) if clips else None
+
+    def absolute_path(self, rel_path: str) -> str:
+        return str(self.root / rel_path)
+
+    def stats(self) -> dict:
+        with self._lock:
+            invalid = [rel for rel, c in self._clips.items() if not c["valid"]]
+            return {
+                "root": str(self.root),
+                "clips": len(self._clips),
+                "valid": len(self._clips) - len(invalid),
+                "invalid": sorted(invalid),
+                "categories": {cat: len(rels) for cat, rels in sorted(self._by_category.items())},
+                "probed": self.probed,
+                "last_refresh": self.last_refresh,
+                "last_refresh_ms": round(self.last_refresh_ms, 1),
+                "watching": self._watcher is not None and self._watcher.is_alive(),
+            }
+
+    # ------------------------------------------------------------------ refresh
+
+    def refresh(self, force: bool = False) -> dict:
+        """
+        Rescan changed category folders and probe new or modified clips.
+
+        Clips already indexed in unchanged folders are stat'ed when
+        stat_interval_s has passed since the last time, so a clip rewritten
+        in place is re-probed.
+
+        Args:
+            force: Rescan every folder even if its directory mtime is unchanged
+
+        Returns:
+            dict with added, updated, removed counts
+        """
+        with self._refresh_lock:
+            start = time.perf_counter()
+            changes = {"added": 0, "updated": 0, "removed": 0}
+            seen_categories = set()
+            to_probe = []
+            entries = {}
+            stat_clips = time.monotonic() - self._last_stat >= self.stat_interval_s
+            if stat_clips:
+                self._last_stat = time.monotonic()
+            try:
+                folders = [e for e in os.scandir(self.root) if e.is_dir()]
+            except FileNotFoundError:
+                folders = []
+            for folder in folders:
+                category = folder.name
+                seen_categories.add(category)
+                dir_mtime = folder.stat().st_mtime_ns
+                if not force and self._dir_mtimes.get(category) == dir_mtime:
+                    if stat_clips:
+                        to_probe.extend(self._modified_clips(category))
+                    continue
+                self._dir_mtimes[category] = dir_mtime
+                entries[category] = {}
+                for entry in os.scandir(folder.path):
+                    if not entry.is_file() or os.path.splitext(entry.name)[1].lower() not in self.extensions:
+                        continue
+                    st = entry.stat()
+                    rel_path = f"{category}/{entry.name}"
+                    entries[category][rel_path] = (st.st_size, st.st_mtime_ns)
+                    known = self._clips.get(rel_path)
+                    if known is None or (known["size"], known["mtime_ns"]) != (st.st_size, st.st_mtime_ns):
+                        to_probe.append((rel_path, category, st.st_size, st.st_mtime_ns, known is None))
+
+            probed = {}
+            if to_probe:
+                with ThreadPoolExecutor(max_workers=self.probe_workers, thread_name_prefix="VideoProbe") as pool:
+                    infos = pool.map(lambda item: probe_clip(str(self.root / item[0])), to_probe)
+                    for (rel_path, category, size, mtime_ns, new), info in zip(to_probe, infos):
+                        info.update(category=category, size=size, mtime_ns=mtime_ns)
+                        probed[rel_path] = info
+                        changes["added" if new else "updated"] += 1
+                        if not info["valid"]:
+                            print(f"[CATALOG] Skipping invalid clip {rel_path}: {info['error']}")
+
+            with self._lock:
+                self._clips.update(probed)
+                stale = [rel for rel, c in self._clips.items()
+                         if c["category"] not in seen_categories
+                         or (c["category"] in entries and rel not in entries[c["category"]])]
+                for rel_path in stale:
+                    del self._clips[rel_path]
+                for category in set(self._dir_mtimes) - seen_categories:
+                    del self._dir_mtimes[category]
+                changes["removed"] = len(stale)
+                by_category: Dict[str, List[str]] = {}
+                for rel_path, clip in self._clips.items():
+                    if clip["valid"]:
+                        by_category.setdefault(clip["category"], []).append(rel_path)
+                self._by_category = {cat: sorted(rels) for cat, rels in by_category.items()}
+                self.probed += len(probed)
+            self.last_refresh = time.time()
+            self.last_refresh_ms = (time.perf_counter() - start) * 1000
+            if any(changes.values()):
+                self._save_index()
+                print(f"[CATALOG] {len(self._clips)} clips ({changes['added']} added, {changes['updated']} "
+                      f"updated, {changes['removed']} removed) in {self.last_refresh_ms:.0f} ms")
+            return changes
+
+    def _modified_clips(self, category: str) -> list:
+        """Indexed clips of a category whose size or mtime changed, as refresh() probe items."""
+        with self._lock:
+            known = [(rel, c["size"], c["mtime_ns"]) for rel, c in self._clips.items() if c["category"] == category]
+        modified = []
+        for rel_path, size, mtime_ns in known:
+            try:
+                st = os.stat(self.root / rel_path)
+            except FileNotFoundError:
+                continue  # removal changes the folder mtime; the next rescan drops it
+            if (st.st_size, st.st_mtime_ns) != (size, mtime_ns):
+                modified.append((rel_path, category, st.st_size, st.st_mtime_ns, False))
+        return modified
+
+    # ------------------------------------------------------------------ watcher
+
+    def start_watcher(self, poll_interval_s: Optional[float] = None):
+        """Refresh in a background thread every poll_interval_s (no-op if already watching)."""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        interval = poll_interval_s or VIDEO_CATALOG.get("poll_interval_s", 10)
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch_loop, args=(interval,), daemon=True,
+                                         name="VideoCatalogWatcher")
+        self._watcher.start()
+
+    def stop_watcher(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout)
+        self._watcher = None
+
+    def watcher_thread(self) -> Optional[threading.Thread]:
+        return self._watcher
+
+    def _watch_loop(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"[CATALOG] Refresh failed: {e}")
+
+    # ------------------------------------------------------------------ persistence
+
+    def _load_index(self):
+        if self.index_path is None or not self.index_path.exists():
+            return
+        try:
+            data = json.loads(self.index_path.read_text())
+            if data.get("version") != INDEX_VERSION or data.get("root") != str(self.root):
+                return
+            # Probe results only: every folder is rescanned on the first refresh
+            self._clips = data.get("clips", {})
+        except Exception as e:
+            print(f"[CATALOG] Ignoring unreadable index {self.index_path}: {e}")
+
+    def _save_index(self):
+        if self.index_path is None:
+            return
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            with self._lock:
+                data = {"version": INDEX_VERSION, "root": str(self.root), "clips": dict(self._clips)}
+            tmp = self.index_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(data))
+            tmp.replace(self.index_path)
+        except Exception as e:
+            print(f"[CATALOG] Could not save index {self.index_path}: {e}")
+
+
+# Process-wide catalog, built on first use
+_catalog: Optional[VideoCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_video_catalog() -> VideoCatalog:
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                catalog = VideoCatalog(
+                    VIDEO_CATALOG.get("root") or VIDEO_DIR,
+                    extensions=VIDEO_CATALOG.get("extensions"),
+                    index_path=VIDEO_CATALOG.get("index_path"),
+                    probe_workers=VIDEO_CATALOG.get("probe_workers", 4),
+                    stat_interval_s=VIDEO_CATALOG.get("stat_interval_s", 60),
+                )
+                catalog.refresh()
+                _catalog = catalog
+    return _catalog
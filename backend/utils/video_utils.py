@@ -1,6 +1,11 @@
-# Video utility functions (stubs)
+# Video utility functions
 
-from typing import Iterable
+from typing import Iterable, Optional, Sequence, Tuple
+
+# Gaps shorter than this are skipped with grab() (decode, no copy/convert).
+# Longer gaps seek instead: FFmpeg jumps to the preceding keyframe and decodes
+# forward, which is cheaper than grabbing through several GOPs.
+SEEK_GAP_FRAMES = 48
 
 
 def extract_frames(video_path: str, max_frames: int = 32) -> Iterable[bytes]:
@@ -8,3 +13,76 @@ def extract_frames(video_path: str, max_frames: int = 32) -> Iterable[bytes]:
     Replace with OpenCV/ffmpeg extraction in the future.
     """
     return []
+
+
+def read_frames_at(cap, indices: Sequence[int], size: Optional[Tuple[int, int]] = None,
+                   rgb: bool = True, seek_gap: int = SEEK_GAP_FRAMES, interpolation: Optional[int] = None):
+    """Read the requested frame indices from an opened cv2.VideoCapture in one forward pass.
+
+    Frames between requested indices are skipped with grab(); only wanted
+    frames are retrieve()d. If the next wanted frame is more than `seek_gap`
+    frames ahead, the reader seeks instead of grabbing through the gap.
+
+    Args:
+        cap: Opened cv2.VideoCapture positioned at frame 0
+        indices: Frame indices to read (any order, duplicates allowed)
+        size: Optional (width, height); frames are resized as soon as they are
+            decoded so full-resolution copies are never kept
+        rgb: Convert BGR to RGB (default True)
+        seek_gap: Gap (in frames) above which to seek rather than grab
+        interpolation: cv2 interpolation flag for resizing (default INTER_LINEAR)
+
+    Returns:
+        numpy array of shape (N, H, W, 3), uint8, in the order of `indices`.
+        Indices past the end of the stream are dropped, so N can be smaller
+        than len(indices).
+    """
+    import cv2
+    import numpy as np
+
+    if interpolation is None:
+        interpolation = cv2.INTER_LINEAR
+
+    wanted = sorted({int(i) for i in indices})
+    slots = {}
+    out = None
+    raw = None  # retrieve() buffer, reused for every frame
+    pos = 0     # index of the next frame the decoder will return
+
+    for target in wanted:
+        gap = target - pos
+        if gap > seek_gap:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+            pos = target
+        elif gap > 0:
+            for _ in range(gap):
+                if not cap.grab():
+                    break
+                pos += 1
+            if pos != target:
+                break
+        if not cap.grab():
+            break
+        ok, raw = cap.retrieve(raw)
+        pos += 1
+        if not ok:
+            break
+
+        frame = raw
+        if size is not None and (frame.shape[1], frame.shape[0]) != tuple(size):
+            frame = cv2.resize(frame, tuple(size), interpolation=interpolation)
+        if out is None:
+            out = np.empty((len(wanted),) + frame.shape, dtype=np.uint8)
+        dst = out[len(slots)]
+        if rgb:
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=dst)
+        else:
+            dst[...] = frame
+        slots[target] = len(slots)
+
+    if out is None:
+        return np.empty((0, 0, 0, 3), dtype=np.uint8)
+    order = [slots[int(i)] for i in indices if int(i) in slots]
+    if order == list(range(len(out))):
+        return out
+    return out[order]